@@ -9,7 +9,8 @@ import base64
 from typing import Dict, Any, Tuple, Optional
 
 from models import db, CA, Certificate
-from services.acme import AcmeService, ari
+from services.acme import AcmeService, ari, validation_worker
+from services.acme.mixins.challenge import CHALLENGE_VALIDATORS
 from models.acme_models import (
     AcmeAccount,
     AcmeAuthorization,
@@ -21,6 +22,7 @@ import logging
 import re
 from utils.datetime_utils import utc_now
 from utils.acme_public_url import get_acme_public_origin, get_acme_public_host, get_acme_expected_urls
+from utils.trusted_proxy import client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -531,9 +533,8 @@ def directory():
     directory_data = service.get_directory()
     
     # Check if EAB is required
-    from models import SystemConfig
-    eab_config = SystemConfig.query.filter_by(key='acme_eab_required').first()
-    eab_required = (eab_config.value if eab_config else 'false').lower() == 'true'
+    from services import settings_cache
+    eab_required = settings_cache.get_bool('acme_eab_required')
     
     # Add metadata
     directory_data['meta'] = {
@@ -560,13 +561,13 @@ def terms_of_service():
     Returns HTML-rendered terms stored in SystemConfig.
     Format: plain text with paragraph breaks (double newline).
     """
-    from models import SystemConfig
+    from services import settings_cache
     
-    tos_cfg = SystemConfig.query.filter_by(key='acme.terms_of_service').first()
+    tos_raw = settings_cache.get('acme.terms_of_service')
     
-    if tos_cfg and tos_cfg.value:
+    if tos_raw:
         try:
-            data = json.loads(tos_cfg.value)
+            data = json.loads(tos_raw)
         except (json.JSONDecodeError, TypeError):
             data = {'title': '', 'body': ''}
     else:
@@ -712,9 +713,8 @@ def new_account():
         
         # Validate EAB if required (RFC 8555 §7.3.4)
         eab_data = payload.get('externalAccountBinding')
-        from models import SystemConfig
-        eab_config = SystemConfig.query.filter_by(key='acme_eab_required').first()
-        eab_required = (eab_config.value if eab_config else 'false').lower() == 'true'
+        from services import settings_cache
+        eab_required = settings_cache.get_bool('acme_eab_required')
         
         if eab_required and not eab_data:
             return acme_error('externalAccountRequired', 'External account binding required')
@@ -1451,7 +1451,10 @@ def authorization_info(authorization_id: str):
     if auth.order_id:
         order_url = f"{service.base_url}/acme/order/{auth.order_id}"
         response.headers.add('Link', f'<{order_url}>;rel="up"')
-    
+    # Validation runs in the background: tell pollers when to come back
+    if auth.status == 'pending' and any(c.status == 'processing' for c in auth.challenges):
+        response.headers['Retry-After'] = '3'
+
     return response
 
 
@@ -1493,14 +1496,10 @@ def respond_to_challenge(challenge_id: str):
         if not jws_data:
             return acme_error('malformed', 'Request body must be JWS')
         
-        # Verify JWS
-        # Challenge URLs use the challenge-specific URL, not a fixed pattern
-        # Try to find the challenge first to get its URL for verification
-        challenge = AcmeChallenge.query.filter(
-            AcmeChallenge.url.endswith(f'/{challenge_id}')
-        ).first()
-        if not challenge:
-            challenge = AcmeChallenge.query.filter_by(challenge_id=challenge_id).first()
+        # Challenge URLs end in the challenge_id (migration 084 aligned the
+        # older random URL segments), so this is a unique-index lookup; the
+        # stored URL is what the JWS must be signed for
+        challenge = AcmeChallenge.query.filter_by(challenge_id=challenge_id).first()
         
         if not challenge:
             return acme_error('malformed', 'Challenge not found', 404)
@@ -1545,33 +1544,27 @@ def respond_to_challenge(challenge_id: str):
         # is no longer pending (expired / deactivated / revoked).
         authz = challenge.authorization
         if challenge.status in ('valid', 'invalid'):
-            success = (challenge.status == 'valid')
-        elif authz and authz.status != 'pending':
-            return acme_error('malformed',
-                              f'Authorization is {authz.status}, not pending', 403)
-        # Trigger validation based on challenge type
-        elif challenge.type == "http-01":
-            success = service.validate_http01_challenge(challenge, account)
-        elif challenge.type == "dns-01":
-            success = service.validate_dns01_challenge(challenge, account)
-        elif challenge.type == "dns-persist-01":
-            success = service.validate_dns_persist01_challenge(challenge, account)
-        elif challenge.type == "tls-alpn-01":
-            success = service.validate_tls_alpn01_challenge(challenge, account)
-        else:
-            return acme_error('malformed', f'Challenge type {challenge.type} not supported')
-
-        # Audit only on terminal state transitions (avoids polling noise)
-        if challenge.status in ('valid', 'invalid'):
-            domain = challenge.authorization.identifier_value if challenge.authorization else '?'
             _audit_acme(
                 'acme.challenge.respond',
                 resource_type='acme_challenge',
                 resource_id=challenge.challenge_id,
-                details=f"type={challenge.type} domain={domain} status={challenge.status} account={account.account_id}",
+                details=f"type={challenge.type} domain={authz.identifier_value if authz else '?'} "
+                        f"status={challenge.status} account={account.account_id}",
                 success=(challenge.status == 'valid'),
             )
-        
+        elif authz and authz.status != 'pending':
+            return acme_error('malformed',
+                              f'Authorization is {authz.status}, not pending', 403)
+        elif challenge.type not in CHALLENGE_VALIDATORS:
+            return acme_error('malformed', f'Challenge type {challenge.type} not supported')
+        elif challenge.status == 'pending' or not validation_worker.is_pending(challenge.challenge_id):
+            # RFC 8555 §7.5.1: acknowledge with 'processing' and validate in
+            # the background; the client polls the authorization. A challenge
+            # left 'processing' by a restarted process is picked up again.
+            challenge.status = 'processing'
+            db.session.commit()
+            validation_worker.submit(challenge, account, service.base_url, client_ip())
+
         # Build response
         response_data = _challenge_wire_dict(challenge, service, account.account_id)
         
@@ -1580,6 +1573,8 @@ def respond_to_challenge(challenge_id: str):
         # Add Link header pointing to parent authorization (rel="up")
         authz_url = f"{service.base_url}/acme/authz/{challenge.authorization.authorization_id}"
         response.headers.add('Link', f'<{authz_url}>;rel="up"')
+        if challenge.status == 'processing':
+            response.headers['Retry-After'] = '3'
         
         return response
         
@@ -1733,18 +1728,10 @@ def revoke_cert():
         except Exception:
             return acme_error('malformed', 'Invalid certificate DER')
         
-        # Find certificate in database by serial number — DB stores serial in
-        # multiple formats (hex upper, hex lower, decimal) depending on the
-        # issuance path, so match against all three.
+        # Find certificate in database by its canonical serial
         from models import Certificate
-        serial_int = cert_obj.serial_number
-        serial_hex_lower = format(serial_int, 'x')
-        serial_hex_upper = serial_hex_lower.upper()
-        serial_dec = str(serial_int)
-        
-        cert = Certificate.query.filter(
-            Certificate.serial_number.in_([serial_hex_lower, serial_hex_upper, serial_dec])
-        ).first()
+        serial_hex_lower = format(cert_obj.serial_number, 'x')
+        cert = Certificate.find_by_serial(cert_obj.serial_number)
         
         if not cert:
             return acme_error('malformed', 'Certificate not found', 404)
@@ -2016,12 +2003,8 @@ def renewal_info(certid: str):
     if cert is None:
         return acme_error('malformed', 'Unknown certificate', 404)
 
-    from models import SystemConfig
-    days_cfg = SystemConfig.query.filter_by(key='auto_renewal_days').first()
-    try:
-        renew_before_days = int(days_cfg.value) if days_cfg and days_cfg.value else None
-    except (TypeError, ValueError):
-        renew_before_days = None
+    from services import settings_cache
+    renew_before_days = settings_cache.get_int('auto_renewal_days')
 
     data = ari.build_renewal_info(
         cert,
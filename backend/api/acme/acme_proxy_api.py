@@ -234,15 +234,9 @@ def _decode_b64url(value):
 
 def _resolve_proxy_certificate(cert_obj):
     """Resolve an exact proxy-stored certificate from its DER value."""
-    serial = cert_obj.serial_number
-    serial_hex = format(serial, 'x')
-    candidates = {
-        str(serial), serial_hex, serial_hex.upper(),
-        f'0x{serial_hex}', f'0X{serial_hex.upper()}',
-    }
     wanted_der = cert_obj.public_bytes(serialization.Encoding.DER)
     rows = Certificate.query.filter(
-        Certificate.serial_number.in_(candidates),
+        Certificate.serial_hex == format(cert_obj.serial_number, 'x'),
         Certificate.crt.isnot(None),
     ).all()
     for row in rows:
@@ -367,7 +361,7 @@ def new_nonce(slug=None):
 @_dual_route('/new-account', methods=['POST'], endpoint='proxy_new_account')
 def new_account(slug=None):
     """New account (RFC 8555 §7.3)"""
-    from models import SystemConfig
+    from services import settings_cache
 
     is_valid, payload, jwk, err = verify_proxy_jws()
     if not is_valid:
@@ -377,8 +371,7 @@ def new_account(slug=None):
         return proxy_error("malformed", "Missing JWK in protected header")
 
     eab_data = payload.get('externalAccountBinding') if isinstance(payload, dict) else None
-    eab_cfg = SystemConfig.query.filter_by(key='acme_eab_required').first()
-    eab_required = (eab_cfg.value if eab_cfg else 'false').lower() == 'true'
+    eab_required = settings_cache.get_bool('acme_eab_required')
 
     if eab_required and not eab_data:
         return proxy_error('externalAccountRequired',
@@ -774,7 +767,7 @@ def renewal_info(certid, slug=None):
     locally in the UCM database (proxy-issued certs are stored on import),
     so there is no upstream round-trip and no upstream host leak.
     """
-    from models import SystemConfig
+    from services import settings_cache
 
     parsed = ari.parse_certid(certid)
     if parsed is None:
@@ -785,11 +778,7 @@ def renewal_info(certid, slug=None):
     if cert is None:
         return proxy_error('malformed', 'Unknown certificate', 404)
 
-    days_cfg = SystemConfig.query.filter_by(key='auto_renewal_days').first()
-    try:
-        renew_before_days = int(days_cfg.value) if days_cfg and days_cfg.value else None
-    except (TypeError, ValueError):
-        renew_before_days = None
+    renew_before_days = settings_cache.get_int('auto_renewal_days')
 
     data = ari.build_renewal_info(cert, renew_before_days)
     resp = make_response(jsonify(data), 200)
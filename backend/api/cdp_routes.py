@@ -3,12 +3,13 @@ CDP (CRL Distribution Point) Routes
 Serves CRLs from database (RFC 5280 §4.2.1.13)
 Supports both refid-based (preferred) and legacy numeric ID-based URLs.
 """
-import threading
+from datetime import timezone
 
-from flask import Blueprint, Response, abort
+from flask import Blueprint, Response, abort, request
 import logging
 
 from models import db, CA
+from services.crl import download_cache
 from services.crl_service import CRLService
 from utils.datetime_utils import utc_now
 from utils.sanitize import crl_download_filename
@@ -31,18 +32,17 @@ cdp_bp = Blueprint('cdp', __name__)
 # generates; the rest wait briefly and re-read the now-cached row from
 # the DB. If generation is still in progress past the timeout, the late
 # requester returns 503 (try-again-later) rather than piling on.
-_CRL_GEN_LOCKS_GUARD = threading.Lock()
-_CRL_GEN_LOCKS = {}
 _CRL_GEN_TIMEOUT_SECONDS = 30
 
+# Upper bound on how long HTTP caches may keep a full CRL; it is further
+# capped by the time left until the CRL's nextUpdate.
+_CRL_MAX_AGE_SECONDS = 3600
 
-def _crl_lock_for(ca_id: int) -> threading.Lock:
-    with _CRL_GEN_LOCKS_GUARD:
-        lock = _CRL_GEN_LOCKS.get(ca_id)
-        if lock is None:
-            lock = threading.Lock()
-            _CRL_GEN_LOCKS[ca_id] = lock
-        return lock
+
+def _crl_lock_for(ca_id: int):
+    # The same per-CA lock every other CRL generation path takes
+    from services.crl.generation import ca_generation_lock
+    return ca_generation_lock(ca_id)
 
 
 def _resolve_ca(ca_ref):
@@ -63,6 +63,38 @@ def _resolve_ca(ca_ref):
         return None
 
 
+def _is_expired(next_update) -> bool:
+    # Compare in UTC; DB stores naive UTC.
+    if not next_update:
+        return False
+    now_naive = utc_now().replace(tzinfo=None)
+    nu_naive = next_update.replace(tzinfo=None) if getattr(next_update, 'tzinfo', None) else next_update
+    return nu_naive <= now_naive
+
+
+def _crl_response(der, filename, etag, this_update, max_age):
+    """CRL download honouring If-None-Match / If-Modified-Since (304)."""
+    response = Response(
+        der,
+        status=200,
+        mimetype='application/pkix-crl',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': f'public, max-age={max_age}, must-revalidate',
+        }
+    )
+    response.set_etag(etag)
+    response.last_modified = this_update.replace(tzinfo=timezone.utc)
+    return response.make_conditional(request)
+
+
+def _serve_cached(entry):
+    next_update = entry.next_update.replace(tzinfo=None)
+    remaining = int((next_update - utc_now().replace(tzinfo=None)).total_seconds())
+    max_age = max(0, min(_CRL_MAX_AGE_SECONDS, remaining))
+    return _crl_response(entry.der, entry.filename, entry.etag, entry.this_update, max_age)
+
+
 @cdp_bp.route('/<ca_ref>.crl')
 def get_crl(ca_ref):
     """
@@ -71,23 +103,33 @@ def get_crl(ca_ref):
     on-demand generation per CA to avoid a stampede on a public,
     unauthenticated endpoint.
     """
-    ca = _resolve_ca(ca_ref)
-    if not ca:
-        abort(404)
+    # Fast path: the resolved CA and its latest CRL DER are cached in
+    # process, so a download needs neither the CA lookup nor the blobs.
+    ca = None
+    ca_id = download_cache.ca_id_for_ref(ca_ref)
+    if ca_id is None:
+        ca = _resolve_ca(ca_ref)
+        if not ca:
+            abort(404)
+        ca_id = ca.id
+        download_cache.remember_ref(ca_ref, ca_id)
+
+    entry = download_cache.lookup(ca_id)
+    if entry and not _is_expired(entry.next_update):
+        return _serve_cached(entry)
+
+    if ca is None:
+        ca = db.session.get(CA, ca_id)
+        if not ca:
+            download_cache.invalidate(ca_id)
+            abort(404)
 
     # Get latest CRL from database
     crl_meta = CRLService.get_latest_crl(ca.id)
 
     # RFC 5280 §5.1.2.5 — relying parties may reject CRLs past nextUpdate.
     # If we hold the signing key, regenerate proactively.
-    needs_regen = False
-    if crl_meta and crl_meta.next_update:
-        nu = crl_meta.next_update
-        # Compare in UTC; DB stores naive UTC.
-        now_naive = utc_now().replace(tzinfo=None) if utc_now().tzinfo else utc_now()
-        nu_naive = nu.replace(tzinfo=None) if getattr(nu, 'tzinfo', None) else nu
-        if nu_naive <= now_naive:
-            needs_regen = True
+    needs_regen = bool(crl_meta and _is_expired(crl_meta.next_update))
 
     if not crl_meta or not crl_meta.crl_der or needs_regen:
         # No CRL in DB or it's expired — try to generate one if CA can sign.
@@ -110,11 +152,7 @@ def get_crl(ca_ref):
                 # Re-check the cache: the request that held the lock
                 # before us may have just populated it.
                 fresh = CRLService.get_latest_crl(ca.id)
-                fresh_expired = (
-                    fresh and fresh.next_update
-                    and (fresh.next_update.replace(tzinfo=None) if getattr(fresh.next_update, 'tzinfo', None) else fresh.next_update)
-                        <= (utc_now().replace(tzinfo=None) if utc_now().tzinfo else utc_now())
-                )
+                fresh_expired = fresh and _is_expired(fresh.next_update)
                 if not fresh or not fresh.crl_der or fresh_expired:
                     try:
                         crl_meta = CRLService.generate_crl(ca.id)
@@ -134,16 +172,13 @@ def get_crl(ca_ref):
         elif not crl_meta or not crl_meta.crl_der:
             abort(404)
 
-    return Response(
-        crl_meta.crl_der,
-        status=200,
-        mimetype='application/pkix-crl',
-        headers={
-            'Content-Disposition': f'attachment; filename="{crl_download_filename(ca)}"',
-            'Cache-Control': 'public, max-age=3600, must-revalidate',
-            'Last-Modified': crl_meta.this_update.strftime('%a, %d %b %Y %H:%M:%S GMT'),
-        }
-    )
+    if _is_expired(crl_meta.next_update):
+        # Stale fallback: serve it, but never let HTTP caches keep it
+        return _crl_response(
+            crl_meta.crl_der, crl_download_filename(ca),
+            f"{crl_meta.crl_number:x}-stale", crl_meta.this_update, 0,
+        )
+    return _serve_cached(download_cache.store(crl_meta, crl_download_filename(ca)))
 
 
 @cdp_bp.route('/<ca_ref>-delta.crl')
@@ -158,13 +193,10 @@ def get_delta_crl(ca_ref):
     if not delta_crl or not delta_crl.crl_der:
         abort(404)
     
-    return Response(
+    return _crl_response(
         delta_crl.crl_der,
-        status=200,
-        mimetype='application/pkix-crl',
-        headers={
-            'Content-Disposition': f'attachment; filename="{crl_download_filename(ca, delta=True)}"',
-            'Cache-Control': 'public, max-age=900, must-revalidate',
-            'Last-Modified': delta_crl.this_update.strftime('%a, %d %b %Y %H:%M:%S GMT'),
-        }
+        crl_download_filename(ca, delta=True),
+        f"{delta_crl.crl_number:x}-delta",
+        delta_crl.this_update,
+        900,
     )
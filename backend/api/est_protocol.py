@@ -4,6 +4,7 @@ Enrollment over Secure Transport for automated certificate enrollment.
 """
 from flask import Blueprint, request, Response
 from models import db, CA
+from services import settings_cache
 from services.ca_service import CAService
 from services.audit_service import AuditService
 from utils.trusted_proxy import client_ip
@@ -156,11 +157,7 @@ def _certs_only_response(cert, ca=None):
     certs = [cert]
     if ca is not None:
         try:
-            from models import SystemConfig
-            row = SystemConfig.query.filter_by(
-                key='est_response_include_chain'
-            ).first()
-            if row and str(row.value).lower() == 'true':
+            if settings_cache.get_bool('est_response_include_chain'):
                 from cryptography import x509 as _x509
                 from services.ca_service import CAService
                 for pem in CAService.get_certificate_chain(ca.refid) or []:
@@ -296,9 +293,7 @@ def _build_csrattrs_der():
 
 def _est_enabled():
     """Return True iff EST protocol is enabled in SystemConfig."""
-    from models import SystemConfig
-    row = SystemConfig.query.filter_by(key='est_enabled').first()
-    return bool(row and (row.value or '').lower() == 'true')
+    return settings_cache.get_bool('est_enabled')
 
 
 _EST_LABELS_KEY = 'est_labels'
@@ -313,13 +308,11 @@ def _est_label_map():
     explicitly lists here are reachable, so adding label support does not
     silently expose every CA in the system to EST enrollment.
     """
-    from models import SystemConfig
-
-    row = SystemConfig.query.filter_by(key=_EST_LABELS_KEY).first()
-    if not row or not row.value:
+    raw = settings_cache.get(_EST_LABELS_KEY)
+    if not raw:
         return {}
     try:
-        parsed = json.loads(row.value)
+        parsed = json.loads(raw)
     except (TypeError, ValueError) as e:
         logger.warning(f"Invalid {_EST_LABELS_KEY} configuration: {e}")
         return {}
@@ -341,18 +334,16 @@ def _get_est_ca(label=None):
     can never be silently enrolled against a different authority than the one
     it addressed. Without a label, the single configured EST CA.
     """
-    from models import SystemConfig
-
     if label is not None:
         ca_refid = _est_label_map().get(label)
         if not ca_refid:
             return None
         return CA.query.filter_by(refid=ca_refid).first()
 
-    ca_refid = SystemConfig.query.filter_by(key='est_ca_refid').first()
-    if not ca_refid:
+    ca_refid = settings_cache.get('est_ca_refid')
+    if ca_refid is None:
         return None
-    return CA.query.filter_by(refid=ca_refid.value).first()
+    return CA.query.filter_by(refid=ca_refid).first()
 
 
 def _resolve_est_ca(label=None):
@@ -455,21 +446,20 @@ def _authenticate_est_client():
     auth = request.authorization
     if auth:
         # Verify against EST credentials in config
-        from models import SystemConfig
-        est_username = SystemConfig.query.filter_by(key='est_username').first()
-        est_password = SystemConfig.query.filter_by(key='est_password').first()
+        est_username = settings_cache.get('est_username')
+        est_password = settings_cache.get('est_password')
         
-        if est_username and est_password and est_username.value and est_password.value:
+        if est_username and est_password:
             from werkzeug.security import check_password_hash
             # auth.username/password may be None for malformed headers
             if auth.username is None or auth.password is None:
                 return False, None
-            username_match = hmac.compare_digest(auth.username, est_username.value)
+            username_match = hmac.compare_digest(auth.username, est_username)
             # Support both hashed and legacy plaintext passwords
-            if est_password.value.startswith(('scrypt:', 'pbkdf2:')):
-                password_match = check_password_hash(est_password.value, auth.password)
+            if est_password.startswith(('scrypt:', 'pbkdf2:')):
+                password_match = check_password_hash(est_password, auth.password)
             else:
-                password_match = hmac.compare_digest(auth.password, est_password.value)
+                password_match = hmac.compare_digest(auth.password, est_password)
             if username_match and password_match:
                 return True, auth.username
     
@@ -636,9 +626,8 @@ def simple_enroll(label=None):
             return deny
 
         # Get validity from config
-        from models import SystemConfig
-        validity_days = SystemConfig.query.filter_by(key='est_validity_days').first()
-        days = int(validity_days.value) if validity_days else 365
+        validity_days = settings_cache.get('est_validity_days')
+        days = int(validity_days) if validity_days is not None else 365
         
         # Sign the CSR
         cert_pem, serial = CAService.sign_csr_from_crypto(
@@ -735,9 +724,8 @@ def simple_reenroll(label=None):
             logger.error(f"EST reenroll: failed to parse client cert: {e}")
             return Response('Invalid client certificate', status=400)
         
-        from models import SystemConfig
-        validity_days = SystemConfig.query.filter_by(key='est_validity_days').first()
-        days = int(validity_days.value) if validity_days else 365
+        validity_days = settings_cache.get('est_validity_days')
+        days = int(validity_days) if validity_days is not None else 365
         
         cert_pem, serial = CAService.sign_csr_from_crypto(
             ca=ca, csr=csr, validity_days=days, source='est',
@@ -930,9 +918,8 @@ def server_keygen(label=None):
         new_csr_builder = _copy_csr_extensions(new_csr_builder, csr)
         new_csr = new_csr_builder.sign(key, hashes.SHA256(), default_backend())
         
-        from models import SystemConfig
-        validity_days = SystemConfig.query.filter_by(key='est_validity_days').first()
-        days = int(validity_days.value) if validity_days else 365
+        validity_days = settings_cache.get('est_validity_days')
+        days = int(validity_days) if validity_days is not None else 365
         
         cert_pem, serial = CAService.sign_csr_from_crypto(
             ca=ca, csr=new_csr, validity_days=days, source='est',
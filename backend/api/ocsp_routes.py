@@ -8,12 +8,10 @@ from datetime import timedelta
 from urllib.parse import unquote
 
 from flask import Blueprint, request, Response
-from cryptography import x509
 from cryptography.x509 import ocsp
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives import serialization
 
-from models import CA
+from services.ocsp_issuer_index import issuer_index
 from services.ocsp_service import OCSPService
 from utils.datetime_utils import utc_now
 
@@ -181,76 +179,10 @@ def _find_ca_by_issuer_hash(issuer_name_hash, issuer_key_hash, hash_algorithm):
     """
     Find the CA that matches the OCSP request's issuer hashes (RFC 6960 §4.1.1).
     Compares both issuer name hash AND key hash to disambiguate re-keyed CAs
-    that share the same Subject DN.
+    that share the same Subject DN. Served from the precomputed issuer index.
     """
     try:
-        cas = CA.query.filter(CA.crt.isnot(None)).all()
-        for ca in cas:
-            try:
-                # ca.crt is base64-encoded PEM in DB
-                ca_pem = base64.b64decode(ca.crt)
-                ca_cert = x509.load_pem_x509_certificate(ca_pem)
-
-                # Pick hash matching the request
-                if isinstance(hash_algorithm, hashes.SHA224):
-                    algo = hashes.SHA224()
-                elif isinstance(hash_algorithm, hashes.SHA256):
-                    algo = hashes.SHA256()
-                elif isinstance(hash_algorithm, hashes.SHA384):
-                    algo = hashes.SHA384()
-                elif isinstance(hash_algorithm, hashes.SHA512):
-                    algo = hashes.SHA512()
-                elif isinstance(hash_algorithm, hashes.SHA1):
-                    algo = hashes.SHA1()
-                else:
-                    logger.debug(
-                        f"OCSP: unsupported issuer hash algorithm {hash_algorithm.name}"
-                    )
-                    return None
-
-                # Issuer name hash (over DER-encoded subject)
-                d = hashes.Hash(algo)
-                d.update(ca_cert.subject.public_bytes(serialization.Encoding.DER))
-                computed_name_hash = d.finalize()
-                if computed_name_hash != issuer_name_hash:
-                    continue
-
-                # Issuer key hash — RFC 6960 §4.1.1: SHA hash of the
-                # subjectPublicKey BIT STRING value (i.e. the contents of
-                # the BIT STRING, *not* the full SubjectPublicKeyInfo).
-                pubkey = ca_cert.public_key()
-                if isinstance(pubkey, rsa.RSAPublicKey):
-                    spki_value = pubkey.public_bytes(
-                        encoding=serialization.Encoding.DER,
-                        format=serialization.PublicFormat.PKCS1,
-                    )
-                elif isinstance(pubkey, ec.EllipticCurvePublicKey):
-                    # X9.62 uncompressed point — the BIT STRING contents
-                    # for an EC SubjectPublicKey.
-                    spki_value = pubkey.public_bytes(
-                        encoding=serialization.Encoding.X962,
-                        format=serialization.PublicFormat.UncompressedPoint,
-                    )
-                else:
-                    # Ed25519/Ed448: BIT STRING contents are the raw key
-                    spki_value = pubkey.public_bytes(
-                        encoding=serialization.Encoding.Raw,
-                        format=serialization.PublicFormat.Raw,
-                    )
-                d2 = hashes.Hash(algo)
-                d2.update(spki_value)
-                computed_key_hash = d2.finalize()
-
-                if issuer_key_hash != computed_key_hash:
-                    # Both name AND key hash MUST match (CertID identity).
-                    # Re-keyed CAs share the subject DN but differ in keys —
-                    # accepting on name alone would mis-route the response.
-                    continue
-                return ca
-            except Exception as e:
-                logger.debug(f"OCSP: failed to parse CA cert {ca.refid}: {e}")
-                continue
-        return None
+        return issuer_index.lookup(issuer_name_hash, issuer_key_hash, hash_algorithm)
     except Exception as e:
         logger.error(f"Error finding CA by issuer hash: {e}")
         return None
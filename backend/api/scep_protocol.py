@@ -11,7 +11,8 @@ from cryptography.hazmat.backends import default_backend
 from flask import Blueprint, make_response, request
 from sqlalchemy import and_
 
-from models import CA, SystemConfig, db
+from models import CA, db
+from services import settings_cache
 from services.scep.crypto_helpers import create_degenerate_pkcs7, create_signed_pkcs7
 from services.scep.scep_service import SCEPService
 from utils.trusted_proxy import client_ip
@@ -27,9 +28,8 @@ MAX_PKI_BODY_BYTES = 1 * 1024 * 1024
 
 
 def get_config(key, default=None):
-    """Get config value from database"""
-    config = SystemConfig.query.filter_by(key=key).first()
-    return config.value if config else default
+    """Get config value from the settings cache"""
+    return settings_cache.get(key, default)
 
 
 def _reject(reason):
@@ -255,9 +255,7 @@ def handle_get_ca_cert(profile_slug=None):
         # return the full chain as a degenerate PKCS#7 (RFC 8894 §4.2.1).
         chain_enabled = False
         try:
-            from models import SystemConfig
-            row = SystemConfig.query.filter_by(key='scep_getcacert_chain').first()
-            chain_enabled = bool(row and str(row.value).lower() == 'true')
+            chain_enabled = settings_cache.get_bool('scep_getcacert_chain')
         except Exception:
             pass
 
@@ -5,6 +5,7 @@ View and manage audit logs
 from flask import Blueprint, request, jsonify, g, Response
 from auth.unified import require_auth
 from services.audit_service import AuditService
+from utils.pagination import InvalidCursor
 from utils.response import success_response, error_response
 from datetime import datetime
 import logging
@@ -23,6 +24,8 @@ def get_logs():
     Query params:
         page: Page number (default: 1)
         per_page: Items per page (default: 50, max: 100)
+        cursor: Keyset mode - empty for the first page, then meta.next_cursor
+        total: With cursor, also return a count ('exact' or 'estimate')
         username: Filter by username
         action: Filter by action type
         category: Filter by category (auth, users, certificates, etc.)
@@ -62,10 +65,7 @@ def get_logs():
             except (ValueError, AttributeError):
                 pass
         
-        # Get logs
-        logs, total, total_pages = AuditService.get_logs(
-            page=page,
-            per_page=per_page,
+        filters = dict(
             username=username,
             action=action_list if action_list else None,
             category=category,
@@ -75,6 +75,29 @@ def get_logs():
             date_to=date_to,
             search=search
         )
+
+        # Opt-in keyset mode: ?cursor= for the first page, then meta.next_cursor
+        if 'cursor' in request.args:
+            try:
+                page_data = AuditService.get_logs_keyset(
+                    cursor=request.args.get('cursor'),
+                    per_page=per_page,
+                    total=request.args.get('total'),
+                    **filters
+                )
+            except InvalidCursor as e:
+                return error_response(str(e), 400)
+            return success_response(
+                data=[log.to_dict() for log in page_data['items']],
+                meta=page_data['meta']
+            )
+
+        # Get logs
+        logs, total, total_pages = AuditService.get_logs(
+            page=page,
+            per_page=per_page,
+            **filters
+        )
         
         return success_response(
             data=[log.to_dict() for log in logs],
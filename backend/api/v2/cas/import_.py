@@ -119,8 +119,15 @@ def import_ca():
                 success=True
             )
 
+            # The certificate (and possibly the key) was replaced — subscribers
+            # such as the OCSP issuer index must drop what they derived from it.
+            username = g.current_user.username if hasattr(g, 'current_user') else 'system'
+            ca_dict = existing_ca.to_dict()
+            from services.webhook_service import emit_ca_updated
+            emit_ca_updated(ca_dict, actor=username, changes={'certificate': 'replaced via import'})
+
             return success_response(
-                data=existing_ca.to_dict(),
+                data=ca_dict,
                 message=f'CA "{existing_ca.descr}" updated (already existed)'
             )
 
@@ -12,6 +12,7 @@ from auth.unified import require_auth
 from utils.response import success_response, error_response, no_content_response
 from utils.datetime_utils import utc_isoformat
 from services.audit_service import AuditService
+from services.ocsp_service import invalidate_signing_cache
 from models import CA, Certificate, SystemConfig, db
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
@@ -94,6 +95,7 @@ def set_ocsp_responder(ca_id):
             config = SystemConfig(key=f'ocsp_responder_cert_{ca_id}', value=str(cert_id))
             db.session.add(config)
         db.session.commit()
+        invalidate_signing_cache(ca_id)
 
         AuditService.log_action(
             'ocsp_responder_assigned',
@@ -122,6 +124,7 @@ def delete_ocsp_responder(ca_id):
         if config:
             db.session.delete(config)
             db.session.commit()
+            invalidate_signing_cache(ca_id)
 
             AuditService.log_action(
                 'ocsp_responder_removed',
@@ -5,9 +5,11 @@ from flask import request
 from sqlalchemy import or_, and_, case, func
 from sqlalchemy.orm import selectinload
 from auth.unified import require_auth
-from utils.response import success_response
+from utils.pagination import InvalidCursor, keyset_paginate
+from utils.response import success_response, error_response
 from models import Certificate, CA, db
-from services.compliance_service import calculate_compliance_score
+from services import search_index
+from services.compliance_service import stored_compliance
 from utils.datetime_utils import utc_now
 from . import bp
 
@@ -24,6 +26,7 @@ def list_certificates():
     status_list = request.args.getlist('status')  # supports multi-select: ?status=valid&status=expired
     ca_id_list = request.args.getlist('ca_id', type=int)  # supports multi-select: ?ca_id=1&ca_id=2
     source_list = request.args.getlist('source')  # supports multi-select: ?source=msca&source=acme
+    grade_list = request.args.getlist('compliance_grade')  # supports multi-select: ?compliance_grade=A&compliance_grade=B
     search = request.args.get('search', '').strip()
     template_modified = request.args.get('template_modified', '').lower() in ('1', 'true', 'yes')
     sort_by = request.args.get('sort_by', 'subject')  # Default sort by subject (common_name)
@@ -44,14 +47,20 @@ def list_certificates():
         'descr': Certificate.descr,
         'key_algo': Certificate.key_algo,
         'status': 'special',  # Handled separately with CASE
-        'compliance_grade': 'special_compliance'  # Handled separately
+        'compliance_grade': Certificate.compliance_score,
+        'compliance_score': Certificate.compliance_score,
     }
 
     query = Certificate.query.filter(Certificate.crt.isnot(None))
 
-    # Eager-load the linked template: to_dict() resolves template_name, and
-    # without this the list page would run one extra query per templated cert.
-    query = query.options(selectinload(Certificate.template))
+    # Eager-load the linked template and owner group: to_dict() resolves
+    # template_name/owner_group_name, and without this the list page would
+    # run extra queries per row. Key/signature/thumbprint facts are stored
+    # columns, so rendering a page parses no PEM.
+    query = query.options(
+        selectinload(Certificate.template),
+        selectinload(Certificate.owner_group),
+    )
 
     # Apply CA filter (Certificate stores caref=CA.refid, not ca_id)
     if ca_id_list:
@@ -106,17 +115,13 @@ def list_certificates():
             )
         query = query.filter(or_(*source_conditions))
 
-    # Apply search filter (escape LIKE wildcards)
+    # Apply compliance grade filter (persisted grade, supports multi-select)
+    if grade_list:
+        query = query.filter(Certificate.compliance_grade.in_(grade_list))
+
+    # Apply search filter (search index; also matches SAN values)
     if search:
-        safe_search = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
-        query = query.filter(
-            or_(
-                Certificate.subject.ilike(f'%{safe_search}%', escape='\\'),
-                Certificate.issuer.ilike(f'%{safe_search}%', escape='\\'),
-                Certificate.descr.ilike(f'%{safe_search}%', escape='\\'),
-                Certificate.serial_number.ilike(f'%{safe_search}%', escape='\\')
-            )
-        )
+        query = query.filter(search_index.search_filter('certificate', search))
 
     # Apply sorting BEFORE pagination (use whitelist)
     sort_column = ALLOWED_SORT_COLUMNS.get(sort_by, Certificate.subject)
@@ -128,68 +133,53 @@ def list_certificates():
         expiry_threshold = now + timedelta(days=30)
 
         # Status priority: 1=revoked, 2=expired, 3=expiring, 4=valid
-        status_order = case(
+        sort_column = case(
             (Certificate.revoked == True, 1),
             (Certificate.valid_to <= now, 2),
             (Certificate.valid_to <= expiry_threshold, 3),
             else_=4
         )
-
-        if sort_order == 'desc':
-            query = query.order_by(status_order.desc(), Certificate.subject.asc())
-        else:
-            query = query.order_by(status_order.asc(), Certificate.subject.asc())
-    elif sort_by == 'compliance_grade':
-        # Approximate compliance score in SQL for sorting:
-        # Key strength: RSA 4096/EC = best, RSA 2048 = good, RSA 1024 = bad
-        # Validity: revoked/expired = worst, expiring = medium, valid = best
-        # This gives a rough sort order consistent with the computed score
-        now = utc_now()
-        expiry_threshold = now + timedelta(days=30)
-
-        compliance_order = (
-            # Key strength component (0-30)
-            case(
-                (Certificate.key_algo.ilike('%4096%'), 30),
-                (Certificate.key_algo.ilike('%EC%'), 30),
-                (Certificate.key_algo.ilike('%P-256%'), 30),
-                (Certificate.key_algo.ilike('%P-384%'), 30),
-                (Certificate.key_algo.ilike('%Ed25519%'), 30),
-                (Certificate.key_algo.ilike('%2048%'), 20),
-                (Certificate.key_algo.ilike('%1024%'), 5),
-                else_=15
-            ) +
-            # Validity component (0-25)
-            case(
-                (Certificate.revoked == True, 0),
-                (Certificate.valid_to <= now, 0),
-                (Certificate.valid_to <= expiry_threshold, 15),
-                else_=25
+        tie_break = Certificate.subject.asc()
+    elif sort_by in ('compliance_grade', 'compliance_score'):
+        # Persisted exact score; ties broken by name
+        tie_break = _cn_sort.asc()
+    else:
+        tie_break = None
+
+    # Opt-in keyset mode (?cursor= for the first page, then meta.next_cursor):
+    # no COUNT(*) unless ?total=exact|estimate, no OFFSET scan, ties by id.
+    if 'cursor' in request.args:
+        try:
+            page_data = keyset_paginate(
+                query, sort_column, Certificate.id,
+                sort_key=f'{sort_by}:{sort_order}',
+                descending=sort_order == 'desc',
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                total=request.args.get('total'),
             )
+        except InvalidCursor as e:
+            return error_response(str(e), 400)
+        return success_response(
+            data=[_list_item(cert) for cert in page_data['items']],
+            meta=page_data['meta'],
         )
 
-        if sort_order == 'desc':
-            query = query.order_by(compliance_order.desc(), _cn_sort.asc())
-        else:
-            query = query.order_by(compliance_order.asc(), _cn_sort.asc())
-    elif sort_column not in ('special', 'special_compliance'):
-        if sort_order == 'desc':
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
+    order = sort_column.desc() if sort_order == 'desc' else sort_column.asc()
+    query = query.order_by(order, tie_break) if tie_break is not None else query.order_by(order)
 
     # Paginate
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    certs = []
-    for cert in pagination.items:
-        d = cert.to_dict()
-        compliance = calculate_compliance_score(d)
-        d['compliance_score'] = compliance['score']
-        d['compliance_grade'] = compliance['grade']
-        certs.append(d)
-
     return success_response(
-        data=certs,
+        data=[_list_item(cert) for cert in pagination.items],
         meta={'total': pagination.total, 'page': page, 'per_page': per_page}
     )
+
+
+def _list_item(cert):
+    d = cert.to_dict()
+    compliance = stored_compliance(cert)
+    d['compliance_score'] = compliance['score']
+    d['compliance_grade'] = compliance['grade']
+    return d
@@ -6,9 +6,10 @@ Certificates Stats Routes
 
 from datetime import timedelta
 from flask import request
+from sqlalchemy import func
 from auth.unified import require_auth
 from models import Certificate, db
-from services.compliance_service import calculate_compliance_score
+from services.compliance_service import stored_compliance
 from utils.response import success_response
 from utils.datetime_utils import utc_now
 from . import bp
@@ -73,23 +74,37 @@ def get_compliance_stats():
     total_score = 0
     count = 0
 
-    # Batch processing to avoid loading all certs into memory
-    BATCH_SIZE = 200
-    offset = 0
-    while True:
-        batch = Certificate.query.filter(Certificate.crt.isnot(None), Certificate.revoked == False).limit(BATCH_SIZE).offset(offset).all()
-        if not batch:
-            break
-        for cert in batch:
-            d = cert.to_dict()
-            result = calculate_compliance_score(d)
-            total_score += result['score']
-            grade = result['grade']
-            if grade in grades:
-                grades[grade] += 1
-            count += 1
-        offset += BATCH_SIZE
-        db.session.expire_all()  # Release memory between batches
+    # Aggregate the persisted scores in SQL
+    now = utc_now()
+    scored = (Certificate.compliance_score.isnot(None)) & (
+        Certificate.compliance_recheck_at.is_(None) | (Certificate.compliance_recheck_at > now)
+    )
+    rows = (
+        db.session.query(
+            Certificate.compliance_grade,
+            func.count(Certificate.id),
+            func.sum(Certificate.compliance_score),
+        )
+        .filter(Certificate.crt.isnot(None), Certificate.revoked == False, scored)
+        .group_by(Certificate.compliance_grade)
+        .all()
+    )
+    for grade, grade_count, grade_total in rows:
+        if grade in grades:
+            grades[grade] += grade_count
+        total_score += grade_total or 0
+        count += grade_count
+
+    # Rows the scheduled refresh has not (re)scored yet are scored on the fly
+    pending = Certificate.query.filter(
+        Certificate.crt.isnot(None), Certificate.revoked == False, ~scored
+    )
+    for cert in pending.yield_per(200):
+        result = stored_compliance(cert)
+        total_score += result['score']
+        if result['grade'] in grades:
+            grades[result['grade']] += 1
+        count += 1
 
     return success_response(data={
         'average_score': round(total_score / count) if count else 0,
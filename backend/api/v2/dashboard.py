@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 from auth.unified import require_auth
 from utils.response import success_response
 from models import db, CA, Certificate
-from models.ssh import SSHCertificateAuthority, SSHCertificate
+from services import inventory_stats
 from sqlalchemy import text
 from utils.datetime_utils import utc_now, utc_isoformat
 
@@ -25,23 +25,23 @@ bp = Blueprint('dashboard_v2', __name__)
 def get_public_stats():
     """Get public overview statistics (no auth required - for login page)"""
     try:
-        
-        # Query counts directly with SQL to avoid import issues
-        total_cas = db.session.execute(text("SELECT COUNT(*) FROM certificate_authorities")).scalar() or 0
-        total_certs = db.session.execute(text("SELECT COUNT(*) FROM certificates")).scalar() or 0
+        total_cas = inventory_stats.get_counts('cas')['total']
+        total_certs = inventory_stats.get_counts('certificates')['total']
         
         # Try ACME accounts table
         try:
-            acme_accounts = db.session.execute(text("SELECT COUNT(*) FROM acme_accounts")).scalar() or 0
+            acme_accounts = inventory_stats.get_counts('acme')['accounts']
         except Exception:
             logger.debug("ACME accounts table not available")
+            db.session.rollback()
             acme_accounts = 0
         
         # Active users
         try:
-            active_users = db.session.execute(text("SELECT COUNT(*) FROM users WHERE is_active = true")).scalar() or 0
+            active_users = inventory_stats.get_counts('users')['active']
         except Exception:
             logger.debug("Users table query failed")
+            db.session.rollback()
             active_users = 1
         
         return success_response(data={
@@ -65,64 +65,33 @@ def get_public_stats():
 def get_dashboard_stats():
     """Get dashboard statistics"""
     
-    # Count CAs
-    total_cas = CA.query.count()
-    
-    # Count certificates
-    total_certs = Certificate.query.count()
-    
-    # Count expired (past valid_to, not revoked)
-    now = utc_now()
-    expired = Certificate.query.filter(
-        Certificate.valid_to < now,
-        Certificate.revoked == False
-    ).count()
-    
-    # Count expiring soon (next 30 days, not yet expired)
-    expiry_threshold = now + timedelta(days=30)
-    expiring_soon = Certificate.query.filter(
-        Certificate.valid_to <= expiry_threshold,
-        Certificate.valid_to >= now,
-        Certificate.revoked == False
-    ).count()
-    
-    # Count revoked
-    revoked = Certificate.query.filter_by(revoked=True).count()
-    
-    # Count pending CSRs (certificates with CSR but no signed cert)
-    pending_csrs = 0
-    try:
-        pending_csrs = db.session.execute(
-            text("SELECT COUNT(*) FROM certificates WHERE csr IS NOT NULL AND csr != '' AND (crt IS NULL OR crt = '')")
-        ).scalar() or 0
-    except Exception:
-        logger.debug("Pending CSRs query failed")
+    # One aggregate query per entity, shared for a few seconds with the
+    # overview endpoint and the metrics exporter
+    total_cas = inventory_stats.get_counts('cas')['total']
+    certs = inventory_stats.get_counts('certificates')
+    total_certs = certs['total']
+    expired = certs['expired']
+    expiring_soon = certs['expiring_30d']
+    revoked = certs['revoked']
+    pending_csrs = certs['pending_csrs']
     
     # Count ACME renewals (last 30 days)
     acme_renewals = 0
     try:
-        thirty_days_ago = (utc_now() - timedelta(days=30)).isoformat()
-        acme_renewals = db.session.execute(
-            text("SELECT COUNT(*) FROM acme_orders WHERE created_at >= :date"),
-            {'date': thirty_days_ago}
-        ).scalar() or 0
+        acme_renewals = inventory_stats.get_counts('acme')['orders_30d']
     except Exception:
-        logger.debug("Pending CSRs query failed")
+        logger.debug("ACME renewals query failed")
+        db.session.rollback()
     
     valid = max(0, total_certs - expired - revoked)
 
     # SSH statistics
-    ssh_cas = 0
-    ssh_certs = 0
-    ssh_user_certs = 0
-    ssh_host_certs = 0
+    ssh = {'cas': 0, 'certificates': 0, 'user_certs': 0, 'host_certs': 0}
     try:
-        ssh_cas = SSHCertificateAuthority.query.count()
-        ssh_certs = SSHCertificate.query.count()
-        ssh_user_certs = SSHCertificate.query.filter_by(cert_type='user').count()
-        ssh_host_certs = SSHCertificate.query.filter_by(cert_type='host').count()
+        ssh = inventory_stats.get_counts('ssh')
     except Exception:
         logger.debug("SSH stats query failed - tables may not exist")
+        db.session.rollback()
 
     return success_response(data={
         'total_cas': total_cas,
@@ -133,10 +102,10 @@ def get_dashboard_stats():
         'revoked': revoked,
         'pending_csrs': pending_csrs,
         'acme_renewals': acme_renewals,
-        'ssh_cas': ssh_cas,
-        'ssh_certificates': ssh_certs,
-        'ssh_user_certs': ssh_user_certs,
-        'ssh_host_certs': ssh_host_certs
+        'ssh_cas': ssh['cas'],
+        'ssh_certificates': ssh['certificates'],
+        'ssh_user_certs': ssh['user_certs'],
+        'ssh_host_certs': ssh['host_certs']
     })
 
 
@@ -23,6 +23,7 @@ from models.auth_certificate import AuthCertificate
 from services.audit_service import AuditService
 from services.cert_service import CertificateService
 from services.certificate_parser import CertificateParser
+from services.mtls_auth_service import invalidate_cache as invalidate_mtls_cache
 from utils.file_naming import cert_key_path
 from utils import trusted_proxy
 from utils.key_codec import load_pem_bytes
@@ -127,6 +128,8 @@ def update_mtls_settings():
     ok, _err = safe_commit(logger, "Failed to update mTLS settings")
     if not ok:
         return _err
+    # The middleware caches the enabled flag and verified certificates
+    invalidate_mtls_cache()
 
     AuditService.log_action(
         action='mtls_settings_update',
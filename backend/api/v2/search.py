@@ -2,9 +2,8 @@
 Global Search API - Search across all entities
 """
 from flask import Blueprint, request, g
-from sqlalchemy import or_
 from auth.unified import require_auth, has_permission
-from models import Certificate, CA, User, CertificateTemplate
+from services import search_index
 from utils.response import success_response
 from utils.datetime_utils import utc_now
 
@@ -20,6 +19,9 @@ def global_search():
     Query params:
         q: search query (required, min 2 chars)
         limit: max results per category (default: 5)
+
+    Results in each category are ordered best match first. Certificates
+    also match on SAN DNS names, IP addresses and email addresses.
     
     Returns:
         {
@@ -40,30 +42,18 @@ def global_search():
             'templates': []
         })
     
-    # Escape LIKE wildcards in user input
-    safe_query = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
-    search_pattern = f'%{safe_query}%'
     results = {}
-    
-    # Search certificates
-    certs = Certificate.query.filter(
-        or_(
-            Certificate.subject.ilike(search_pattern),
-            Certificate.issuer.ilike(search_pattern),
-            Certificate.descr.ilike(search_pattern),
-            Certificate.serial_number.ilike(search_pattern)
-        )
-    ).limit(limit).all()
-    
-    from datetime import datetime
-    
+
+    # Ranked lookups against the search index (SAN values included)
+    certs = search_index.search('certificate', query, limit)
+
     def get_cert_status(cert):
         if cert.revoked:
             return 'revoked'
         if cert.valid_to and cert.valid_to < utc_now():
             return 'expired'
         return 'valid'
-    
+
     results['certificates'] = [{
         'id': c.id,
         'refid': c.refid,
@@ -74,13 +64,7 @@ def global_search():
     } for c in certs]
     
     # Search CAs
-    cas = CA.query.filter(
-        or_(
-            CA.descr.ilike(search_pattern),
-            CA.subject.ilike(search_pattern),
-            CA.issuer.ilike(search_pattern)
-        )
-    ).limit(limit).all()
+    cas = search_index.search('ca', query, limit)
     
     results['cas'] = [{
         'id': ca.id,
@@ -93,13 +77,7 @@ def global_search():
     
     # Search users — same scope as /api/v2/users (read:users)
     if has_permission('read:users', g.permissions):
-        users = User.query.filter(
-            or_(
-                User.username.ilike(search_pattern),
-                User.email.ilike(search_pattern),
-                User.full_name.ilike(search_pattern)
-            )
-        ).limit(limit).all()
+        users = search_index.search('user', query, limit)
 
         results['users'] = [{
             'id': u.id,
@@ -113,12 +91,7 @@ def global_search():
         results['users'] = []
     
     # Search templates
-    templates = CertificateTemplate.query.filter(
-        or_(
-            CertificateTemplate.name.ilike(search_pattern),
-            CertificateTemplate.description.ilike(search_pattern)
-        )
-    ).limit(limit).all()
+    templates = search_index.search('template', query, limit)
     
     results['templates'] = [{
         'id': t.id,
@@ -111,6 +111,10 @@ def get_general_settings():
         'key_recovery_dual_control_locked': _dual_control_env() is not None,
         # OCSP responder: signed response validity window (hours, 1..168)
         'ocsp_response_validity_hours': int(get_config('ocsp_response_validity_hours', '24') or 24),
+        # OCSP pre-signing: background re-sign once a response is this
+        # fraction of its validity old (0 < fraction <= 1)
+        'ocsp_presign_enabled': get_config('ocsp_presign_enabled', 'false') == 'true',
+        'ocsp_presign_refresh_fraction': float(get_config('ocsp_presign_refresh_fraction', '0.5') or 0.5),
     })
 
 
@@ -169,6 +173,9 @@ def update_general_settings():
         'metrics_token',
         # OCSP responder response validity window
         'ocsp_response_validity_hours',
+        # OCSP response pre-signing
+        'ocsp_presign_enabled',
+        'ocsp_presign_refresh_fraction',
     ]
 
     if 'ocsp_response_validity_hours' in data:
@@ -180,6 +187,15 @@ def update_general_settings():
             return error_response('ocsp_response_validity_hours must be between 1 and 168', 400)
         data['ocsp_response_validity_hours'] = str(hours)
 
+    if 'ocsp_presign_refresh_fraction' in data:
+        try:
+            fraction = float(data['ocsp_presign_refresh_fraction'])
+        except (TypeError, ValueError):
+            return error_response('ocsp_presign_refresh_fraction must be a number', 400)
+        if not 0 < fraction <= 1:
+            return error_response('ocsp_presign_refresh_fraction must be greater than 0 and at most 1', 400)
+        data['ocsp_presign_refresh_fraction'] = str(fraction)
+
     if 'base_url' in data:
         normalized, err = validate_admin_base_url(data.get('base_url') or '')
         if err:
@@ -67,7 +67,7 @@ def cleanup_audit_logs():
 def get_syslog_config():
     """Get remote syslog configuration"""
     try:
-        return success_response(data=syslog_forwarder.config)
+        return success_response(data=dict(syslog_forwarder.config, stats=syslog_forwarder.stats))
     except Exception as e:
         logger.error(f"Failed to get syslog config: {e}")
         return error_response("Failed to get syslog config", 500)
@@ -9,6 +9,7 @@ from utils.response import success_response, error_response
 from utils.trusted_proxy import client_ip
 from models import CA, Certificate, db
 from services.audit_service import AuditService
+from services.ocsp_service import invalidate_signing_cache
 from pathlib import Path
 import os
 import shutil
@@ -92,6 +93,7 @@ def enable_encryption():
 
         # Encrypt all existing keys
         encrypted, skipped, errors = do_encrypt(dry_run=False)
+        invalidate_signing_cache()
 
         # Read the freshly-written key so the caller can immediately download
         # a backup. This is the ONLY chance to surface it cleanly: if the
@@ -249,6 +251,7 @@ def disable_encryption():
 
         # Reload singleton
         key_encryption.reload()
+        invalidate_signing_cache()
 
         AuditService.log_action(
             action='encryption_disabled',
@@ -285,6 +288,7 @@ def encrypt_all_keys():
         encrypted, skipped, errors = do_encrypt(dry_run=dry_run)
 
         if not dry_run:
+            invalidate_signing_cache()
             AuditService.log_action(
                 action='system_encrypt',
                 resource_type='system',
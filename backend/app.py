@@ -498,7 +498,15 @@ def create_app(config_name=None):
                 app.logger.info("Initializing default data...")
                 init_database(app)
                 app.logger.info("✓ Default data initialized")
-                
+
+                # Search index is derived data: created (and filled) on first start
+                try:
+                    from services.search_index import ensure_search_index
+                    backend = ensure_search_index()
+                    app.logger.info(f"✓ Search index ready ({backend})")
+                except Exception as e:
+                    app.logger.warning(f"Search index unavailable, using table scans: {e}")
+
             except Exception as e:
                 app.logger.error(f"❌ FATAL: Database initialization failed: {e}")
                 raise
@@ -534,7 +542,8 @@ def create_app(config_name=None):
             name="crl_auto_regen",
             func=CRLSchedulerTask.execute,
             interval=3600,  # "interval" parameter, not "interval_seconds"
-            description="Auto-regenerate expiring CRLs"
+            description="Auto-regenerate expiring CRLs",
+            details=lambda: {'cas': CRLSchedulerTask.last_runs()}
         )
         
         # Register audit log cleanup task (runs daily)
@@ -630,7 +639,33 @@ def create_app(config_name=None):
             app.logger.info("Registered OCSP cache cleanup task (daily)")
         except ImportError:
             pass
-        
+
+        # Register OCSP pre-signing task (every 15 minutes; opt-in setting)
+        try:
+            from services.ocsp_presign import run_ocsp_presign
+            scheduler.register_task(
+                name="ocsp_presign",
+                func=run_ocsp_presign,
+                interval=900,  # Every 15 minutes (re-signs only what is due)
+                description="Pre-sign OCSP responses for OCSP-enabled CAs"
+            )
+            app.logger.info("Registered OCSP pre-signing task (every 15m)")
+        except ImportError:
+            pass
+
+        # Register compliance score refresh (hourly; only rows whose expiry band moved)
+        try:
+            from services.compliance_service import refresh_compliance_scores
+            scheduler.register_task(
+                name="compliance_refresh",
+                func=refresh_compliance_scores,
+                interval=3600,  # 1 hour
+                description="Re-score certificates whose compliance expiry band changed"
+            )
+            app.logger.info("Registered compliance refresh task (hourly)")
+        except ImportError:
+            pass
+
         # Register update check task (runs daily)
         try:
             from services.updates import scheduled_update_check
@@ -726,7 +761,8 @@ def create_app(config_name=None):
         except ImportError:
             pass
 
-        # Register webhook delivery task (drains the durable delivery queue with retry)
+        # Register webhook delivery task (drains the durable delivery queue with
+        # retry; services.webhook_dispatcher delivers new events in between)
         try:
             from services.webhook_service import WebhookService
             scheduler.register_task(
@@ -739,6 +775,47 @@ def create_app(config_name=None):
         except ImportError:
             pass
 
+        # Register ACME nonce cleanup task (expired nonces of the configured
+        # backend; nothing to do for Redis and stateless HMAC nonces)
+        try:
+            from services.acme import nonce_store
+            scheduler.register_task(
+                name="acme_nonce_cleanup",
+                func=nonce_store.cleanup,
+                interval=3600,  # Hourly
+                description="Remove expired ACME replay nonces"
+            )
+            app.logger.info("Registered ACME nonce cleanup task (hourly)")
+        except ImportError:
+            pass
+
+        # Register ACME orphaned validation task: challenges left 'processing'
+        # by a restarted process are queued again (first run shortly after startup)
+        try:
+            from services.acme import validation_worker
+            scheduler.register_task(
+                name="acme_validation_resubmit",
+                func=validation_worker.resubmit_orphans,
+                interval=300,  # Every 5 minutes
+                description="Re-queue ACME challenge validations lost on restart"
+            )
+            app.logger.info("Registered ACME validation resubmit task (every 5m)")
+        except ImportError:
+            pass
+
+        # Register ACME history pruning task (runs daily)
+        try:
+            from services.acme.history import prune_history
+            scheduler.register_task(
+                name="acme_history_prune",
+                func=prune_history,
+                interval=86400,  # 24 hours
+                description="Delete long-expired ACME authorizations, challenges and failed orders"
+            )
+            app.logger.info("Registered ACME history pruning task (daily)")
+        except ImportError:
+            pass
+
         # Wire email + WebSocket notifications onto the event bus so lifecycle
         # code emits one event instead of calling three notification systems.
         try:
@@ -769,6 +846,14 @@ def create_app(config_name=None):
         if not app.config.get('TESTING'):
             scheduler.start(app=app)
             app.logger.info("Scheduler service started with all tasks")
+            # Deliver webhooks as soon as they are queued; the scheduler task
+            # above stays as the safety net
+            from services import webhook_dispatcher
+            webhook_dispatcher.start(app)
+            # Announce cache invalidations to the other workers; each worker
+            # starts its own listener in gunicorn's post_worker_init
+            from services.events import relay
+            relay.start(listen=False)
         else:
             app.logger.info("Scheduler tasks registered (background thread disabled under TESTING)")
         
@@ -141,8 +141,14 @@ def get_effective_permissions(user) -> list:
     """Role permissions unioned with those granted by the user's groups.
 
     This is what authorisation and the login response must both use, so the UI
-    gates on exactly what the API enforces.
+    gates on exactly what the API enforces. Cached per (user, role) until a
+    user, group or membership change (see auth.resolver_cache).
     """
+    from auth.resolver_cache import get_permissions
+    return get_permissions(user, _resolve_effective_permissions)
+
+
+def _resolve_effective_permissions(user) -> list:
     role_perms = list(get_role_permissions(getattr(user, 'role', None)))
     if '*' in role_perms:
         return role_perms  # administrator: nothing to add
@@ -0,0 +1,289 @@
+"""Process-level cache for API-key and effective-permission resolution.
+
+Every API-key request used to look the key row up, commit a ``last_used_at``
+update, and re-derive the owner's effective permissions through a fresh
+group join. On SQLite those commits serialise every read-only API call
+behind one writer.
+
+Here:
+  * Active API keys are cached by key hash and effective permissions by
+    (user id, role) for up to AUTH_CACHE_TTL_SEC. The owner row is still
+    read on every request, so a deactivated user or a role change takes
+    effect immediately.
+  * Inserts, updates and deletes of API keys, users, groups and group
+    memberships publish an ``auth.*`` event on the bus, at flush and again
+    when the transaction ends. The cache subscribes to those events and
+    drops the affected entries. Changes made by another worker process are
+    picked up once the TTL lapses.
+  * ``last_used_at`` of API keys (and of mTLS auth certificates) is
+    coalesced in memory and written with ONE bulk UPDATE per table every
+    API_KEY_LAST_USED_FLUSH_SEC by a background thread. Under TESTING
+    it is written through on every use, as before.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from utils.datetime_utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SEC = float(os.getenv('AUTH_CACHE_TTL_SEC', '30'))
+CACHE_MAX_ENTRIES = 10000
+LAST_USED_FLUSH_SEC = float(os.getenv('API_KEY_LAST_USED_FLUSH_SEC', '5'))
+
+# Bus events published when an auth-relevant row changes
+API_KEY_CHANGED = 'auth.api_key.changed'
+USER_CHANGED = 'auth.user.changed'
+GROUP_CHANGED = 'auth.group.changed'
+
+
+@dataclass(frozen=True)
+class CachedApiKey:
+    """The columns of an active API key needed to authenticate with it."""
+    id: int
+    user_id: int
+    name: str
+    permissions: Tuple[str, ...]
+    expires_at: Optional[datetime]
+
+
+_lock = threading.Lock()
+_keys: Dict[str, Tuple[float, CachedApiKey]] = {}  # key_hash -> (stored_at, key)
+_permissions: Dict[Tuple[int, str], Tuple[float, tuple]] = {}  # (user_id, role) -> (stored_at, perms)
+_generation = 0  # bumped on every invalidation
+
+_last_used: Dict[tuple, datetime] = {}  # (table, row id) -> latest use
+_flusher: Optional[threading.Thread] = None
+
+
+def _fresh(entry, now) -> bool:
+    return entry is not None and now - entry[0] <= CACHE_TTL_SEC
+
+
+def _store(cache: dict, key, value, generation: int) -> None:
+    with _lock:
+        # An invalidation that landed while we were loading makes this stale
+        if generation != _generation:
+            return
+        if len(cache) >= CACHE_MAX_ENTRIES:
+            cache.clear()
+        cache[key] = (time.monotonic(), value)
+
+
+def get_api_key(key_hash: str) -> Optional[CachedApiKey]:
+    """Return the active API key with *key_hash*, or None.
+
+    Unknown and inactive keys are not cached, so revoking a key never has to
+    wait for a negative entry to expire.
+    """
+    _register_listeners()
+    now = time.monotonic()
+    with _lock:
+        entry = _keys.get(key_hash)
+        if _fresh(entry, now):
+            return entry[1]
+        generation = _generation
+
+    from models.api_key import APIKey
+    row = APIKey.query.filter_by(key_hash=key_hash, is_active=True).first()
+    if row is None:
+        return None
+    try:
+        permissions = tuple(json.loads(row.permissions))
+    except Exception:
+        permissions = ()
+    key = CachedApiKey(row.id, row.user_id, row.name, permissions, row.expires_at)
+    _store(_keys, key_hash, key, generation)
+    return key
+
+
+def get_permissions(user, loader: Callable[[object], list]) -> list:
+    """Return ``loader(user)``, cached per (user id, role)."""
+    user_id = getattr(user, 'id', None)
+    if user_id is None:
+        return loader(user)
+    _register_listeners()
+    cache_key = (user_id, getattr(user, 'role', None))
+    now = time.monotonic()
+    with _lock:
+        entry = _permissions.get(cache_key)
+        if _fresh(entry, now):
+            return list(entry[1])
+        generation = _generation
+
+    permissions = loader(user)
+    _store(_permissions, cache_key, tuple(permissions), generation)
+    return list(permissions)
+
+
+def invalidate_api_key(key_hash: str = None) -> None:
+    """Drop the cached key with *key_hash*, or every cached key."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if key_hash is None:
+            _keys.clear()
+        else:
+            _keys.pop(key_hash, None)
+
+
+def invalidate_user(user_id: int = None) -> None:
+    """Drop the permissions and API keys cached for *user_id*, or for everyone."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if user_id is None:
+            _permissions.clear()
+            _keys.clear()
+            return
+        for cache_key in [k for k in _permissions if k[0] == user_id]:
+            del _permissions[cache_key]
+        for key_hash in [h for h, (_, key) in _keys.items() if key.user_id == user_id]:
+            del _keys[key_hash]
+
+
+def _on_auth_event(event_type, payload, ca_refid, meta):
+    if event_type == API_KEY_CHANGED:
+        invalidate_api_key(payload.get('key_hash'))
+    elif event_type == USER_CHANGED:
+        invalidate_user(payload.get('user_id'))
+    elif event_type == GROUP_CHANGED:
+        # A group's grants reach every member; membership changes one user
+        invalidate_user(payload.get('user_id'))
+
+
+# ---------------------------------------------------------------------------
+# last_used_at batching
+# ---------------------------------------------------------------------------
+
+def _inline() -> bool:
+    return not has_app_context() or current_app.config.get('TESTING')
+
+
+def record_use(model, row_id: int) -> None:
+    """Note that the *model* row *row_id* (an API key or an mTLS
+    certificate) authenticated a request just now."""
+    with _lock:
+        _last_used[(model.__table__, row_id)] = utc_now()
+    if _inline():
+        flush_last_used()
+    else:
+        _ensure_flusher(current_app._get_current_object())
+
+
+def flush_last_used() -> int:
+    """Write pending ``last_used_at`` values, one UPDATE per table; returns rows written."""
+    global _last_used
+    with _lock:
+        pending, _last_used = _last_used, {}
+    if not pending:
+        return 0
+
+    from sqlalchemy import case, update
+    from models import db
+    from utils.db_transaction import commit_or_rollback
+
+    by_table = {}
+    for (table, row_id), used in pending.items():
+        by_table.setdefault(table, {})[row_id] = used
+    try:
+        for table, values in by_table.items():
+            db.session.execute(
+                update(table)
+                .where(table.c.id.in_(list(values)))
+                .values(last_used_at=case(values, value=table.c.id))
+            )
+        written = commit_or_rollback(logger, "Failed to update last_used_at")
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Failed to update last_used_at: {e}")
+        written = False
+    if written:
+        return len(pending)
+    # Non-critical telemetry: keep the newest value for the next flush
+    with _lock:
+        for key, used in pending.items():
+            if _last_used.get(key, used) <= used:
+                _last_used[key] = used
+    return 0
+
+
+def _flush_in(app) -> None:
+    try:
+        with app.app_context():
+            flush_last_used()
+    except Exception as e:  # pragma: no cover - defensive
+        logger.error(f"last_used_at flush failed: {e}")
+
+
+def _flush_loop(app) -> None:
+    while True:
+        time.sleep(LAST_USED_FLUSH_SEC)
+        _flush_in(app)
+
+
+def _ensure_flusher(app) -> None:
+    global _flusher
+    with _lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_loop, args=(app,),
+                                    name='AuthLastUsed', daemon=True)
+        _flusher.start()
+    atexit.register(_flush_in, app)
+
+
+def reset() -> None:
+    """Forget every cached entry and pending ``last_used_at`` write (tests)."""
+    invalidate_user()
+    with _lock:
+        _last_used.clear()
+
+
+# ---------------------------------------------------------------------------
+# Change capture
+# ---------------------------------------------------------------------------
+
+def _row_listener(event_type: str, payload: Callable[[object], dict]):
+    def listener(mapper, connection, target):
+        from sqlalchemy.orm import object_session
+        from services.events.orm import emit_row_change
+        emit_row_change(object_session(target), event_type, payload(target))
+    return listener
+
+
+def _register_listeners():
+    # Lazily, on first use: nothing is cached before then, so nothing can go stale
+    if getattr(_register_listeners, '_done', False):
+        return
+    from sqlalchemy import event
+    from models import User
+    from models.api_key import APIKey
+    from models.group import Group, GroupMember
+    from services.events import event_bus
+
+    watched = (
+        (APIKey, API_KEY_CHANGED, lambda key: {'key_hash': key.key_hash}),
+        (User, USER_CHANGED, lambda user: {'user_id': user.id}),
+        (Group, GROUP_CHANGED, lambda group: {'group_id': group.id}),
+        (GroupMember, GROUP_CHANGED, lambda member: {'user_id': member.user_id}),
+    )
+    with _lock:
+        if getattr(_register_listeners, '_done', False):
+            return
+        for model, event_type, payload in watched:
+            listener = _row_listener(event_type, payload)
+            for hook in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, hook, listener)
+        for event_type in (API_KEY_CHANGED, USER_CHANGED, GROUP_CHANGED):
+            event_bus.subscribe(event_type, _on_auth_event, remote=True)
+        _register_listeners._done = True
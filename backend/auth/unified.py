@@ -14,6 +14,7 @@ from functools import wraps
 from flask import request, jsonify, g, session, current_app
 from utils.datetime_utils import utc_now, utc_isoformat
 from utils.db_transaction import commit_or_rollback
+from auth import resolver_cache
 
 # Import models (will be created)
 try:
@@ -77,11 +78,8 @@ class AuthManager:
         # Hash the key
         key_hash = hashlib.sha256(key.encode()).hexdigest()
         
-        # Find API key in database
-        api_key = APIKey.query.filter_by(
-            key_hash=key_hash,
-            is_active=True
-        ).first()
+        # Find the active API key (cached per process, see auth.resolver_cache)
+        api_key = resolver_cache.get_api_key(key_hash)
         
         if not api_key:
             return None
@@ -93,21 +91,14 @@ class AuthManager:
         # Reject if the linked user is missing or deactivated. Without this,
         # API keys belonging to a disabled user remain valid until the key
         # itself is revoked.
-        linked_user = api_key.user
+        linked_user = db.session.get(User, api_key.user_id)
         if not linked_user or not getattr(linked_user, 'active', False):
             return None
         
-        # Update last_used timestamp
-        api_key.last_used_at = utc_now()
-        if not commit_or_rollback(logger, "Failed to update api_key.last_used_at"):
-            # Don't fail the auth — last_used is non-critical telemetry
-            pass
+        # Update last_used timestamp (coalesced, written in batches)
+        resolver_cache.record_use(APIKey, api_key.id)
         
-        # Parse permissions from JSON
-        try:
-            permissions = json.loads(api_key.permissions)
-        except Exception:
-            permissions = []
+        permissions = list(api_key.permissions)
 
         # Re-bind the key's scopes to the owner's CURRENT effective permissions.
         # The stored list is a snapshot from mint time, so without this a key
@@ -148,7 +139,7 @@ class AuthManager:
 
         return {
             'user_id': api_key.user_id,
-            'user': api_key.user,
+            'user': linked_user,
             'auth_method': 'api_key',
             'permissions': permissions,
             'api_key_id': api_key.id,
@@ -229,10 +220,10 @@ class AuthManager:
     def _get_session_timeout():
         """Get inactivity timeout in seconds from DB config (default 8h = 28800s)"""
         try:
-            from models import SystemConfig
-            config = SystemConfig.query.filter_by(key='session_timeout').first()
-            if config and config.value:
-                return int(config.value)
+            from services import settings_cache
+            value = settings_cache.get('session_timeout')
+            if value:
+                return int(value)
         except Exception as e:
             logger.warning(f"Failed to read session_timeout from SystemConfig, using 8h default: {e}")
         return 28800  # 8 hours default
@@ -241,10 +232,10 @@ class AuthManager:
     def _get_session_max_lifetime():
         """Get absolute max session lifetime in seconds from DB config (default 24h = 86400s)"""
         try:
-            from models import SystemConfig
-            config = SystemConfig.query.filter_by(key='session_max_lifetime').first()
-            if config and config.value:
-                return int(config.value)
+            from services import settings_cache
+            value = settings_cache.get('session_max_lifetime')
+            if value:
+                return int(value)
         except Exception as e:
             logger.warning(f"Failed to read session_max_lifetime from SystemConfig, using 24h default: {e}")
         return 86400  # 24 hours default
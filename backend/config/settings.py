@@ -191,6 +191,16 @@ class Config:
         SESSION_TYPE = 'filesystem'
         SESSION_FILE_DIR = DATA_DIR / 'sessions'
     
+    # Server workers (gunicorn_config.py reads the same variable). With more
+    # than one, Socket.IO broadcasts go through Redis to reach the clients of
+    # every worker, and only the websocket transport is offered: long-polling
+    # requests would need sticky sessions to land on the worker that owns them.
+    UCM_WORKERS = max(1, int(os.getenv("UCM_WORKERS", "1")))
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE") or (
+        _redis_url if UCM_WORKERS > 1 else None)
+    SOCKETIO_REQUIRE_MESSAGE_QUEUE = UCM_WORKERS > 1
+    SOCKETIO_TRANSPORTS = ["websocket"] if UCM_WORKERS > 1 else None
+    
     SESSION_COOKIE_SECURE = True  # HTTPS only
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
@@ -19,9 +19,30 @@ is_docker = os.path.exists('/.dockerenv') or os.getenv('UCM_DOCKER') == '1'
 bind = f"0.0.0.0:{os.getenv('HTTPS_PORT', '8443')}"
 backlog = 2048
 
-# Worker processes — single worker required for WebSocket broadcast across tabs
-# gevent handles concurrency via greenlets (1000+ concurrent connections)
-workers = 1
+# Worker processes — gevent handles concurrency via greenlets (1000+
+# concurrent connections per worker). UCM_WORKERS > 1 spreads CPU-bound work
+# (signing, TLS) over cores and needs REDIS_URL: WebSocket broadcasts, cache
+# invalidations, ACME nonces, rate limits and the scheduler lease are then
+# shared by every worker through Redis (see config/settings.py and
+# utils/redis_backend.py). SOCKETIO_MESSAGE_QUEUE alone only covers the
+# broadcasts, so without REDIS_URL we stay on one worker. With several
+# workers PostgreSQL is recommended over SQLite.
+def _worker_count():
+    try:
+        requested = max(1, int(os.getenv('UCM_WORKERS', '1')))
+    except ValueError:
+        print("UCM_WORKERS is not a number, using 1 worker", file=sys.stderr)
+        requested = 1
+    if requested > 1 and not os.getenv('REDIS_URL'):
+        print(f"UCM_WORKERS={requested} needs REDIS_URL to share state between "
+              "workers, using 1 worker", file=sys.stderr)
+        requested = 1
+    # The app reads the effective count to configure Socket.IO
+    os.environ['UCM_WORKERS'] = str(requested)
+    return requested
+
+
+workers = _worker_count()
 worker_class = 'workers.MTLSGeventWebSocketWorker'
 worker_connections = 1000
 timeout = 120
@@ -290,6 +311,7 @@ def post_worker_init(worker):
     """Post-worker initialization:
     1. Suppress noisy SSL/connection tracebacks from gevent
     2. Start HTTP protocol server for CDP/OCSP (if configured)
+    3. Listen for cache invalidations from the other workers (REDIS_URL)
     """
     import ssl
     import gevent
@@ -316,3 +338,10 @@ def post_worker_init(worker):
         logging.getLogger('ucm.protocol').warning(
             "Could not initialize HTTP protocol server: %s", e
         )
+
+    # Each worker replays the others' cache events; the master only publishes
+    try:
+        from services.events import relay
+        relay.start()
+    except Exception as e:
+        worker.log.warning("Could not start the cache event relay: %s", e)
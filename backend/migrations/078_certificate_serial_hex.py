@@ -0,0 +1,136 @@
+"""Migration 078: canonical serial column for certificates.
+
+``certificates.serial_number`` holds a historical mix of decimal and hex
+spellings, so revocation lookups (OCSP, ACME revoke, ARI) had to try several
+string forms. This adds ``serial_hex`` (lowercase hex, no padding, the same
+form as the OCSP cache keys) with a composite ``(serial_hex, caref)`` index,
+and backfills it from the stored certificate, falling back to
+``serial_number`` for rows without a parseable ``crt``.
+
+Idempotent: only rows with a NULL ``serial_hex`` are backfilled.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import base64
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+BATCH_SIZE = 500
+_SELECT_BATCH = (
+    'SELECT id, crt, serial_number FROM certificates '
+    'WHERE serial_hex IS NULL AND id > {after} ORDER BY id LIMIT {limit}'
+)
+
+
+def _serial_hex(crt, serial_number):
+    from utils.serial_format import serial_to_hex
+
+    if crt:
+        try:
+            from cryptography import x509
+            cert = x509.load_pem_x509_certificate(base64.b64decode(crt))
+            return format(cert.serial_number, 'x')
+        except (ValueError, TypeError):
+            pass
+    return serial_to_hex(serial_number) or None
+
+
+def _backfill(fetch, update):
+    last_id = 0
+    filled = 0
+    while True:
+        rows = fetch(last_id)
+        if not rows:
+            return filled
+        for row_id, crt, serial_number in rows:
+            value = _serial_hex(crt, serial_number)
+            if value:
+                update(row_id, value)
+                filled += 1
+        last_id = rows[-1][0]
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'certificates' not in tables:
+        logger.info('[078] certificates absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(certificates)').fetchall()
+    }
+    if 'serial_hex' not in columns:
+        conn.execute('ALTER TABLE certificates ADD COLUMN serial_hex VARCHAR(64)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_certificates_serial_hex_caref '
+        'ON certificates(serial_hex, caref)'
+    )
+
+    def fetch(after):
+        return conn.execute(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        ).fetchall()
+
+    def update(row_id, value):
+        conn.execute(
+            'UPDATE certificates SET serial_hex = ? WHERE id = ?', (value, row_id)
+        )
+
+    filled = _backfill(fetch, update)
+    conn.commit()
+    logger.info(f'[078] added certificates.serial_hex, backfilled {filled} row(s) (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if 'certificates' not in set(inspector.get_table_names()):
+        logger.info('[078] certificates absent, skipping (PostgreSQL)')
+        return
+
+    columns = {
+        column['name'] for column in inspector.get_columns('certificates')
+    }
+    if 'serial_hex' not in columns:
+        conn.execute(text(
+            'ALTER TABLE certificates ADD COLUMN serial_hex VARCHAR(64)'
+        ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_certificates_serial_hex_caref '
+        'ON certificates(serial_hex, caref)'
+    ))
+
+    def fetch(after):
+        return conn.execute(text(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        )).fetchall()
+
+    def update(row_id, value):
+        conn.execute(
+            text('UPDATE certificates SET serial_hex = :v WHERE id = :i'),
+            {'v': value, 'i': row_id},
+        )
+
+    filled = _backfill(fetch, update)
+    logger.info(f'[078] added certificates.serial_hex, backfilled {filled} row(s) (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Keep the derived column; older code simply ignores it."""
+    pass
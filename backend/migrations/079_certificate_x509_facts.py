@@ -0,0 +1,131 @@
+"""Migration 079: persist parsed X.509 display facts on certificates.
+
+``Certificate.to_dict`` used to decode and parse the stored PEM several times
+per row (key type, signature algorithm, two thumbprints). The model now keeps
+those values in ``x509_key_type``, ``x509_signature_algorithm``,
+``x509_thumbprint_sha1`` and ``x509_thumbprint_sha256``, filled on insert and
+whenever ``crt``/``csr`` change. This adds the columns and backfills existing
+rows in id-keyset batches, parsing each PEM once.
+
+Idempotent: only rows whose ``x509_key_type`` is still NULL are backfilled.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+BATCH_SIZE = 500
+_COLUMNS = (
+    ('x509_key_type', 'VARCHAR(50)', 'key_type'),
+    ('x509_signature_algorithm', 'VARCHAR(100)', 'signature_algorithm'),
+    ('x509_thumbprint_sha1', 'VARCHAR(64)', 'thumbprint_sha1'),
+    ('x509_thumbprint_sha256', 'VARCHAR(100)', 'thumbprint_sha256'),
+)
+_SELECT_BATCH = (
+    'SELECT id, crt, csr FROM certificates '
+    'WHERE x509_key_type IS NULL AND id > {after} ORDER BY id LIMIT {limit}'
+)
+_UPDATE = 'UPDATE certificates SET {assignments} WHERE id = {id_param}'
+
+
+def _backfill(fetch, update):
+    from utils.cert_facts import derive_certificate_facts
+
+    last_id = 0
+    filled = 0
+    while True:
+        rows = fetch(last_id)
+        if not rows:
+            return filled
+        for row_id, crt, csr in rows:
+            facts = derive_certificate_facts(crt, csr)
+            update(row_id, [facts[name] for _, _, name in _COLUMNS])
+            filled += 1
+        last_id = rows[-1][0]
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'certificates' not in tables:
+        logger.info('[079] certificates absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(certificates)').fetchall()
+    }
+    for column, ddl_type, _ in _COLUMNS:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE certificates ADD COLUMN {column} {ddl_type}')
+
+    update_sql = _UPDATE.format(
+        assignments=', '.join(f'{column} = ?' for column, _, _ in _COLUMNS),
+        id_param='?',
+    )
+
+    def fetch(after):
+        return conn.execute(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        ).fetchall()
+
+    def update(row_id, values):
+        conn.execute(update_sql, (*values, row_id))
+
+    filled = _backfill(fetch, update)
+    conn.commit()
+    logger.info(f'[079] added certificate X.509 fact columns, backfilled {filled} row(s) (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if 'certificates' not in set(inspector.get_table_names()):
+        logger.info('[079] certificates absent, skipping (PostgreSQL)')
+        return
+
+    columns = {
+        column['name'] for column in inspector.get_columns('certificates')
+    }
+    for column, ddl_type, _ in _COLUMNS:
+        if column not in columns:
+            conn.execute(text(
+                f'ALTER TABLE certificates ADD COLUMN {column} {ddl_type}'
+            ))
+
+    update_sql = text(_UPDATE.format(
+        assignments=', '.join(f'{column} = :{column}' for column, _, _ in _COLUMNS),
+        id_param=':id',
+    ))
+
+    def fetch(after):
+        return conn.execute(text(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        )).fetchall()
+
+    def update(row_id, values):
+        params = {column: value for (column, _, _), value in zip(_COLUMNS, values)}
+        params['id'] = row_id
+        conn.execute(update_sql, params)
+
+    filled = _backfill(fetch, update)
+    logger.info(f'[079] added certificate X.509 fact columns, backfilled {filled} row(s) (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Keep the derived columns; older code simply ignores them."""
+    pass
@@ -0,0 +1,89 @@
+"""Migration 080: persisted compliance score on certificates.
+
+Adds ``compliance_score``, ``compliance_grade`` and ``compliance_recheck_at``
+(with indexes on the score and recheck time) so the certificate list can sort
+and filter by the exact score instead of a SQL approximation. Existing rows
+are left NULL here; the ``compliance_refresh`` scheduled task scores every
+unscored certificate on its first run, and readers score NULL rows on the
+fly until then.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_SQLITE_COLUMNS = (
+    ('compliance_score', 'INTEGER'),
+    ('compliance_grade', 'VARCHAR(3)'),
+    ('compliance_recheck_at', 'DATETIME'),
+)
+_PG_COLUMNS = (
+    ('compliance_score', 'INTEGER'),
+    ('compliance_grade', 'VARCHAR(3)'),
+    ('compliance_recheck_at', 'TIMESTAMP'),
+)
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_certificates_compliance_score '
+    'ON certificates(compliance_score)',
+    'CREATE INDEX IF NOT EXISTS ix_certificates_compliance_recheck_at '
+    'ON certificates(compliance_recheck_at)',
+)
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'certificates' not in tables:
+        logger.info('[080] certificates absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(certificates)').fetchall()
+    }
+    for column, ddl_type in _SQLITE_COLUMNS:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE certificates ADD COLUMN {column} {ddl_type}')
+    for statement in _INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    logger.info('[080] added certificate compliance score columns (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if 'certificates' not in set(inspector.get_table_names()):
+        logger.info('[080] certificates absent, skipping (PostgreSQL)')
+        return
+
+    columns = {
+        column['name'] for column in inspector.get_columns('certificates')
+    }
+    for column, ddl_type in _PG_COLUMNS:
+        if column not in columns:
+            conn.execute(text(
+                f'ALTER TABLE certificates ADD COLUMN {column} {ddl_type}'
+            ))
+    for statement in _INDEXES:
+        conn.execute(text(statement))
+    logger.info('[080] added certificate compliance score columns (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Keep the derived columns; older code simply ignores them."""
+    pass
@@ -0,0 +1,85 @@
+"""Migration 081: audit_chain_head table.
+
+Single-row tracker of the audit hash-chain tail (id and entry_hash of the
+newest chained audit entry). Audit appends lock this row instead of querying
+the previous audit_logs row, so concurrent writers cannot fork the chain.
+Seeded from the newest audit entry that carries an entry_hash, or empty.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_SQLITE_DDL = """
+CREATE TABLE IF NOT EXISTS audit_chain_head (
+    id INTEGER PRIMARY KEY,
+    last_id INTEGER,
+    last_hash VARCHAR(64),
+    updated_at DATETIME
+)
+"""
+
+_PG_DDL = """
+CREATE TABLE IF NOT EXISTS audit_chain_head (
+    id INTEGER PRIMARY KEY,
+    last_id INTEGER,
+    last_hash VARCHAR(64),
+    updated_at TIMESTAMP
+)
+"""
+
+# Always seeds the row, empty when nothing is chained yet: workers appending
+# to a fresh database must find it rather than race to insert it.
+_SEED = """
+INSERT INTO audit_chain_head (id, last_id, last_hash, updated_at)
+SELECT 1,
+       (SELECT id FROM audit_logs WHERE entry_hash IS NOT NULL ORDER BY id DESC LIMIT 1),
+       (SELECT entry_hash FROM audit_logs WHERE entry_hash IS NOT NULL ORDER BY id DESC LIMIT 1),
+       CURRENT_TIMESTAMP
+WHERE NOT EXISTS (SELECT 1 FROM audit_chain_head WHERE id = 1)
+"""
+
+_SEED_EMPTY = """
+INSERT INTO audit_chain_head (id, last_id, last_hash, updated_at)
+SELECT 1, NULL, NULL, CURRENT_TIMESTAMP
+WHERE NOT EXISTS (SELECT 1 FROM audit_chain_head WHERE id = 1)
+"""
+
+
+def _upgrade_sqlite(conn):
+    conn.execute(_SQLITE_DDL)
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    conn.execute(_SEED if 'audit_logs' in tables else _SEED_EMPTY)
+    conn.commit()
+    logger.info("[081] created audit_chain_head (SQLite)")
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+    conn.execute(text(_PG_DDL))
+    tables = set(inspect(conn).get_table_names())
+    conn.execute(text(_SEED if 'audit_logs' in tables else _SEED_EMPTY))
+    logger.info("[081] created audit_chain_head (PostgreSQL)")
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        conn.execute("DROP TABLE IF EXISTS audit_chain_head")
+        conn.commit()
+    else:
+        from sqlalchemy import text
+        conn.execute(text("DROP TABLE IF EXISTS audit_chain_head"))
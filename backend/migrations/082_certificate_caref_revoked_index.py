@@ -0,0 +1,59 @@
+"""Migration 082: (caref, revoked, id) index on certificates.
+
+CRL generation streams a CA's revoked certificates in id-ordered chunks
+(``CRLQueryMixin.iter_revoked_rows``); this index serves that walk and the
+delta-CRL variant without scanning the whole table.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_INDEX = (
+    'CREATE INDEX IF NOT EXISTS idx_certificates_caref_revoked '
+    'ON certificates(caref, revoked, id)'
+)
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'certificates' not in tables:
+        logger.info('[082] certificates absent, skipping (SQLite)')
+        return
+    conn.execute(_INDEX)
+    conn.commit()
+    logger.info('[082] added certificates (caref, revoked, id) index (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    if 'certificates' not in set(inspect(conn).get_table_names()):
+        logger.info('[082] certificates absent, skipping (PostgreSQL)')
+        return
+    conn.execute(text(_INDEX))
+    logger.info('[082] added certificates (caref, revoked, id) index (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        conn.execute('DROP INDEX IF EXISTS idx_certificates_caref_revoked')
+        conn.commit()
+    else:
+        from sqlalchemy import text
+        conn.execute(text('DROP INDEX IF EXISTS idx_certificates_caref_revoked'))
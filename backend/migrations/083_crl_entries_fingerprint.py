@@ -0,0 +1,73 @@
+"""Migration 083: revoked-entry fingerprint on crl_metadata.
+
+Adds ``entries_fingerprint`` (``"<row count>:<sum of certificate ids>"`` of
+the revoked rows a full CRL was built from) and ``entries_reuse_depth`` (how
+many consecutive full CRLs reused their predecessor's encoded entries). The
+next full CRL re-encodes only revocations newer than the previous base when
+the fingerprint still matches the database. Existing rows stay NULL and
+simply force one complete rebuild.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_COLUMNS = (
+    ('entries_fingerprint', 'VARCHAR(64)'),
+    ('entries_reuse_depth', 'INTEGER DEFAULT 0'),
+)
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'crl_metadata' not in tables:
+        logger.info('[083] crl_metadata absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(crl_metadata)').fetchall()
+    }
+    for column, ddl_type in _COLUMNS:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE crl_metadata ADD COLUMN {column} {ddl_type}')
+    conn.commit()
+    logger.info('[083] added crl_metadata entry fingerprint columns (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if 'crl_metadata' not in set(inspector.get_table_names()):
+        logger.info('[083] crl_metadata absent, skipping (PostgreSQL)')
+        return
+
+    columns = {
+        column['name'] for column in inspector.get_columns('crl_metadata')
+    }
+    for column, ddl_type in _COLUMNS:
+        if column not in columns:
+            conn.execute(text(
+                f'ALTER TABLE crl_metadata ADD COLUMN {column} {ddl_type}'
+            ))
+    logger.info('[083] added crl_metadata entry fingerprint columns (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Keep the columns; older code simply ignores them."""
+    pass
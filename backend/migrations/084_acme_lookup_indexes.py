@@ -0,0 +1,125 @@
+"""Migration 084: indexes for the ACME order flow, challenge ids from URLs.
+
+The per-request ACME lookups walk foreign keys that had no index:
+authorization -> challenges, order -> authorizations, account -> orders,
+certificate -> owning order, and the authorization-reuse query. Each was a
+full table scan that grew with every order ever placed.
+
+Challenge URLs used to end in a random segment unrelated to challenge_id,
+so the challenge endpoint found them with ``url LIKE '%/<segment>'``. New
+challenges use their challenge_id as the segment; this migration copies
+the segment into challenge_id for challenges whose authorization has not
+expired yet, so those URLs keep resolving through the unique index.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_INDEXES = {
+    'acme_challenges': [
+        'CREATE INDEX IF NOT EXISTS idx_acme_challenges_authorization '
+        'ON acme_challenges(authorization_id)',
+    ],
+    'acme_authorizations': [
+        'CREATE INDEX IF NOT EXISTS idx_acme_authz_order '
+        'ON acme_authorizations(order_id)',
+        'CREATE INDEX IF NOT EXISTS idx_acme_authz_account_status '
+        'ON acme_authorizations(account_id, status, expires)',
+    ],
+    'acme_orders': [
+        'CREATE INDEX IF NOT EXISTS idx_acme_orders_account_created '
+        'ON acme_orders(account_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_acme_orders_certificate '
+        'ON acme_orders(certificate_id)',
+    ],
+}
+_DROP = [
+    'DROP INDEX IF EXISTS idx_acme_challenges_authorization',
+    'DROP INDEX IF EXISTS idx_acme_authz_order',
+    'DROP INDEX IF EXISTS idx_acme_authz_account_status',
+    'DROP INDEX IF EXISTS idx_acme_orders_account_created',
+    'DROP INDEX IF EXISTS idx_acme_orders_certificate',
+]
+
+_PATH = '/acme/challenge/'
+_LIVE_CHALLENGES = (
+    "authorization_id IN (SELECT authorization_id FROM acme_authorizations "
+    "WHERE expires > :now)"
+)
+_BACKFILL_SQLITE = (
+    f"UPDATE acme_challenges SET challenge_id = substr(url, instr(url, '{_PATH}') + {len(_PATH)}) "
+    f"WHERE instr(url, '{_PATH}') > 0 "
+    f"AND substr(url, instr(url, '{_PATH}') + {len(_PATH)}) != challenge_id "
+    f"AND {_LIVE_CHALLENGES}"
+)
+_BACKFILL_PG = (
+    f"UPDATE acme_challenges SET challenge_id = split_part(url, '{_PATH}', 2) "
+    f"WHERE strpos(url, '{_PATH}') > 0 "
+    f"AND split_part(url, '{_PATH}', 2) != challenge_id "
+    f"AND {_LIVE_CHALLENGES}"
+)
+
+
+def _now() -> str:
+    # Columns hold naive UTC timestamps
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(' ')
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    for table, statements in _INDEXES.items():
+        if table not in tables:
+            logger.info(f'[084] {table} absent, skipping its indexes (SQLite)')
+            continue
+        for statement in statements:
+            conn.execute(statement)
+    if {'acme_challenges', 'acme_authorizations'} <= tables:
+        updated = conn.execute(_BACKFILL_SQLITE, {'now': _now()}).rowcount
+        logger.info(f'[084] challenge ids taken from {updated} challenge URLs (SQLite)')
+    conn.commit()
+    logger.info('[084] added ACME lookup indexes (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    tables = set(inspect(conn).get_table_names())
+    for table, statements in _INDEXES.items():
+        if table not in tables:
+            logger.info(f'[084] {table} absent, skipping its indexes (PostgreSQL)')
+            continue
+        for statement in statements:
+            conn.execute(text(statement))
+    if {'acme_challenges', 'acme_authorizations'} <= tables:
+        updated = conn.execute(text(_BACKFILL_PG), {'now': _now()}).rowcount
+        logger.info(f'[084] challenge ids taken from {updated} challenge URLs (PostgreSQL)')
+    logger.info('[084] added ACME lookup indexes (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Drop the indexes; copied challenge ids stay (URLs still match them)."""
+    if isinstance(conn, sqlite3.Connection):
+        for statement in _DROP:
+            conn.execute(statement)
+        conn.commit()
+    else:
+        from sqlalchemy import text
+        for statement in _DROP:
+            conn.execute(text(statement))
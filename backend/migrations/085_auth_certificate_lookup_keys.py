@@ -0,0 +1,151 @@
+"""Migration 085: canonical lookup keys for mTLS auth certificates.
+
+``auth_certificates.cert_serial`` holds hex or decimal spellings depending on
+the enrolment path, and some paths store no fingerprint, so mTLS login tried
+up to four lookups per request. This adds indexed ``serial_hex`` (lowercase
+hex, no padding) and ``fingerprint_hex`` (lowercase SHA-256 hex) columns and
+backfills them from the stored PEM, falling back to ``cert_serial`` and
+``cert_fingerprint`` for rows without one.
+
+Idempotent: only rows with a NULL ``serial_hex`` are backfilled.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import hashlib
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+BATCH_SIZE = 500
+_COLUMNS = (
+    ('serial_hex', 'VARCHAR(64)'),
+    ('fingerprint_hex', 'VARCHAR(64)'),
+)
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_auth_certificates_serial_hex '
+    'ON auth_certificates(serial_hex)',
+    'CREATE INDEX IF NOT EXISTS ix_auth_certificates_fingerprint_hex '
+    'ON auth_certificates(fingerprint_hex)',
+)
+_SELECT_BATCH = (
+    'SELECT id, cert_pem, cert_serial, cert_fingerprint FROM auth_certificates '
+    'WHERE serial_hex IS NULL AND id > {after} ORDER BY id LIMIT {limit}'
+)
+
+
+def _lookup_keys(cert_pem, cert_serial, cert_fingerprint):
+    from utils.serial_format import serial_to_hex
+
+    if cert_pem:
+        try:
+            from cryptography import x509
+            from cryptography.hazmat.primitives import serialization
+            cert = x509.load_pem_x509_certificate(bytes(cert_pem))
+            der = cert.public_bytes(serialization.Encoding.DER)
+            return format(cert.serial_number, 'x'), hashlib.sha256(der).hexdigest()
+        except (ValueError, TypeError):
+            pass
+    fingerprint = str(cert_fingerprint or '').replace(':', '').strip().lower()
+    if len(fingerprint) != 64 or any(c not in '0123456789abcdef' for c in fingerprint):
+        fingerprint = None
+    return serial_to_hex(cert_serial) or None, fingerprint
+
+
+def _backfill(fetch, update):
+    last_id = 0
+    filled = 0
+    while True:
+        rows = fetch(last_id)
+        if not rows:
+            return filled
+        for row_id, cert_pem, cert_serial, cert_fingerprint in rows:
+            serial_hex, fingerprint_hex = _lookup_keys(cert_pem, cert_serial, cert_fingerprint)
+            if serial_hex:
+                update(row_id, serial_hex, fingerprint_hex)
+                filled += 1
+        last_id = rows[-1][0]
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'auth_certificates' not in tables:
+        logger.info('[085] auth_certificates absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(auth_certificates)').fetchall()
+    }
+    for column, ddl_type in _COLUMNS:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE auth_certificates ADD COLUMN {column} {ddl_type}')
+    for statement in _INDEXES:
+        conn.execute(statement)
+
+    def fetch(after):
+        return conn.execute(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        ).fetchall()
+
+    def update(row_id, serial_hex, fingerprint_hex):
+        conn.execute(
+            'UPDATE auth_certificates SET serial_hex = ?, fingerprint_hex = ? WHERE id = ?',
+            (serial_hex, fingerprint_hex, row_id),
+        )
+
+    filled = _backfill(fetch, update)
+    conn.commit()
+    logger.info(f'[085] added auth_certificates lookup keys, backfilled {filled} row(s) (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(conn)
+    if 'auth_certificates' not in set(inspector.get_table_names()):
+        logger.info('[085] auth_certificates absent, skipping (PostgreSQL)')
+        return
+
+    columns = {
+        column['name'] for column in inspector.get_columns('auth_certificates')
+    }
+    for column, ddl_type in _COLUMNS:
+        if column not in columns:
+            conn.execute(text(
+                f'ALTER TABLE auth_certificates ADD COLUMN {column} {ddl_type}'
+            ))
+    for statement in _INDEXES:
+        conn.execute(text(statement))
+
+    def fetch(after):
+        return conn.execute(text(
+            _SELECT_BATCH.format(after=int(after), limit=BATCH_SIZE)
+        )).fetchall()
+
+    def update(row_id, serial_hex, fingerprint_hex):
+        conn.execute(
+            text('UPDATE auth_certificates SET serial_hex = :s, fingerprint_hex = :f '
+                 'WHERE id = :i'),
+            {'s': serial_hex, 'f': fingerprint_hex, 'i': row_id},
+        )
+
+    filled = _backfill(fetch, update)
+    logger.info(f'[085] added auth_certificates lookup keys, backfilled {filled} row(s) (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Keep the derived columns; older code simply ignores them."""
+    pass
@@ -0,0 +1,78 @@
+"""Migration 086: unique (ca_id, crl_number) index on crl_metadata.
+
+Full and delta CRLs of a CA share one strictly increasing CRL number
+sequence (RFC 5280 §5.2.3). Generation is serialized per CA; this index
+makes the database reject a duplicate number should two generations still
+race (e.g. separate processes on SQLite).
+
+CRLs already issued with a duplicate number cannot be renumbered (the number
+is inside the signed DER), so on such databases the index is not created and
+the affected CAs are logged; generation stays serialized either way.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_INDEX = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS uq_crl_metadata_ca_number '
+    'ON crl_metadata(ca_id, crl_number)'
+)
+_DUPLICATES = (
+    'SELECT DISTINCT ca_id FROM crl_metadata '
+    'GROUP BY ca_id, crl_number HAVING COUNT(*) > 1'
+)
+
+
+def _create(execute, backend):
+    duplicated = [row[0] for row in execute(_DUPLICATES).fetchall()]
+    if duplicated:
+        logger.warning(
+            f'[086] CA(s) {sorted(duplicated)} already issued CRLs with duplicate numbers; '
+            f'unique (ca_id, crl_number) index not created ({backend})'
+        )
+        return
+    execute(_INDEX)
+    logger.info(f'[086] added unique crl_metadata (ca_id, crl_number) index ({backend})')
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'crl_metadata' not in tables:
+        logger.info('[086] crl_metadata absent, skipping (SQLite)')
+        return
+    _create(conn.execute, 'SQLite')
+    conn.commit()
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    if 'crl_metadata' not in set(inspect(conn).get_table_names()):
+        logger.info('[086] crl_metadata absent, skipping (PostgreSQL)')
+        return
+    _create(lambda sql: conn.execute(text(sql)), 'PostgreSQL')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        conn.execute('DROP INDEX IF EXISTS uq_crl_metadata_ca_number')
+        conn.commit()
+    else:
+        from sqlalchemy import text
+        conn.execute(text('DROP INDEX IF EXISTS uq_crl_metadata_ca_number'))
@@ -0,0 +1,61 @@
+"""Migration 087: drop the CRL entries fingerprint columns added by 083.
+
+Full CRLs are encoded from all revoked rows again: checking whether the
+previous base's entries could be reused read every revoked row of the CA
+anyway, so the incremental assembly saved next to nothing.
+``entries_fingerprint`` and ``entries_reuse_depth`` are no longer used.
+
+Dual-backend (SQLite + PostgreSQL).
+"""
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+pg_compatible = True
+
+_COLUMNS = ('entries_fingerprint', 'entries_reuse_depth')
+
+
+def _upgrade_sqlite(conn):
+    tables = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    }
+    if 'crl_metadata' not in tables:
+        logger.info('[087] crl_metadata absent, skipping (SQLite)')
+        return
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(crl_metadata)').fetchall()
+    }
+    for column in _COLUMNS:
+        if column in columns:
+            conn.execute(f'ALTER TABLE crl_metadata DROP COLUMN {column}')
+    conn.commit()
+    logger.info('[087] dropped crl_metadata entry fingerprint columns (SQLite)')
+
+
+def _upgrade_pg(conn):
+    from sqlalchemy import inspect, text
+
+    if 'crl_metadata' not in set(inspect(conn).get_table_names()):
+        logger.info('[087] crl_metadata absent, skipping (PostgreSQL)')
+        return
+
+    for column in _COLUMNS:
+        conn.execute(text(f'ALTER TABLE crl_metadata DROP COLUMN IF EXISTS {column}'))
+    logger.info('[087] dropped crl_metadata entry fingerprint columns (PostgreSQL)')
+
+
+def upgrade(conn):
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_pg(conn)
+
+
+def downgrade(conn):
+    """Nothing to restore; the columns only ever held derived data."""
+    pass
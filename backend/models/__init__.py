@@ -10,7 +10,7 @@ from models.ca import CA
 from models.certificate import Certificate
 from models.crl_list import CRL
 from models.scep import SCEPRequest, ScepProfile
-from models.audit_log import AuditLog
+from models.audit_log import AuditLog, AuditChainHead
 
 # Previously-split sub-models (already existed)
 from models.certificate_template import CertificateTemplate
@@ -44,7 +44,7 @@ from utils.datetime_utils import utc_now, utc_isoformat
 
 __all__ = [
     "db", "User", "UserSession", "SystemConfig", "CA", "Certificate",
-    "CRL", "SCEPRequest", "AuditLog",
+    "CRL", "SCEPRequest", "AuditLog", "AuditChainHead",
     "CRLMetadata", "OCSPResponse", "CertificateTemplate",
     "AcmeAccount", "AcmeOrder", "AcmeAuthorization", "AcmeChallenge", "AcmeNonce",
     "DnsProvider", "AcmeClientOrder", "AcmeDomain", "AcmeLocalDomain", "AcmeEabCredential",
@@ -81,6 +81,12 @@ class AcmeOrder(db.Model):
     account = db.relationship('AcmeAccount', back_populates='orders')
     authorizations = db.relationship('AcmeAuthorization', back_populates='order', lazy='dynamic', cascade='all, delete-orphan')
     certificate = db.relationship('Certificate', foreign_keys=[certificate_id])
+
+    # Account order list and certificate ownership checks (migration 084)
+    __table_args__ = (
+        db.Index('idx_acme_orders_account_created', 'account_id', 'created_at'),
+        db.Index('idx_acme_orders_certificate', 'certificate_id'),
+    )
     
     @property
     def identifiers_list(self):
@@ -149,6 +155,12 @@ class AcmeAuthorization(db.Model):
     order = db.relationship('AcmeOrder', back_populates='authorizations')
     challenges = db.relationship('AcmeChallenge', back_populates='authorization', lazy='dynamic', cascade='all, delete-orphan')
 
+    # order.authorizations and authorization reuse lookups (migration 084)
+    __table_args__ = (
+        db.Index('idx_acme_authz_order', 'order_id'),
+        db.Index('idx_acme_authz_account_status', 'account_id', 'status', 'expires'),
+    )
+
     @property
     def identifier_obj(self):
         """Return identifier as a dict: {'type': 'dns', 'value': 'example.com'}."""
@@ -211,6 +223,11 @@ class AcmeChallenge(db.Model):
     
     # Relationships
     authorization = db.relationship('AcmeAuthorization', back_populates='challenges')
+
+    # authorization.challenges (migration 084)
+    __table_args__ = (
+        db.Index('idx_acme_challenges_authorization', 'authorization_id'),
+    )
     
     def to_dict(self):
         """Convert to ACME challenge object"""
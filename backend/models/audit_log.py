@@ -1,6 +1,8 @@
 """
 AuditLog Model - Audit log for all operations
 """
+from sqlalchemy import event, inspect, text
+
 from models import db
 from utils.datetime_utils import utc_now, utc_isoformat
 
@@ -26,8 +28,13 @@ class AuditLog(db.Model):
     
     def compute_hash(self, prev_hash: str = None) -> str:
         """Compute SHA-256 hash of this entry for tamper detection"""
+        return AuditLog.hash_entry(self, prev_hash)
+
+    @staticmethod
+    def hash_entry(entry, prev_hash: str = None) -> str:
+        """Chain hash of any object or row exposing the audit log columns"""
         import hashlib
-        data = f"{self.id}|{self.timestamp}|{self.username}|{self.action}|{self.resource_type}|{self.resource_id}|{self.details}|{self.success}|{prev_hash or ''}"
+        data = f"{entry.id}|{entry.timestamp}|{entry.username}|{entry.action}|{entry.resource_type}|{entry.resource_id}|{entry.details}|{entry.success}|{prev_hash or ''}"
         return hashlib.sha256(data.encode()).hexdigest()
     
     def to_dict(self):
@@ -47,3 +54,38 @@ class AuditLog(db.Model):
             "entry_hash": self.entry_hash,
             "prev_hash": self.prev_hash,
         }
+
+
+class AuditChainHead(db.Model):
+    """Tail of the audit hash chain (single row, id=1).
+
+    Appenders lock this row instead of looking up the previous audit entry,
+    so concurrent writers serialize on it and can never fork the chain.
+    """
+    __tablename__ = "audit_chain_head"
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_id = db.Column(db.Integer)  # id of the newest chained audit entry
+    last_hash = db.Column(db.String(64))  # its entry_hash
+    updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now)
+
+
+# Seeds the chain-head row from the newest chained entry (or empty on a fresh
+# database). Idempotent, and safe when several processes race to run it.
+SEED_CHAIN_HEAD_SQL = """
+INSERT INTO audit_chain_head (id, last_id, last_hash, updated_at)
+SELECT 1,
+       (SELECT id FROM audit_logs WHERE entry_hash IS NOT NULL ORDER BY id DESC LIMIT 1),
+       (SELECT entry_hash FROM audit_logs WHERE entry_hash IS NOT NULL ORDER BY id DESC LIMIT 1),
+       CURRENT_TIMESTAMP
+WHERE NOT EXISTS (SELECT 1 FROM audit_chain_head WHERE id = 1)
+ON CONFLICT (id) DO NOTHING
+"""
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _seed_chain_head(target, connection, **kw):
+    """Create the chain head with the tables, before any worker appends."""
+    inspector = inspect(connection)
+    if inspector.has_table('audit_chain_head') and inspector.has_table('audit_logs'):
+        connection.execute(text(SEED_CHAIN_HEAD_SQL))
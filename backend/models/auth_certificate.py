@@ -2,9 +2,12 @@
 Authentication Certificate Model
 Store client certificates for mTLS authentication
 """
+import hashlib
 from datetime import datetime
+from sqlalchemy import event, inspect as sa_inspect
 from models import db
 from utils.datetime_utils import utc_now, utc_isoformat
+from utils.serial_format import serial_to_hex
 
 
 class AuthCertificate(db.Model):
@@ -22,6 +25,10 @@ class AuthCertificate(db.Model):
     cert_subject = db.Column(db.Text, nullable=False)  # Full DN
     cert_issuer = db.Column(db.Text)
     cert_fingerprint = db.Column(db.String(128), index=True)  # SHA256
+    # Canonical lookup keys (lowercase hex, no separators), derived from
+    # cert_pem when stored; cert_serial/cert_fingerprint keep what was enrolled
+    serial_hex = db.Column(db.String(64), index=True)
+    fingerprint_hex = db.Column(db.String(64), index=True)
     
     # Certificate metadata
     name = db.Column(db.String(128))  # User-friendly name
@@ -54,3 +61,41 @@ class AuthCertificate(db.Model):
             'created_at': utc_isoformat(self.created_at),
             'last_used_at': utc_isoformat(self.last_used_at),
         }
+
+
+def canonical_fingerprint(value) -> str:
+    """Lowercase hex SHA-256 fingerprint without separators ('' if not one)."""
+    fingerprint = str(value or '').replace(':', '').strip().lower()
+    if len(fingerprint) != 64 or any(c not in '0123456789abcdef' for c in fingerprint):
+        return ''
+    return fingerprint
+
+
+def derive_lookup_keys(cert_pem, cert_serial, cert_fingerprint):
+    """Return (serial_hex, fingerprint_hex) for an enrolled certificate.
+
+    The parsed certificate is authoritative: cert_serial strings are a mix of
+    hex and decimal spellings, and some enrolment paths store no fingerprint.
+    """
+    if cert_pem:
+        try:
+            from cryptography import x509
+            from cryptography.hazmat.primitives import serialization
+            pem = cert_pem if isinstance(cert_pem, bytes) else str(cert_pem).encode()
+            cert = x509.load_pem_x509_certificate(pem)
+            der = cert.public_bytes(serialization.Encoding.DER)
+            return format(cert.serial_number, 'x'), hashlib.sha256(der).hexdigest()
+        except (ValueError, TypeError):
+            pass
+    return serial_to_hex(cert_serial) or None, canonical_fingerprint(cert_fingerprint) or None
+
+
+@event.listens_for(AuthCertificate, 'before_insert')
+@event.listens_for(AuthCertificate, 'before_update')
+def _sync_lookup_keys(mapper, connection, target):
+    state = sa_inspect(target)
+    changed = any(state.attrs[name].history.has_changes()
+                  for name in ('cert_pem', 'cert_serial', 'cert_fingerprint'))
+    if changed or target.serial_hex is None:
+        target.serial_hex, target.fingerprint_hex = derive_lookup_keys(
+            target.cert_pem, target.cert_serial, target.cert_fingerprint)
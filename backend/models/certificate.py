@@ -2,8 +2,14 @@
 Certificate Model - Certificates and CSRs
 """
 import json
+from datetime import timedelta
+
+from sqlalchemy import event, inspect as sa_inspect
+
 from models import db
-from utils.datetime_utils import utc_now, utc_isoformat
+from utils.cert_facts import derive_certificate_facts
+from utils.datetime_utils import to_naive_utc, utc_now, utc_isoformat
+from utils.serial_format import serial_to_hex
 
 
 class Certificate(db.Model):
@@ -24,12 +30,30 @@ class Certificate(db.Model):
     subject_cn = db.Column(db.String(255))  # Extracted CN for sorting
     issuer = db.Column(db.Text)
     serial_number = db.Column(db.String(100))
+    # Canonical lowercase hex (no padding, same form as the OCSP cache keys),
+    # maintained by the before_insert/before_update hook below. serial_number
+    # keeps the historical decimal/hex mix; lookups go through serial_hex.
+    serial_hex = db.Column(db.String(64))
     aki = db.Column(db.String(200))  # Authority Key Identifier (hex, colon-separated)
     ski = db.Column(db.String(200))  # Subject Key Identifier (hex, colon-separated)
     valid_from = db.Column(db.DateTime)
     valid_to = db.Column(db.DateTime)
     key_algo = db.Column(db.String(50))  # RSA 2048, EC P-256, etc. (for sorting)
     
+    # Parsed once from crt/csr by the before_insert/before_update hook below
+    # so to_dict() and list pages do no PEM parsing. NULL = not derived yet.
+    x509_key_type = db.Column(db.String(50))
+    x509_signature_algorithm = db.Column(db.String(100))
+    x509_thumbprint_sha1 = db.Column(db.String(64))
+    x509_thumbprint_sha256 = db.Column(db.String(100))
+    
+    # Persisted compliance result (services.compliance_service), rescored on
+    # change by the flush hook and when compliance_recheck_at (next expiry
+    # band boundary) passes by the scheduled refresh.
+    compliance_score = db.Column(db.Integer, index=True)
+    compliance_grade = db.Column(db.String(3))
+    compliance_recheck_at = db.Column(db.DateTime, index=True)
+    
     # Subject Alternative Names (SAN)
     san_dns = db.Column(db.Text)  # JSON array of DNS names
     san_ip = db.Column(db.Text)   # JSON array of IP addresses
@@ -82,6 +106,26 @@ class Certificate(db.Model):
     # Relationships
     ca = db.relationship("CA", back_populates="certificates")
     template = db.relationship("CertificateTemplate", foreign_keys=[template_id])
+
+    # Indexes: serial_hex leads so the same index serves caref-scoped probes
+    # (OCSP) and issuer-agnostic ones (ACME revoke, ARI). (caref, revoked, id)
+    # lets CRL generation walk a CA's revoked certificates in id order.
+    __table_args__ = (
+        db.Index('idx_certificates_serial_hex_caref', 'serial_hex', 'caref'),
+        db.Index('idx_certificates_caref_revoked', 'caref', 'revoked', 'id'),
+    )
+
+    @classmethod
+    def find_by_serial(cls, serial: int, caref: str = None):
+        """Return the certificate with integer *serial* (optionally under *caref*).
+
+        One probe on the (serial_hex, caref) index instead of trying every
+        historical spelling of serial_number.
+        """
+        query = cls.query.filter_by(serial_hex=format(serial, 'x'))
+        if caref is not None:
+            query = query.filter_by(caref=caref)
+        return query.first()
     
     @property
     def template_overrides_list(self) -> list:
@@ -157,35 +201,8 @@ class Certificate(db.Model):
             
     @property
     def key_type(self) -> str:
-        """Parse key type from certificate or CSR"""
-        try:
-            from cryptography import x509
-            from cryptography.hazmat.backends import default_backend
-            from cryptography.hazmat.primitives.asymmetric import rsa, ec, dsa
-            import base64
-            
-            # Try parsing CRT first
-            if self.crt:
-                pem_data = base64.b64decode(self.crt).decode('utf-8')
-                obj = x509.load_pem_x509_certificate(pem_data.encode(), default_backend())
-                public_key = obj.public_key()
-            # Then try parsing CSR
-            elif self.csr:
-                pem_data = base64.b64decode(self.csr).decode('utf-8')
-                obj = x509.load_pem_x509_csr(pem_data.encode(), default_backend())
-                public_key = obj.public_key()
-            else:
-                return "N/A"
-            
-            if isinstance(public_key, rsa.RSAPublicKey):
-                return f"RSA {public_key.key_size}"
-            elif isinstance(public_key, ec.EllipticCurvePublicKey):
-                return f"EC {public_key.curve.name}"
-            elif isinstance(public_key, dsa.DSAPublicKey):
-                return f"DSA {public_key.key_size}"
-            return "Unknown"
-        except Exception:
-            return "N/A"
+        """Key type from the certificate, or from the CSR when not yet signed"""
+        return self._x509_fact('key_type')
     
     @property
     def common_name(self) -> str:
@@ -303,72 +320,51 @@ class Certificate(db.Model):
     @property
     def signature_algorithm(self) -> str:
         """Get signature algorithm from certificate"""
-        try:
-            from cryptography import x509
-            from cryptography.hazmat.backends import default_backend
-            import base64
-            
-            if not self.crt:
-                return "N/A"
-            
-            pem_data = base64.b64decode(self.crt).decode('utf-8')
-            cert = x509.load_pem_x509_certificate(pem_data.encode(), default_backend())
-            
-            # Get signature algorithm
-            sig_oid = cert.signature_algorithm_oid
-            # Map common OIDs to friendly names
-            sig_map = {
-                '1.2.840.113549.1.1.11': 'SHA256-RSA',
-                '1.2.840.113549.1.1.12': 'SHA384-RSA',
-                '1.2.840.113549.1.1.13': 'SHA512-RSA',
-                '1.2.840.113549.1.1.5': 'SHA1-RSA',
-                '1.2.840.10045.4.3.2': 'ECDSA-SHA256',
-                '1.2.840.10045.4.3.3': 'ECDSA-SHA384',
-                '1.2.840.10045.4.3.4': 'ECDSA-SHA512',
-            }
-            return sig_map.get(sig_oid.dotted_string, sig_oid._name or str(sig_oid))
-        except Exception:
-            return "N/A"
+        return self._x509_fact('signature_algorithm')
     
     @property
     def thumbprint_sha1(self) -> str:
         """Get SHA1 thumbprint/fingerprint"""
-        return self._get_thumbprint('sha1')
+        return self._x509_fact('thumbprint_sha1')
     
     @property
     def thumbprint_sha256(self) -> str:
         """Get SHA256 thumbprint/fingerprint"""
-        return self._get_thumbprint('sha256')
+        return self._x509_fact('thumbprint_sha256')
+    
+    def _x509_fact(self, name: str) -> str:
+        """Persisted X.509 fact, else parsed once per (crt, csr) and memoized"""
+        stored = getattr(self, _FACT_COLUMNS[name])
+        if stored is not None:
+            return stored
+        source = (self.crt, self.csr)
+        memo = self.__dict__.get('_x509_facts_memo')
+        if memo is None or memo[0] != source:
+            memo = (source, derive_certificate_facts(self.crt, self.csr))
+            self.__dict__['_x509_facts_memo'] = memo
+        return memo[1][name]
     
-    def _get_thumbprint(self, algorithm: str) -> str:
-        """Calculate certificate thumbprint"""
-        try:
-            from cryptography import x509
-            from cryptography.hazmat.backends import default_backend
-            from cryptography.hazmat.primitives import hashes
-            import base64
-            
-            if not self.crt:
-                return ""
-            
-            pem_data = base64.b64decode(self.crt).decode('utf-8')
-            cert = x509.load_pem_x509_certificate(pem_data.encode(), default_backend())
-            
-            if algorithm == 'sha1':
-                digest = cert.fingerprint(hashes.SHA1())
-            else:
-                digest = cert.fingerprint(hashes.SHA256())
-            
-            return ':'.join(f'{b:02X}' for b in digest)
-        except Exception:
-            return ""
+    @property
+    def lifecycle_status(self) -> str:
+        """valid / expiring (within 30 days) / expired / revoked"""
+        if self.revoked:
+            return "revoked"
+        if self.valid_to:
+            # Aware until the row round-trips the DB on some issuance paths
+            valid_to = to_naive_utc(self.valid_to)
+            now = utc_now()
+            if valid_to < now:
+                return "expired"
+            if valid_to < now + timedelta(days=30):
+                return "expiring"
+        return "valid"
     
     @property
     def days_remaining(self) -> int:
         """Days until expiration"""
         if not self.valid_to:
             return -1
-        delta = self.valid_to - utc_now()
+        delta = to_naive_utc(self.valid_to) - utc_now()
         return max(0, delta.days)
     
     @property
@@ -428,18 +424,7 @@ class Certificate(db.Model):
     
     def to_dict(self, include_private=False):
         """Convert to dictionary"""
-        from datetime import datetime, timedelta
-        
-        # Calculate status
-        status = "valid"
-        if self.revoked:
-            status = "revoked"
-        elif self.valid_to:
-            now = utc_now()
-            if self.valid_to < now:
-                status = "expired"
-            elif self.valid_to < now + timedelta(days=30):
-                status = "expiring"
+        status = self.lifecycle_status
         
         data = {
             "id": self.id,
@@ -524,3 +509,57 @@ class Certificate(db.Model):
             return base64.b64decode(encoded).decode('utf-8')
         except Exception:
             return None
+
+
+
+# Fact name (utils.cert_facts) -> persisted column
+_FACT_COLUMNS = {
+    'key_type': 'x509_key_type',
+    'signature_algorithm': 'x509_signature_algorithm',
+    'thumbprint_sha1': 'x509_thumbprint_sha1',
+    'thumbprint_sha256': 'x509_thumbprint_sha256',
+}
+
+
+# Columns the compliance score reads besides crt/csr
+_COMPLIANCE_FIELDS = (
+    'revoked', 'valid_from', 'valid_to', 'cert_type', 'key_algo',
+    'san_dns', 'san_ip', 'san_email', 'san_uri', 'san_upn',
+)
+
+
+@event.listens_for(Certificate.crt, 'set')
+@event.listens_for(Certificate.csr, 'set')
+def _forget_x509_facts(target, value, oldvalue, initiator):
+    # New PEM: stored facts are stale until the flush hook re-derives them.
+    if value != oldvalue:
+        for column in _FACT_COLUMNS.values():
+            setattr(target, column, None)
+
+
+@event.listens_for(Certificate, 'before_insert')
+@event.listens_for(Certificate, 'before_update')
+def _sync_derived_columns(mapper, connection, target):
+    state = sa_inspect(target)
+    pem_changed = (state.attrs.crt.history.has_changes()
+                   or state.attrs.csr.history.has_changes())
+    serial_stale = (target.serial_hex is None or pem_changed
+                    or state.attrs.serial_number.history.has_changes())
+    facts_stale = pem_changed or any(
+        getattr(target, column) is None for column in _FACT_COLUMNS.values())
+    if serial_stale or facts_stale:
+        facts = derive_certificate_facts(target.crt, target.csr)
+        if serial_stale:
+            # The parsed serial is authoritative: serial_number strings are
+            # ambiguous (an all-digit hex serial parses as decimal).
+            target.serial_hex = facts['serial_hex'] or serial_to_hex(target.serial_number) or None
+        if facts_stale:
+            for name, column in _FACT_COLUMNS.items():
+                setattr(target, column, facts[name])
+
+    if (pem_changed
+            or (target.crt and target.compliance_score is None)
+            or any(getattr(state.attrs, name).history.has_changes()
+                   for name in _COMPLIANCE_FIELDS)):
+        from services.compliance_service import apply_compliance_score
+        apply_compliance_score(target)
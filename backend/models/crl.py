@@ -10,6 +10,10 @@ from utils.datetime_utils import utc_now, utc_isoformat
 class CRLMetadata(db.Model):
     """Certificate Revocation List metadata and storage"""
     __tablename__ = "crl_metadata"
+    __table_args__ = (
+        # One CRL number sequence per CA, shared by full and delta CRLs
+        db.Index('uq_crl_metadata_ca_number', 'ca_id', 'crl_number', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ca_id = db.Column(db.Integer, db.ForeignKey("certificate_authorities.id"), nullable=False, index=True)
@@ -59,6 +59,24 @@ def get_http_protocol_port():
     return 8080  # Default
 
 
+def _listener(port):
+    """Listening socket on *port*. Every gunicorn worker starts this server,
+    so with UCM_WORKERS > 1 they share the port (SO_REUSEPORT) and the kernel
+    spreads connections over them."""
+    from gevent import socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(('0.0.0.0', port))
+        sock.listen(128)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
 def start_http_protocol_server(flask_app, port=None):
     """Start the HTTP protocol server. Returns the server or None on failure."""
     if port is None:
@@ -69,7 +87,7 @@ def start_http_protocol_server(flask_app, port=None):
     try:
         from gevent.pywsgi import WSGIServer
         server = WSGIServer(
-            ('0.0.0.0', port),
+            _listener(port),
             ProtocolOnlyMiddleware(flask_app),
             log=None,
         )
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request ACME server lookups against a large history.
+
+USAGE:
+    python3 backend/scripts/benchmark_acme_lookups.py [--orders 200000]
+                                                      [--samples 200]
+                                                      [--db /tmp/acme-bench.db]
+
+Builds the ACME tables (acme_accounts, acme_orders, acme_authorizations,
+acme_challenges) from the models in a scratch SQLite database, fills them
+with --orders single-identifier orders (one authorization and three
+challenges each), then times the lookups behind the challenge, authz,
+order, account-orders and certificate endpoints plus authorization reuse:
+
+    before  the schema without the migration 084 indexes, and the challenge
+            endpoint's former ``url LIKE '%/<id>'`` lookup
+    after   migration 084 applied, and the current lookups
+
+Reports the mean milliseconds per lookup over --samples random keys and
+SQLite's query plan for each lookup after the change.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import secrets
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from models import db  # noqa: E402
+from models.acme_models import AcmeAccount, AcmeAuthorization, AcmeChallenge, AcmeOrder  # noqa: E402
+
+_TABLES = [AcmeAccount.__table__, AcmeOrder.__table__,
+           AcmeAuthorization.__table__, AcmeChallenge.__table__]
+_NEW_INDEXES = ['idx_acme_challenges_authorization', 'idx_acme_authz_order',
+                'idx_acme_authz_account_status', 'idx_acme_orders_account_created',
+                'idx_acme_orders_certificate']
+_BASE = 'https://ucm.example/acme'
+
+_LOOKUPS = {
+    'challenge': (
+        "SELECT * FROM acme_challenges WHERE url LIKE '%/' || :challenge_id",
+        "SELECT * FROM acme_challenges WHERE challenge_id = :challenge_id",
+    ),
+    'authz challenges': (
+        "SELECT * FROM acme_challenges WHERE authorization_id = :authorization_id",
+    ) * 2,
+    'order authorizations': (
+        "SELECT * FROM acme_authorizations WHERE order_id = :order_id",
+    ) * 2,
+    'account orders': (
+        "SELECT * FROM acme_orders WHERE account_id = :account_id ORDER BY created_at DESC",
+    ) * 2,
+    'cert owner': (
+        "SELECT * FROM acme_orders WHERE certificate_id = :certificate_id "
+        "AND account_id = :account_id LIMIT 1",
+    ) * 2,
+    'authz reuse': (
+        "SELECT * FROM acme_authorizations WHERE account_id = :account_id "
+        "AND identifier = :identifier AND wildcard = 0 AND status = 'valid' "
+        "AND expires > :now ORDER BY expires DESC LIMIT 1",
+    ) * 2,
+}
+
+
+def _populate(conn, orders, accounts=100, seed=1):
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    account_ids = [secrets.token_urlsafe(32) for _ in range(accounts)]
+    conn.executemany(
+        "INSERT INTO acme_accounts (account_id, jwk, jwk_thumbprint, status, created_at) "
+        "VALUES (?, '{}', ?, 'valid', ?)",
+        [(a, secrets.token_hex(32), now) for a in account_ids],
+    )
+    keys = []
+    order_rows, authz_rows, challenge_rows = [], [], []
+    for i in range(orders):
+        account_id = rng.choice(account_ids)
+        created = now - timedelta(seconds=rng.randrange(0, 2 * 365 * 86400))
+        order_id, authz_id = secrets.token_urlsafe(32), secrets.token_urlsafe(32)
+        identifier = json.dumps({'type': 'dns', 'value': f'host{i}.example.com'})
+        certificate_id = i + 1 if i % 4 else None
+        status = 'valid' if certificate_id else 'invalid'
+        order_rows.append((order_id, account_id, status, json.dumps([json.loads(identifier)]),
+                           certificate_id, created, created + timedelta(days=7)))
+        authz_rows.append((authz_id, order_id, account_id, identifier, status,
+                           created + timedelta(days=7), 0, created))
+        challenge_ids = []
+        for kind in ('http-01', 'dns-01', 'tls-alpn-01'):
+            challenge_id = secrets.token_urlsafe(32)
+            challenge_ids.append(challenge_id)
+            challenge_rows.append((challenge_id, authz_id, kind, status, secrets.token_urlsafe(32),
+                                   f'{_BASE}/challenge/{challenge_id}', created))
+        keys.append({
+            'challenge_id': rng.choice(challenge_ids), 'authorization_id': authz_id,
+            'order_id': order_id, 'account_id': account_id, 'certificate_id': certificate_id or 0,
+            'identifier': identifier, 'now': now,
+        })
+    conn.executemany(
+        "INSERT INTO acme_orders (order_id, account_id, status, identifiers, certificate_id, "
+        "created_at, expires) VALUES (?, ?, ?, ?, ?, ?, ?)", order_rows)
+    conn.executemany(
+        "INSERT INTO acme_authorizations (authorization_id, order_id, account_id, identifier, "
+        "status, expires, wildcard, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", authz_rows)
+    conn.executemany(
+        "INSERT INTO acme_challenges (challenge_id, authorization_id, type, status, token, url, "
+        "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", challenge_rows)
+    conn.commit()
+    return keys
+
+
+def _time(conn, sql, samples):
+    started = time.perf_counter()
+    for params in samples:
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - started) * 1000 / len(samples)
+
+
+def _plan(conn, sql, params):
+    return '; '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--db', help='scratch database path (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix='acme-bench-'), 'acme.db')
+    if os.path.exists(path):
+        os.remove(path)
+    db.metadata.create_all(create_engine(f'sqlite:///{path}'), tables=_TABLES)
+    conn = sqlite3.connect(path)
+
+    started = time.perf_counter()
+    keys = _populate(conn, args.orders)
+    print(f"{args.orders} orders, {3 * args.orders} challenges in {time.perf_counter() - started:.1f}s ({path})")
+    samples = random.Random(2).sample(keys, min(args.samples, len(keys)))
+
+    results = {}
+    for phase in ('before', 'after'):
+        if phase == 'before':
+            for name in _NEW_INDEXES:
+                conn.execute(f'DROP INDEX IF EXISTS {name}')
+        else:
+            importlib.import_module('migrations.084_acme_lookup_indexes').upgrade(conn)
+        conn.execute('ANALYZE')
+        for label, statements in _LOOKUPS.items():
+            sql = statements[0] if phase == 'before' else statements[1]
+            results.setdefault(label, {})[phase] = _time(conn, sql, samples)
+
+    print(f"\n{'lookup':<22}  {'before ms':>10}  {'after ms':>9}  plan after")
+    for label, statements in _LOOKUPS.items():
+        timing = results[label]
+        print(f"{label:<22}  {timing['before']:>10.3f}  {timing['after']:>9.3f}  "
+              f"{_plan(conn, statements[1], samples[0])}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
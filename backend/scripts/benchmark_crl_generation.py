@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark CRL encoding over synthetic revocation sets.
+
+USAGE:
+    python3 backend/scripts/benchmark_crl_generation.py [--sizes 10000,100000,1000000]
+                                                        [--builder-max 20000]
+                                                        [--key rsa|ec]
+
+Compares the streaming DER encoder used by CRLService
+(services/crl/der_encoder.py) with cryptography's immutable
+CertificateRevocationListBuilder, which copies its entry list on every
+add_revoked_certificate() and is therefore quadratic. The builder is only
+run up to --builder-max entries. No database is touched: entries are
+synthetic (serial, revoked_at, reason, invalidity_at) tuples, the same
+shape CRLQueryMixin.iter_revoked_rows() yields.
+
+Reports wall time, peak traced Python memory and the DER size per run.
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from services.crl.der_encoder import encode_crl, encode_revoked_entry  # noqa: E402
+
+_REASONS = [None, x509.ReasonFlags.key_compromise, x509.ReasonFlags.superseded,
+            x509.ReasonFlags.cessation_of_operation]
+
+
+def _entries(count, now, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        revoked_at = now - timedelta(seconds=rng.randrange(0, 3 * 365 * 86400))
+        invalidity_at = revoked_at - timedelta(days=1) if i % 10 == 0 else None
+        yield rng.getrandbits(127) | (1 << 127), revoked_at, _REASONS[i % len(_REASONS)], invalidity_at
+
+
+def _streaming(count, key, issuer, now, extensions):
+    der = encode_crl(
+        issuer, now, now + timedelta(days=7),
+        (encode_revoked_entry(*entry) for entry in _entries(count, now)),
+        extensions, key, hashes.SHA256(),
+    )
+    return len(der)
+
+
+def _builder(count, key, issuer, now, extensions):
+    builder = (x509.CertificateRevocationListBuilder()
+               .issuer_name(issuer).last_update(now).next_update(now + timedelta(days=7)))
+    for serial, revoked_at, reason, invalidity_at in _entries(count, now):
+        revoked = x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(revoked_at)
+        if reason is not None:
+            revoked = revoked.add_extension(x509.CRLReason(reason), critical=False)
+        if invalidity_at is not None:
+            revoked = revoked.add_extension(x509.InvalidityDate(invalidity_at), critical=False)
+        builder = builder.add_revoked_certificate(revoked.build())
+    for ext, critical in extensions:
+        builder = builder.add_extension(ext, critical=critical)
+    return len(builder.sign(key, hashes.SHA256()).public_bytes(serialization.Encoding.DER))
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--builder-max', type=int, default=20000)
+    parser.add_argument('--key', choices=('rsa', 'ec'), default='rsa')
+    args = parser.parse_args()
+
+    key = (rsa.generate_private_key(65537, 2048) if args.key == 'rsa'
+           else ec.generate_private_key(ec.SECP256R1()))
+    issuer = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'CRL Benchmark CA')])
+    extensions = [
+        (x509.CRLNumber(1), False),
+        (x509.AuthorityKeyIdentifier.from_issuer_public_key(key.public_key()), False),
+    ]
+    now = datetime(2026, 1, 1)
+
+    print(f"{'entries':>10}  {'encoder':>8}  {'seconds':>9}  {'peak MiB':>9}  {'DER MiB':>8}")
+    for count in (int(n) for n in args.sizes.split(',')):
+        runs = [('stream', _streaming)]
+        if count <= args.builder_max:
+            runs.append(('builder', _builder))
+        for label, fn in runs:
+            elapsed, peak, size = _measure(fn, count, key, issuer, now, extensions)
+            print(f"{count:>10}  {label:>8}  {elapsed:>9.2f}  {peak / 2**20:>9.1f}  {size / 2**20:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Load test: request throughput against the number of gunicorn workers.
+
+USAGE:
+    python3 backend/scripts/loadtest_workers.py [--workers 1,2,4]
+                                                [--path /api/v2/health]
+                                                [--duration 15] [--clients 64]
+                                                [--client-procs 4]
+
+For each worker count, starts the server exactly as deployed
+(``gunicorn -c gunicorn_config.py wsgi:app`` with ``UCM_WORKERS``) on a
+spare port, waits until --path answers, then has --clients keep-alive HTTPS
+connections, spread over --client-procs processes, request --path for
+--duration seconds. Reports requests per second, the speed-up over the
+first worker count and the non-2xx/failed requests.
+
+Run it on an installed node with its environment loaded (SECRET_KEY,
+DATA_DIR with the HTTPS certificate and database, DATABASE_URL). More than
+one worker needs REDIS_URL, or gunicorn_config.py falls back to one; such
+counts are skipped. Throughput only scales up to the number of CPU cores,
+and the load generator itself needs some of them.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _connection(port):
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return http.client.HTTPSConnection('127.0.0.1', port, context=context, timeout=10)
+
+
+def _wait_ready(port, path, server, timeout=90):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            return False
+        try:
+            conn = _connection(port)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def _client_proc(port, path, threads, duration, results):
+    """One load-generating process: *threads* keep-alive connections."""
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def run():
+        ok = failed = 0
+        conn = _connection(port)
+        while time.monotonic() < stop_at:
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if 200 <= response.status < 300:
+                    ok += 1
+                else:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = _connection(port)
+        conn.close()
+        with lock:
+            counts['ok'] += ok
+            counts['failed'] += failed
+
+    workers = [threading.Thread(target=run, daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((counts['ok'], counts['failed']))
+
+
+def _measure(port, path, clients, procs, duration):
+    results = multiprocessing.Queue()
+    per_proc = [clients // procs + (1 if i < clients % procs else 0) for i in range(procs)]
+    started = time.monotonic()
+    children = [multiprocessing.Process(target=_client_proc,
+                                        args=(port, path, n, duration, results))
+                for n in per_proc if n]
+    for child in children:
+        child.start()
+    totals = [results.get() for _ in children]
+    for child in children:
+        child.join()
+    elapsed = time.monotonic() - started
+    return sum(ok for ok, _ in totals) / elapsed, sum(failed for _, failed in totals)
+
+
+def _run(workers, args, log):
+    port = _free_port()
+    env = dict(os.environ, UCM_WORKERS=str(workers), HTTPS_PORT=str(port),
+               ACCESS_LOG='/dev/null', ERROR_LOG='-', HTTP_PROTOCOL_PORT='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', 'wsgi:app'],
+        cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not _wait_ready(port, args.path, server):
+            return None
+        _measure(port, args.path, args.clients, args.client_procs, min(args.duration, 3))  # warm up
+        return _measure(port, args.path, args.clients, args.client_procs, args.duration)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--path', default='/api/v2/health')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--client-procs', type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(',') if n.strip()]
+    shared = os.getenv('REDIS_URL')
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients over {args.client_procs} processes, "
+          f"GET {args.path} for {args.duration:g}s")
+    print(f"{'workers':>7}  {'req/s':>9}  {'speed-up':>8}  failed")
+    baseline = None
+    with tempfile.NamedTemporaryFile('w+b', prefix='ucm-loadtest-', suffix='.log',
+                                     delete=False) as log:
+        for workers in counts:
+            if workers > 1 and not shared:
+                print(f"{workers:>7}  skipped (needs REDIS_URL)")
+                continue
+            result = _run(workers, args, log)
+            if result is None:
+                print(f"{workers:>7}  server did not start, see {log.name}")
+                continue
+            rate, failed = result
+            baseline = baseline or rate
+            print(f"{workers:>7}  {rate:>9.1f}  {rate / baseline:>7.2f}x  {failed}")
+    print(f"server output: {log.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Token bucket storage for the rate limiter.
+
+Each bucket holds up to ``burst`` tokens and refills at ``rpm`` tokens per
+minute; a request takes one token or is refused. The backend is picked with
+``RATE_LIMIT_BACKEND``:
+
+``memory``
+    Buckets live in this process in an LRU map capped at
+    ``RATE_LIMIT_MEMORY_CAPACITY`` entries. Evicting the least recently used
+    bucket only hands that client a full bucket again. Each worker enforces
+    its own quota.
+``redis``
+    One hash per bucket, read, refilled and charged by a Lua script in a
+    single atomic call, so every worker and replica pointing at
+    ``REDIS_URL`` shares one quota. Buckets expire once they would be full
+    again. If Redis stops answering, requests are decided by an in-process
+    store, which keeps serving for ``RATE_LIMIT_REDIS_RETRY_SEC`` before
+    Redis is tried again, so an outage does not cost every request a
+    connection timeout.
+
+``auto`` (the default) uses Redis when ``REDIS_URL`` is set and the redis
+library is installed, the in-memory store otherwise.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from utils.redis_backend import BackendSlot, redis_client
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'auto').strip().lower()
+MEMORY_CAPACITY = int(os.getenv('RATE_LIMIT_MEMORY_CAPACITY', '100000'))
+_REDIS_PREFIX = 'ucm:ratelimit:'
+_REDIS_WARN_INTERVAL = 60
+REDIS_RETRY_SEC = float(os.getenv('RATE_LIMIT_REDIS_RETRY_SEC', '10'))
+
+# KEYS[1] bucket; ARGV rate (tokens/s), burst. Uses the Redis clock so every
+# worker refills against the same time. Returns {allowed, tokens as string}.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = burst
+  ts = now
+end
+if now > ts then
+  tokens = math.min(burst, tokens + (now - ts) * rate)
+  ts = now
+end
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(ts))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+def _rate(rpm: int) -> float:
+    """Tokens per second for *rpm*; at least one per minute."""
+    return max(rpm, 1) / 60.0
+
+
+class BucketStore:
+    name = 'base'
+
+    def take(self, key: str, rpm: int, burst: int) -> Tuple[bool, float]:
+        """Charge one token to bucket *key*; returns (allowed, tokens left)."""
+        raise NotImplementedError
+
+    def clear(self, prefix: str = '') -> int:
+        """Drop the buckets whose key starts with *prefix*; returns how many."""
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    name = 'memory'
+
+    def __init__(self, capacity: int = MEMORY_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, last refill], least recent first
+
+    def take(self, key: str, rpm: int, burst: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                if len(self._buckets) > self.capacity:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * _rate(rpm))
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, bucket[0]
+            return False, bucket[0]
+
+    def clear(self, prefix: str = '') -> int:
+        with self._lock:
+            if not prefix:
+                removed = len(self._buckets)
+                self._buckets.clear()
+                return removed
+            keys = [key for key in self._buckets if key.startswith(prefix)]
+            for key in keys:
+                del self._buckets[key]
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketStore(BucketStore):
+    name = 'redis'
+
+    def __init__(self, client, fallback: Optional[BucketStore] = None,
+                 retry_after: float = REDIS_RETRY_SEC):
+        self._client = client
+        self._take = client.register_script(_TAKE_SCRIPT)
+        self._fallback = fallback or MemoryBucketStore()
+        self._retry_after = retry_after
+        self._retry_at = 0.0
+        self._warned_at = 0.0
+
+    def _unavailable(self, e: Exception) -> None:
+        now = time.monotonic()
+        self._retry_at = now + self._retry_after
+        if now - self._warned_at >= _REDIS_WARN_INTERVAL:
+            self._warned_at = now
+            logger.warning(f"Rate limiter: Redis unavailable, limiting per process: {e}")
+
+    def take(self, key: str, rpm: int, burst: int) -> Tuple[bool, float]:
+        if time.monotonic() < self._retry_at:
+            return self._fallback.take(key, rpm, burst)
+        try:
+            allowed, tokens = self._take(keys=[_REDIS_PREFIX + key], args=[_rate(rpm), burst])
+        except Exception as e:
+            self._unavailable(e)
+            return self._fallback.take(key, rpm, burst)
+        return bool(int(allowed)), float(tokens)
+
+    def clear(self, prefix: str = '') -> int:
+        removed = self._fallback.clear(prefix)
+        try:
+            keys = list(self._client.scan_iter(match=f"{_REDIS_PREFIX}{prefix}*", count=500))
+            if keys:
+                removed += self._client.delete(*keys)
+        except Exception as e:
+            self._unavailable(e)
+        return removed
+
+
+def _build(backend: str) -> BucketStore:
+    if backend in ('redis', 'auto'):
+        client = redis_client()
+        if client is not None:
+            return RedisBucketStore(client)
+        if backend == 'redis':
+            logger.warning("RATE_LIMIT_BACKEND=redis but Redis is unavailable, using memory")
+    elif backend != 'memory':
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND {backend!r}, using memory")
+    return MemoryBucketStore()
+
+
+_backend: BackendSlot[BucketStore] = BackendSlot('Rate limit', _build, lambda: BACKEND)
+get_store = _backend.get
+configure = _backend.configure
+reset = _backend.reset
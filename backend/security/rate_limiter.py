@@ -2,17 +2,25 @@
 Rate Limiting Module
 Per-endpoint rate limiting with configurable limits
 Configurable via environment variables in /etc/ucm/ucm.env
+
+Path-prefix rules are compiled into a character trie, so a request path is
+matched in one walk instead of a ``startswith`` test per rule. Token buckets
+are kept by security.rate_limit_store: shared through Redis when available,
+otherwise in a bounded per-process LRU.
 """
 import ipaddress
 import os
 import time
 import logging
+import math
 from collections import defaultdict
 from threading import Lock
 from typing import Dict, Any, Optional, Tuple
 from functools import wraps
 from flask import request, jsonify, g
 
+from security.rate_limit_store import BucketStore, get_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +54,36 @@ def _is_lan_ip(ip: str) -> bool:
     return addr.is_private or addr.is_loopback or addr.is_link_local
 
 
+class _PrefixMatcher:
+    """Path-prefix rules compiled into a character trie.
+
+    ``match`` walks the path once and returns the lowest-ranked rule among
+    all prefixes it passes: the rule a first-match scan in rank order would
+    pick.
+    """
+
+    def __init__(self, rules):
+        self._root: Dict[Any, Any] = {}
+        for rank, (pattern, limit) in enumerate(rules):
+            node = self._root
+            for ch in pattern:
+                node = node.setdefault(ch, {})
+            # None never collides with a path character
+            node.setdefault(None, (rank, pattern, limit))
+
+    def match(self, path: str):
+        node = self._root
+        best = node.get(None)
+        for ch in path:
+            node = node.get(ch)
+            if node is None:
+                break
+            rule = node.get(None)
+            if rule is not None and (best is None or rule[0] < best[0]):
+                best = rule
+        return best
+
+
 class RateLimitConfig:
     """Rate limit configuration per endpoint pattern
     
@@ -61,6 +99,8 @@ class RateLimitConfig:
     RATE_LIMIT_PROTOCOL_RPM=500       # Protocol (ACME/SCEP/OCSP): rpm
     RATE_LIMIT_PROTOCOL_BURST=100     # Protocol: burst
     RATE_LIMIT_WHITELIST=127.0.0.1,::1  # Comma-separated IPs to whitelist
+    RATE_LIMIT_BACKEND=auto           # auto | redis | memory (security.rate_limit_store)
+    RATE_LIMIT_MEMORY_CAPACITY=100000 # Max buckets kept per process (memory backend)
     """
     
     # Limits loaded from environment or defaults
@@ -139,6 +179,7 @@ class RateLimitConfig:
                     cls._whitelist.add(ip)
         
         cls._limits_loaded = True
+        cls._matcher = None
         logger.info(f"Rate limits loaded: auth={auth_rpm}rpm, heavy={heavy_rpm}rpm, "
                    f"standard={standard_rpm}rpm, protocol={protocol_rpm}rpm")
     
@@ -152,6 +193,8 @@ class RateLimitConfig:
     _enabled: bool = None  # Will be loaded from env
     _custom_limits: Dict[str, Dict] = {}
     _whitelist: set = set()  # IPs that bypass rate limiting
+    _matcher: Optional[_PrefixMatcher] = None
+    _matcher_source: tuple = ()  # (custom, default) dicts it was compiled from
     
     @classmethod
     def is_enabled(cls) -> bool:
@@ -164,27 +207,44 @@ class RateLimitConfig:
         cls._enabled = enabled
         logger.info(f"Rate limiting {'enabled' if enabled else 'disabled'}")
     
+    @classmethod
+    def _get_matcher(cls) -> _PrefixMatcher:
+        """Compiled rules: custom limits first, then defaults in declaration order"""
+        cls._load_limits()
+        matcher = cls._matcher
+        source = cls._matcher_source
+        # Tests (and older callers) replace the dicts wholesale
+        if (matcher is None or source[0] is not cls._custom_limits
+                or source[1] is not cls._default_limits):
+            rules = list(cls._custom_limits.items()) + [
+                (pattern, limit) for pattern, limit in cls._default_limits.items()
+                if pattern != '_default'
+            ]
+            matcher = _PrefixMatcher(rules)
+            cls._matcher, cls._matcher_source = matcher, (cls._custom_limits, cls._default_limits)
+        return matcher
+    
+    @classmethod
+    def get_rule(cls, path: str) -> Tuple[str, Dict[str, int]]:
+        """Get the (pattern, limit) rule that applies to a path"""
+        rule = cls._get_matcher().match(path)
+        if rule is None:
+            return '_default', cls._default_limits['_default']
+        return rule[1], rule[2]
+    
     @classmethod
     def get_limit(cls, path: str) -> Dict[str, int]:
         """Get rate limit for a path"""
-        cls._load_limits()
-        
-        # Check custom limits first
-        for pattern, limit in cls._custom_limits.items():
-            if path.startswith(pattern):
-                return limit
-        
-        # Check default limits
-        for pattern, limit in cls._default_limits.items():
-            if pattern != '_default' and path.startswith(pattern):
-                return limit
-        
-        return cls._default_limits['_default']
+        return cls.get_rule(path)[1]
     
     @classmethod
     def set_custom_limit(cls, path: str, rpm: int, burst: int):
         """Set custom rate limit for a path pattern"""
-        cls._custom_limits[path] = {'rpm': rpm, 'burst': burst}
+        limit = {'rpm': rpm, 'burst': burst}
+        if cls._custom_limits.get(path) == limit:
+            return
+        cls._custom_limits[path] = limit
+        cls._matcher = None
         logger.info(f"Custom rate limit set: {path} -> {rpm} rpm, {burst} burst")
     
     @classmethod
@@ -192,6 +252,7 @@ class RateLimitConfig:
         """Remove custom rate limit"""
         if path in cls._custom_limits:
             del cls._custom_limits[path]
+            cls._matcher = None
     
     @classmethod
     def add_whitelist(cls, ip: str):
@@ -242,27 +303,36 @@ class RateLimitConfig:
 
 class RateLimiter:
     """
-    Token bucket rate limiter with sliding window
+    Token bucket rate limiter, one bucket per client IP and matched rule
     Thread-safe implementation
     """
     
-    def __init__(self):
-        self._buckets: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    def __init__(self, store: Optional[BucketStore] = None):
+        self._store = store if store is not None else get_store()
         self._lock = Lock()
-        self._stats = {
+        self._stats = self._empty_stats()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
             'total_requests': 0,
             'rate_limited': 0,
+            'bypassed': 0,
+            # Keyed by matched rule, so bounded by the configuration
             'by_endpoint': defaultdict(lambda: {'allowed': 0, 'blocked': 0})
         }
     
-    def _get_key(self, ip: str, path: str) -> str:
-        """Generate bucket key from IP and path pattern"""
-        # Normalize path to pattern
-        default_limits = RateLimitConfig.get_default_limits()
-        for pattern in default_limits.keys():
-            if pattern != '_default' and path.startswith(pattern):
-                return f"{ip}:{pattern}"
-        return f"{ip}:_default"
+    def _count(self, rule: str = None, allowed: bool = True):
+        with self._lock:
+            if rule is None:
+                self._stats['bypassed'] += 1
+                return
+            self._stats['total_requests'] += 1
+            if allowed:
+                self._stats['by_endpoint'][rule]['allowed'] += 1
+            else:
+                self._stats['rate_limited'] += 1
+                self._stats['by_endpoint'][rule]['blocked'] += 1
     
     def check_rate_limit(self, ip: str, path: str) -> Tuple[bool, Dict[str, Any]]:
         """
@@ -279,101 +349,58 @@ class RateLimiter:
             return True, {'enabled': False}
         
         if RateLimitConfig.is_whitelisted(ip):
+            self._count()
             return True, {'whitelisted': True}
         
-        limit = RateLimitConfig.get_limit(path)
+        pattern, limit = RateLimitConfig.get_rule(path)
         rpm = limit['rpm']
         burst = limit['burst']
+        seconds_per_token = 60.0 / max(rpm, 1)
         
-        key = self._get_key(ip, path)
-        now = time.time()
-        window = 60.0  # 1 minute window
+        allowed, tokens = self._store.take(f"{ip}:{pattern}", rpm, burst)
+        self._count(pattern, allowed)
         
-        with self._lock:
-            self._stats['total_requests'] += 1
-            
-            if key not in self._buckets:
-                self._buckets[key] = {
-                    'tokens': burst,
-                    'last_update': now,
-                    'requests': []
-                }
-            
-            bucket = self._buckets[key]
-            
-            # Clean old requests outside window
-            bucket['requests'] = [t for t in bucket['requests'] if now - t < window]
-            
-            # Replenish tokens based on time elapsed
-            elapsed = now - bucket['last_update']
-            tokens_to_add = (elapsed / window) * rpm
-            bucket['tokens'] = min(burst, bucket['tokens'] + tokens_to_add)
-            bucket['last_update'] = now
-            
-            # Check if we have tokens
-            requests_in_window = len(bucket['requests'])
-            
-            if bucket['tokens'] >= 1 and requests_in_window < rpm:
-                bucket['tokens'] -= 1
-                bucket['requests'].append(now)
-                self._stats['by_endpoint'][path]['allowed'] += 1
-                
-                return True, {
-                    'allowed': True,
-                    'remaining': int(bucket['tokens']),
-                    'limit': rpm,
-                    'reset': int(now + window - (bucket['requests'][0] if bucket['requests'] else now))
-                }
-            else:
-                self._stats['rate_limited'] += 1
-                self._stats['by_endpoint'][path]['blocked'] += 1
-                
-                # Calculate retry-after
-                if bucket['requests']:
-                    oldest = bucket['requests'][0]
-                    retry_after = int(window - (now - oldest)) + 1
-                else:
-                    retry_after = int(window)
-                
-                return False, {
-                    'allowed': False,
-                    'remaining': 0,
-                    'limit': rpm,
-                    'retry_after': retry_after,
-                    'message': f'Rate limit exceeded. Try again in {retry_after}s'
-                }
+        if allowed:
+            return True, {
+                'allowed': True,
+                'remaining': int(tokens),
+                'limit': rpm,
+                # Seconds until the bucket is full again
+                'reset': math.ceil(max(0.0, burst - tokens) * seconds_per_token)
+            }
+        
+        retry_after = max(1, math.ceil((1 - tokens) * seconds_per_token))
+        return False, {
+            'allowed': False,
+            'remaining': 0,
+            'limit': rpm,
+            'retry_after': retry_after,
+            'message': f'Rate limit exceeded. Try again in {retry_after}s'
+        }
     
     def get_stats(self) -> Dict[str, Any]:
         """Get rate limiting statistics"""
         with self._lock:
             return {
+                'backend': self._store.name,
                 'total_requests': self._stats['total_requests'],
                 'rate_limited': self._stats['rate_limited'],
+                'bypassed': self._stats['bypassed'],
                 'rate_limited_percent': round(
                     (self._stats['rate_limited'] / self._stats['total_requests'] * 100)
                     if self._stats['total_requests'] > 0 else 0, 2
                 ),
-                'by_endpoint': dict(self._stats['by_endpoint'])
+                'by_endpoint': {rule: dict(counts) for rule, counts in self._stats['by_endpoint'].items()}
             }
     
     def reset_stats(self):
         """Reset statistics"""
         with self._lock:
-            self._stats = {
-                'total_requests': 0,
-                'rate_limited': 0,
-                'by_endpoint': defaultdict(lambda: {'allowed': 0, 'blocked': 0})
-            }
+            self._stats = self._empty_stats()
     
     def clear_bucket(self, ip: str = None):
         """Clear rate limit buckets"""
-        with self._lock:
-            if ip:
-                keys_to_remove = [k for k in self._buckets.keys() if k.startswith(f"{ip}:")]
-                for key in keys_to_remove:
-                    del self._buckets[key]
-            else:
-                self._buckets.clear()
+        self._store.clear(f"{ip}:" if ip else '')
 
 
 # Global rate limiter instance — preserved across importlib.reload() so tests
@@ -20,7 +20,6 @@ from typing import Optional, Tuple
 from models import Certificate
 from models.acme_models import AcmeOrder
 from utils.datetime_utils import utc_now
-from utils.serial_format import serial_to_int, serial_variants
 
 # How often a client should re-poll the renewalInfo resource (RFC 9773 §4.2
 # recommends advertising this via Retry-After).
@@ -74,17 +73,15 @@ def _aki_matches(stored_aki: Optional[str], wanted_hex: str) -> bool:
 def find_certificate(aki_hex: str, serial_int: int) -> Optional[Certificate]:
     """Locate an issued certificate by AKI + serial.
 
-    Serial numbers are stored inconsistently (decimal or hex) across the
-    DB's history, so we match on the integer value and confirm the AKI to
+    Matches on the canonical ``serial_hex`` column and confirms the AKI to
     avoid cross-CA collisions.
     """
-    candidates = serial_variants(serial_int)
     rows = (Certificate.query
             .filter(Certificate.crt.isnot(None))
-            .filter(Certificate.serial_number.in_(candidates))
+            .filter(Certificate.serial_hex == format(serial_int, 'x'))
             .all())
     for cert in rows:
-        if serial_to_int(cert.serial_number) == serial_int and _aki_matches(cert.aki, aki_hex):
+        if _aki_matches(cert.aki, aki_hex):
             return cert
     return None
 
@@ -0,0 +1,90 @@
+"""Pruning of settled ACME order history.
+
+Every order leaves an authorization per identifier and up to four challenges
+per authorization behind, forever. Once an authorization has been expired
+for ACME_HISTORY_RETENTION_DAYS nothing reads it any more: reuse only
+considers unexpired authorizations and clients never poll it again. This
+removes those authorizations with their challenges, and orders that never
+produced a certificate. Orders that did are kept; revocation by account key
+and ARI ownership checks look them up by certificate.
+
+Rows are deleted in batches of BATCH_SIZE, one commit per batch, so a large
+backlog never holds long locks. ``ACME_HISTORY_RETENTION_DAYS=0`` disables
+pruning.
+"""
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+from models import db
+from models.acme_models import AcmeAuthorization, AcmeChallenge, AcmeOrder
+from utils.datetime_utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.getenv('ACME_HISTORY_RETENTION_DAYS', '90'))
+BATCH_SIZE = 1000
+
+
+def _commit() -> None:
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"DB commit failed: {e}")
+        raise
+
+
+def _prune_authorizations(cutoff) -> Dict[str, int]:
+    removed = {'authorizations': 0, 'challenges': 0}
+    while True:
+        authz_ids = [row[0] for row in db.session.query(AcmeAuthorization.authorization_id).filter(
+            AcmeAuthorization.expires < cutoff,
+        ).limit(BATCH_SIZE).all()]
+        if not authz_ids:
+            return removed
+        removed['challenges'] += AcmeChallenge.query.filter(
+            AcmeChallenge.authorization_id.in_(authz_ids)
+        ).delete(synchronize_session=False)
+        removed['authorizations'] += AcmeAuthorization.query.filter(
+            AcmeAuthorization.authorization_id.in_(authz_ids)
+        ).delete(synchronize_session=False)
+        _commit()
+
+
+def _prune_orders(cutoff) -> int:
+    removed = 0
+    while True:
+        order_ids = [row[0] for row in db.session.query(AcmeOrder.order_id).filter(
+            AcmeOrder.expires < cutoff,
+            AcmeOrder.certificate_id.is_(None),
+            ~AcmeOrder.authorizations.any(),
+        ).limit(BATCH_SIZE).all()]
+        if not order_ids:
+            return removed
+        removed += AcmeOrder.query.filter(
+            AcmeOrder.order_id.in_(order_ids)
+        ).delete(synchronize_session=False)
+        _commit()
+
+
+def prune_history(retention_days: Optional[int] = None) -> Dict[str, int]:
+    """Delete ACME history older than the retention period.
+
+    Returns:
+        Counts of deleted challenges, authorizations and orders
+    """
+    days = RETENTION_DAYS if retention_days is None else retention_days
+    if days <= 0:
+        return {'challenges': 0, 'authorizations': 0, 'orders': 0}
+    cutoff = utc_now() - timedelta(days=days)
+    result = _prune_authorizations(cutoff)
+    # Authorizations of these orders expire with them, so they are gone now
+    result['orders'] = _prune_orders(cutoff)
+    if any(result.values()):
+        logger.info(
+            f"Pruned ACME history older than {days} days: {result['orders']} orders, "
+            f"{result['authorizations']} authorizations, {result['challenges']} challenges"
+        )
+    return result
@@ -17,8 +17,56 @@ logger = logging.getLogger(__name__)
 _HTTP01_REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
 _HTTP01_MAX_REDIRECTS = 5
 
+CHALLENGE_VALIDATORS = {
+    'http-01': 'validate_http01_challenge',
+    'dns-01': 'validate_dns01_challenge',
+    'dns-persist-01': 'validate_dns_persist01_challenge',
+    'tls-alpn-01': 'validate_tls_alpn01_challenge',
+}
+
+
+class ChallengeRetry(Exception):
+    """A validation attempt failed for a network-level reason and may be retried."""
+
+
+def _is_transient(exc: Exception) -> bool:
+    import requests
+    import dns.exception
+    import dns.resolver
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code >= 500
+    return isinstance(exc, (OSError, dns.exception.Timeout, dns.resolver.NoNameservers))
+
 
 class ChallengeMixin:
+    # Set by the validation worker while attempts remain: transient failures
+    # raise ChallengeRetry instead of invalidating the challenge.
+    _retry_transient = False
+
+    def run_challenge_validation(self, challenge: AcmeChallenge, account,
+                                 retry_transient: bool = False) -> bool:
+        """Run the validator for the challenge's type.
+
+        Returns:
+            True when validation succeeded, False when it failed
+
+        Raises:
+            ChallengeRetry: with ``retry_transient``, when the attempt failed
+                for a transient reason and left the challenge untouched
+        """
+        validator = getattr(self, CHALLENGE_VALIDATORS[challenge.type])
+        self._retry_transient = retry_transient
+        try:
+            return validator(challenge, account)
+        finally:
+            self._retry_transient = False
+
+    def _fail_challenge(self, challenge: AcmeChallenge, error_type: str, exc: Exception) -> None:
+        """Invalidate after an unexpected error, or defer it when a retry is allowed."""
+        if self._retry_transient and _is_transient(exc):
+            raise ChallengeRetry(f"{error_type}: {exc}") from exc
+        self._invalidate_challenge(challenge, error_type, str(exc))
+
     def validate_http01_challenge(
         self,
         challenge: AcmeChallenge,
@@ -138,7 +186,7 @@ class ChallengeMixin:
                 return False
 
         except Exception as e:
-            self._invalidate_challenge(challenge, 'connection', str(e))
+            self._fail_challenge(challenge, 'connection', e)
             try:
                 db.session.commit()
             except Exception as commit_err:
@@ -300,7 +348,7 @@ class ChallengeMixin:
             return False
 
         except Exception as e:
-            self._invalidate_challenge(challenge, 'dns', str(e))
+            self._fail_challenge(challenge, 'dns', e)
             try:
                 db.session.commit()
             except Exception as commit_err:
@@ -588,7 +636,7 @@ class ChallengeMixin:
                         raise ValueError("Certificate missing acmeIdentifier extension")
         
         except Exception as e:
-            self._invalidate_challenge(challenge, 'tls', str(e))
+            self._fail_challenge(challenge, 'tls', e)
             try:
                 db.session.commit()
             except Exception as commit_err:
@@ -3,10 +3,32 @@ import json
 import hashlib
 import base64
 import logging
+import os
+import threading
+import time
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Answers cached by the shared DNS-01 resolvers expire after at most this
+# long, whatever their TTL: enough for the TXT lookups of one validation
+# burst (apex + wildcard, dns-persist ancestors), too short to hide a record
+# the client fixes between orders.
+DNS_CACHE_TTL_SEC = float(os.getenv('ACME_DNS_CACHE_TTL_SEC', '10'))
+_resolver_lock = threading.Lock()
+_resolvers = {}  # tuple of nameserver entries -> dns.resolver.Resolver
+
+
+def _short_lived_cache():
+    import dns.resolver
+
+    class _ShortLivedCache(dns.resolver.LRUCache):
+        def put(self, key, value):
+            value.expiration = min(value.expiration, time.time() + DNS_CACHE_TTL_SEC)
+            super().put(key, value)
+
+    return _ShortLivedCache(max_size=1024)
+
 
 class CryptoMixin:
     def _compute_jwk_thumbprint(self, jwk: Dict[str, Any]) -> str:
@@ -101,28 +123,41 @@ class CryptoMixin:
         """dns.resolver.Resolver honoring ``acme.dns01_nameservers``, or None.
 
         Supports 'host:port' entries; the port of the first entry carrying
-        one wins (dnspython resolvers expose a single shared port).
+        one wins (dnspython resolvers expose a single shared port). The
+        resolver is shared per nameserver setting, with a short-lived
+        answer cache (DNS_CACHE_TTL_SEC).
         """
-        custom_ns = [e for e in self._acme_dns01_nameservers() if e]
+        custom_ns = tuple(e for e in self._acme_dns01_nameservers() if e)
         if not custom_ns:
             return None
-        import dns.resolver
-        resolver = dns.resolver.Resolver(configure=False)
-        hosts, port = [], None
-        for entry in custom_ns:
-            if ':' in entry and entry.count(':') == 1:  # ipv4:port
-                host, _, p = entry.rpartition(':')
-                hosts.append(host)
-                if port is None:
-                    try:
-                        port = int(p)
-                    except ValueError:
-                        port = 53
-            else:
-                hosts.append(entry)
-        resolver.nameservers = hosts
-        if port:
-            resolver.port = port
-        resolver.timeout = 5
-        resolver.lifetime = 10
+        with _resolver_lock:
+            resolver = _resolvers.get(custom_ns)
+            if resolver is None:
+                resolver = _build_dns01_resolver(custom_ns)
+                _resolvers.clear()  # only the current setting is ever used
+                _resolvers[custom_ns] = resolver
         return resolver
+
+
+def _build_dns01_resolver(custom_ns):
+    import dns.resolver
+    resolver = dns.resolver.Resolver(configure=False)
+    hosts, port = [], None
+    for entry in custom_ns:
+        if ':' in entry and entry.count(':') == 1:  # ipv4:port
+            host, _, p = entry.rpartition(':')
+            hosts.append(host)
+            if port is None:
+                try:
+                    port = int(p)
+                except ValueError:
+                    port = 53
+        else:
+            hosts.append(entry)
+    resolver.nameservers = hosts
+    if port:
+        resolver.port = port
+    resolver.timeout = 5
+    resolver.lifetime = 10
+    resolver.cache = _short_lived_cache()
+    return resolver
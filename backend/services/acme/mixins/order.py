@@ -382,7 +382,7 @@ class OrderMixin:
                 type="dns-01",
                 status=status,
                 token=dns_token,
-                url=f"{self.base_url}/acme/challenge/{secrets.token_urlsafe(16)}",
+                **self._challenge_locator(),
                 validated=validated
             )
             auth.challenges.append(dns_challenge)
@@ -399,7 +399,7 @@ class OrderMixin:
                         type="dns-persist-01",
                         status=status,
                         token=secrets.token_urlsafe(32),
-                        url=f"{self.base_url}/acme/challenge/{secrets.token_urlsafe(16)}",
+                        **self._challenge_locator(),
                         validated=validated
                     )
                     auth.challenges.append(persist_challenge)
@@ -416,7 +416,7 @@ class OrderMixin:
             type="http-01",
             status=status,
             token=http_token,
-            url=f"{self.base_url}/acme/challenge/{secrets.token_urlsafe(16)}",
+            **self._challenge_locator(),
             validated=validated
         )
         auth.challenges.append(http_challenge)
@@ -428,11 +428,20 @@ class OrderMixin:
             type="tls-alpn-01",
             status=status,
             token=tls_token,
-            url=f"{self.base_url}/acme/challenge/{secrets.token_urlsafe(16)}",
+            **self._challenge_locator(),
             validated=validated
         )
         auth.challenges.append(tls_challenge)
-    
+
+    def _challenge_locator(self) -> Dict[str, str]:
+        """challenge_id and URL of a new challenge: the URL ends in the id,
+        so the challenge endpoint resolves it through the unique index."""
+        challenge_id = secrets.token_urlsafe(32)
+        return {
+            'challenge_id': challenge_id,
+            'url': f"{self.base_url}/acme/challenge/{challenge_id}",
+        }
+
     @staticmethod
     def _problem_data(error_type: str, detail: str) -> Dict[str, Any]:
         return {
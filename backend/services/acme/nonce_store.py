@@ -0,0 +1,306 @@
+"""ACME Replay-Nonce backends (RFC 8555 §6.5).
+
+Every ACME response carries a fresh ``Replay-Nonce`` and every JWS consumes
+one, so a database-backed nonce costs an INSERT and an UPDATE, each with its
+own commit, per request. The backend is picked with ``ACME_NONCE_BACKEND``:
+
+``memory``
+    Outstanding nonces live in a bounded, insertion-ordered ring in this
+    process; consuming one removes it. The oldest are evicted first when the
+    ring is full. Only suitable when a single worker serves ACME.
+``redis``
+    One key per outstanding nonce with the nonce TTL, consumed with an
+    atomic DELETE. Shared by every worker that points at ``REDIS_URL``.
+``hmac``
+    Stateless nonces: a timestamp and random bytes, signed with a key derived
+    from SECRET_KEY, accepted for ``ACME_NONCE_HMAC_WINDOW_SEC``. Consumed
+    nonces are remembered in two rotating Bloom filters covering the window;
+    a false positive only makes the client retry with a new nonce (badNonce).
+    Replays are detected per process, so it is refused (the database is used
+    instead) when ``UCM_WORKERS`` is above one.
+``db``
+    The ``acme_nonces`` table, as before.
+
+``auto`` (the default) uses Redis when ``REDIS_URL`` is set and the redis
+library is installed. Without it, the in-memory ring serves a single worker
+and the database several, as it does for an unavailable ``redis`` or a
+``memory`` backend: a nonce issued by one worker must be consumable by any
+other. A nonce lost on restart or eviction is answered with badNonce, which
+clients retry by design.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import os
+import secrets
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from models import db
+from models.acme_models import AcmeNonce
+from utils.datetime_utils import utc_now
+from utils.redis_backend import BackendSlot, redis_client
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv('ACME_NONCE_BACKEND', 'auto').strip().lower()
+NONCE_TTL_SEC = int(os.getenv('ACME_NONCE_TTL_SEC', '3600'))
+MEMORY_CAPACITY = int(os.getenv('ACME_NONCE_MEMORY_CAPACITY', '100000'))
+HMAC_WINDOW_SEC = int(os.getenv('ACME_NONCE_HMAC_WINDOW_SEC', '300'))
+BLOOM_CAPACITY = int(os.getenv('ACME_NONCE_BLOOM_CAPACITY', '200000'))
+BLOOM_ERROR_RATE = 1e-6
+_REDIS_PREFIX = 'ucm:acme:nonce:'
+
+
+class NonceStore:
+    name = 'base'
+
+    def issue(self) -> str:
+        raise NotImplementedError
+
+    def consume(self, token: str) -> bool:
+        """Accept *token* once; False when unknown, expired or already used."""
+        raise NotImplementedError
+
+    def cleanup(self) -> int:
+        """Drop expired state; returns the number of nonces removed."""
+        return 0
+
+
+class DatabaseNonceStore(NonceStore):
+    name = 'db'
+
+    def issue(self) -> str:
+        token = secrets.token_urlsafe(32)
+        db.session.add(AcmeNonce(token=token, expires_at=utc_now() + timedelta(seconds=NONCE_TTL_SEC)))
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"DB commit failed: {e}")
+            raise
+        return token
+
+    def consume(self, token: str) -> bool:
+        now = utc_now()
+        # Atomic: update used=True WHERE token=X AND used=False AND not expired
+        updated = AcmeNonce.query.filter(
+            AcmeNonce.token == token,
+            AcmeNonce.used == False,  # noqa: E712
+            AcmeNonce.expires_at > now,
+        ).update({'used': True, 'used_at': now}, synchronize_session=False)
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"DB commit failed: {e}")
+            raise
+        return updated > 0
+
+    def cleanup(self) -> int:
+        deleted = AcmeNonce.query.filter(
+            AcmeNonce.expires_at < utc_now()
+        ).delete(synchronize_session=False)
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"DB commit failed: {e}")
+            raise
+        return deleted
+
+
+class MemoryNonceStore(NonceStore):
+    name = 'memory'
+
+    def __init__(self, capacity: int = MEMORY_CAPACITY, ttl: int = NONCE_TTL_SEC):
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._outstanding = OrderedDict()  # token -> monotonic expiry, oldest first
+
+    def issue(self) -> str:
+        token = secrets.token_urlsafe(32)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._outstanding[token] = expires
+            while len(self._outstanding) > self.capacity:
+                self._outstanding.popitem(last=False)
+        return token
+
+    def consume(self, token: str) -> bool:
+        with self._lock:
+            expires = self._outstanding.pop(token, None)
+        return expires is not None and expires > time.monotonic()
+
+    def cleanup(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            # Issue order is expiry order, so expired tokens sit at the front
+            while self._outstanding:
+                token, expires = next(iter(self._outstanding.items()))
+                if expires > now:
+                    break
+                del self._outstanding[token]
+                removed += 1
+        return removed
+
+
+class RedisNonceStore(NonceStore):
+    name = 'redis'
+
+    def __init__(self, client, ttl: int = NONCE_TTL_SEC):
+        self._client = client
+        self.ttl = ttl
+
+    def issue(self) -> str:
+        token = secrets.token_urlsafe(32)
+        self._client.set(_REDIS_PREFIX + token, b'1', ex=self.ttl)
+        return token
+
+    def consume(self, token: str) -> bool:
+        return self._client.delete(_REDIS_PREFIX + token) == 1
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings (double hashing on SHA-256)."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._bits = bits
+        self._hashes = max(1, round(bits / capacity * math.log(2)))
+        self._array = bytearray((bits + 7) // 8)
+
+    def _positions(self, item: bytes):
+        digest = hashlib.sha256(item).digest()
+        h1, h2 = struct.unpack_from('>QQ', digest)
+        h2 |= 1
+        return ((h1 + i * h2) % self._bits for i in range(self._hashes))
+
+    def add(self, item: bytes) -> None:
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class HmacNonceStore(NonceStore):
+    """Signed ``timestamp || random`` nonces; nothing is stored at issue time."""
+    name = 'hmac'
+
+    _TS = struct.Struct('>Q')
+    _RANDOM_BYTES = 16
+    _MAC_BYTES = 16
+
+    def __init__(self, secret: bytes, window: int = HMAC_WINDOW_SEC,
+                 bloom_capacity: int = BLOOM_CAPACITY):
+        self._key = hmac.new(secret, b'ucm-acme-nonce', hashlib.sha256).digest()
+        self.window = max(1, window)
+        self._bloom_capacity = bloom_capacity
+        self._lock = threading.Lock()
+        # Each filter covers one window; together they cover every nonce
+        # still young enough to be accepted
+        self._current = BloomFilter(bloom_capacity)
+        self._previous = BloomFilter(bloom_capacity)
+        self._rotated_at = time.time()
+
+    def _mac(self, body: bytes) -> bytes:
+        return hmac.new(self._key, body, hashlib.sha256).digest()[:self._MAC_BYTES]
+
+    def issue(self) -> str:
+        body = self._TS.pack(int(time.time())) + secrets.token_bytes(self._RANDOM_BYTES)
+        return base64.urlsafe_b64encode(body + self._mac(body)).rstrip(b'=').decode('ascii')
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self._rotated_at
+        if elapsed < self.window:
+            return
+        self._previous = self._current if elapsed < 2 * self.window else BloomFilter(self._bloom_capacity)
+        self._current = BloomFilter(self._bloom_capacity)
+        self._rotated_at = now
+
+    def consume(self, token: str) -> bool:
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        except (ValueError, TypeError):
+            return False
+        body_len = self._TS.size + self._RANDOM_BYTES
+        if len(raw) != body_len + self._MAC_BYTES:
+            return False
+        body, mac = raw[:body_len], raw[body_len:]
+        if not hmac.compare_digest(mac, self._mac(body)):
+            return False
+        now = time.time()
+        issued = self._TS.unpack_from(body)[0]
+        if not (issued <= now + 1 and now - issued <= self.window):
+            return False
+        with self._lock:
+            self._rotate(now)
+            if body in self._current or body in self._previous:
+                return False
+            self._current.add(body)
+        return True
+
+
+def _secret() -> bytes:
+    from flask import current_app, has_app_context
+    secret = current_app.config.get('SECRET_KEY') if has_app_context() else None
+    secret = secret or os.getenv('SECRET_KEY')
+    if not secret:
+        raise RuntimeError("SECRET_KEY is required for HMAC ACME nonces")
+    return secret.encode('utf-8') if isinstance(secret, str) else secret
+
+
+def _workers() -> int:
+    """The effective worker count (gunicorn_config.py exports it)."""
+    try:
+        return max(1, int(os.getenv('UCM_WORKERS', '1')))
+    except ValueError:
+        return 1
+
+
+def _build(backend: str) -> NonceStore:
+    if backend == 'db':
+        return DatabaseNonceStore()
+    workers = _workers()
+    if backend == 'hmac':
+        if workers == 1:
+            return HmacNonceStore(_secret())
+        logger.error(f"ACME_NONCE_BACKEND=hmac only detects replays within one process, "
+                     f"refused with UCM_WORKERS={workers}: using the database")
+        return DatabaseNonceStore()
+    if backend in ('redis', 'auto'):
+        client = redis_client()
+        if client is not None:
+            return RedisNonceStore(client)
+        if backend == 'redis':
+            logger.warning("ACME_NONCE_BACKEND=redis but Redis is unavailable")
+    elif backend != 'memory':
+        logger.warning(f"Unknown ACME_NONCE_BACKEND {backend!r}")
+    if workers > 1:
+        if backend == 'memory':
+            logger.warning(f"ACME nonces in memory would not be shared by UCM_WORKERS={workers}, "
+                           "using the database")
+        return DatabaseNonceStore()
+    return MemoryNonceStore()
+
+
+_backend: BackendSlot[NonceStore] = BackendSlot('ACME nonce', _build, lambda: BACKEND)
+get_store = _backend.get
+configure = _backend.configure
+reset = _backend.reset
+
+
+def cleanup() -> int:
+    """Scheduler entry point: drop expired nonces of the active backend."""
+    removed = get_store().cleanup()
+    if removed:
+        logger.debug(f"Removed {removed} expired ACME nonces")
+    return removed
@@ -0,0 +1,320 @@
+"""Asynchronous ACME challenge validation (RFC 8555 §7.5.1).
+
+Responding to a challenge only moves it to ``processing``; the HTTP fetch,
+DNS query or TLS handshake runs here, on a bounded thread pool, while the
+client polls the authorization. A slow or unreachable client endpoint then
+ties up a validation thread instead of a server worker.
+
+Jobs are admitted under three limits: MAX_WORKERS validations overall,
+PER_IDENTIFIER at a time for one identifier (apex and wildcard count as the
+same name) and PER_ACCOUNT for one ACME account; a job that would exceed a
+limit waits in line. An attempt that fails for a network-level reason
+(timeout, refused connection, SERVFAIL, 5xx) is retried after the next of
+RETRY_DELAYS, up to MAX_ATTEMPTS attempts; the last failure invalidates the
+challenge as before.
+
+Under TESTING, or with ``ACME_VALIDATION_ASYNC=false``, validation runs
+synchronously in the request (single attempt), as it used to.
+
+Queued work lives in memory, so a restart leaves challenges ``processing``
+with nobody validating them; :func:`resubmit_orphans`, a scheduler task that
+first runs shortly after startup, queues them again.
+"""
+import logging
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv('ACME_VALIDATION_WORKERS', '8'))
+PER_IDENTIFIER = int(os.getenv('ACME_VALIDATION_PER_IDENTIFIER', '1'))
+PER_ACCOUNT = int(os.getenv('ACME_VALIDATION_PER_ACCOUNT', '4'))
+MAX_ATTEMPTS = int(os.getenv('ACME_VALIDATION_ATTEMPTS', '3'))
+RETRY_DELAYS = (5.0, 15.0)
+ASYNC_ENABLED = os.getenv('ACME_VALIDATION_ASYNC', 'true').lower() not in ('0', 'false', 'no')
+
+
+@dataclass(frozen=True)
+class ValidationJob:
+    challenge_id: str
+    account_id: str
+    identifier: str
+    base_url: str
+    client_ip: Optional[str] = None
+    app: object = None
+    attempt: int = 1
+
+
+class ValidationPool:
+    """Runs validation jobs under global, per-identifier and per-account limits.
+
+    ``runner(job, final)`` performs one attempt and returns False when it
+    should be retried (only ever when ``final`` is False).
+    """
+
+    def __init__(self, runner: Callable[[ValidationJob, bool], bool],
+                 max_workers: int = MAX_WORKERS, per_identifier: int = PER_IDENTIFIER,
+                 per_account: int = PER_ACCOUNT, max_attempts: int = MAX_ATTEMPTS,
+                 retry_delays=RETRY_DELAYS):
+        self._runner = runner
+        self.max_workers = max(1, max_workers)
+        self.per_identifier = max(1, per_identifier)
+        self.per_account = max(1, per_account)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delays = tuple(retry_delays) or (0.0,)
+        self._cond = threading.Condition()
+        self._waiting = deque()
+        self._tracked = set()  # challenge ids queued, running or awaiting a retry
+        self._timers: Dict[str, threading.Timer] = {}
+        self._running = 0
+        self._by_identifier = Counter()
+        self._by_account = Counter()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = Counter()
+
+    def submit(self, job: ValidationJob) -> bool:
+        """Queue *job*; False when its challenge is already being validated."""
+        with self._cond:
+            if job.challenge_id in self._tracked:
+                return False
+            self._tracked.add(job.challenge_id)
+            self._waiting.append(job)
+            self._counters['submitted'] += 1
+        self._dispatch()
+        return True
+
+    def _admissible(self, job: ValidationJob) -> bool:
+        return (self._by_identifier[job.identifier] < self.per_identifier
+                and self._by_account[job.account_id] < self.per_account)
+
+    def _dispatch(self) -> None:
+        started = []
+        with self._cond:
+            blocked = deque()
+            while self._waiting and self._running < self.max_workers:
+                job = self._waiting.popleft()
+                if not self._admissible(job):
+                    blocked.append(job)
+                    continue
+                self._running += 1
+                self._by_identifier[job.identifier] += 1
+                self._by_account[job.account_id] += 1
+                started.append(job)
+            blocked.extend(self._waiting)
+            self._waiting = blocked
+            if started and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='AcmeValidation')
+            executor = self._executor
+        for job in started:
+            executor.submit(self._run, job)
+
+    def _run(self, job: ValidationJob) -> None:
+        final = job.attempt >= self.max_attempts
+        try:
+            done = self._runner(job, final) or final
+        except Exception as e:
+            logger.error(f"ACME validation of challenge {job.challenge_id} failed: {e}", exc_info=True)
+            done = True
+        with self._cond:
+            self._running -= 1
+            self._by_identifier[job.identifier] -= 1
+            self._by_account[job.account_id] -= 1
+            if done:
+                self._tracked.discard(job.challenge_id)
+                self._counters['completed'] += 1
+            else:
+                self._counters['retried'] += 1
+                delay = self.retry_delays[min(job.attempt, len(self.retry_delays)) - 1]
+                timer = threading.Timer(delay, self._requeue, args=(replace(job, attempt=job.attempt + 1),))
+                timer.daemon = True
+                self._timers[job.challenge_id] = timer
+                timer.start()
+            self._cond.notify_all()
+        self._dispatch()
+
+    def _requeue(self, job: ValidationJob) -> None:
+        with self._cond:
+            if self._timers.pop(job.challenge_id, None) is None:
+                return  # shut down meanwhile
+            self._waiting.append(job)
+        self._dispatch()
+
+    def is_tracked(self, challenge_id: str) -> bool:
+        with self._cond:
+            return challenge_id in self._tracked
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no job is queued, running or awaiting a retry."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._tracked, timeout)
+
+    def shutdown(self) -> None:
+        """Drop queued jobs and pending retries; running attempts finish."""
+        with self._cond:
+            for timer in self._timers.values():
+                timer.cancel()
+            for job in self._waiting:
+                self._tracked.discard(job.challenge_id)
+            for challenge_id in self._timers:
+                self._tracked.discard(challenge_id)
+            self._timers.clear()
+            self._waiting.clear()
+            executor, self._executor = self._executor, None
+            self._cond.notify_all()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'running': self._running,
+                'waiting': len(self._waiting),
+                'retry_scheduled': len(self._timers),
+                **self._counters,
+            }
+
+
+def identifier_key(authorization) -> str:
+    """Concurrency key of an authorization: its name without any wildcard label."""
+    if authorization is None:
+        return ''
+    value = (authorization.identifier_value or '').lower().rstrip('.')
+    return value[2:] if value.startswith('*.') else value
+
+
+def _audit_outcome(job: ValidationJob, challenge) -> None:
+    try:
+        from services.audit_service import AuditService
+        details = (f"type={challenge.type} domain={job.identifier or '?'} "
+                   f"status={challenge.status} account={job.account_id}")
+        if job.client_ip:
+            details += f" client={job.client_ip}"
+        AuditService.log_action(
+            username='acme',
+            action='acme.challenge.respond',
+            resource_type='acme_challenge',
+            resource_id=challenge.challenge_id,
+            details=details,
+            success=(challenge.status == 'valid'),
+        )
+    except Exception as audit_err:  # audit must never break validation
+        logger.warning(f"ACME audit log failed for challenge {job.challenge_id}: {audit_err}")
+
+
+def _attempt(job: ValidationJob, final: bool) -> bool:
+    """One validation attempt; False when a transient failure should be retried."""
+    from models.acme_models import AcmeAccount, AcmeChallenge
+    from services.acme.acme_service import AcmeService
+    from services.acme.mixins.challenge import ChallengeRetry
+
+    challenge = AcmeChallenge.query.filter_by(challenge_id=job.challenge_id).first()
+    account = AcmeAccount.query.filter_by(account_id=job.account_id).first()
+    if challenge is None or account is None or challenge.status != 'processing':
+        return True
+    try:
+        AcmeService(base_url=job.base_url).run_challenge_validation(
+            challenge, account, retry_transient=not final)
+    except ChallengeRetry as e:
+        logger.info(f"ACME challenge {job.challenge_id} attempt {job.attempt} failed, will retry: {e}")
+        return False
+    _audit_outcome(job, challenge)
+    return True
+
+
+def _run_in_app(job: ValidationJob, final: bool) -> bool:
+    with job.app.app_context():
+        try:
+            return _attempt(job, final)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+
+_lock = threading.Lock()
+_pool: Optional[ValidationPool] = None
+
+
+def get_pool() -> ValidationPool:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ValidationPool(_run_in_app)
+        return _pool
+
+
+def _inline() -> bool:
+    return not ASYNC_ENABLED or bool(current_app.config.get('TESTING'))
+
+
+def submit(challenge, account, base_url: str, client_ip: Optional[str] = None) -> None:
+    """Validate a ``processing`` challenge, in the background unless inline.
+
+    Must be called inside an app context, after the ``processing`` state
+    has been committed.
+    """
+    job = ValidationJob(
+        challenge_id=challenge.challenge_id,
+        account_id=account.account_id,
+        identifier=identifier_key(challenge.authorization),
+        base_url=base_url,
+        client_ip=client_ip,
+    )
+    if _inline():
+        _attempt(job, final=True)
+        return
+    get_pool().submit(replace(job, app=current_app._get_current_object()))
+
+
+def is_pending(challenge_id: str) -> bool:
+    """True while this process has the challenge queued, running or awaiting a retry."""
+    with _lock:
+        pool = _pool
+    return pool is not None and pool.is_tracked(challenge_id)
+
+
+def _base_url(challenge) -> str:
+    """The ACME base URL the challenge was issued under (its URL is absolute)."""
+    return (challenge.url or '').split('/acme/challenge/', 1)[0]
+
+
+def resubmit_orphans() -> int:
+    """Scheduler entry point: queue ``processing`` challenges not tracked here.
+
+    Returns the number of challenges queued again.
+    """
+    from models.acme_models import AcmeAccount, AcmeChallenge
+
+    queued = 0
+    for challenge in AcmeChallenge.query.filter_by(status='processing').all():
+        authz = challenge.authorization
+        if authz is None or authz.status != 'pending' or is_pending(challenge.challenge_id):
+            continue
+        account_id = authz.account_id or (authz.order.account_id if authz.order else None)
+        account = AcmeAccount.query.filter_by(account_id=account_id).first() if account_id else None
+        if account is None:
+            continue
+        submit(challenge, account, _base_url(challenge))
+        queued += 1
+    if queued:
+        logger.info(f"Queued {queued} orphaned ACME challenge validations")
+    return queued
+
+
+def reset() -> None:
+    """Drop the pool and its queued work (tests, shutdown)."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
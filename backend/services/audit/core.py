@@ -1,13 +1,83 @@
 import json
 import logging
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
 from flask import request, g, has_request_context
-from models import db, AuditLog
+from sqlalchemy import text
+from models import db, AuditLog, AuditChainHead
+from models.audit_log import SEED_CHAIN_HEAD_SQL
 from utils.datetime_utils import utc_now
 from utils.trusted_proxy import client_ip
 
 logger = logging.getLogger(__name__)
 
+_GENESIS_HASH = '0' * 64
+_VERIFY_CHUNK = 1000
+
+# Serializes appends within this process; the locked audit_chain_head row
+# does the same across worker processes (PostgreSQL).
+_append_lock = threading.Lock()
+# Entries buffered by AuditService.batch() on the current thread/greenlet
+_batch = threading.local()
+
+
+def _chain_head() -> AuditChainHead:
+    """Lock and return the chain-head row, seeding it if it is missing.
+
+    The seed is an INSERT ... ON CONFLICT DO NOTHING, so workers racing on a
+    database created before the row was seeded at create time all end up
+    locking the one row instead of failing on its primary key.
+    """
+    head = db.session.query(AuditChainHead).filter_by(id=1).with_for_update().first()
+    if head is None:
+        db.session.execute(text(SEED_CHAIN_HEAD_SQL))
+        head = db.session.query(AuditChainHead).filter_by(id=1).with_for_update().one()
+    return head
+
+
+def _append(entries: List[AuditLog]) -> bool:
+    """Insert *entries*, chain them onto the head and commit once."""
+    try:
+        with _append_lock:
+            head = _chain_head()
+            db.session.add_all(entries)
+            db.session.flush()
+
+            prev_hash = head.last_hash or _GENESIS_HASH
+            for entry in entries:
+                entry.prev_hash = prev_hash
+                entry.entry_hash = entry.compute_hash(prev_hash)
+                prev_hash = entry.entry_hash
+            head.last_id = entries[-1].id
+            head.last_hash = prev_hash
+
+            db.session.commit()
+    except Exception as e:
+        logger.error(f"Failed to create audit log: {e}")
+        db.session.rollback()
+        return False
+
+    for entry in entries:
+        _after_commit(entry)
+    return True
+
+
+def _after_commit(audit_log: AuditLog) -> None:
+    log_msg = f"AUDIT: {audit_log.action} by {audit_log.username} - {audit_log.details}"
+    if audit_log.success:
+        logger.info(log_msg)
+    else:
+        logger.warning(log_msg)
+
+    try:
+        from services.syslog_service import syslog_forwarder
+        if syslog_forwarder.is_enabled:
+            syslog_forwarder.send(audit_log)
+    except Exception as e:
+        # Syslog forwarding must never break audit logging itself.
+        logger.warning(f"Syslog forward failed for audit_log id={audit_log.id}: {e}", exc_info=True)
+
 
 class AuditCoreLoggingMixin:
 
@@ -61,83 +131,108 @@ class AuditCoreLoggingMixin:
                 success=success
             )
 
-            db.session.add(audit_log)
-            db.session.flush()
-
-            prev_log = AuditLog.query.filter(AuditLog.id < audit_log.id).order_by(AuditLog.id.desc()).first()
-            prev_hash = prev_log.entry_hash if prev_log and prev_log.entry_hash else '0' * 64
-            audit_log.prev_hash = prev_hash
-            audit_log.entry_hash = audit_log.compute_hash(prev_hash)
-
-            db.session.commit()
-
-            log_msg = f"AUDIT: {action} by {username} - {details}"
-            if success:
-                logger.info(log_msg)
-            else:
-                logger.warning(log_msg)
-
-            try:
-                from services.syslog_service import syslog_forwarder
-                if syslog_forwarder.is_enabled:
-                    syslog_forwarder.send(audit_log)
-            except Exception as e:
-                # Syslog forwarding must never break audit logging itself.
-                logger.warning(f"Syslog forward failed for audit_log id={audit_log.id}: {e}", exc_info=True)
+            pending = getattr(_batch, 'entries', None)
+            if pending is not None:
+                pending.append(audit_log)
+                return audit_log
 
-            return audit_log
+            return audit_log if _append([audit_log]) else None
 
         except Exception as e:
             logger.error(f"Failed to create audit log: {e}")
             db.session.rollback()
             return None
 
+    @staticmethod
+    @contextmanager
+    def batch():
+        """Buffer log_action() calls and write them with a single commit.
+
+        Entries are captured (user, IP, timestamp) when logged and chained in
+        call order when the block exits, even if it raised. Nested blocks join
+        the outermost one.
+        """
+        if getattr(_batch, 'entries', None) is not None:
+            yield
+            return
+        _batch.entries = []
+        try:
+            yield
+        finally:
+            entries, _batch.entries = _batch.entries, None
+            if entries:
+                _append(entries)
+
     @staticmethod
     def verify_integrity(start_id: int = None, end_id: int = None) -> dict:
-        query = AuditLog.query.order_by(AuditLog.id.asc())
-        if start_id:
-            query = query.filter(AuditLog.id >= start_id)
+        columns = (
+            AuditLog.id, AuditLog.timestamp, AuditLog.username, AuditLog.action,
+            AuditLog.resource_type, AuditLog.resource_id, AuditLog.details,
+            AuditLog.success, AuditLog.prev_hash, AuditLog.entry_hash,
+        )
+        query = db.session.query(*columns).order_by(AuditLog.id.asc())
         if end_id:
             query = query.filter(AuditLog.id <= end_id)
 
-        logs = query.all()
-        if not logs:
-            return {'valid': True, 'checked': 0, 'errors': []}
-
         errors = []
+        checked = 0
         # The first log in the verified range may NOT chain back to the
         # genesis (prev_hash = '0' * 64) when audit cleanup has purged
         # earlier records. Treat its stored prev_hash as the chain anchor
         # for this verification window — we can only attest integrity
         # of records that still exist.
-        prev_hash = logs[0].prev_hash or '0' * 64
-
-        for log in logs:
-            if not log.entry_hash:
-                prev_hash = '0' * 64
-                continue
-
-            if log.prev_hash and log.prev_hash != prev_hash:
-                errors.append({
-                    'id': log.id,
-                    'error': 'prev_hash mismatch',
-                    'expected': prev_hash,
-                    'actual': log.prev_hash
-                })
-
-            computed = log.compute_hash(log.prev_hash)
-            if computed != log.entry_hash:
-                errors.append({
-                    'id': log.id,
-                    'error': 'entry_hash mismatch (tampered)',
-                    'expected': computed,
-                    'actual': log.entry_hash
-                })
-
-            prev_hash = log.entry_hash
+        prev_hash = None
+        # Rows written outside log_action() carry no hash. Older entries
+        # restarted the chain from genesis after such a row; entries
+        # appended through the chain head link to the last chained entry.
+        after_gap = False
+        last_id = (start_id - 1) if start_id else None
+
+        # Stream in id-ordered chunks so the whole table is never loaded
+        while True:
+            chunk_query = query
+            if last_id is not None:
+                chunk_query = chunk_query.filter(AuditLog.id > last_id)
+            chunk = chunk_query.limit(_VERIFY_CHUNK).all()
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            for log in chunk:
+                checked += 1
+                if prev_hash is None:
+                    prev_hash = log.prev_hash or _GENESIS_HASH
+
+                if not log.entry_hash:
+                    after_gap = True
+                    continue
+
+                if log.prev_hash and log.prev_hash != prev_hash \
+                        and not (after_gap and log.prev_hash == _GENESIS_HASH):
+                    errors.append({
+                        'id': log.id,
+                        'error': 'prev_hash mismatch',
+                        'expected': prev_hash,
+                        'actual': log.prev_hash
+                    })
+
+                computed = AuditLog.hash_entry(log, log.prev_hash)
+                if computed != log.entry_hash:
+                    errors.append({
+                        'id': log.id,
+                        'error': 'entry_hash mismatch (tampered)',
+                        'expected': computed,
+                        'actual': log.entry_hash
+                    })
+
+                prev_hash = log.entry_hash
+                after_gap = False
+
+            if len(chunk) < _VERIFY_CHUNK:
+                break
 
         return {
             'valid': len(errors) == 0,
-            'checked': len(logs),
+            'checked': checked,
             'errors': errors
         }
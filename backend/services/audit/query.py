@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from models import db, AuditLog
 from utils.datetime_utils import utc_now
+from utils.pagination import keyset_paginate
 from ._constants import CATEGORIES
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,44 @@ class AuditQueryMixin:
         search: Optional[str] = None,
         category: Optional[str] = None
     ) -> tuple:
+        query = AuditQueryMixin._filtered_logs_query(
+            username=username, action=action, resource_type=resource_type,
+            success=success, date_from=date_from, date_to=date_to,
+            search=search, category=category,
+        )
+        query = query.order_by(AuditLog.timestamp.desc())
+
+        total = query.count()
+        total_pages = (total + per_page - 1) // per_page
+        logs = query.offset((page - 1) * per_page).limit(per_page).all()
+
+        return logs, total, total_pages
+
+    @staticmethod
+    def get_logs_keyset(cursor: Optional[str] = None, per_page: int = 50,
+                        total: Optional[str] = None, **filters) -> dict:
+        """Newest-first keyset page of logs; see utils.pagination.keyset_paginate.
+
+        Same filters as get_logs. Raises utils.pagination.InvalidCursor.
+        """
+        query = AuditQueryMixin._filtered_logs_query(**filters)
+        return keyset_paginate(
+            query, AuditLog.timestamp, AuditLog.id,
+            sort_key='timestamp:desc', descending=True,
+            cursor=cursor, per_page=per_page, total=total,
+        )
+
+    @staticmethod
+    def _filtered_logs_query(
+        username: Optional[str] = None,
+        action=None,
+        resource_type=None,
+        success: Optional[bool] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        search: Optional[str] = None,
+        category: Optional[str] = None
+    ):
         query = AuditLog.query
 
         if username:
@@ -65,13 +104,7 @@ class AuditQueryMixin:
                 )
             )
 
-        query = query.order_by(AuditLog.timestamp.desc())
-
-        total = query.count()
-        total_pages = (total + per_page - 1) // per_page
-        logs = query.offset((page - 1) * per_page).limit(per_page).all()
-
-        return logs, total, total_pages
+        return query
 
     @staticmethod
     def get_log_by_id(log_id: int) -> Optional[AuditLog]:
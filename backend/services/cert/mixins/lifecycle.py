@@ -344,9 +344,11 @@ class LifecycleMixin:
         from services.audit_service import AuditService
         AuditService.log_certificate('cert_revoked', certificate, f'Revoked certificate: {certificate.descr} - Reason: {reason}')
 
-        # Auto-generate CRL if CA has CDP enabled
+        # Auto-generate CRL if CA has CDP enabled. CAs publishing delta CRLs
+        # get a debounced delta from the certificate.revoked event instead.
         ca = CA.query.filter_by(refid=certificate.caref).first()
-        if ca and ca.cdp_enabled:
+        from services.crl import delta_publisher
+        if ca and ca.cdp_enabled and not delta_publisher.covers(ca):
             from services.crl_service import CRLService
             try:
                 CRLService.generate_crl(ca.id, username=username)
@@ -3,10 +3,17 @@ Certificate Compliance Scoring Service
 
 Scores certificates A+ to F based on cryptographic strength,
 validity, SANs, and industry best practices.
+
+Scores are persisted on the certificate (``compliance_score`` /
+``compliance_grade``) whenever a scored field changes. Only the validity
+component depends on the clock; ``compliance_recheck_at`` records when it
+next changes band and ``refresh_compliance_scores`` re-scores just those rows.
 """
 
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+from utils.datetime_utils import to_naive_utc, utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -252,3 +259,111 @@ def score_certificates_batch(cert_dicts):
                 'breakdown': {},
             }
     return results
+
+
+# days_remaining values at which _score_validity changes band (<=30, <=7, <=0)
+_VALIDITY_BAND_DAYS = (30, 7, 0)
+
+REFRESH_BATCH_SIZE = 500
+
+
+def compliance_inputs(cert):
+    """The fields of ``Certificate.to_dict()`` that the scorer reads."""
+    return {
+        'key_algorithm': cert.key_algorithm,
+        'key_algo': cert.key_algo,
+        'key_size': cert.key_size,
+        'key_type': cert.key_type,
+        'signature_algorithm': cert.signature_algorithm,
+        'status': cert.lifecycle_status,
+        'days_remaining': cert.days_remaining,
+        'san_combined': cert.san_combined,
+        'san_dns': cert.san_dns,
+        'san_ip': cert.san_ip,
+        'san_email': cert.san_email,
+        'cert_type': cert.cert_type,
+        'valid_from': cert.valid_from,
+        'valid_to': cert.valid_to,
+    }
+
+
+def next_compliance_recheck(valid_to, revoked=False, now=None):
+    """When the validity score of a cert expiring at *valid_to* next changes.
+
+    ``days_remaining`` is whole days left, so the "<= N days" band starts
+    once less than N+1 days remain. Returns None when the score can no
+    longer change with time (revoked, already in the last band, no expiry).
+    """
+    if revoked or valid_to is None:
+        return None
+    now = now or utc_now()
+    for days in _VALIDITY_BAND_DAYS:
+        boundary = valid_to - timedelta(days=days + 1)
+        if boundary >= now:
+            return boundary
+    return None
+
+
+def apply_compliance_score(cert, now=None):
+    """Score *cert* and store score, grade and next recheck time on it."""
+    if not cert.crt:
+        cert.compliance_score = None
+        cert.compliance_grade = None
+        cert.compliance_recheck_at = None
+        return None
+    result = calculate_compliance_score(compliance_inputs(cert))
+    cert.compliance_score = result['score']
+    cert.compliance_grade = result['grade']
+    cert.compliance_recheck_at = next_compliance_recheck(
+        to_naive_utc(cert.valid_to), bool(cert.revoked), now)
+    return result
+
+
+def stored_compliance(cert):
+    """``{'score', 'grade'}`` from the persisted columns.
+
+    Rows not scored yet, or whose recheck time passed before the scheduled
+    refresh got to them, are scored on the fly (not persisted).
+    """
+    recheck_at = cert.compliance_recheck_at
+    if (cert.compliance_score is not None and cert.compliance_grade
+            and (recheck_at is None or recheck_at > utc_now())):
+        return {'score': cert.compliance_score, 'grade': cert.compliance_grade}
+    result = calculate_compliance_score(compliance_inputs(cert))
+    return {'score': result['score'], 'grade': result['grade']}
+
+
+def refresh_compliance_scores():
+    """Scheduled task: re-score certs whose expiry band moved, plus unscored ones."""
+    from sqlalchemy import and_, or_
+    from models import db, Certificate
+
+    now = utc_now()
+    refreshed = 0
+    last_id = 0
+    while True:
+        batch = (
+            Certificate.query
+            .filter(
+                Certificate.id > last_id,
+                or_(
+                    Certificate.compliance_recheck_at <= now,
+                    and_(Certificate.compliance_score.is_(None),
+                         Certificate.crt.isnot(None)),
+                ),
+            )
+            .order_by(Certificate.id)
+            .limit(REFRESH_BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for cert in batch:
+            apply_compliance_score(cert, now)
+        db.session.commit()
+        refreshed += len(batch)
+
+    if refreshed:
+        logger.info(f"Compliance scores refreshed for {refreshed} certificate(s)")
+    return refreshed
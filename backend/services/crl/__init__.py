@@ -2,6 +2,7 @@ from ._constants import REASON_MAP, DEFAULT_VALIDITY_DAYS
 from .query import CRLQueryMixin
 from .generation import CRLGenerationMixin
 from .management import CRLManagementMixin
+from . import delta_publisher  # noqa: F401  (subscribes to certificate.revoked)
 
 
 class CRLService(CRLQueryMixin, CRLGenerationMixin, CRLManagementMixin):
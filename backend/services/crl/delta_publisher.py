@@ -0,0 +1,99 @@
+"""Event-driven delta CRL publication.
+
+A revocation should reach relying parties as soon as a delta CRL carrying it
+is signed, not when the scheduler's delta interval next comes round. Every
+``certificate.revoked`` event arms a per-CA timer; further revocations of the
+same CA before it fires ride on it, so a bulk revoke of hundreds of
+certificates costs one delta signature instead of hundreds of full CRLs.
+
+Only CAs that publish delta CRLs (CDP and delta enabled, key online, a base
+CRL to refer to) are handled here; the lifecycle code keeps regenerating the
+full CRL for every other CA (see :func:`covers`).
+"""
+import logging
+import threading
+
+from flask import current_app, has_app_context
+
+from models import db, CA
+from .generation import CRLGenerationMixin
+from .query import CRLQueryMixin
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SEC = 2.0
+_lock = threading.Lock()
+_pending = {}  # ca_refid -> threading.Timer
+
+
+def _publishes_delta(ca: CA) -> bool:
+    return bool(
+        ca is not None and ca.cdp_enabled and ca.delta_crl_enabled
+        and ca.has_private_key and not ca.offline
+    )
+
+
+def covers(ca: CA) -> bool:
+    """True when a revocation under *ca* is published as a debounced delta CRL."""
+    return _publishes_delta(ca) and CRLQueryMixin.get_latest_base_crl(ca.id) is not None
+
+
+def _publish(app, ca_refid: str) -> None:
+    with _lock:
+        # Whoever removes the entry publishes: the timer or flush(), never both
+        if _pending.pop(ca_refid, None) is None:
+            return
+    with app.app_context():
+        try:
+            ca = CA.query.filter_by(refid=ca_refid).first()
+            if not covers(ca):
+                return
+            CRLGenerationMixin.generate_delta_crl(
+                ca.id,
+                validity_hours=(ca.delta_crl_interval or 4) * 2,
+                username='system',
+            )
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Event-driven delta CRL failed for CA {ca_refid}: {e}")
+
+
+def flush() -> None:
+    """Publish every pending delta CRL now instead of waiting for its timer."""
+    with _lock:
+        pending = list(_pending.items())
+    for ca_refid, timer in pending:
+        timer.cancel()
+        _publish(timer.args[0], ca_refid)
+
+
+def reset() -> None:
+    """Drop pending publications without publishing them."""
+    with _lock:
+        for timer in _pending.values():
+            timer.cancel()
+        _pending.clear()
+
+
+def _on_certificate_revoked(event_type, payload, ca_refid, meta):
+    if not ca_refid or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    with _lock:
+        if ca_refid in _pending:
+            return
+        timer = threading.Timer(DEBOUNCE_SEC, _publish, args=(app, ca_refid))
+        timer.daemon = True
+        timer.name = f"DeltaCRL-{ca_refid}"
+        _pending[ca_refid] = timer
+    timer.start()
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        event_bus.subscribe('certificate.revoked', _on_certificate_revoked)
+        _register_bus_subscriber._done = True
+
+
+_register_bus_subscriber()
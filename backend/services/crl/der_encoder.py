@@ -0,0 +1,223 @@
+"""Direct DER encoder for X.509 CRLs (RFC 5280 §5.1).
+
+``x509.CertificateRevocationListBuilder`` is immutable: every
+``add_revoked_certificate`` copies the entry list, so building a CRL with n
+entries costs O(n²) and keeps n ``RevokedCertificate`` objects alive. This
+encoder writes each revoked entry straight to DER as it arrives from a
+streaming source and holds nothing but the encoded bytes. The TBSCertList
+is assembled around them, signed with the CA key (local or HSM wrapper),
+and wrapped into the CertificateList.
+
+Only the pieces UCM emits are encoded here; CRL-level extensions are
+serialized by ``cryptography`` (``ExtensionType.public_bytes``).
+"""
+import base64
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, padding, rsa
+
+from services.hsm.hsm_private_key import HsmECPrivateKey, HsmRSAPrivateKey
+
+_SEQUENCE = 0x30
+_INTEGER = 0x02
+_BIT_STRING = 0x03
+_OCTET_STRING = 0x04
+_NULL = b'\x05\x00'
+_OID = 0x06
+_ENUMERATED = 0x0A
+_UTC_TIME = 0x17
+_GENERALIZED_TIME = 0x18
+_BOOLEAN_TRUE = b'\x01\x01\xff'
+_CRL_EXTENSIONS = 0xA0  # [0] EXPLICIT
+_VERSION_V2 = b'\x02\x01\x01'
+
+_OID_CRL_REASON = '2.5.29.21'
+_OID_INVALIDITY_DATE = '2.5.29.24'
+
+_RSA_SIGNATURE_OIDS = {
+    'sha256': '1.2.840.113549.1.1.11',
+    'sha384': '1.2.840.113549.1.1.12',
+    'sha512': '1.2.840.113549.1.1.13',
+}
+_ECDSA_SIGNATURE_OIDS = {
+    'sha256': '1.2.840.10045.4.3.2',
+    'sha384': '1.2.840.10045.4.3.3',
+    'sha512': '1.2.840.10045.4.3.4',
+}
+_ED25519_OID = '1.3.101.112'
+_ED448_OID = '1.3.101.113'
+
+# RFC 5280 §5.3.1 CRLReason codes
+_REASON_CODES = {
+    x509.ReasonFlags.unspecified: 0,
+    x509.ReasonFlags.key_compromise: 1,
+    x509.ReasonFlags.ca_compromise: 2,
+    x509.ReasonFlags.affiliation_changed: 3,
+    x509.ReasonFlags.superseded: 4,
+    x509.ReasonFlags.cessation_of_operation: 5,
+    x509.ReasonFlags.certificate_hold: 6,
+    x509.ReasonFlags.remove_from_crl: 8,
+    x509.ReasonFlags.privilege_withdrawn: 9,
+    x509.ReasonFlags.aa_compromise: 10,
+}
+
+
+def _length(n: int) -> bytes:
+    if n < 0x80:
+        return bytes((n,))
+    octets = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(octets),)) + octets
+
+
+def tlv(tag: int, content: bytes) -> bytes:
+    return bytes((tag,)) + _length(len(content)) + content
+
+
+def _header(tag: int, content_length: int) -> bytes:
+    return bytes((tag,)) + _length(content_length)
+
+
+def encode_integer(value: int) -> bytes:
+    # Two's complement, minimal; a leading 0x00 keeps positive values positive
+    octets = value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True)
+    return tlv(_INTEGER, octets)
+
+
+def encode_oid(dotted: str) -> bytes:
+    arcs = [int(a) for a in dotted.split('.')]
+    body = bytearray((arcs[0] * 40 + arcs[1],))
+    for arc in arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(reversed(chunk))
+    return tlv(_OID, bytes(body))
+
+
+def _utc(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt
+
+
+def encode_generalized_time(dt: datetime) -> bytes:
+    return tlv(_GENERALIZED_TIME, _utc(dt).strftime('%Y%m%d%H%M%SZ').encode('ascii'))
+
+
+def encode_time(dt: datetime) -> bytes:
+    """RFC 5280 §5.1.2.4: UTCTime through 2049, GeneralizedTime after."""
+    dt = _utc(dt)
+    if 1950 <= dt.year < 2050:
+        return tlv(_UTC_TIME, dt.strftime('%y%m%d%H%M%SZ').encode('ascii'))
+    return encode_generalized_time(dt)
+
+
+def _extension(oid_der: bytes, value: bytes, critical: bool = False) -> bytes:
+    return tlv(_SEQUENCE, oid_der + (_BOOLEAN_TRUE if critical else b'') + tlv(_OCTET_STRING, value))
+
+
+_CRL_REASON_OID_DER = encode_oid(_OID_CRL_REASON)
+_INVALIDITY_DATE_OID_DER = encode_oid(_OID_INVALIDITY_DATE)
+_REASON_EXTENSIONS = {
+    reason: _extension(_CRL_REASON_OID_DER, tlv(_ENUMERATED, bytes((code,))))
+    for reason, code in _REASON_CODES.items()
+}
+
+
+def encode_revoked_entry(
+    serial: int,
+    revoked_at: datetime,
+    reason: Optional[x509.ReasonFlags] = None,
+    invalidity_at: Optional[datetime] = None,
+) -> bytes:
+    """One ``revokedCertificates`` element (RFC 5280 §5.1.2.6)."""
+    extensions = b''
+    if reason is not None:
+        extensions += _REASON_EXTENSIONS[reason]
+    if invalidity_at is not None:
+        # §5.3.2: invalidityDate is always GeneralizedTime
+        extensions += _extension(_INVALIDITY_DATE_OID_DER, encode_generalized_time(invalidity_at))
+    body = encode_integer(serial) + encode_time(revoked_at)
+    if extensions:
+        body += tlv(_SEQUENCE, extensions)
+    return tlv(_SEQUENCE, body)
+
+
+def encode_extensions(extensions: Iterable[Tuple[x509.ExtensionType, bool]]) -> bytes:
+    """``crlExtensions`` ([0] EXPLICIT Extensions), or b'' when empty."""
+    encoded = b''.join(
+        _extension(encode_oid(ext.oid.dotted_string), ext.public_bytes(), critical)
+        for ext, critical in extensions
+    )
+    if not encoded:
+        return b''
+    return tlv(_CRL_EXTENSIONS, tlv(_SEQUENCE, encoded))
+
+
+def _signature_algorithm(private_key, hash_algorithm: hashes.HashAlgorithm):
+    """Return (AlgorithmIdentifier DER, sign(tbs) callable) for the CA key."""
+    if isinstance(private_key, (rsa.RSAPrivateKey, HsmRSAPrivateKey)):
+        oid = _RSA_SIGNATURE_OIDS.get(hash_algorithm.name)
+        if oid:
+            return (tlv(_SEQUENCE, encode_oid(oid) + _NULL),
+                    lambda tbs: private_key.sign(tbs, padding.PKCS1v15(), hash_algorithm))
+    elif isinstance(private_key, (ec.EllipticCurvePrivateKey, HsmECPrivateKey)):
+        oid = _ECDSA_SIGNATURE_OIDS.get(hash_algorithm.name)
+        if oid:
+            return (tlv(_SEQUENCE, encode_oid(oid)),
+                    lambda tbs: private_key.sign(tbs, ec.ECDSA(hash_algorithm)))
+    elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return tlv(_SEQUENCE, encode_oid(_ED25519_OID)), private_key.sign
+    elif isinstance(private_key, ed448.Ed448PrivateKey):
+        return tlv(_SEQUENCE, encode_oid(_ED448_OID)), private_key.sign
+    raise ValueError(
+        f"Unsupported CRL signing key/digest: {type(private_key).__name__} "
+        f"with {getattr(hash_algorithm, 'name', hash_algorithm)}"
+    )
+
+
+def encode_crl(
+    issuer: x509.Name,
+    this_update: datetime,
+    next_update: datetime,
+    revoked_entries: Iterable[bytes],
+    extensions: Iterable[Tuple[x509.ExtensionType, bool]],
+    private_key,
+    hash_algorithm: hashes.HashAlgorithm,
+) -> bytes:
+    """Sign and return a DER CertificateList.
+
+    *revoked_entries* yields pre-encoded entries (see
+    :func:`encode_revoked_entry`) and is consumed exactly once.
+    """
+    algorithm_der, sign = _signature_algorithm(private_key, hash_algorithm)
+
+    # Entries are appended to one contiguous buffer as they stream in
+    entries = bytearray()
+    for entry in revoked_entries:
+        entries += entry
+
+    head = (_VERSION_V2 + algorithm_der + issuer.public_bytes()
+            + encode_time(this_update) + encode_time(next_update))
+    tail = encode_extensions(extensions)
+    # RFC 5280 §5.1.2.6: an empty revokedCertificates list MUST be absent
+    revoked_header = _header(_SEQUENCE, len(entries)) if entries else b''
+
+    tbs_length = len(head) + len(revoked_header) + len(entries) + len(tail)
+    tbs = b''.join((_header(_SEQUENCE, tbs_length), head, revoked_header, entries, tail))
+    del entries
+
+    signature = tlv(_BIT_STRING, b'\x00' + sign(tbs))
+    body_length = len(tbs) + len(algorithm_der) + len(signature)
+    return b''.join((_header(_SEQUENCE, body_length), tbs, algorithm_der, signature))
+
+
+def der_to_pem(der: bytes) -> str:
+    b64 = base64.encodebytes(der).decode('ascii').replace('\n', '')
+    lines = [b64[i:i + 64] for i in range(0, len(b64), 64)]
+    return '-----BEGIN X509 CRL-----\n' + '\n'.join(lines) + '\n-----END X509 CRL-----\n'
@@ -0,0 +1,186 @@
+"""Latest full CRL per CA, cached for the public CDP endpoint.
+
+/cdp/<ca>.crl is unauthenticated and fetched by every relying party, so it
+must not resolve the CA and load the crl_pem/crl_der blobs on each download.
+Entries are keyed by CRL number: generation stores the new CRL right away,
+and every ``_REVALIDATE_SEC`` a lookup re-reads only the latest CRL number
+(an indexed, blob-free query) so a CRL generated by another worker process
+replaces the cached one. With ``REDIS_URL`` set, the DER is also shared
+through Redis so other workers can serve a new CRL without loading it from
+the database.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Optional
+
+from models import db
+from models.crl import CRLMetadata
+from utils.datetime_utils import utc_now
+from utils.redis_backend import shared_redis
+
+logger = logging.getLogger(__name__)
+
+_REVALIDATE_SEC = 10
+_MAX_ENTRIES = 256
+_REDIS_PREFIX = 'ucm:crl:'
+_lock = threading.Lock()
+_entries = OrderedDict()  # ca_id -> CachedCRL
+_refs = OrderedDict()  # URL ref (refid, slug or id) -> ca_id
+
+
+@dataclass(frozen=True)
+class CachedCRL:
+    ca_id: int
+    crl_number: int
+    der: bytes
+    this_update: datetime
+    next_update: datetime
+    etag: str
+    filename: str
+    checked_at: float
+
+
+def _etag(crl_number: int, der: bytes) -> str:
+    return f"{crl_number:x}-{hashlib.sha256(der).hexdigest()[:16]}"
+
+
+def _redis_key(ca_id: int, crl_number: int) -> str:
+    return f"{_REDIS_PREFIX}{ca_id}:{crl_number}"
+
+
+def _redis_put(entry: CachedCRL) -> None:
+    client = shared_redis()
+    if client is None:
+        return
+    try:
+        ttl = max(60, int((entry.next_update - utc_now()).total_seconds()))
+        key = _redis_key(entry.ca_id, entry.crl_number)
+        client.hset(key, mapping={'der': entry.der, 'filename': entry.filename})
+        client.expire(key, ttl)
+    except Exception as e:
+        logger.warning(f"CRL cache: Redis store failed for CA {entry.ca_id}: {e}")
+
+
+def _redis_get(ca_id: int, crl_number: int) -> Optional[dict]:
+    client = shared_redis()
+    if client is None:
+        return None
+    try:
+        data = client.hgetall(_redis_key(ca_id, crl_number))
+    except Exception as e:
+        logger.warning(f"CRL cache: Redis read failed for CA {ca_id}: {e}")
+        return None
+    if not data or b'der' not in data:
+        return None
+    return {'der': data[b'der'], 'filename': data.get(b'filename', b'').decode()}
+
+
+def _put(entry: CachedCRL) -> None:
+    with _lock:
+        _entries[entry.ca_id] = entry
+        _entries.move_to_end(entry.ca_id)
+        while len(_entries) > _MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def ca_id_for_ref(ca_ref: str) -> Optional[int]:
+    with _lock:
+        return _refs.get(ca_ref)
+
+
+def remember_ref(ca_ref: str, ca_id: int) -> None:
+    """Remember which CA a URL ref resolved to (only refs that resolved)."""
+    with _lock:
+        _refs[ca_ref] = ca_id
+        _refs.move_to_end(ca_ref)
+        while len(_refs) > _MAX_ENTRIES * 3:
+            _refs.popitem(last=False)
+
+
+def store(crl: CRLMetadata, filename: str) -> CachedCRL:
+    """Cache *crl* as the latest full CRL of its CA (and share it via Redis)."""
+    entry = CachedCRL(
+        ca_id=crl.ca_id,
+        crl_number=crl.crl_number,
+        der=bytes(crl.crl_der),
+        this_update=crl.this_update,
+        next_update=crl.next_update,
+        etag=_etag(crl.crl_number, crl.crl_der),
+        filename=filename,
+        checked_at=time.monotonic(),
+    )
+    _put(entry)
+    _redis_put(entry)
+    return entry
+
+
+def lookup(ca_id: int) -> Optional[CachedCRL]:
+    """Return the cached latest full CRL for *ca_id*, or None on a miss."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(ca_id)
+    if entry and now - entry.checked_at <= _REVALIDATE_SEC:
+        return entry
+
+    latest = db.session.query(
+        CRLMetadata.crl_number, CRLMetadata.this_update, CRLMetadata.next_update
+    ).filter_by(ca_id=ca_id, is_delta=False).order_by(
+        CRLMetadata.crl_number.desc()
+    ).first()
+    if latest is None:
+        invalidate(ca_id)
+        return None
+
+    if entry and entry.crl_number == latest.crl_number:
+        entry = replace(entry, checked_at=now)
+        _put(entry)
+        return entry
+
+    shared = _redis_get(ca_id, latest.crl_number)
+    if shared is None:
+        return None
+    entry = CachedCRL(
+        ca_id=ca_id,
+        crl_number=latest.crl_number,
+        der=shared['der'],
+        this_update=latest.this_update,
+        next_update=latest.next_update,
+        etag=_etag(latest.crl_number, shared['der']),
+        filename=shared['filename'],
+        checked_at=now,
+    )
+    _put(entry)
+    return entry
+
+
+def invalidate(ca_id: Optional[int] = None) -> None:
+    """Drop the cached CRL and URL refs of *ca_id*, or everything."""
+    with _lock:
+        if ca_id is None:
+            _entries.clear()
+            _refs.clear()
+            return
+        _entries.pop(ca_id, None)
+        for ref in [ref for ref, cid in _refs.items() if cid == ca_id]:
+            del _refs[ref]
+
+
+def _on_ca_event(event_type, payload, ca_refid, meta):
+    # A renamed CA changes the download filename; a deleted one must 404
+    invalidate(((payload or {}).get('ca') or {}).get('id'))
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        for event_type in ('ca.updated', 'ca.deleted'):
+            event_bus.subscribe(event_type, _on_ca_event, remote=True)
+        _register_bus_subscriber._done = True
+
+
+_register_bus_subscriber()
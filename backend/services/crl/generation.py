@@ -1,12 +1,14 @@
 import base64
 import logging
+import threading
 from datetime import timedelta
 from typing import Optional
 from urllib.parse import urlparse
 
 from cryptography import x509
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
+from sqlalchemy import func
 
 from models import db, CA, Certificate
 from models.crl import CRLMetadata
@@ -14,6 +16,7 @@ from utils.datetime_utils import utc_now
 from utils.serial_format import serial_to_int
 from utils.x509_aki import authority_key_identifier_from_issuer
 from ._constants import REASON_MAP
+from .der_encoder import der_to_pem, encode_crl, encode_revoked_entry
 from .query import CRLQueryMixin
 
 logger = logging.getLogger(__name__)
@@ -24,90 +27,82 @@ def _authority_key_identifier_for_crl(ca_cert: x509.Certificate) -> x509.Authori
     return authority_key_identifier_from_issuer(ca_cert)
 
 
-def _apply_invalidity_date(
-    revoked_builder: x509.RevokedCertificateBuilder,
-    cert: Certificate,
-) -> x509.RevokedCertificateBuilder:
-    """RFC 5280 §5.3.2 — emit invalidityDate when known (optional)."""
-    invalidity_at = getattr(cert, 'invalidity_at', None)
-    if not invalidity_at:
-        return revoked_builder
-    try:
-        return revoked_builder.add_extension(
-            x509.InvalidityDate(invalidity_at),
-            critical=False,
-        )
-    except Exception as e:
-        logger.warning(
-            f"CRL: omitting invalidityDate for cert {cert.id}: {e}"
-        )
-        return revoked_builder
-
-
-def _apply_revoke_reason(
-    revoked_builder: x509.RevokedCertificateBuilder,
-    revoke_reason: Optional[str],
-    *,
-    is_delta: bool,
-) -> x509.RevokedCertificateBuilder:
-    """Attach CRLReason when RFC-conformant.
+def _crl_reason(revoke_reason: Optional[str], *, is_delta: bool) -> Optional[x509.ReasonFlags]:
+    """CRLReason to emit for *revoke_reason*, or None when RFC 5280 says omit.
 
     RFC 5280 §5.3.1:
     - omit the extension instead of emitting ``unspecified``
     - ``removeFromCRL`` may only appear on delta CRLs
     """
     if not revoke_reason:
-        return revoked_builder
+        return None
 
     if revoke_reason == 'unspecified':
-        return revoked_builder
+        return None
 
     if revoke_reason == 'removeFromCRL' and not is_delta:
         logger.warning(
             "CRL: omitting removeFromCRL reason on full CRL (RFC 5280 §5.3.1 — delta only)"
         )
-        return revoked_builder
+        return None
 
     reason = REASON_MAP.get(revoke_reason)
     if reason is None or reason is x509.ReasonFlags.unspecified:
         logger.warning(f"CRL: omitting unknown/unspecified revoke_reason={revoke_reason!r}")
-        return revoked_builder
+        return None
+
+    return reason
 
+
+def _apply_revoke_reason(
+    revoked_builder: x509.RevokedCertificateBuilder,
+    revoke_reason: Optional[str],
+    *,
+    is_delta: bool,
+) -> x509.RevokedCertificateBuilder:
+    """Attach CRLReason when RFC-conformant (see :func:`_crl_reason`)."""
+    reason = _crl_reason(revoke_reason, is_delta=is_delta)
+    if reason is None:
+        return revoked_builder
     return revoked_builder.add_extension(x509.CRLReason(reason), critical=False)
 
 
-def _add_freshest_crl(builder: x509.CertificateRevocationListBuilder, ca: CA):
+def _freshest_crl(ca: CA) -> Optional[x509.FreshestCRL]:
     """RFC 5280 §5.2.6 — non-critical pointer to the delta CRL (complete CRLs only)."""
     if not ca.delta_crl_enabled:
-        return builder
+        return None
 
     primary_cdp = ca.get_primary_cdp_url()
     if not primary_cdp:
-        return builder
+        return None
 
     try:
         parsed = urlparse(primary_cdp.replace('{ca_refid}', ca.url_ref))
         delta_url = f"{parsed.scheme}://{parsed.netloc}/cdp/{ca.url_ref}-delta.crl"
-        return builder.add_extension(
-            x509.FreshestCRL([
-                x509.DistributionPoint(
-                    full_name=[x509.UniformResourceIdentifier(delta_url)],
-                    relative_name=None,
-                    reasons=None,
-                    crl_issuer=None,
-                )
-            ]),
-            critical=False,
-        )
+        return x509.FreshestCRL([
+            x509.DistributionPoint(
+                full_name=[x509.UniformResourceIdentifier(delta_url)],
+                relative_name=None,
+                reasons=None,
+                crl_issuer=None,
+            )
+        ])
     except Exception as e:
         logger.warning(f"Could not add FreshestCRL extension: {e}")
-        return builder
+        return None
 
 
 def _parse_revoked_serial(cert: Certificate, *, context: str) -> Optional[int]:
-    if not cert.serial_number:
+    if not cert.serial_hex and not cert.serial_number:
         return None
-    serial_int = serial_to_int(cert.serial_number)
+    # serial_hex is parsed from the certificate itself; serial_number may be
+    # an ambiguous all-digit hex string on legacy rows.
+    try:
+        serial_int = int(cert.serial_hex, 16) if cert.serial_hex else None
+    except ValueError:
+        serial_int = None
+    if serial_int is None:
+        serial_int = serial_to_int(cert.serial_number)
     if serial_int is None or serial_int <= 0:
         logger.warning(
             f"{context}: skipping cert {cert.id} with unparseable serial {cert.serial_number!r}"
@@ -123,6 +118,68 @@ def _parse_revoked_serial(cert: Certificate, *, context: str) -> Optional[int]:
     return serial_int
 
 
+class _EncodedEntries:
+    """Iterate revoked rows as DER CRL entries, counting what was emitted."""
+
+    def __init__(self, rows, now, *, is_delta: bool, context: str):
+        self._rows = rows
+        self._now = now
+        self._is_delta = is_delta
+        self._context = context
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            serial_int = _parse_revoked_serial(row, context=self._context)
+            if serial_int is None:
+                continue
+            self.count += 1
+            yield encode_revoked_entry(
+                serial_int,
+                row.revoked_at or self._now,
+                _crl_reason(row.revoke_reason, is_delta=self._is_delta),
+                # RFC 5280 §5.3.2 — emit invalidityDate when known (optional)
+                row.invalidity_at,
+            )
+
+
+_ca_locks_guard = threading.Lock()
+_ca_locks = {}
+
+
+def ca_generation_lock(ca_id: int) -> threading.RLock:
+    """Per-CA lock every CRL of *ca_id* is numbered, signed and stored under.
+
+    Full and delta CRLs draw from one strictly increasing number sequence
+    (RFC 5280 §5.2.3), and the CDP route, the scheduler pool, the delta
+    publisher and the revoke path can all generate at once. Reentrant, so a
+    caller already holding it (the CDP route) can generate.
+    """
+    with _ca_locks_guard:
+        lock = _ca_locks.get(ca_id)
+        if lock is None:
+            lock = _ca_locks[ca_id] = threading.RLock()
+        return lock
+
+
+def _lock_ca_row(ca_id: int) -> None:
+    """Serialize generation with other processes until commit (PostgreSQL
+    ``SELECT ... FOR UPDATE``; SQLite serializes writers itself)."""
+    db.session.query(CA.id).filter(CA.id == ca_id).with_for_update().scalar()
+
+
+def _next_crl_number(ca_id: int) -> int:
+    """CRL numbers are shared by full and delta CRLs (RFC 5280 §5.2.3).
+
+    Only call under :func:`ca_generation_lock` with the CA row locked; the
+    unique (ca_id, crl_number) index rejects a duplicate that slips through.
+    """
+    last = db.session.query(func.max(CRLMetadata.crl_number)).filter(
+        CRLMetadata.ca_id == ca_id
+    ).scalar()
+    return (last or 0) + 1
+
+
 CRL_DIGESTS = {
     'sha256': hashes.SHA256,
     'sha384': hashes.SHA384,
@@ -146,9 +203,15 @@ class CRLGenerationMixin:
         validity_days: int | None = None,
         username: str = 'system'
     ) -> CRLMetadata:
+        with ca_generation_lock(ca_id):
+            return CRLGenerationMixin._generate_crl(ca_id, validity_days, username)
+
+    @staticmethod
+    def _generate_crl(ca_id, validity_days, username) -> CRLMetadata:
         ca = db.session.get(CA, ca_id)
         if not ca:
             raise ValueError(f"CA with id {ca_id} not found")
+        _lock_ca_row(ca_id)
 
         if validity_days is None:
             validity_days = ca.crl_validity_days or CRLGenerationMixin.DEFAULT_VALIDITY_DAYS
@@ -162,47 +225,30 @@ class CRLGenerationMixin:
         from services.hsm.ca_key_loader import get_ca_signing_key
         ca_private_key = get_ca_signing_key(ca)
 
-        revoked_certs = CRLQueryMixin.get_revoked_certificates(ca_id)
-
-        last_crl = CRLMetadata.query.filter_by(ca_id=ca_id).order_by(
-            CRLMetadata.crl_number.desc()
-        ).first()
-        crl_number = 1 if not last_crl else last_crl.crl_number + 1
+        crl_number = _next_crl_number(ca_id)
 
         now = utc_now()
-        builder = x509.CertificateRevocationListBuilder()
-        builder = builder.issuer_name(ca_cert.subject)
-        builder = builder.last_update(now)
-        builder = builder.next_update(now + timedelta(days=validity_days))
-
-        entries = 0
-        for cert in revoked_certs:
-            serial_int = _parse_revoked_serial(cert, context='CRL')
-            if serial_int is None:
-                continue
-
-            revoked_builder = x509.RevokedCertificateBuilder()
-            revoked_builder = revoked_builder.serial_number(serial_int)
-            revoked_builder = revoked_builder.revocation_date(cert.revoked_at or now)
-            revoked_builder = _apply_revoke_reason(
-                revoked_builder, cert.revoke_reason, is_delta=False
-            )
-            revoked_builder = _apply_invalidity_date(revoked_builder, cert)
-            builder = builder.add_revoked_certificate(revoked_builder.build())
-            entries += 1
-
-        builder = builder.add_extension(x509.CRLNumber(crl_number), critical=False)
-        builder = builder.add_extension(
-            _authority_key_identifier_for_crl(ca_cert), critical=False
+        # Revoked entries stream from a column-projected query straight into
+        # the DER encoder; no Certificate objects or builder copies are kept.
+        revoked = _EncodedEntries(
+            CRLQueryMixin.iter_revoked_rows(ca.refid), now, is_delta=False, context='CRL'
         )
+        extensions = [
+            (x509.CRLNumber(crl_number), False),
+            (_authority_key_identifier_for_crl(ca_cert), False),
+        ]
         # RFC 5280 §5.2.4: base and delta MUST both omit IDP or carry identical IDP.
         # UCM issues unpartitioned CRLs — omit IDP on both full and delta.
-        builder = _add_freshest_crl(builder, ca)
-
-        crl = builder.sign(ca_private_key, _crl_signature_hash(ca), default_backend())
+        freshest = _freshest_crl(ca)
+        if freshest is not None:
+            extensions.append((freshest, False))
 
-        crl_pem = crl.public_bytes(serialization.Encoding.PEM).decode('utf-8')
-        crl_der = crl.public_bytes(serialization.Encoding.DER)
+        crl_der = encode_crl(
+            ca_cert.subject, now, now + timedelta(days=validity_days), revoked,
+            extensions, ca_private_key, _crl_signature_hash(ca),
+        )
+        crl_pem = der_to_pem(crl_der)
+        entries = revoked.count
 
         crl_metadata = CRLMetadata(
             ca_id=ca_id,
@@ -237,6 +283,13 @@ class CRLGenerationMixin:
             )
             raise
 
+        try:
+            from utils.sanitize import crl_download_filename
+            from . import download_cache
+            download_cache.store(crl_metadata, crl_download_filename(ca))
+        except Exception as e:
+            logger.warning(f"CRL download cache refresh failed for CA {ca_id}: {e}")
+
         return crl_metadata
 
     @staticmethod
@@ -245,6 +298,11 @@ class CRLGenerationMixin:
         validity_hours: int = 24,
         username: str = 'system'
     ) -> CRLMetadata:
+        with ca_generation_lock(ca_id):
+            return CRLGenerationMixin._generate_delta_crl(ca_id, validity_hours, username)
+
+    @staticmethod
+    def _generate_delta_crl(ca_id, validity_hours, username) -> CRLMetadata:
         ca = db.session.get(CA, ca_id)
         if not ca:
             raise ValueError(f"CA with id {ca_id} not found")
@@ -256,6 +314,7 @@ class CRLGenerationMixin:
             raise ValueError("Delta CRL is not enabled for this CA")
         if validity_hours < 1 or validity_hours > 720:
             raise ValueError("validity_hours must be between 1 and 720")
+        _lock_ca_row(ca_id)
 
         base_crl = CRLMetadata.query.filter_by(
             ca_id=ca_id, is_delta=False
@@ -270,52 +329,26 @@ class CRLGenerationMixin:
         from services.hsm.ca_key_loader import get_ca_signing_key
         ca_private_key = get_ca_signing_key(ca)
 
-        revoked_certs = Certificate.query.filter(
-            Certificate.caref == ca.refid,
-            Certificate.revoked == True,
-            Certificate.revoked_at > base_crl.this_update
-        ).all()
-
-        last_crl = CRLMetadata.query.filter_by(ca_id=ca_id).order_by(
-            CRLMetadata.crl_number.desc()
-        ).first()
-        crl_number = 1 if not last_crl else last_crl.crl_number + 1
+        crl_number = _next_crl_number(ca_id)
 
         now = utc_now()
-        builder = x509.CertificateRevocationListBuilder()
-        builder = builder.issuer_name(ca_cert.subject)
-        builder = builder.last_update(now)
-        builder = builder.next_update(now + timedelta(hours=validity_hours))
-
-        entries = 0
-        for cert in revoked_certs:
-            serial_int = _parse_revoked_serial(cert, context='Delta CRL')
-            if serial_int is None:
-                continue
-
-            revoked_builder = x509.RevokedCertificateBuilder()
-            revoked_builder = revoked_builder.serial_number(serial_int)
-            revoked_builder = revoked_builder.revocation_date(cert.revoked_at or now)
-            revoked_builder = _apply_revoke_reason(
-                revoked_builder, cert.revoke_reason, is_delta=True
-            )
-            revoked_builder = _apply_invalidity_date(revoked_builder, cert)
-            builder = builder.add_revoked_certificate(revoked_builder.build())
-            entries += 1
-
-        builder = builder.add_extension(x509.CRLNumber(crl_number), critical=False)
-        builder = builder.add_extension(
-            x509.DeltaCRLIndicator(base_crl.crl_number), critical=True
+        revoked = _EncodedEntries(
+            CRLQueryMixin.iter_revoked_rows(ca.refid, revoked_after=base_crl.this_update),
+            now, is_delta=True, context='Delta CRL',
         )
         # No IssuingDistributionPoint — must match the base CRL (both omit).
-        builder = builder.add_extension(
-            _authority_key_identifier_for_crl(ca_cert), critical=False
+        extensions = [
+            (x509.CRLNumber(crl_number), False),
+            (x509.DeltaCRLIndicator(base_crl.crl_number), True),
+            (_authority_key_identifier_for_crl(ca_cert), False),
+        ]
+
+        crl_der = encode_crl(
+            ca_cert.subject, now, now + timedelta(hours=validity_hours), revoked,
+            extensions, ca_private_key, _crl_signature_hash(ca),
         )
-
-        crl = builder.sign(ca_private_key, _crl_signature_hash(ca), default_backend())
-
-        crl_pem = crl.public_bytes(serialization.Encoding.PEM).decode('utf-8')
-        crl_der = crl.public_bytes(serialization.Encoding.DER)
+        crl_pem = der_to_pem(crl_der)
+        entries = revoked.count
 
         try:
             crl_metadata = CRLMetadata(
@@ -1,10 +1,13 @@
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional
 from models import db, CA, Certificate
 from models.crl import CRLMetadata
 
 logger = logging.getLogger(__name__)
 
+REVOKED_CHUNK_SIZE = 5000
+
 
 class CRLQueryMixin:
 
@@ -19,6 +22,43 @@ class CRLQueryMixin:
             revoked=True
         ).all()
 
+    @staticmethod
+    def iter_revoked_rows(
+        ca_refid: str,
+        revoked_after: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator:
+        """Yield revoked certificates of a CA as lightweight rows, in id order.
+
+        Only the columns a CRL entry needs are selected (never the crt/prv/csr
+        blobs), in keyset-paginated chunks so memory stays bounded however
+        many certificates are revoked.
+        """
+        query = db.session.query(
+            Certificate.id,
+            Certificate.serial_hex,
+            Certificate.serial_number,
+            Certificate.revoked_at,
+            Certificate.revoke_reason,
+            Certificate.invalidity_at,
+        ).filter(
+            Certificate.caref == ca_refid,
+            Certificate.revoked == True,  # noqa: E712
+        )
+        if revoked_after is not None:
+            query = query.filter(Certificate.revoked_at > revoked_after)
+        query = query.order_by(Certificate.id.asc())
+        chunk_size = chunk_size or REVOKED_CHUNK_SIZE
+
+        last_id = None
+        while True:
+            chunk_query = query if last_id is None else query.filter(Certificate.id > last_id)
+            chunk = chunk_query.limit(chunk_size).all()
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1].id
+
     @staticmethod
     def get_latest_crl(ca_id: int) -> Optional[CRLMetadata]:
         return CRLMetadata.query.filter_by(
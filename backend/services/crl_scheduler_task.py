@@ -3,16 +3,42 @@ CRL Scheduler Task - Automatic CRL Regeneration
 Monitors CRL expiration and regenerates when needed
 """
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, func
 
 from models import db, CA
 from models.crl import CRLMetadata
+from services.crl.generation import ca_generation_lock
 from services.crl_service import CRLService
 from utils.datetime_utils import utc_now
 
 logger = logging.getLogger(__name__)
 
+# Per-CA outcome of the most recent scheduled generation, keyed by CA id
+_last_runs: Dict[int, dict] = {}
+_last_runs_lock = threading.Lock()
+
+
+def _latest_crl_times(is_delta: bool):
+    """Subquery of (ca_id, this_update, next_update) for each CA's newest full or delta CRL."""
+    newest = db.session.query(
+        CRLMetadata.ca_id,
+        func.max(CRLMetadata.crl_number).label('crl_number'),
+    ).filter(CRLMetadata.is_delta == is_delta).group_by(CRLMetadata.ca_id).subquery()
+    return db.session.query(
+        CRLMetadata.ca_id, CRLMetadata.this_update, CRLMetadata.next_update
+    ).join(newest, and_(
+        CRLMetadata.ca_id == newest.c.ca_id,
+        CRLMetadata.crl_number == newest.c.crl_number,
+    )).filter(CRLMetadata.is_delta == is_delta).subquery()
+
 
 class CRLSchedulerTask:
     """
@@ -27,6 +53,9 @@ class CRLSchedulerTask:
     
     # Regenerate CRL when this many hours before expiration
     REGENERATION_THRESHOLD_HOURS = 24
+
+    # Upper bound on CAs signed concurrently per cycle
+    MAX_WORKERS = int(os.getenv("CRL_SCHEDULER_WORKERS", "4"))
     
     @staticmethod
     def should_regenerate_crl(ca_id: int) -> tuple[bool, Optional[str]]:
@@ -53,34 +82,14 @@ class CRLSchedulerTask:
                 ca_id=ca_id, is_delta=False
             ).order_by(CRLMetadata.created_at.desc()).first()
             
-            if not latest_crl:
-                return True, f"No CRL exists for CA '{ca.descr}' - needs generation"
-            
-            # Check if CRL is stale (past next_update)
-            if latest_crl.is_stale:
-                return True, f"CRL is stale for CA '{ca.descr}' - needs regeneration"
-            
-            # Publish cadence decoupled from validity (#207): when configured,
-            # republish once the latest CRL is older than the interval, well
-            # before nextUpdate — the validity margin is the grace period.
-            if ca.crl_publish_interval_hours:
-                age_hours = (utc_now() - latest_crl.this_update).total_seconds() / 3600
-                if age_hours >= ca.crl_publish_interval_hours:
-                    return (
-                        True,
-                        f"CRL publish interval reached for CA '{ca.descr}' "
-                        f"(age {age_hours:.1f}h >= {ca.crl_publish_interval_hours}h)"
-                    )
-
-            # Check if approaching expiration
-            hours_until_expiry = latest_crl.days_until_expiry * 24
-            if hours_until_expiry <= CRLSchedulerTask.REGENERATION_THRESHOLD_HOURS:
-                return (
-                    True,
-                    f"CRL expires in {hours_until_expiry:.1f}h for CA '{ca.descr}' "
-                    f"(threshold: {CRLSchedulerTask.REGENERATION_THRESHOLD_HOURS}h)"
-                )
-
+            reason = CRLSchedulerTask._full_crl_due_reason(
+                ca,
+                latest_crl.this_update if latest_crl else None,
+                latest_crl.next_update if latest_crl else None,
+                utc_now(),
+            )
+            if reason:
+                return True, reason
             return False, None
         
         except Exception as e:
@@ -126,103 +135,190 @@ class CRLSchedulerTask:
             )
             return False
     
+    @staticmethod
+    def _full_crl_due_reason(
+        ca: CA,
+        this_update: Optional[datetime],
+        next_update: Optional[datetime],
+        now: datetime,
+    ) -> Optional[str]:
+        """Why the CA's full CRL must be regenerated now, or None if it need not be."""
+        if next_update is None:
+            return f"No CRL exists for CA '{ca.descr}' - needs generation"
+
+        # Check if CRL is stale (past next_update)
+        if now > next_update:
+            return f"CRL is stale for CA '{ca.descr}' - needs regeneration"
+
+        # Publish cadence decoupled from validity (#207): when configured,
+        # republish once the latest CRL is older than the interval, well
+        # before nextUpdate — the validity margin is the grace period.
+        if ca.crl_publish_interval_hours:
+            age_hours = (now - this_update).total_seconds() / 3600
+            if age_hours >= ca.crl_publish_interval_hours:
+                return (
+                    f"CRL publish interval reached for CA '{ca.descr}' "
+                    f"(age {age_hours:.1f}h >= {ca.crl_publish_interval_hours}h)"
+                )
+
+        # Check if approaching expiration
+        hours_until_expiry = max(0, (next_update - now).days) * 24
+        if hours_until_expiry <= CRLSchedulerTask.REGENERATION_THRESHOLD_HOURS:
+            return (
+                f"CRL expires in {hours_until_expiry:.1f}h for CA '{ca.descr}' "
+                f"(threshold: {CRLSchedulerTask.REGENERATION_THRESHOLD_HOURS}h)"
+            )
+        return None
+
+    @staticmethod
+    def due_crls(now: Optional[datetime] = None) -> List[dict]:
+        """
+        Work list for one scheduler cycle, from a single query
+
+        Joins every CDP-enabled CA with the times of its newest full and delta
+        CRL (no CRL blobs are read). Offline CAs are excluded: in
+        password_protected mode the key is still present but
+        passphrase-encrypted, so has_private_key is true while signing is
+        impossible — attempting it raised a traceback on every cycle instead
+        of a skip.
+
+        Returns:
+            One dict per CA with work: ca_id, ca, full_reason (None when only
+            the delta is due) and delta_hours (None when no delta is due)
+        """
+        now = now or utc_now()
+        base = _latest_crl_times(False)
+        delta = _latest_crl_times(True)
+        rows = db.session.query(
+            CA,
+            base.c.this_update, base.c.next_update,
+            delta.c.this_update, delta.c.next_update,
+        ).outerjoin(base, base.c.ca_id == CA.id).outerjoin(
+            delta, delta.c.ca_id == CA.id
+        ).filter(CA.cdp_enabled == True).all()  # noqa: E712
+
+        due = []
+        offline_skipped = 0
+        for ca, base_this, base_next, delta_this, delta_next in rows:
+            # NOTE: has_private_key is a @property, NOT a DB column
+            if not ca.has_private_key:
+                continue
+            if ca.offline:
+                offline_skipped += 1
+                continue
+
+            full_reason = CRLSchedulerTask._full_crl_due_reason(ca, base_this, base_next, now)
+
+            delta_hours = None
+            if ca.delta_crl_enabled:
+                interval_hours = ca.delta_crl_interval or 4
+                if delta_next is None:
+                    # Only generate delta if a base CRL exists (or is about to)
+                    need_delta = base_next is not None or full_reason is not None
+                elif now > delta_next:
+                    need_delta = True
+                else:
+                    need_delta = (now - delta_this).total_seconds() / 3600 >= interval_hours
+                if need_delta:
+                    delta_hours = interval_hours
+
+            if full_reason or delta_hours:
+                due.append({
+                    'ca_id': ca.id,
+                    'ca': ca.descr,
+                    'full_reason': full_reason,
+                    'delta_hours': delta_hours,
+                })
+
+        if offline_skipped:
+            logger.debug(
+                "CRL regeneration: %s offline CA(s) skipped", offline_skipped
+            )
+        return due
+
+    @staticmethod
+    def _run_ca(app, job: dict) -> dict:
+        """Regenerate one CA's due CRLs in its own app context (and DB session)."""
+        result = {'ca_id': job['ca_id'], 'ca': job['ca'], 'finished_at': None}
+        # Held across full and delta so CDP rebuilds and delta publishes of this
+        # CA wait for the pair and every CRL draws the next number in turn
+        with ca_generation_lock(job['ca_id']), app.app_context():
+            if job['full_reason']:
+                logger.info(f"Regenerating CRL: {job['full_reason']}")
+                started = time.monotonic()
+                ok = bool(CRLSchedulerTask.regenerate_crl(job['ca_id']))
+                result['full'] = {
+                    'ok': ok,
+                    'duration_ms': round((time.monotonic() - started) * 1000, 1),
+                }
+
+            # Full before delta: both draw from the CA's one CRL number sequence
+            if job['delta_hours']:
+                started = time.monotonic()
+                try:
+                    CRLService.generate_delta_crl(
+                        job['ca_id'],
+                        validity_hours=job['delta_hours'] * 2,
+                        username='scheduler'
+                    )
+                    ok = True
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error generating delta CRL for CA {job['ca_id']}: {e}")
+                    ok = False
+                result['delta'] = {
+                    'ok': ok,
+                    'duration_ms': round((time.monotonic() - started) * 1000, 1),
+                }
+
+        result['finished_at'] = utc_now().isoformat() + 'Z'
+        with _last_runs_lock:
+            _last_runs[job['ca_id']] = result
+        return result
+
+    @staticmethod
+    def last_runs() -> List[dict]:
+        """Per-CA timing of the latest scheduled generations (task status / metrics)."""
+        with _last_runs_lock:
+            return [dict(run) for run in _last_runs.values()]
+
     @staticmethod
     def execute() -> None:
         """
         Main task to check all CAs and regenerate CRLs as needed
         Called by scheduler every N seconds
+
+        Due CAs are processed on a bounded worker pool, so one slow (e.g.
+        HSM-backed) signature no longer pushes every other CA's CRL past its
+        nextUpdate.
         """
         try:
             logger.debug("Starting CRL regeneration check")
-            
-            # Get all CAs with CDP enabled (auto-regen)
-            # NOTE: has_private_key is a @property, NOT a DB column — cannot use filter_by
-            # Offline CAs are excluded: in password_protected mode the key is
-            # still present but passphrase-encrypted, so has_private_key is
-            # true while signing is impossible — attempting it raised a
-            # traceback on every cycle instead of a skip.
-            cas_with_cdp = CA.query.filter_by(cdp_enabled=True).all()
-            cas_with_keys = [
-                ca for ca in cas_with_cdp if ca.has_private_key and not ca.offline
-            ]
-            offline_skipped = sum(
-                1 for ca in cas_with_cdp if ca.has_private_key and ca.offline
-            )
-            if offline_skipped:
-                logger.debug(
-                    "CRL regeneration: %s offline CA(s) skipped", offline_skipped
-                )
-            
-            if not cas_with_keys:
-                logger.debug("No CAs with CDP enabled and private key found")
+
+            due = CRLSchedulerTask.due_crls()
+            if not due:
+                logger.debug("No CRL regeneration due")
                 return
-            
-            regenerated_count = 0
-            skipped_count = 0
-            error_count = 0
-            
-            for ca in cas_with_keys:
-                should_regen, reason = CRLSchedulerTask.should_regenerate_crl(ca.id)
-                
-                if should_regen:
-                    logger.info(f"Regenerating CRL: {reason}")
-                    success = CRLSchedulerTask.regenerate_crl(ca.id)
-                    if success:
-                        regenerated_count += 1
-                    else:
-                        error_count += 1
-                else:
-                    if reason:
-                        logger.debug(f"Skipping CRL regeneration: {reason}")
-                    skipped_count += 1
-            
+
+            app = current_app._get_current_object()
+            workers = max(1, min(CRLSchedulerTask.MAX_WORKERS, len(due)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='CRLRegen') as pool:
+                results = list(pool.map(lambda job: CRLSchedulerTask._run_ca(app, job), due))
+
+            regenerated = sum(1 for r in results if r.get('full', {}).get('ok'))
+            deltas = sum(1 for r in results if r.get('delta', {}).get('ok'))
+            errors = sum(
+                1 for r in results for kind in ('full', 'delta')
+                if kind in r and not r[kind]['ok']
+            )
             logger.info(
                 f"CRL regeneration check complete: "
-                f"regenerated={regenerated_count}, "
-                f"skipped={skipped_count}, "
-                f"errors={error_count}"
+                f"regenerated={regenerated}, "
+                f"deltas={deltas}, "
+                f"errors={errors}, "
+                f"workers={workers}"
             )
-            
-            # Check delta CRLs for CAs with delta enabled
-            # NOTE: has_private_key is a @property — filter in Python
-            delta_cas = [
-                ca for ca in CA.query.filter_by(cdp_enabled=True, delta_crl_enabled=True).all()
-                if ca.has_private_key and not ca.offline
-            ]
-            
-            delta_count = 0
-            for ca in delta_cas:
-                try:
-                    # Check if delta CRL needs regeneration
-                    latest_delta = CRLService.get_latest_delta_crl(ca.id)
-                    interval_hours = ca.delta_crl_interval or 4
-                    
-                    need_delta = False
-                    if not latest_delta:
-                        # Only generate delta if a base CRL exists
-                        base = CRLService.get_latest_base_crl(ca.id)
-                        if base:
-                            need_delta = True
-                    elif latest_delta.is_stale:
-                        need_delta = True
-                    else:
-                        age_hours = (utc_now() - latest_delta.this_update).total_seconds() / 3600
-                        if age_hours >= interval_hours:
-                            need_delta = True
-                    
-                    if need_delta:
-                        CRLService.generate_delta_crl(
-                            ca.id,
-                            validity_hours=interval_hours * 2,
-                            username='scheduler'
-                        )
-                        delta_count += 1
-                except Exception as e:
-                    logger.error(f"Error generating delta CRL for CA {ca.id}: {e}")
-            
-            if delta_count > 0:
-                logger.info(f"Generated {delta_count} delta CRL(s)")
-        
+
         except Exception as e:
             logger.error(f"Error in CRL regeneration task: {e}", exc_info=True)
 
@@ -40,6 +40,10 @@ def _safe_ident(name: str) -> str:
         raise ValueError(f"Unsafe SQL identifier: {name!r}")
     return name
 
+# Tables whose row create_all() seeds on the target (see models.audit_log);
+# the copy from the source replaces it.
+SEEDED_BY_CREATE_ALL = ("audit_chain_head",)
+
 # Tables that must be present on a target backend even when an admin switches
 # WITHOUT migrating data, so we don't lock everyone out of the new empty DB.
 # Order matters: parents before children to satisfy FKs without disabling them.
@@ -347,6 +351,8 @@ def migrate_data(target_url: str) -> Tuple[bool, str, dict]:
                     if not cols:
                         logger.warning(f"{table_name}: no overlapping columns, skipping")
                         continue
+                    if table_name in SEEDED_BY_CREATE_ALL:
+                        dst.execute(text(f'DELETE FROM "{table_q}"'))
                     placeholders = ", ".join(f":{c}" for c in cols)
                     col_list = ", ".join(f'"{c}"' for c in cols)
                     insert_sql = text(
@@ -12,6 +12,10 @@ Design notes:
     handler itself, not done inline.
   * Fully isolated — a failing/throwing handler can never break ``emit`` or
     the business operation that triggered it.
+  * Handlers subscribed with ``remote=True`` only drop in-process caches.
+    With several workers, events that have one are also handed to the relay
+    (services.events.relay), which replays them in the other workers to the
+    remote handlers alone, so notifications are never delivered twice.
 """
 import logging
 import threading
@@ -29,12 +33,25 @@ EventHandler = Callable[[str, dict, Optional[str], Optional[dict]], None]
 class EventBus:
     def __init__(self):
         self._handlers: Dict[str, List[EventHandler]] = {}
+        self._remote: Dict[str, List[EventHandler]] = {}
+        self._relay: Optional[Callable[[str, dict, Optional[str]], None]] = None
         self._lock = threading.RLock()
 
-    def subscribe(self, event_type: str, handler: EventHandler) -> None:
-        """Register *handler* for *event_type* (use ALL for every event)."""
+    def subscribe(self, event_type: str, handler: EventHandler, remote: bool = False) -> None:
+        """Register *handler* for *event_type* (use ALL for every event).
+
+        ``remote=True`` marks a handler that must also see events emitted in
+        other worker processes (cache invalidation).
+        """
         with self._lock:
             self._handlers.setdefault(event_type, []).append(handler)
+            if remote:
+                self._remote.setdefault(event_type, []).append(handler)
+
+    def set_relay(self, relay: Optional[Callable[[str, dict, Optional[str]], None]]) -> None:
+        """Forward events that have remote handlers to *relay* (None stops it)."""
+        with self._lock:
+            self._relay = relay
 
     def emit(self, event_type: str, payload: dict, ca_refid: str = None, meta: dict = None) -> None:
         """Publish an event. Never raises.
@@ -46,6 +63,22 @@ class EventBus:
         meta = meta or {}
         with self._lock:
             handlers = list(self._handlers.get(event_type, ())) + list(self._handlers.get(ALL, ()))
+            relay = self._relay if (event_type in self._remote or ALL in self._remote) else None
+        self._dispatch(handlers, event_type, payload, ca_refid, meta)
+        if relay is not None:
+            try:
+                relay(event_type, payload, ca_refid)
+            except Exception as e:  # pragma: no cover - defensive
+                logger.error(f"Event relay failed for {event_type}: {e}", exc_info=True)
+
+    def emit_remote(self, event_type: str, payload: dict, ca_refid: str = None) -> None:
+        """Deliver an event relayed from another process to remote handlers only."""
+        with self._lock:
+            handlers = list(self._remote.get(event_type, ())) + list(self._remote.get(ALL, ()))
+        self._dispatch(handlers, event_type, payload, ca_refid, {})
+
+    @staticmethod
+    def _dispatch(handlers, event_type, payload, ca_refid, meta) -> None:
         for handler in handlers:
             try:
                 handler(event_type, payload, ca_refid, meta)
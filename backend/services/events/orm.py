@@ -0,0 +1,42 @@
+"""Bus events for ORM row changes that in-process caches depend on.
+
+A change is published as soon as it is flushed, so this process stops
+serving the old value right away, and once more when the transaction
+commits or rolls back: a request that re-read the row between the flush and
+the commit cached a value that was not yet (or never) committed.
+"""
+import threading
+
+from .bus import event_bus
+
+_SESSION_KEY = 'bus_row_change_events'
+_lock = threading.Lock()
+_registered = False
+
+
+def emit_row_change(session, event_type: str, payload: dict) -> None:
+    """Publish *event_type* now and again when *session*'s transaction ends."""
+    _register()
+    event_bus.emit(event_type, payload)
+    if session is not None:
+        session.info.setdefault(_SESSION_KEY, []).append((event_type, payload))
+
+
+def _on_transaction_end(session) -> None:
+    for event_type, payload in session.info.pop(_SESSION_KEY, ()):
+        event_bus.emit(event_type, payload)
+
+
+def _register() -> None:
+    global _registered
+    if _registered:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    with _lock:
+        if _registered:
+            return
+        event.listen(Session, 'after_commit', _on_transaction_end)
+        event.listen(Session, 'after_rollback', _on_transaction_end)
+        _registered = True
@@ -0,0 +1,132 @@
+"""Cross-worker relay for cache-invalidation events.
+
+Every server worker keeps its own in-process caches (OCSP signing material,
+the issuer index, CRL downloads, inventory counts, auth resolution), and a
+change made in one worker is only announced on that worker's bus. Events
+with a ``remote=True`` subscriber are therefore also published on the Redis
+channel ``ucm:events``; a listener thread in every other process replays
+them to the remote subscribers alone. Webhook, e-mail and WebSocket
+subscribers never see a replayed event, so nothing is delivered twice.
+
+Without ``REDIS_URL`` the relay stays off (one worker needs none). While
+Redis is unreachable, changes from other workers are picked up when the
+caches' own TTLs expire.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+from utils.redis_backend import redis_client
+
+from .bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'ucm:events'
+_RETRY_SEC = 5
+_WARN_INTERVAL = 60
+
+_lock = threading.Lock()
+_client = None
+_listening_pid: Optional[int] = None
+_origin: Optional[str] = None
+_origin_pid: Optional[int] = None
+_warned_at = 0.0
+
+
+def _process_origin() -> str:
+    """Id of this process in relayed messages; a forked worker gets its own."""
+    global _origin, _origin_pid
+    if _origin_pid != os.getpid():
+        _origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        _origin_pid = os.getpid()
+    return _origin
+
+
+def publish(event_type: str, payload: dict, ca_refid: Optional[str] = None) -> None:
+    """Send an event to the other workers (the bus calls this, see start())."""
+    global _warned_at
+    client = _client
+    if client is None:
+        return
+    message = json.dumps({'origin': _process_origin(), 'type': event_type,
+                          'payload': payload or {}, 'ca_refid': ca_refid}, default=str)
+    try:
+        client.publish(CHANNEL, message)
+    except Exception as e:
+        now = time.monotonic()
+        if now - _warned_at >= _WARN_INTERVAL:
+            _warned_at = now
+            logger.warning(f"Event relay: publish failed, other workers rely on cache TTLs: {e}")
+
+
+def _dispatch(data, origin: str) -> None:
+    try:
+        event = json.loads(data)
+    except (TypeError, ValueError):
+        logger.debug("Event relay: ignoring malformed message")
+        return
+    if not isinstance(event, dict) or event.get('origin') == origin or not event.get('type'):
+        return
+    event_bus.emit_remote(event['type'], event.get('payload') or {}, event.get('ca_refid'))
+
+
+def _listen(pid: int) -> None:
+    client = redis_client(socket_timeout=None)
+    origin = _process_origin()
+    while _listening_pid == pid:
+        pubsub = None
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            while _listening_pid == pid:
+                message = pubsub.get_message(timeout=1.0)
+                if message:
+                    _dispatch(message.get('data'), origin)
+        except Exception as e:
+            logger.warning(f"Event relay: subscription lost, retrying in {_RETRY_SEC}s: {e}")
+            time.sleep(_RETRY_SEC)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def start(listen: bool = True) -> bool:
+    """Relay this process's cache events, and with *listen* replay the others'.
+
+    Idempotent per process: the gunicorn master publishes only (its loop
+    would otherwise be inherited by forked workers), each worker calls this
+    again from ``post_worker_init`` to start its own listener. Returns
+    whether Redis is configured.
+    """
+    global _client, _listening_pid
+    with _lock:
+        if _client is None:
+            _client = redis_client()
+            if _client is None:
+                return False
+            event_bus.set_relay(publish)
+        if listen and _listening_pid != os.getpid():
+            _listening_pid = os.getpid()
+            thread = threading.Thread(target=_listen, args=(_listening_pid,), daemon=True,
+                                      name='EventRelay')
+            thread.start()
+            logger.info(f"Event relay listening on {CHANNEL} (pid {_listening_pid})")
+    return True
+
+
+def stop() -> None:
+    """Stop publishing and let the listener exit."""
+    global _client, _listening_pid
+    with _lock:
+        _client = None
+        _listening_pid = None
+        event_bus.set_relay(None)
@@ -24,7 +24,7 @@ try:
     from azure.keyvault.keys import KeyClient, KeyType, KeyCurveName
     from azure.keyvault.keys.crypto import CryptographyClient, SignatureAlgorithm
     from azure.identity import DefaultAzureCredential, ClientSecretCredential
-    from azure.core.exceptions import AzureError, ResourceNotFoundError
+    from azure.core.exceptions import AzureError, ResourceNotFoundError, ServiceRequestError
     AZURE_AVAILABLE = True
     
     # Algorithm mappings (only defined if azure is available)
@@ -130,9 +130,20 @@ class AzureKeyVaultProvider(BaseHsmProvider):
         """Disconnect from Azure Key Vault"""
         self._key_client = None
         self._credential = None
+        self._key_handles.clear()
         self._connected = False
         logger.debug(f"Disconnected from Azure Key Vault: {self.vault_url}")
     
+    def ping(self) -> bool:
+        """Fetch one page of key properties over the pooled HTTP client"""
+        if not self._key_client:
+            return False
+        try:
+            next(iter(self._key_client.list_properties_of_keys(max_page_size=1)), None)
+            return True
+        except AzureError:
+            return False
+    
     def test_connection(self) -> Dict[str, Any]:
         """Test connection to Azure Key Vault"""
         try:
@@ -356,6 +367,7 @@ class AzureKeyVaultProvider(BaseHsmProvider):
             # Extract key name from identifier
             # Format: https://<vault>.vault.azure.net/keys/<name>/<version>
             key_name = key_identifier.split('/keys/')[-1].split('/')[0]
+            self._key_handles.pop(key_name, None)
             
             # Delete key (soft delete)
             poller = self._key_client.begin_delete_key(key_name)
@@ -411,20 +423,20 @@ class AzureKeyVaultProvider(BaseHsmProvider):
             # Extract key name
             key_name = key_identifier.split('/keys/')[-1].split('/')[0]
             
-            # Get key to determine algorithm
-            key = self._key_client.get_key(key_name)
+            # Key and its crypto client are resolved once per connection
+            crypto_client, key_type = self._crypto_client(key_name)
             
             # Determine signature algorithm
             if algorithm and algorithm in SIGN_ALGORITHMS:
                 sign_alg = SIGN_ALGORITHMS[algorithm]
             else:
                 # Default based on key type
-                if key.key_type in (KeyType.rsa, KeyType.rsa_hsm):
+                if key_type in (KeyType.rsa, KeyType.rsa_hsm):
                     sign_alg = SignatureAlgorithm.rs256
-                elif key.key_type in (KeyType.ec, KeyType.ec_hsm):
+                elif key_type in (KeyType.ec, KeyType.ec_hsm):
                     sign_alg = SignatureAlgorithm.es256
                 else:
-                    raise HsmOperationError(f"Unsupported key type: {key.key_type}")
+                    raise HsmOperationError(f"Unsupported key type: {key_type}")
             
             # Hash the data first (Azure expects a digest)
             import hashlib
@@ -435,17 +447,27 @@ class AzureKeyVaultProvider(BaseHsmProvider):
             else:
                 digest = hashlib.sha512(data).digest()
             
-            # Create crypto client and sign
-            crypto_client = CryptographyClient(key, credential=self._credential)
             result = crypto_client.sign(sign_alg, digest)
             
             logger.debug(f"Signed {len(data)} bytes with key {key_name}")
             return result.signature
             
         except ResourceNotFoundError:
+            self._key_handles.pop(key_name, None)
             raise HsmKeyNotFoundError(f"Key not found: {key_identifier}")
+        except ServiceRequestError as e:
+            raise HsmConnectionError(f"Azure Key Vault unreachable: {str(e)}")
         except AzureError as e:
             raise HsmOperationError(f"Signing failed: {str(e)}")
+    
+    def _crypto_client(self, key_name: str):
+        """Return (CryptographyClient, key type) for a key, cached per connection"""
+        cached = self._key_handles.get(key_name)
+        if cached is None:
+            key = self._key_client.get_key(key_name)
+            cached = (CryptographyClient(key, credential=self._credential), key.key_type)
+            self._key_handles[key_name] = cached
+        return cached
 
 
 def is_available() -> bool:
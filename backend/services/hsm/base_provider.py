@@ -36,12 +36,30 @@ class BaseHsmProvider(ABC):
         """
         self.config = config
         self._connected = False
+        # Per-connection cache of resolved key handles, keyed by key identifier.
+        # Providers fill it on first use and must clear it on disconnect.
+        self._key_handles: Dict[str, Any] = {}
     
+    # Whether the login is shared by every session to the backend (PKCS#11
+    # tokens), so that one session logging out logs all of them out
+    shares_login = False
+
     @property
     def is_connected(self) -> bool:
         """Check if provider is connected"""
         return self._connected
     
+    def ping(self) -> bool:
+        """
+        Cheap liveness check of an open connection, used by the session pool
+        before reusing an instance that has been idle for a while.
+        Providers override this with a round-trip to the backend.
+        
+        Returns:
+            True if the connection is still usable
+        """
+        return self._connected
+    
     @abstractmethod
     def connect(self) -> bool:
         """
@@ -55,6 +73,21 @@ class BaseHsmProvider(ABC):
         """
         pass
     
+    def connect_session(self) -> bool:
+        """
+        Connect without logging in, relying on a login held by another
+        instance of the same provider. Only called when ``shares_login`` is
+        set: the session pool keeps one logged-in instance open for its
+        lifetime and opens the instances it leases out this way.
+        
+        Returns:
+            True if connection successful
+            
+        Raises:
+            HsmConnectionError: If connection fails
+        """
+        return self.connect()
+    
     @abstractmethod
     def disconnect(self) -> None:
         """Close connection to HSM"""
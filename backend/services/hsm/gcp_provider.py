@@ -136,9 +136,20 @@ class GcpKmsProvider(BaseHsmProvider):
         """Disconnect from GCP KMS"""
         self._client = None
         self._key_ring_path = None
+        self._key_handles.clear()
         self._connected = False
         logger.debug(f"Disconnected from GCP KMS")
     
+    def ping(self) -> bool:
+        """Re-read the key ring over the pooled gRPC channel"""
+        if not self._client:
+            return False
+        try:
+            self._client.get_key_ring(name=self._key_ring_path)
+            return True
+        except gcp_exceptions.GoogleAPIError:
+            return False
+    
     def test_connection(self) -> Dict[str, Any]:
         """Test connection to GCP KMS"""
         try:
@@ -377,9 +388,13 @@ class GcpKmsProvider(BaseHsmProvider):
             
             version_name = f"{key_identifier}/cryptoKeyVersions/{crypto_key.primary.name.split('/')[-1]}"
             
-            # Get version to determine algorithm
-            version = self._client.get_crypto_key_version(name=version_name)
-            version_algorithm = GCP_ALGORITHM_NAMES.get(version.algorithm, '')
+            # A version's algorithm never changes; look it up once per connection.
+            # The primary itself is re-read every time so rotations apply at once.
+            version_algorithm = self._key_handles.get(version_name)
+            if version_algorithm is None:
+                version = self._client.get_crypto_key_version(name=version_name)
+                version_algorithm = GCP_ALGORITHM_NAMES.get(version.algorithm, '')
+                self._key_handles[version_name] = version_algorithm
             
             # Hash the data
             import hashlib
@@ -401,6 +416,8 @@ class GcpKmsProvider(BaseHsmProvider):
             
         except gcp_exceptions.NotFound:
             raise HsmKeyNotFoundError(f"Key not found: {key_identifier}")
+        except gcp_exceptions.ServiceUnavailable as e:
+            raise HsmConnectionError(f"GCP KMS unreachable: {str(e)}")
         except gcp_exceptions.GoogleAPIError as e:
             raise HsmOperationError(f"Signing failed: {str(e)}")
 
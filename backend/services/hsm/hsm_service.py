@@ -14,6 +14,7 @@ from services.hsm.base_provider import (
     BaseHsmProvider, HsmKeyInfo,
     HsmError, HsmConnectionError, HsmOperationError, HsmConfigError
 )
+from services.hsm import session_pool
 from utils.datetime_utils import utc_now
 from utils import hsm_check, pkcs11_config
 
@@ -47,16 +48,10 @@ class HsmService:
         return list(cls._provider_registry.keys())
     
     @classmethod
-    def _get_provider_instance(cls, provider: HsmProvider) -> BaseHsmProvider:
+    def _get_provider_class(cls, provider: HsmProvider) -> Type[BaseHsmProvider]:
         """
-        Get provider instance for a given HsmProvider model.
+        Get the registered implementation for a HsmProvider model.
         
-        Args:
-            provider: HsmProvider model instance
-            
-        Returns:
-            Configured provider instance
-            
         Raises:
             HsmConfigError: If provider type not registered
         """
@@ -66,11 +61,49 @@ class HsmService:
                 f"Provider type '{provider.type}' not available. "
                 f"Available types: {available}"
             )
+        return cls._provider_registry[provider.type]
+    
+    @classmethod
+    def _get_provider_instance(cls, provider: HsmProvider) -> BaseHsmProvider:
+        """
+        Get a fresh, unconnected provider instance for a given HsmProvider model.
         
-        provider_class = cls._provider_registry[provider.type]
+        Args:
+            provider: HsmProvider model instance
+            
+        Returns:
+            Configured provider instance
+            
+        Raises:
+            HsmConfigError: If provider type not registered
+        """
+        provider_class = cls._get_provider_class(provider)
         config = provider.get_config()
         return provider_class(config)
     
+    @classmethod
+    def _with_session(cls, provider: HsmProvider, operation, retry: bool = False):
+        """
+        Run ``operation(hsm)`` on a connected instance leased from the
+        provider's session pool.
+        
+        Args:
+            provider: HsmProvider model instance
+            operation: Callable receiving the connected provider instance
+            retry: Repeat once on a fresh connection if the leased one turns
+                out to be dead (only for idempotent operations)
+        """
+        pool = session_pool.pool_for(provider, cls._get_provider_class(provider))
+        try:
+            with pool.lease() as hsm:
+                return operation(hsm)
+        except HsmConnectionError as e:
+            if not retry:
+                raise
+            logger.warning(f"HSM session to {provider.name} lost ({e}), retrying on a new one")
+        with pool.lease() as hsm:
+            return operation(hsm)
+    
     # =========================================================================
     # Provider CRUD
     # =========================================================================
@@ -189,6 +222,7 @@ class HsmService:
             db.session.rollback()
             logger.error(f"Commit failed in services/hsm/hsm_service.py:176: {_commit_err}", exc_info=True)
             raise
+        session_pool.invalidate(provider_id)
         
         logger.info(f"Updated HSM provider: {provider.name}")
         return provider
@@ -219,6 +253,7 @@ class HsmService:
             db.session.rollback()
             logger.error(f"Commit failed in services/hsm/hsm_service.py:201: {_commit_err}", exc_info=True)
             raise
+        session_pool.invalidate(provider_id)
         
         logger.info(f"Deleted HSM provider: {name}")
         return True
@@ -338,14 +373,12 @@ class HsmService:
         
         try:
             # Generate key in HSM
-            hsm = cls._get_provider_instance(provider)
-            with hsm:
-                key_info = hsm.generate_key(
-                    label=label,
-                    algorithm=algorithm,
-                    purpose=purpose,
-                    extractable=extractable
-                )
+            key_info = cls._with_session(provider, lambda hsm: hsm.generate_key(
+                label=label,
+                algorithm=algorithm,
+                purpose=purpose,
+                extractable=extractable
+            ))
             
             # Save to database
             key = HsmKey(
@@ -392,9 +425,8 @@ class HsmService:
         
         try:
             # Delete from HSM
-            hsm = cls._get_provider_instance(provider)
-            with hsm:
-                hsm.delete_key(key.key_identifier)
+            key_identifier = key.key_identifier
+            cls._with_session(provider, lambda hsm: hsm.delete_key(key_identifier))
             
             # Delete from database
             db.session.delete(key)
@@ -431,9 +463,10 @@ class HsmService:
         # Fetch from HSM
         provider = key.provider
         try:
-            hsm = cls._get_provider_instance(provider)
-            with hsm:
-                pem = hsm.get_public_key(key.key_identifier)
+            key_identifier = key.key_identifier
+            pem = cls._with_session(
+                provider, lambda hsm: hsm.get_public_key(key_identifier), retry=True
+            )
             
             # Cache it
             key.public_key_pem = pem
@@ -469,9 +502,10 @@ class HsmService:
         
         provider = key.provider
         try:
-            hsm = cls._get_provider_instance(provider)
-            with hsm:
-                signature = hsm.sign(key.key_identifier, data, algorithm)
+            key_identifier = key.key_identifier
+            signature = cls._with_session(
+                provider, lambda hsm: hsm.sign(key_identifier, data, algorithm), retry=True
+            )
             
             logger.debug(f"Signed data with HSM key: {key.label}")
             return signature
@@ -503,9 +537,7 @@ class HsmService:
             raise ValueError(f"Provider not found: {provider_id}")
         
         try:
-            hsm = cls._get_provider_instance(provider)
-            with hsm:
-                hsm_keys = hsm.list_keys()
+            hsm_keys = cls._with_session(provider, lambda hsm: hsm.list_keys(), retry=True)
             
             # Get existing keys in DB
             db_keys = {k.key_identifier: k for k in provider.keys}
@@ -166,8 +166,19 @@ class OpenBaoProvider(BaseHsmProvider):
         if self._session:
             self._session.close()
             self._session = None
+        self._key_handles.clear()
         self._connected = False
 
+    def ping(self) -> bool:
+        """Health check over the pooled keep-alive connection"""
+        if not self._session:
+            return False
+        try:
+            resp = self._session.get(f'{self._url}/v1/sys/health')
+            return resp.status_code in (200, 429, 472, 473)
+        except requests.RequestException:
+            return False
+
     def test_connection(self) -> Dict[str, Any]:
         try:
             self.connect()
@@ -310,6 +321,7 @@ class OpenBaoProvider(BaseHsmProvider):
         )
 
     def delete_key(self, key_identifier: str) -> bool:
+        self._key_handles.pop(key_identifier, None)
         # Transit requires deletion_allowed=true before deleting
         try:
             self._api('POST', f'keys/{key_identifier}/config', json={
@@ -358,13 +370,16 @@ class OpenBaoProvider(BaseHsmProvider):
             hash_alg = SIGN_HASH_ALGORITHM[algorithm]
             sig_alg = SIGN_ALGORITHM.get(algorithm)
         else:
-            # Read key to determine type
-            detail = self._api('GET', f'keys/{key_identifier}')
-            key_data = detail.get('data', {})
-            if not key_data:
-                raise HsmKeyNotFoundError(f'Key {key_identifier} not found')
+            # Read key to determine type (once per connection)
+            transit_type = self._key_handles.get(key_identifier)
+            if transit_type is None:
+                detail = self._api('GET', f'keys/{key_identifier}')
+                key_data = detail.get('data', {})
+                if not key_data:
+                    raise HsmKeyNotFoundError(f'Key {key_identifier} not found')
+                transit_type = key_data.get('type', '')
+                self._key_handles[key_identifier] = transit_type
 
-            transit_type = key_data.get('type', '')
             ucm_alg = TRANSIT_TO_ALGORITHM.get(transit_type)
             if ucm_alg:
                 hash_alg = SIGN_HASH_ALGORITHM.get(ucm_alg, 'sha2-256')
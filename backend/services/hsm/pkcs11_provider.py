@@ -22,6 +22,8 @@ logger = logging.getLogger(__name__)
 PKCS11_AVAILABLE = False
 ALGORITHM_TO_PKCS11 = {}
 SIGN_MECHANISMS = {}
+SESSION_ERRORS = ()
+STALE_HANDLE_ERRORS = ()
 
 try:
     import pkcs11
@@ -51,6 +53,22 @@ try:
         'EC-P384': Mechanism.ECDSA_SHA384,
         'EC-P521': Mechanism.ECDSA_SHA512,
     }
+    
+    # Errors after which the session (or the login behind it) is gone and
+    # only a reconnect helps
+    SESSION_ERRORS = (
+        pkcs11.exceptions.SessionClosed,
+        pkcs11.exceptions.SessionHandleInvalid,
+        pkcs11.exceptions.UserNotLoggedIn,
+        pkcs11.exceptions.TokenNotPresent,
+        pkcs11.exceptions.DeviceRemoved,
+        pkcs11.exceptions.DeviceError,
+    )
+    # A cached object handle no longer refers to the key (deleted elsewhere)
+    STALE_HANDLE_ERRORS = (
+        pkcs11.exceptions.ObjectHandleInvalid,
+        pkcs11.exceptions.KeyHandleInvalid,
+    )
 except ImportError:
     pkcs11 = None
 
@@ -65,6 +83,8 @@ class Pkcs11Provider(BaseHsmProvider):
         user_pin: User PIN for authentication
         slot_index: Slot index (optional, default: auto-detect)
     """
+
+    shares_login = True
     
     def __init__(self, config: Dict[str, Any]):
         if not PKCS11_AVAILABLE:
@@ -98,7 +118,14 @@ class Pkcs11Provider(BaseHsmProvider):
         self._session = None
     
     def connect(self) -> bool:
-        """Connect to HSM and open session"""
+        """Connect to HSM and open a session logged in with the user PIN"""
+        return self._open(login=True)
+
+    def connect_session(self) -> bool:
+        """Open a session that relies on the token login held elsewhere"""
+        return self._open(login=False)
+
+    def _open(self, login: bool) -> bool:
         try:
             # Load PKCS#11 library
             self._lib = pkcs11.lib(self.module_path)
@@ -112,8 +139,17 @@ class Pkcs11Provider(BaseHsmProvider):
             else:
                 self._token = self._lib.get_token(token_label=self.token_label)
             
-            # Open session
-            self._session = self._token.open(rw=True, user_pin=self.user_pin)
+            # Open session. Login state is per token, not per session: a
+            # session opened with the PIN logs the whole token out again when
+            # it closes, so pooled sessions open without one and inherit the
+            # login of the pool's login session.
+            if login:
+                try:
+                    self._session = self._token.open(rw=True, user_pin=self.user_pin)
+                except pkcs11.exceptions.UserAlreadyLoggedIn:
+                    self._session = self._token.open(rw=True)
+            else:
+                self._session = self._token.open(rw=True)
             self._connected = True
             
             logger.info(f"Connected to PKCS#11 token: {self.token_label}")
@@ -133,9 +169,24 @@ class Pkcs11Provider(BaseHsmProvider):
         self._session = None
         self._token = None
         self._lib = None
+        self._key_handles.clear()
         self._connected = False
         logger.debug(f"Disconnected from PKCS#11 token: {self.token_label}")
     
+    def ping(self) -> bool:
+        """Run an empty object search to prove the session is still alive"""
+        if not self._session:
+            return False
+        try:
+            for _ in self._session.get_objects({
+                Attribute.CLASS: ObjectClass.DATA,
+                Attribute.LABEL: '__ucm_ping__'
+            }):
+                break
+            return True
+        except pkcs11.PKCS11Error:
+            return False
+    
     def test_connection(self) -> Dict[str, Any]:
         """Test connection and return token info"""
         try:
@@ -193,6 +244,8 @@ class Pkcs11Provider(BaseHsmProvider):
             
             return keys
             
+        except SESSION_ERRORS as e:
+            raise HsmConnectionError(f"PKCS#11 session lost: {str(e)}")
         except pkcs11.PKCS11Error as e:
             raise HsmOperationError(f"Failed to list keys: {str(e)}")
     
@@ -374,6 +427,7 @@ class Pkcs11Provider(BaseHsmProvider):
         
         try:
             key_id = bytes.fromhex(key_identifier)
+            self._key_handles.pop(key_identifier, None)
             
             # Find and delete private key
             for obj in self._session.get_objects({
@@ -399,6 +453,8 @@ class Pkcs11Provider(BaseHsmProvider):
             logger.info(f"Deleted key {key_identifier} from HSM")
             return True
             
+        except SESSION_ERRORS as e:
+            raise HsmConnectionError(f"PKCS#11 session lost: {str(e)}")
         except pkcs11.PKCS11Error as e:
             raise HsmOperationError(f"Failed to delete key: {str(e)}")
     
@@ -426,6 +482,8 @@ class Pkcs11Provider(BaseHsmProvider):
             
             raise HsmKeyNotFoundError(f"Public key not found: {key_identifier}")
             
+        except SESSION_ERRORS as e:
+            raise HsmConnectionError(f"PKCS#11 session lost: {str(e)}")
         except pkcs11.PKCS11Error as e:
             raise HsmOperationError(f"Failed to get public key: {str(e)}")
     
@@ -440,23 +498,9 @@ class Pkcs11Provider(BaseHsmProvider):
             raise HsmOperationError("Not connected")
         
         try:
-            key_id = bytes.fromhex(key_identifier)
-            
-            # Find private key
-            priv_key = None
-            for obj in self._session.get_objects({
-                Attribute.CLASS: ObjectClass.PRIVATE_KEY,
-                Attribute.ID: key_id
-            }):
-                priv_key = obj
-                break
-            
-            if not priv_key:
-                raise HsmKeyNotFoundError(f"Private key not found: {key_identifier}")
+            priv_key, key_type = self._private_key(key_identifier)
             
             # Determine mechanism
-            key_type = priv_key[Attribute.KEY_TYPE]
-            
             if algorithm:
                 mechanism = SIGN_MECHANISMS.get(algorithm)
             else:
@@ -469,13 +513,37 @@ class Pkcs11Provider(BaseHsmProvider):
                     raise HsmOperationError(f"Unsupported key type for signing: {key_type}")
             
             # Sign
-            signature = priv_key.sign(data, mechanism=mechanism)
+            try:
+                signature = priv_key.sign(data, mechanism=mechanism)
+            except STALE_HANDLE_ERRORS:
+                # Key was re-created or deleted behind our cached handle
+                self._key_handles.pop(key_identifier, None)
+                priv_key, _ = self._private_key(key_identifier)
+                signature = priv_key.sign(data, mechanism=mechanism)
             
             logger.debug(f"Signed {len(data)} bytes with key {key_identifier}")
             return signature
             
+        except SESSION_ERRORS as e:
+            raise HsmConnectionError(f"PKCS#11 session lost: {str(e)}")
         except pkcs11.PKCS11Error as e:
             raise HsmOperationError(f"Signing failed: {str(e)}")
+    
+    def _private_key(self, key_identifier: str):
+        """Return (private key object, key type), cached for this session"""
+        cached = self._key_handles.get(key_identifier)
+        if cached is not None:
+            return cached
+        
+        for obj in self._session.get_objects({
+            Attribute.CLASS: ObjectClass.PRIVATE_KEY,
+            Attribute.ID: bytes.fromhex(key_identifier)
+        }):
+            handle = (obj, obj[Attribute.KEY_TYPE])
+            self._key_handles[key_identifier] = handle
+            return handle
+        
+        raise HsmKeyNotFoundError(f"Private key not found: {key_identifier}")
 
 
 # Export availability flag
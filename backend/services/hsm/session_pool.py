@@ -0,0 +1,246 @@
+"""
+HSM Session Pool - long-lived connected provider instances per HsmProvider
+
+Connecting is the expensive part of an HSM operation: PKCS#11 loads the
+module, finds the token and logs in; the cloud providers build credentials
+and an HTTP client and probe the service. The signature itself is a single
+round-trip. HsmService therefore leases an already connected instance from
+the provider's pool instead of connecting around every call, and hands it
+back afterwards together with the key handles it resolved on the way.
+
+An instance that sat idle longer than HEALTH_CHECK_SEC is pinged before it is
+reused; one that fails the ping, or raises HsmConnectionError while leased, is
+disconnected and replaced by a fresh connection on demand. Pools are keyed by
+provider id and rebuilt whenever the provider's type or stored config changes.
+
+PKCS#11 logins belong to the token, not the session, and closing the session
+that logged in logs every other session out with it. For such providers
+(``shares_login``) the pool opens one extra logged-in instance that it keeps
+for its whole lifetime, closed only by close(), and connects the instances it
+leases out without the PIN so that retiring one never touches the login.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.hsm.base_provider import BaseHsmProvider, HsmConnectionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv('HSM_SESSION_POOL_SIZE', '4'))
+HEALTH_CHECK_SEC = float(os.getenv('HSM_SESSION_HEALTH_CHECK_SEC', '60'))
+ACQUIRE_TIMEOUT_SEC = float(os.getenv('HSM_SESSION_ACQUIRE_TIMEOUT', '30'))
+
+
+def _disconnect(instance: BaseHsmProvider) -> None:
+    try:
+        instance.disconnect()
+    except Exception as e:
+        logger.debug(f"HSM session disconnect failed: {e}")
+
+
+class HsmSessionPool:
+    """Bounded, thread-safe pool of connected instances of one provider."""
+
+    def __init__(self, factory: Callable[[], BaseHsmProvider], size: int = DEFAULT_POOL_SIZE,
+                 signature: str = ''):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.signature = signature
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[BaseHsmProvider, float]] = []
+        self._open = 0
+        self._closed = False
+        self._login: Optional[BaseHsmProvider] = None
+        self._login_lock = threading.Lock()
+
+    def _acquire(self) -> BaseHsmProvider:
+        deadline = time.monotonic() + ACQUIRE_TIMEOUT_SEC
+        instance = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise HsmConnectionError("HSM session pool is closed")
+                if self._idle:
+                    instance, idle_since = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise HsmConnectionError(
+                        f"No HSM session free after {ACQUIRE_TIMEOUT_SEC:g}s "
+                        f"(pool size {self.size})"
+                    )
+                self._cond.wait(remaining)
+
+        # The slot is ours from here on; connecting happens outside the lock
+        if instance is not None:
+            if time.monotonic() - idle_since < HEALTH_CHECK_SEC or self._healthy(instance):
+                return instance
+            logger.info("HSM session failed its health check, reconnecting")
+            _disconnect(instance)
+            self._check_login()
+        try:
+            return self._connect()
+        except BaseException:
+            self._drop_slot()
+            raise
+
+    def _connect(self) -> BaseHsmProvider:
+        instance = self._factory()
+        if not instance.shares_login:
+            instance.connect()
+            return instance
+        self._hold_login()
+        instance.connect_session()
+        return instance
+
+    def _hold_login(self) -> None:
+        """Open the pool's login instance unless it is already open."""
+        with self._login_lock:
+            if self._closed:
+                raise HsmConnectionError("HSM session pool is closed")
+            if self._login is not None and self._login.is_connected:
+                return
+            login = self._factory()
+            login.connect()
+            self._login = login
+
+    def _check_login(self) -> None:
+        """Drop a dead login instance so that the next connection logs in again."""
+        with self._login_lock:
+            login = self._login
+            if login is None or self._healthy(login):
+                return
+            self._login = None
+        logger.info("HSM login session failed its health check, logging in again")
+        _disconnect(login)
+
+    @staticmethod
+    def _healthy(instance: BaseHsmProvider) -> bool:
+        try:
+            return bool(instance.is_connected and instance.ping())
+        except Exception as e:
+            logger.debug(f"HSM session ping failed: {e}")
+            return False
+
+    def _drop_slot(self) -> None:
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _release(self, instance: BaseHsmProvider) -> None:
+        with self._cond:
+            if not self._closed and instance.is_connected:
+                self._idle.append((instance, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(instance)
+
+    def _discard(self, instance: BaseHsmProvider) -> None:
+        _disconnect(instance)
+        self._drop_slot()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a connected instance for the duration of the ``with`` block.
+
+        A :class:`HsmConnectionError` raised inside the block retires the
+        instance instead of returning it to the pool.
+        """
+        instance = self._acquire()
+        try:
+            yield instance
+        except HsmConnectionError:
+            self._discard(instance)
+            self._check_login()
+            raise
+        except BaseException:
+            self._release(instance)
+            raise
+        self._release(instance)
+
+    def close(self) -> None:
+        """Disconnect idle instances and log out; leased ones are disconnected on return."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for instance, _ in idle:
+            _disconnect(instance)
+        with self._login_lock:
+            login, self._login = self._login, None
+        if login is not None:
+            _disconnect(login)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle)}
+
+
+_lock = threading.Lock()
+_pools: Dict[int, HsmSessionPool] = {}
+
+
+def config_signature(provider) -> str:
+    """Identifies the provider settings a pool's connections were opened with."""
+    raw = f"{provider.type}\0{provider.config or ''}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _pool_size(config: Dict[str, Any]) -> int:
+    try:
+        return int(config.get('pool_size') or DEFAULT_POOL_SIZE)
+    except (TypeError, ValueError):
+        return DEFAULT_POOL_SIZE
+
+
+def pool_for(provider, provider_class) -> HsmSessionPool:
+    """Return the session pool of an HsmProvider row, (re)building it if needed.
+
+    ``provider_class`` is the registered implementation for the provider's
+    type; the decrypted config is captured once, when the pool is created.
+    """
+    signature = config_signature(provider)
+    stale: Optional[HsmSessionPool] = None
+    with _lock:
+        pool = _pools.get(provider.id)
+        if pool is None or pool.signature != signature:
+            stale = pool
+            config = provider.get_config()
+            pool = HsmSessionPool(lambda: provider_class(config), _pool_size(config), signature)
+            _pools[provider.id] = pool
+    if stale is not None:
+        stale.close()
+    return pool
+
+
+def invalidate(provider_id: int) -> None:
+    """Close the pool of a provider whose config changed or that was deleted."""
+    with _lock:
+        pool = _pools.pop(provider_id, None)
+    if pool is not None:
+        pool.close()
+
+
+def reset() -> None:
+    """Close every pool (tests, shutdown)."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def stats() -> Dict[int, Dict[str, int]]:
+    with _lock:
+        pools = dict(_pools)
+    return {provider_id: pool.stats() for provider_id, pool in pools.items()}
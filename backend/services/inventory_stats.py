@@ -0,0 +1,182 @@
+"""Aggregated inventory counters shared by the dashboard and /metrics.
+
+Every dashboard poll and every Prometheus scrape used to fire a separate
+COUNT(*) per status bucket. Here each entity is counted with ONE
+conditional-aggregate query that yields all of its buckets at once, and the
+result is kept for a few seconds in a process-level cache so concurrent
+pollers and scrapers share it.
+
+Freshness: certificate and CA lifecycle events on the bus drop the matching
+entry immediately, so an operator sees their own issuance/revocation on the
+next poll. Changes made by another worker process, or purely time-driven
+transitions (a certificate crossing its expiry), are picked up once the short
+TTL lapses.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import case, func
+
+from utils.datetime_utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+_STATS_TTL_SEC = 5
+_lock = threading.Lock()
+_cache = {}  # entity -> (stored_at, counts)
+_generation = {}  # entity -> bumped on every invalidation
+
+
+def _bucket(condition):
+    """COUNT of rows matching *condition*, as a SUM(CASE ...) column."""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _load_certificates():
+    from models import Certificate, db
+    now = utc_now()
+    in_30d = now + timedelta(days=30)
+    in_7d = now + timedelta(days=7)
+
+    not_revoked = Certificate.revoked == False  # noqa: E712
+    active = Certificate.archived == False  # noqa: E712
+    expired = not_revoked & (Certificate.valid_to < now)
+    expiring_30d = not_revoked & (Certificate.valid_to >= now) & (Certificate.valid_to < in_30d)
+    expiring_7d = not_revoked & (Certificate.valid_to >= now) & (Certificate.valid_to < in_7d)
+    pending_csr = (
+        Certificate.csr.isnot(None) & (Certificate.csr != '')
+        & (Certificate.crt.is_(None) | (Certificate.crt == ''))
+    )
+
+    row = db.session.query(
+        func.count(Certificate.id),
+        _bucket(Certificate.revoked == True),  # noqa: E712
+        _bucket(expired),
+        _bucket(expiring_30d),
+        _bucket(pending_csr),
+        _bucket(active),
+        _bucket(active & (Certificate.revoked == True)),  # noqa: E712
+        _bucket(active & expired),
+        _bucket(active & expiring_30d),
+        _bucket(active & expiring_7d),
+    ).one()
+    values = [int(v or 0) for v in row]
+    return {
+        'total': values[0],
+        'revoked': values[1],
+        'expired': values[2],
+        'expiring_30d': values[3],
+        'pending_csrs': values[4],
+        # Archived rows are superseded renewals; the metrics exporter
+        # reports the live inventory only.
+        'active': {
+            'total': values[5],
+            'revoked': values[6],
+            'expired': values[7],
+            'expiring_30d': values[8],
+            'expiring_7d': values[9],
+        },
+    }
+
+
+def _load_cas():
+    from models import CA, db
+    now = utc_now()
+    row = db.session.query(
+        func.count(CA.id),
+        _bucket(CA.offline == True),  # noqa: E712
+        _bucket(CA.valid_to.isnot(None) & (CA.valid_to < now)),
+    ).one()
+    total, offline, expired = (int(v or 0) for v in row)
+    return {'total': total, 'offline': offline, 'expired': expired}
+
+
+def _load_ssh():
+    from models import db
+    from models.ssh import SSHCertificateAuthority, SSHCertificate
+    cas = db.session.query(func.count(SSHCertificateAuthority.id)).scalar() or 0
+    row = db.session.query(
+        func.count(SSHCertificate.id),
+        _bucket(SSHCertificate.cert_type == 'user'),
+        _bucket(SSHCertificate.cert_type == 'host'),
+    ).one()
+    total, user, host = (int(v or 0) for v in row)
+    return {'cas': int(cas), 'certificates': total, 'user_certs': user, 'host_certs': host}
+
+
+def _load_acme():
+    from models import AcmeAccount, AcmeOrder, db
+    since = utc_now() - timedelta(days=30)
+    accounts = db.session.query(func.count(AcmeAccount.id)).scalar() or 0
+    orders_30d = db.session.query(func.count(AcmeOrder.id)).filter(
+        AcmeOrder.created_at >= since).scalar() or 0
+    return {'accounts': int(accounts), 'orders_30d': int(orders_30d)}
+
+
+def _load_users():
+    from models import User, db
+    active = db.session.query(func.count(User.id)).filter(
+        User.is_active == True).scalar() or 0  # noqa: E712
+    return {'active': int(active)}
+
+
+_LOADERS = {
+    'certificates': _load_certificates,
+    'cas': _load_cas,
+    'ssh': _load_ssh,
+    'acme': _load_acme,
+    'users': _load_users,
+}
+
+
+def get_counts(entity: str) -> dict:
+    """Return the (cached) status buckets for *entity*.
+
+    Raises whatever the underlying query raises (e.g. a missing table); a
+    failure is never cached.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(entity)
+        if entry and now - entry[0] <= _STATS_TTL_SEC:
+            return entry[1]
+        generation = _generation.get(entity, 0)
+
+    counts = _LOADERS[entity]()
+    with _lock:
+        # An event that landed while we were counting makes this result stale
+        if _generation.get(entity, 0) == generation:
+            _cache[entity] = (now, counts)
+    return counts
+
+
+def invalidate(entity: str = None) -> None:
+    """Drop cached counts for *entity*, or for every entity."""
+    with _lock:
+        for name in (_LOADERS if entity is None else (entity,)):
+            _cache.pop(name, None)
+            _generation[name] = _generation.get(name, 0) + 1
+
+
+def _on_certificate_event(event_type, payload, ca_refid, meta):
+    invalidate('certificates')
+
+
+def _on_ca_event(event_type, payload, ca_refid, meta):
+    invalidate('cas')
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        for event_type in ('certificate.issued', 'certificate.revoked', 'certificate.renewed',
+                           'certificate.imported', 'certificate.deleted'):
+            event_bus.subscribe(event_type, _on_certificate_event, remote=True)
+        for event_type in ('ca.created', 'ca.updated', 'ca.deleted'):
+            event_bus.subscribe(event_type, _on_ca_event, remote=True)
+        _register_bus_subscriber._done = True
+
+
+_register_bus_subscriber()
@@ -1,14 +1,11 @@
 """Prometheus metrics exposition.
 
 Renders a text/plain Prometheus exposition document from live UCM state:
-certificate / CA inventory, scheduler task health, and webhook delivery queue.
+certificate / CA inventory, scheduler task health, per-CA CRL generation
+timing, webhook delivery queue, and rate limiter decisions.
 Each metric group is isolated so one failing query never blanks the scrape.
 """
 import logging
-from datetime import timedelta
-
-from utils.datetime_utils import utc_now
-
 logger = logging.getLogger(__name__)
 
 
@@ -38,37 +35,24 @@ class _Doc:
 
 
 def _certificates(doc):
-    from models import Certificate
-    now = utc_now()
-    total = Certificate.query.filter_by(archived=False).count()
-    revoked = Certificate.query.filter_by(archived=False, revoked=True).count()
-    expired = Certificate.query.filter(
-        Certificate.archived == False, Certificate.revoked == False,  # noqa: E712
-        Certificate.valid_to < now).count()
-    valid = total - revoked - expired
-    exp30 = Certificate.query.filter(
-        Certificate.archived == False, Certificate.revoked == False,  # noqa: E712
-        Certificate.valid_to >= now, Certificate.valid_to < now + timedelta(days=30)).count()
-    exp7 = Certificate.query.filter(
-        Certificate.archived == False, Certificate.revoked == False,  # noqa: E712
-        Certificate.valid_to >= now, Certificate.valid_to < now + timedelta(days=7)).count()
+    from services.inventory_stats import get_counts
+    counts = get_counts('certificates')['active']
+    valid = counts['total'] - counts['revoked'] - counts['expired']
     h = "Certificates by status"
     doc.metric('ucm_certificates', valid, help_text=h, status='valid')
-    doc.metric('ucm_certificates', revoked, status='revoked')
-    doc.metric('ucm_certificates', expired, status='expired')
-    doc.metric('ucm_certificates_expiring', exp30, help_text="Active certs expiring within a window", days='30')
-    doc.metric('ucm_certificates_expiring', exp7, days='7')
+    doc.metric('ucm_certificates', counts['revoked'], status='revoked')
+    doc.metric('ucm_certificates', counts['expired'], status='expired')
+    doc.metric('ucm_certificates_expiring', counts['expiring_30d'],
+               help_text="Active certs expiring within a window", days='30')
+    doc.metric('ucm_certificates_expiring', counts['expiring_7d'], days='7')
 
 
 def _cas(doc):
-    from models import CA
-    now = utc_now()
-    total = CA.query.count()
-    offline = CA.query.filter_by(offline=True).count()
-    expired = CA.query.filter(CA.valid_to.isnot(None), CA.valid_to < now).count()
-    doc.metric('ucm_certificate_authorities', total, help_text="Certificate authorities by status", status='total')
-    doc.metric('ucm_certificate_authorities', offline, status='offline')
-    doc.metric('ucm_certificate_authorities', expired, status='expired')
+    from services.inventory_stats import get_counts
+    counts = get_counts('cas')
+    doc.metric('ucm_certificate_authorities', counts['total'], help_text="Certificate authorities by status", status='total')
+    doc.metric('ucm_certificate_authorities', counts['offline'], status='offline')
+    doc.metric('ucm_certificate_authorities', counts['expired'], status='expired')
 
 
 def _scheduler(doc):
@@ -86,6 +70,21 @@ def _scheduler(doc):
                    help_text=doc_help_fail, task=name)
 
 
+def _crl_generation(doc):
+    from services.crl_scheduler_task import CRLSchedulerTask
+    h_dur = "Duration of the last scheduled CRL generation per CA (ms)"
+    h_fail = "1 if the last scheduled CRL generation for a CA failed, else 0"
+    for run in CRLSchedulerTask.last_runs():
+        for kind in ('full', 'delta'):
+            if kind not in run:
+                continue
+            labels = {'ca': run['ca'], 'ca_id': run['ca_id'], 'type': kind}
+            doc.metric('ucm_crl_generation_duration_milliseconds', run[kind]['duration_ms'],
+                       help_text=h_dur, **labels)
+            doc.metric('ucm_crl_generation_failed', 0 if run[kind]['ok'] else 1,
+                       help_text=h_fail, **labels)
+
+
 def _webhooks(doc):
     from models import WebhookDelivery, db
     from sqlalchemy import func
@@ -108,6 +107,18 @@ def _acme(doc):
         doc.metric('ucm_acme_orders', n, help_text="ACME orders by status", status=status)
 
 
+def _rate_limits(doc):
+    from security.rate_limiter import get_rate_limiter
+    stats = get_rate_limiter().get_stats()
+    h = "Rate limiter decisions by matched rule, in this worker since start"
+    for rule, counts in sorted(stats['by_endpoint'].items()):
+        for decision in ('allowed', 'blocked'):
+            doc.metric('ucm_rate_limit_decisions_total', counts.get(decision, 0),
+                       mtype='counter', help_text=h, rule=rule, decision=decision)
+    doc.metric('ucm_rate_limit_bypassed_total', stats.get('bypassed', 0), mtype='counter',
+               help_text="Requests that skipped the rate limiter (whitelisted or LAN)")
+
+
 def _build_info(doc):
     try:
         from services.updates import get_current_version
@@ -119,7 +130,8 @@ def _build_info(doc):
 
 def render_metrics() -> str:
     doc = _Doc()
-    for fn in (_build_info, _certificates, _cas, _scheduler, _webhooks, _acme):
+    for fn in (_build_info, _certificates, _cas, _scheduler, _crl_generation, _webhooks, _acme,
+               _rate_limits):
         try:
             fn(doc)
         except Exception as e:
@@ -1,11 +1,21 @@
 """
 mTLS Authentication Service
 Handle client certificate authentication
+
+The middleware asks on every request, so the hot path is cached: the
+``mtls_enabled`` flag comes from services.settings_cache, and the enrolment a
+presented certificate resolved to is kept for MTLS_CERT_CACHE_TTL_SEC. A cached enrolment is
+re-read by primary key, so disabling or deleting it still takes effect on
+the next request. ``last_used_at`` is written in batches (auth.resolver_cache).
 """
+import os
+import threading
+import time
 from typing import Optional, Tuple
 from datetime import datetime, timezone
+from sqlalchemy import or_
 from models import db, User
-from models.auth_certificate import AuthCertificate
+from models.auth_certificate import AuthCertificate, canonical_fingerprint
 from services.certificate_parser import CertificateParser
 import logging
 from utils.datetime_utils import utc_now
@@ -13,6 +23,53 @@ from utils.db_transaction import commit_or_rollback
 
 logger = logging.getLogger(__name__)
 
+MTLS_CERT_CACHE_TTL_SEC = float(os.getenv('MTLS_CERT_CACHE_TTL_SEC', '60'))
+_CERT_CACHE_MAX = 10000
+
+_lock = threading.Lock()
+_verified = {}  # (serial, fingerprint) as presented -> (stored_at, auth certificate id)
+
+
+def _serial_candidates(serial: str) -> list:
+    """Canonical (lowercase hex) forms a presented serial may be stored under.
+
+    Client certificates present their serial in hex; some proxies and older
+    enrolments use decimal, and an all-digit string could be either.
+    """
+    value = serial.replace(':', '').strip()
+    candidates = []
+    for base in (16, 10):
+        try:
+            candidate = format(int(value, base), 'x')
+        except ValueError:
+            continue
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+def _find_enrolment(serial: str, fingerprint: Optional[str]) -> Optional[AuthCertificate]:
+    """One indexed query for the presented serial or fingerprint; serial wins."""
+    candidates = _serial_candidates(serial)
+    fingerprint_hex = canonical_fingerprint(fingerprint)
+    conditions = [AuthCertificate.serial_hex.in_(candidates)] if candidates else []
+    if fingerprint_hex:
+        conditions.append(AuthCertificate.fingerprint_hex == fingerprint_hex)
+    if not conditions:
+        return None
+    rows = AuthCertificate.query.filter(or_(*conditions)).all()
+    for candidate in candidates:
+        for row in rows:
+            if row.serial_hex == candidate:
+                return row
+    return next((row for row in rows if fingerprint_hex and row.fingerprint_hex == fingerprint_hex), None)
+
+
+def invalidate_cache() -> None:
+    """Forget the verified certificates (mTLS settings changed)."""
+    with _lock:
+        _verified.clear()
+
 
 class MTLSAuthService:
     """Service for mTLS (client certificate) authentication"""
@@ -38,24 +95,15 @@ class MTLSAuthService:
         if not serial:
             return None, None, "Certificate serial number not found"
         
-        # Try to find certificate by serial number (hex or decimal)
-        auth_cert = AuthCertificate.query.filter_by(cert_serial=serial).first()
-        
-        # Serial may be stored in decimal but presented in hex (or vice-versa)
-        if not auth_cert:
-            try:
-                if all(c in '0123456789ABCDEFabcdef' for c in serial):
-                    decimal_serial = str(int(serial, 16))
-                    auth_cert = AuthCertificate.query.filter_by(cert_serial=decimal_serial).first()
-                if not auth_cert:
-                    hex_serial = format(int(serial), 'X')
-                    auth_cert = AuthCertificate.query.filter_by(cert_serial=hex_serial).first()
-            except (ValueError, OverflowError):
-                pass
-        
-        # If not found by serial, try fingerprint
-        if not auth_cert and fingerprint:
-            auth_cert = AuthCertificate.query.filter_by(cert_fingerprint=fingerprint).first()
+        cache_key = (serial, fingerprint)
+        looked_up_at = time.monotonic()
+        with _lock:
+            entry = _verified.get(cache_key)
+        auth_cert = None
+        if entry and looked_up_at - entry[0] <= MTLS_CERT_CACHE_TTL_SEC:
+            auth_cert = db.session.get(AuthCertificate, entry[1])
+        if auth_cert is None:
+            auth_cert = _find_enrolment(serial, fingerprint)
         
         if not auth_cert:
             logger.warning(f"Certificate not enrolled: serial={serial}, fingerprint={fingerprint}")
@@ -92,11 +140,14 @@ class MTLSAuthService:
             logger.warning(f"User account disabled: user_id={user.id}")
             return None, None, "User account is disabled"
         
-        # Update last used timestamp
-        auth_cert.last_used_at = utc_now()
-        if not commit_or_rollback(logger, "Failed to update auth_cert.last_used_at"):
-            # Non-critical telemetry — let auth proceed
-            pass
+        with _lock:
+            if len(_verified) >= _CERT_CACHE_MAX:
+                _verified.clear()
+            _verified[cache_key] = (looked_up_at, auth_cert.id)
+        
+        # Update last used timestamp (coalesced, written in batches)
+        from auth.resolver_cache import record_use
+        record_use(AuthCertificate, auth_cert.id)
         
         logger.info(f"Certificate authentication successful: user={user.username}, serial={serial}")
         return user, auth_cert, ""
@@ -220,13 +271,8 @@ class MTLSAuthService:
         Returns:
             True if mTLS is enabled
         """
-        from models import SystemConfig
-        
-        config = SystemConfig.query.filter_by(key='mtls_enabled').first()
-        if config and config.value:
-            return config.value.lower() in ('true', '1', 'yes')
-        
-        return False
+        from services import settings_cache
+        return settings_cache.get_bool('mtls_enabled')
     
     @staticmethod
     def get_user_certificates(user_id: int) -> list:
@@ -0,0 +1,230 @@
+"""
+OCSP Issuer-Hash Index
+Maps an RFC 6960 CertID (hashAlgorithm, issuerNameHash, issuerKeyHash) to the
+CA that issued it with a single dict probe, instead of parsing and hashing
+every CA certificate on each OCSP request.
+
+The index is process-wide and built lazily for every supported CertID hash
+algorithm. It is kept in sync in two ways:
+  * CA lifecycle events on the event bus (ca.created / ca.updated /
+    ca.deleted) mark it dirty, so the next lookup refreshes it.
+  * Each indexed CA remembers a digest of its stored ``crt`` column. A hit
+    whose row no longer matches, or a miss, triggers an incremental refresh:
+    only rows whose digest changed are re-parsed. This covers changes made by
+    another worker process or by paths that do not emit events (restore).
+    Misses refresh at most once per MISS_REFRESH_INTERVAL_SEC, so requests
+    for unknown issuers cannot turn every lookup into a CA table scan.
+"""
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from models import db, CA
+
+logger = logging.getLogger(__name__)
+
+# CertID hash algorithms accepted by the responder (RFC 6960 §4.1.1, RFC 5019).
+SUPPORTED_ALGORITHMS = {
+    'sha1': hashes.SHA1,
+    'sha224': hashes.SHA224,
+    'sha256': hashes.SHA256,
+    'sha384': hashes.SHA384,
+    'sha512': hashes.SHA512,
+}
+
+MISS_REFRESH_INTERVAL_SEC = float(os.getenv('OCSP_ISSUER_MISS_REFRESH_SEC', '1'))
+
+# Bus events after which a CA's certificate (hence its CertID hashes) may differ.
+_INVALIDATING_EVENTS = ('ca.created', 'ca.updated', 'ca.deleted')
+
+_IndexKey = Tuple[str, bytes, bytes]
+
+
+def issuer_key_bytes(ca_cert: x509.Certificate) -> bytes:
+    """Return the subjectPublicKey BIT STRING contents of *ca_cert*.
+
+    RFC 6960 §4.1.1: issuerKeyHash is computed over the value of the BIT
+    STRING, *not* the full SubjectPublicKeyInfo.
+    """
+    pubkey = ca_cert.public_key()
+    if isinstance(pubkey, rsa.RSAPublicKey):
+        return pubkey.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.PKCS1,
+        )
+    if isinstance(pubkey, ec.EllipticCurvePublicKey):
+        # X9.62 uncompressed point — the BIT STRING contents for an EC key.
+        return pubkey.public_bytes(
+            encoding=serialization.Encoding.X962,
+            format=serialization.PublicFormat.UncompressedPoint,
+        )
+    # Ed25519/Ed448: BIT STRING contents are the raw key
+    return pubkey.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw,
+    )
+
+
+def issuer_hashes(ca_cert: x509.Certificate, algorithm: hashes.HashAlgorithm) -> Tuple[bytes, bytes]:
+    """Compute (issuerNameHash, issuerKeyHash) of *ca_cert* with *algorithm*."""
+    name_digest = hashes.Hash(algorithm)
+    name_digest.update(ca_cert.subject.public_bytes(serialization.Encoding.DER))
+    key_digest = hashes.Hash(algorithm)
+    key_digest.update(issuer_key_bytes(ca_cert))
+    return name_digest.finalize(), key_digest.finalize()
+
+
+def _crt_digest(crt: str) -> str:
+    return hashlib.sha256(crt.encode('utf-8')).hexdigest()
+
+
+class OCSPIssuerIndex:
+    """Process-wide (algorithm, name hash, key hash) -> CA id index."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[_IndexKey, int] = {}
+        # ca_id -> (crt digest, index keys contributed by that CA)
+        self._cas: Dict[int, Tuple[str, Tuple[_IndexKey, ...]]] = {}
+        self._dirty = True
+        self._miss_refreshed_at = None
+
+    def invalidate(self) -> None:
+        """Mark the index stale; the next lookup refreshes it."""
+        self._dirty = True
+
+    def clear(self) -> None:
+        """Drop every entry (tests, app teardown)."""
+        with self._lock:
+            self._entries = {}
+            self._cas = {}
+            self._dirty = True
+            self._miss_refreshed_at = None
+
+    def lookup(self, issuer_name_hash: bytes, issuer_key_hash: bytes,
+               hash_algorithm) -> Optional[CA]:
+        """Return the CA matching the CertID issuer hashes, or None.
+
+        Both the name AND key hash must match: re-keyed CAs share the subject
+        DN but differ in keys, and accepting on name alone would mis-route the
+        response.
+        """
+        algo_name = getattr(hash_algorithm, 'name', None)
+        if algo_name not in SUPPORTED_ALGORITHMS:
+            logger.debug(f"OCSP: unsupported issuer hash algorithm {algo_name}")
+            return None
+        key = (algo_name, bytes(issuer_name_hash), bytes(issuer_key_hash))
+
+        refreshed = False
+        if self._dirty:
+            self.refresh()
+            refreshed = True
+
+        ca = self._resolve(key)
+        if ca is None and not refreshed and self._may_refresh_for(key):
+            # Miss or stale hit: the CA table may have changed in another
+            # process. The refresh only re-parses rows whose crt changed.
+            self.refresh()
+            ca = self._resolve(key)
+        return ca
+
+    def _may_refresh_for(self, key: _IndexKey) -> bool:
+        """Stale hits always refresh; plain misses once per interval."""
+        if key in self._entries:
+            return True
+        now = time.monotonic()
+        last = self._miss_refreshed_at
+        if last is not None and now - last < MISS_REFRESH_INTERVAL_SEC:
+            return False
+        self._miss_refreshed_at = now
+        return True
+
+    def _resolve(self, key: _IndexKey) -> Optional[CA]:
+        ca_id = self._entries.get(key)
+        if ca_id is None:
+            return None
+        ca = db.session.get(CA, ca_id)
+        indexed = self._cas.get(ca_id)
+        if not ca or not ca.crt or not indexed or indexed[0] != _crt_digest(ca.crt):
+            return None
+        return ca
+
+    def refresh(self) -> None:
+        """Bring the index in line with the CA table, parsing only changes."""
+        with self._lock:
+            self._dirty = False
+            try:
+                rows = (
+                    db.session.query(CA.id, CA.crt)
+                    .filter(CA.crt.isnot(None))
+                    .order_by(CA.id)
+                    .all()
+                )
+            except Exception as e:
+                logger.error(f"OCSP issuer index refresh failed: {e}")
+                self._dirty = True
+                return
+
+            cas = {}
+            for ca_id, crt in rows:
+                digest = _crt_digest(crt)
+                current = self._cas.get(ca_id)
+                if current and current[0] == digest:
+                    cas[ca_id] = current
+                    continue
+                cas[ca_id] = (digest, self._index_keys(ca_id, crt))
+
+            # Rebuilt in id order so the first CA wins on duplicate CertIDs,
+            # as the former linear scan did.
+            entries = {}
+            for ca_id, (_, keys) in cas.items():
+                for key in keys:
+                    entries.setdefault(key, ca_id)
+            self._cas = cas
+            self._entries = entries
+            logger.debug(f"OCSP issuer index refreshed: {len(cas)} CAs")
+
+    @staticmethod
+    def _index_keys(ca_id: int, crt: str) -> Tuple[_IndexKey, ...]:
+        try:
+            # ca.crt is base64-encoded PEM in DB
+            ca_cert = x509.load_pem_x509_certificate(base64.b64decode(crt))
+        except Exception as e:
+            logger.debug(f"OCSP: failed to parse CA cert {ca_id}: {e}")
+            return ()
+        keys = []
+        for algo_name, algo_type in SUPPORTED_ALGORITHMS.items():
+            try:
+                name_hash, key_hash = issuer_hashes(ca_cert, algo_type())
+            except Exception as e:
+                logger.debug(f"OCSP: cannot hash CA cert {ca_id} with {algo_name}: {e}")
+                continue
+            keys.append((algo_name, name_hash, key_hash))
+        return tuple(keys)
+
+    def on_ca_event(self, event_type, payload, ca_refid, meta):
+        """Event bus subscriber: any CA lifecycle change marks the index dirty."""
+        self.invalidate()
+
+
+# Global singleton
+issuer_index = OCSPIssuerIndex()
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        for event_type in _INVALIDATING_EVENTS:
+            event_bus.subscribe(event_type, issuer_index.on_ca_event, remote=True)
+        _register_bus_subscriber._done = True
+
+
+_register_bus_subscriber()
@@ -0,0 +1,214 @@
+"""
+OCSP Response Pre-Signing
+Signs nonce-free "good"/"revoked" responses ahead of time for every issued,
+unexpired certificate of each OCSP-enabled CA, so the responder's hot path
+(no nonce) is an indexed ``ocsp_responses`` lookup plus a byte copy, as
+RFC 5019 high-volume responders do.
+
+A scheduled task walks each CA in batches of ``BATCH_SIZE`` certificates
+(one commit per batch) and re-signs a response once it is older than
+``ocsp_presign_refresh_fraction`` of ``ocsp_response_validity_hours``. A
+revocation re-signs that certificate's responses right away, on a background
+thread so the revoking request does not wait for the signatures (inline under
+TESTING). Pre-signing is
+opt-in via the ``ocsp_presign_enabled`` setting; requests for serials that
+have no pre-signed response still fall back to on-demand signing.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import or_
+
+from models import db, CA, Certificate, OCSPResponse
+from services import settings_cache
+from services.ocsp_service import OCSPService
+from utils.datetime_utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+# CertID hash algorithms to pre-sign: SHA-1 is what RFC 5019 clients send,
+# SHA-256 is the modern default. Other algorithms are signed on demand.
+PRESIGN_ALGORITHMS = ('sha1', 'sha256')
+DEFAULT_REFRESH_FRACTION = 0.5
+
+_lock = threading.Lock()
+_revoked_ids = []  # certificates waiting to be re-signed after revocation
+_thread: Optional[threading.Thread] = None
+
+
+def _get_config(key, default=None):
+    return settings_cache.get(key, default)
+
+
+def presign_enabled() -> bool:
+    return _get_config('ocsp_presign_enabled', 'false') == 'true'
+
+
+def _refresh_fraction() -> float:
+    raw_value = _get_config('ocsp_presign_refresh_fraction', DEFAULT_REFRESH_FRACTION)
+    try:
+        fraction = float(raw_value)
+    except (TypeError, ValueError):
+        fraction = DEFAULT_REFRESH_FRACTION
+    if not 0 < fraction <= 1:
+        logger.warning(
+            "Invalid ocsp_presign_refresh_fraction %r; using default %s",
+            raw_value, DEFAULT_REFRESH_FRACTION,
+        )
+        return DEFAULT_REFRESH_FRACTION
+    return fraction
+
+
+def _ca_can_presign(ca: CA) -> bool:
+    return bool(ca and ca.crt and ca.ocsp_enabled and ca.has_private_key and not ca.offline)
+
+
+def _fresh_serials(ca_id: int, refresh_before) -> set:
+    """Cache keys (``serial:algo``) of this CA that do not need re-signing yet."""
+    rows = (
+        db.session.query(OCSPResponse.cert_serial)
+        .filter(OCSPResponse.ca_id == ca_id, OCSPResponse.this_update >= refresh_before)
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _needs_presign(certificate: Certificate, fresh: set) -> bool:
+    return any(f"{certificate.serial_hex}:{algo}" not in fresh for algo in PRESIGN_ALGORITHMS)
+
+
+def presign_ca(ca: CA, service: OCSPService = None) -> dict:
+    """Pre-sign every due response for *ca*, BATCH_SIZE certificates at a time."""
+    service = service or OCSPService()
+    stats = {'good': 0, 'revoked': 0, 'skipped': 0}
+    now = utc_now()
+    refresh_before = now - timedelta(
+        hours=service._response_validity_hours() * _refresh_fraction()
+    )
+    fresh = _fresh_serials(ca.id, refresh_before)
+
+    last_id = 0
+    while True:
+        batch = (
+            Certificate.query
+            .filter(
+                Certificate.caref == ca.refid,
+                Certificate.id > last_id,
+                Certificate.crt.isnot(None),
+                or_(Certificate.valid_to.is_(None), Certificate.valid_to > now),
+            )
+            .order_by(Certificate.id)
+            .limit(BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        due = [cert for cert in batch if _needs_presign(cert, fresh)]
+        if due:
+            for key, value in service.presign_responses(ca, due, PRESIGN_ALGORITHMS).items():
+                stats[key] += value
+    return stats
+
+
+def presign_certificate(certificate: Certificate) -> bool:
+    """Re-sign one certificate's responses now (e.g. right after revocation)."""
+    ca = CA.query.filter_by(refid=certificate.caref).first()
+    if not _ca_can_presign(ca):
+        return False
+    OCSPService().presign_responses(ca, [certificate], PRESIGN_ALGORITHMS)
+    return True
+
+
+def run_ocsp_presign():
+    """Scheduled task: pre-sign due OCSP responses for all OCSP-enabled CAs."""
+    if not presign_enabled():
+        logger.debug("OCSP pre-signing is disabled")
+        return {'cas': 0, 'good': 0, 'revoked': 0, 'skipped': 0, 'failed': 0}
+
+    totals = {'cas': 0, 'good': 0, 'revoked': 0, 'skipped': 0, 'failed': 0}
+    service = OCSPService()
+    for ca in CA.query.filter_by(ocsp_enabled=True).all():
+        if not _ca_can_presign(ca):
+            continue
+        try:
+            stats = presign_ca(ca, service)
+        except Exception as e:
+            db.session.rollback()
+            totals['failed'] += 1
+            logger.error(f"OCSP pre-signing failed for CA {ca.id}: {e}", exc_info=True)
+            continue
+        totals['cas'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+
+    if totals['good'] or totals['revoked']:
+        logger.info(
+            "OCSP pre-signing: %d good, %d revoked across %d CAs",
+            totals['good'], totals['revoked'], totals['cas'],
+        )
+    return totals
+
+
+def _resign_revoked(cert_id: int) -> None:
+    certificate = db.session.get(Certificate, cert_id)
+    if not certificate or not certificate.revoked:
+        return
+    try:
+        presign_certificate(certificate)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"OCSP re-sign after revocation failed for cert {cert_id}: {e}")
+
+
+def _drain_revoked(app) -> None:
+    global _thread
+    while True:
+        with _lock:
+            if not _revoked_ids:
+                _thread = None
+                return
+            cert_id = _revoked_ids.pop(0)
+        with app.app_context():
+            try:
+                _resign_revoked(cert_id)
+            finally:
+                db.session.remove()
+
+
+def _inline() -> bool:
+    return bool(current_app.config.get('TESTING'))
+
+
+def on_certificate_revoked(event_type, payload, ca_refid, meta):
+    """Event bus subscriber: replace the revoked cert's pre-signed responses."""
+    global _thread
+    if not presign_enabled():
+        return
+    cert_id = ((payload or {}).get('certificate') or {}).get('id')
+    if not cert_id:
+        return
+    if _inline():
+        _resign_revoked(cert_id)
+        return
+    with _lock:
+        if cert_id not in _revoked_ids:
+            _revoked_ids.append(cert_id)
+        if _thread is None:
+            _thread = threading.Thread(target=_drain_revoked, args=(current_app._get_current_object(),),
+                                       daemon=True, name='OCSPRevokedPresign')
+            _thread.start()
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        event_bus.subscribe('certificate.revoked', on_certificate_revoked)
+        _register_bus_subscriber._done = True
+
+
+_register_bus_subscriber()
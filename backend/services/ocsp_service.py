@@ -5,6 +5,9 @@ Handles OCSP request parsing and response generation
 import base64
 import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
@@ -22,7 +25,9 @@ from cryptography.hazmat.primitives.asymmetric import (
 from cryptography.hazmat.backends import default_backend
 from sqlalchemy import or_
 
-from models import db, CA, Certificate, OCSPResponse, SystemConfig
+from models import db, CA, Certificate, OCSPResponse
+from services import settings_cache
+from services.ocsp_issuer_index import SUPPORTED_ALGORITHMS, issuer_hashes
 from utils.datetime_utils import utc_now
 from utils.serial_format import serial_to_hex
 
@@ -33,13 +38,18 @@ _DEFAULT_RESPONSE_VALIDITY_HOURS = 24
 # Upper bound (7 days): a longer-lived response keeps a revocation masked for
 # any client that cached the HTTP response, defeating timely revocation.
 _MAX_RESPONSE_VALIDITY_HOURS = 168
-_HASH_ALGORITHMS = {
-    'sha1': hashes.SHA1,
-    'sha224': hashes.SHA224,
-    'sha256': hashes.SHA256,
-    'sha384': hashes.SHA384,
-    'sha512': hashes.SHA512,
-}
+_HASH_ALGORITHMS = SUPPORTED_ALGORITHMS
+
+# Ready-to-sign material per CA (parsed CA cert, decrypted key, validated
+# delegated responder). Loading it costs a Fernet decryption, a PEM key parse
+# and a responder signature verification, so it is kept for a short TTL. Each
+# entry is fingerprinted on the CA's stored crt/prv/HSM key and the configured
+# responder id: a rekey or responder change made by another worker process is
+# picked up on the next request, not after the TTL.
+_SIGNING_CACHE_TTL_SEC = 300
+_SIGNING_CACHE_MAX = 64
+_signing_cache_lock = threading.Lock()
+_signing_cache = OrderedDict()  # ca_id -> (stored_at, fingerprint, _SigningMaterial)
 
 
 @dataclass(frozen=True)
@@ -62,6 +72,42 @@ class ParsedOCSPRequest:
     has_unsupported_critical_extension: bool
 
 
+@dataclass(frozen=True)
+class _SigningMaterial:
+    """Everything needed to sign a BasicOCSPResponse for one CA."""
+
+    ca_cert: x509.Certificate
+    signing_cert: x509.Certificate
+    signing_key: object
+    use_delegated: bool
+
+
+def invalidate_signing_cache(ca_id: Optional[int] = None) -> None:
+    """Drop cached signing material for *ca_id*, or for every CA.
+
+    Call after a delegated responder is (re)assigned or removed and after the
+    private-key encryption setting is toggled.
+    """
+    with _signing_cache_lock:
+        if ca_id is None:
+            _signing_cache.clear()
+        else:
+            _signing_cache.pop(ca_id, None)
+
+
+def _on_ca_event(event_type, payload, ca_refid, meta):
+    ca_id = ((payload or {}).get('ca') or {}).get('id')
+    invalidate_signing_cache(ca_id)
+
+
+def _register_bus_subscriber():
+    from services.events import event_bus
+    if not getattr(_register_bus_subscriber, '_done', False):
+        for event_type in ('ca.updated', 'ca.deleted'):
+            event_bus.subscribe(event_type, _on_ca_event, remote=True)
+        _register_bus_subscriber._done = True
+
+
 class _HsmPrivateKeyWrapper:
     """
     Wraps an HSM key to work with cryptography's builder.sign() API.
@@ -268,6 +314,59 @@ class OCSPService:
         except Exception:
             return None
     
+    def _signing_material(self, ca: CA) -> _SigningMaterial:
+        """Return (cached) signing material for *ca*.
+
+        Raises like :meth:`_load_ca_key` when the CA cannot sign.
+        """
+        responder_cert_id = settings_cache.get(f'ocsp_responder_cert_{ca.id}', '')
+        # A renewed or re-keyed responder keeps its record id, so its
+        # certificate and key are part of the fingerprint too
+        responder = None
+        if responder_cert_id:
+            try:
+                responder = db.session.query(Certificate.crt, Certificate.prv).filter(
+                    Certificate.id == int(responder_cert_id)).first()
+            except ValueError:
+                pass
+        fingerprint = hashlib.sha256('|'.join((
+            ca.crt or '', ca.prv or '', str(ca.hsm_key_id or ''), responder_cert_id or '',
+            (responder and responder.crt) or '', (responder and responder.prv) or '',
+        )).encode('utf-8')).hexdigest()
+
+        now = time.monotonic()
+        with _signing_cache_lock:
+            entry = _signing_cache.get(ca.id)
+            if entry:
+                stored_at, cached_fingerprint, material = entry
+                if (now - stored_at <= _SIGNING_CACHE_TTL_SEC
+                        and cached_fingerprint == fingerprint
+                        and (not material.use_delegated
+                             or self._certificate_is_currently_valid(material.signing_cert))):
+                    _signing_cache.move_to_end(ca.id)
+                    return material
+                _signing_cache.pop(ca.id, None)
+
+        ca_cert = x509.load_pem_x509_certificate(
+            base64.b64decode(ca.crt), self.backend
+        )
+        ca_key = self._load_ca_key(ca)
+        responder_cert, responder_key = self._get_delegated_responder(ca)
+        use_delegated = responder_cert is not None and responder_key is not None
+        material = _SigningMaterial(
+            ca_cert=ca_cert,
+            signing_cert=responder_cert if use_delegated else ca_cert,
+            signing_key=responder_key if use_delegated else ca_key,
+            use_delegated=use_delegated,
+        )
+
+        with _signing_cache_lock:
+            _signing_cache[ca.id] = (now, fingerprint, material)
+            _signing_cache.move_to_end(ca.id)
+            while len(_signing_cache) > _SIGNING_CACHE_MAX:
+                _signing_cache.popitem(last=False)
+        return material
+
     def _get_delegated_responder(self, ca: CA):
         """
         Check if CA has a delegated OCSP responder certificate (RFC 5019/6960).
@@ -279,8 +378,7 @@ class OCSPService:
         Returns (responder_cert, responder_key) or (None, None) if not configured.
         """
         # Check if delegated responder is configured for this CA
-        config_row = SystemConfig.query.filter_by(key=f'ocsp_responder_cert_{ca.id}').first()
-        responder_cert_id = config_row.value if config_row else ''
+        responder_cert_id = settings_cache.get(f'ocsp_responder_cert_{ca.id}', '')
         if not responder_cert_id:
             return None, None
         
@@ -419,10 +517,9 @@ class OCSPService:
 
     @staticmethod
     def _response_validity_hours() -> int:
-        config = SystemConfig.query.filter_by(
-            key='ocsp_response_validity_hours'
-        ).first()
-        raw_value = config.value if config else str(_DEFAULT_RESPONSE_VALIDITY_HOURS)
+        raw_value = settings_cache.get(
+            'ocsp_response_validity_hours', str(_DEFAULT_RESPONSE_VALIDITY_HOURS)
+        )
         try:
             hours = int(raw_value)
             if hours <= 0:
@@ -444,16 +541,7 @@ class OCSPService:
 
     @staticmethod
     def _status_for_serial(ca: CA, cert_serial: int):
-        serial_dec = str(cert_serial)
-        serial_hex = format(cert_serial, 'x')
-        certificate = (
-            Certificate.query.filter_by(
-                caref=ca.refid, serial_number=serial_dec).first()
-            or Certificate.query.filter_by(
-                caref=ca.refid, serial_number=serial_hex).first()
-            or Certificate.query.filter_by(
-                caref=ca.refid, serial_number=serial_hex.upper()).first()
-        )
+        certificate = Certificate.find_by_serial(cert_serial, caref=ca.refid)
         if not certificate:
             return None, 'unknown', None, None
         if not certificate.revoked:
@@ -519,14 +607,10 @@ class OCSPService:
     ) -> Tuple[bytes, Tuple[str, ...]]:
         """Build one BasicOCSPResponse containing every requested CertID."""
         try:
-            ca_cert = x509.load_pem_x509_certificate(
-                base64.b64decode(ca.crt), self.backend
-            )
-            ca_key = self._load_ca_key(ca)
-            responder_cert, responder_key = self._get_delegated_responder(ca)
-            use_delegated = responder_cert is not None and responder_key is not None
-            signing_cert = responder_cert if use_delegated else ca_cert
-            signing_key = responder_key if use_delegated else ca_key
+            material = self._signing_material(ca)
+            use_delegated = material.use_delegated
+            signing_cert = material.signing_cert
+            signing_key = material.signing_key
 
             this_update = utc_now().replace(microsecond=0)
             next_update = this_update + timedelta(
@@ -608,6 +692,122 @@ class OCSPService:
                 ('error',),
             )
 
+    @staticmethod
+    def _certificate_status(certificate: Optional[Certificate]):
+        """Return (OCSPCertStatus, status string, revocation time, reason)."""
+        if not certificate:
+            return ocsp.OCSPCertStatus.UNKNOWN, 'unknown', None, None
+        if certificate.revoked:
+            return (
+                ocsp.OCSPCertStatus.REVOKED,
+                'revoked',
+                certificate.revoked_at or utc_now(),
+                _REASON_MAP.get(
+                    certificate.revoke_reason, x509.ReasonFlags.unspecified
+                ),
+            )
+        return ocsp.OCSPCertStatus.GOOD, 'good', None, None
+
+    @staticmethod
+    def _sign_response(
+        material: _SigningMaterial,
+        builder: ocsp.OCSPResponseBuilder,
+        request_nonce: Optional[bytes] = None,
+    ) -> bytes:
+        """Set the responder id, nonce and signature; return the DER bytes."""
+        builder = builder.responder_id(
+            ocsp.OCSPResponderEncoding.HASH, material.signing_cert
+        )
+
+        # RFC 6960 §4.2.2.3: when signed by a delegated responder, the
+        # response MUST include the responder's certificate so the
+        # client can verify the signature without a separate fetch.
+        if material.use_delegated:
+            builder = builder.certificates([material.signing_cert])
+
+        # Add nonce if provided (replay protection)
+        if request_nonce is not None:
+            builder = builder.add_extension(
+                x509.OCSPNonce(request_nonce),
+                critical=False
+            )
+
+        # Sign response (with CA key or delegated responder key)
+        response = builder.sign(material.signing_key, hashes.SHA256())
+        return response.public_bytes(serialization.Encoding.DER)
+
+    def presign_responses(self, ca: CA, certificates, algorithms) -> dict:
+        """Sign and cache nonce-free responses for *certificates* of *ca*.
+
+        One response per certificate and CertID hash algorithm name in
+        *algorithms*, written with a single commit. Certificates whose PEM
+        cannot be parsed are skipped. Returns counts by status.
+        """
+        stats = {'good': 0, 'revoked': 0, 'skipped': 0}
+        material = self._signing_material(ca)
+        this_update = utc_now()
+        next_update = this_update + timedelta(
+            hours=self._response_validity_hours()
+        )
+
+        signed = {}
+        for certificate in certificates:
+            cert_x509 = self._load_cert(certificate)
+            if not cert_x509:
+                stats['skipped'] += 1
+                continue
+            status, cert_status, revocation_time, revocation_reason = (
+                self._certificate_status(certificate)
+            )
+            serial_hex = format(cert_x509.serial_number, 'x')
+            for algo_name in algorithms:
+                builder = ocsp.OCSPResponseBuilder().add_response(
+                    cert=cert_x509,
+                    issuer=material.ca_cert,
+                    algorithm=SUPPORTED_ALGORITHMS[algo_name](),
+                    cert_status=status,
+                    this_update=this_update,
+                    next_update=next_update,
+                    revocation_time=revocation_time,
+                    revocation_reason=revocation_reason
+                )
+                signed[f"{serial_hex}:{algo_name}"] = (
+                    self._sign_response(material, builder),
+                    cert_status,
+                    revocation_time,
+                    revocation_reason.value if revocation_reason else None,
+                )
+            stats[cert_status] += 1
+
+        if not signed:
+            return stats
+
+        existing = {
+            row.cert_serial: row
+            for row in OCSPResponse.query.filter(
+                OCSPResponse.ca_id == ca.id,
+                OCSPResponse.cert_serial.in_(list(signed)),
+            )
+        }
+        for cache_serial, (response_der, cert_status, revocation_time, reason) in signed.items():
+            row = existing.get(cache_serial)
+            if row is None:
+                row = OCSPResponse(ca_id=ca.id, cert_serial=cache_serial)
+                db.session.add(row)
+            row.response_der = response_der
+            row.status = cert_status
+            row.this_update = this_update
+            row.next_update = next_update
+            row.revocation_time = revocation_time
+            row.revocation_reason = reason
+            row.updated_at = this_update
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return stats
+
     def generate_response(
         self,
         ca: CA,
@@ -643,54 +843,21 @@ class OCSPService:
             algo = hash_algorithm or hashes.SHA256()
             algo_name = getattr(algo, 'name', 'sha256')
 
-            # Load CA certificate
-            ca_crt_pem = base64.b64decode(ca.crt).decode('utf-8')
-            ca_cert = x509.load_pem_x509_certificate(ca_crt_pem.encode(), self.backend)
-            
-            # Load CA private key (with decryption and HSM check)
-            ca_key = self._load_ca_key(ca)
-            
-            # Check for delegated OCSP responder (RFC 5019/6960)
-            responder_cert, responder_key = self._get_delegated_responder(ca)
-            use_delegated = responder_cert is not None and responder_key is not None
-            
-            signing_cert = responder_cert if use_delegated else ca_cert
-            signing_key = responder_key if use_delegated else ca_key
+            # CA certificate, CA key (with decryption and HSM check) and the
+            # delegated OCSP responder (RFC 5019/6960), cached per CA
+            material = self._signing_material(ca)
+            ca_cert = material.ca_cert
             
             # Find certificate in database. RFC 6960 sends the serial as an
-            # ASN.1 INTEGER; UCM stores serials as the decimal string form
-            # (Certificate.serial_number) while the OCSP cache uses the
-            # lowercase hex form. Convert accordingly.
-            cert_serial_dec = str(cert_serial)
+            # ASN.1 INTEGER; serial_hex holds the same lowercase hex form the
+            # OCSP cache uses, so this is one (serial_hex, caref) index probe.
             cert_serial_hex = format(cert_serial, 'x')
-            # DB has historical mixed format (decimal vs lowercase hex). Try both.
-            certificate = (
-                Certificate.query.filter_by(
-                    caref=ca.refid, serial_number=cert_serial_dec).first()
-                or Certificate.query.filter_by(
-                    caref=ca.refid, serial_number=cert_serial_hex).first()
-                or Certificate.query.filter_by(
-                    caref=ca.refid, serial_number=cert_serial_hex.upper()).first()
-            )
+            certificate = Certificate.find_by_serial(cert_serial, caref=ca.refid)
             
             # Determine certificate status
-            if not certificate:
-                status = ocsp.OCSPCertStatus.UNKNOWN
-                cert_status = 'unknown'
-                revocation_time = None
-                revocation_reason = None
-            elif certificate.revoked:
-                status = ocsp.OCSPCertStatus.REVOKED
-                cert_status = 'revoked'
-                revocation_time = certificate.revoked_at or utc_now()
-                revocation_reason = _REASON_MAP.get(
-                    certificate.revoke_reason, x509.ReasonFlags.unspecified
-                )
-            else:
-                status = ocsp.OCSPCertStatus.GOOD
-                cert_status = 'good'
-                revocation_time = None
-                revocation_reason = None
+            status, cert_status, revocation_time, revocation_reason = (
+                self._certificate_status(certificate)
+            )
             
             # Build OCSP response
             this_update = utc_now()
@@ -727,29 +894,7 @@ class OCSPService:
                 # _find_ca_by_issuer_hash); otherwise compute them fresh from
                 # the CA cert with the chosen algorithm.
                 if issuer_name_hash is None or issuer_key_hash is None:
-                    h_name = hashes.Hash(algo)
-                    h_name.update(ca_cert.subject.public_bytes(
-                        serialization.Encoding.DER))
-                    issuer_name_hash = h_name.finalize()
-                    pubkey = ca_cert.public_key()
-                    if isinstance(pubkey, rsa.RSAPublicKey):
-                        spki_value = pubkey.public_bytes(
-                            encoding=serialization.Encoding.DER,
-                            format=serialization.PublicFormat.PKCS1,
-                        )
-                    elif isinstance(pubkey, ec.EllipticCurvePublicKey):
-                        spki_value = pubkey.public_bytes(
-                            encoding=serialization.Encoding.X962,
-                            format=serialization.PublicFormat.UncompressedPoint,
-                        )
-                    else:
-                        spki_value = pubkey.public_bytes(
-                            encoding=serialization.Encoding.Raw,
-                            format=serialization.PublicFormat.Raw,
-                        )
-                    h_key = hashes.Hash(algo)
-                    h_key.update(spki_value)
-                    issuer_key_hash = h_key.finalize()
+                    issuer_name_hash, issuer_key_hash = issuer_hashes(ca_cert, algo)
                 if hasattr(builder, 'add_response_by_hash'):
                     builder = builder.add_response_by_hash(
                         issuer_name_hash=issuer_name_hash,
@@ -779,30 +924,7 @@ class OCSPService:
                         revocation_reason=revocation_reason
                     )
             
-            builder = builder.responder_id(
-                ocsp.OCSPResponderEncoding.HASH, signing_cert
-            )
-
-            # RFC 6960 §4.2.2.3: when signed by a delegated responder, the
-            # response MUST include the responder's certificate so the
-            # client can verify the signature without a separate fetch.
-            if use_delegated:
-                builder = builder.certificates([signing_cert])
-
-            # Add nonce if provided (replay protection)
-            if request_nonce is not None:
-                builder = builder.add_extension(
-                    x509.OCSPNonce(request_nonce),
-                    critical=False
-                )
-            
-            # Sign response (with CA key or delegated responder key)
-            # For delegated responder, include responder cert chain
-            if use_delegated:
-                response = builder.sign(signing_key, hashes.SHA256())
-            else:
-                response = builder.sign(signing_key, hashes.SHA256())
-            response_der = response.public_bytes(serialization.Encoding.DER)
+            response_der = self._sign_response(material, builder, request_nonce)
             
             # Cache response — key includes the hash algorithm because a SHA-1
             # and a SHA-256 response for the same serial are different DER blobs.
@@ -959,3 +1081,6 @@ class OCSPService:
         except Exception as e:
             logger.error(f"Failed to cleanup expired OCSP responses: {e}")
             db.session.rollback()
+
+
+_register_bus_subscriber()
@@ -5,7 +5,9 @@ from datetime import timedelta
 from collections import Counter
 
 from models import Certificate, CA, AuditLog
-from services.compliance_service import calculate_compliance_score
+from services.compliance_service import (
+    calculate_compliance_score, compliance_inputs, stored_compliance,
+)
 from utils.datetime_utils import utc_now
 
 logger = logging.getLogger(__name__)
@@ -102,11 +104,12 @@ def collect_report_data():
                 expiring_7.append(cert)
 
         try:
-            cd = cert.to_dict() if hasattr(cert, 'to_dict') else cert
-            sd = calculate_compliance_score(cd)
-            compliance_scores.append(sd['score'])
+            stored = stored_compliance(cert)
+            # Per-category averages need the breakdown, which is not stored
+            sd = calculate_compliance_score(compliance_inputs(cert))
+            compliance_scores.append(stored['score'])
             compliance_breakdowns.append(sd.get('breakdown', {}))
-            grade_counts[sd['grade']] += 1
+            grade_counts[stored['grade']] += 1
         except Exception:
             grade_counts['F'] += 1
             compliance_scores.append(0)
@@ -714,18 +714,10 @@ class SCEPService:
                 transaction_id=transaction_id, recipient_nonce=sender_nonce,
             )
 
-        serial_hex = format(requested_serial, "x")
-        serial_candidates = {
-            str(requested_serial),
-            serial_hex,
-            serial_hex.upper(),
-            f"0x{serial_hex}",
-            f"0X{serial_hex.upper()}",
-        }
         cert_rows = Certificate.query.filter(
+            Certificate.serial_hex == format(requested_serial, "x"),
             Certificate.caref == self.ca_refid,
             Certificate.crt.isnot(None),
-            Certificate.serial_number.in_(serial_candidates),
         ).all()
         for cert_row in cert_rows:
             try:
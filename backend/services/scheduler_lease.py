@@ -0,0 +1,203 @@
+"""
+Scheduler leader election across hosts.
+
+The pidfile lock in services.scheduler_service keeps the scheduler loop to
+one process per host. Several hosts or containers sharing one database would
+still each run every task, so the loop also holds a lease and only the
+holder runs tasks. The backend is picked with ``SCHEDULER_LEADER_BACKEND``:
+
+``redis``
+    The key ``ucm:scheduler:leader`` holds the leader's token with a
+    ``SCHEDULER_LEASE_TTL_SEC`` expiry. The leader renews it before every
+    task, and from a heartbeat thread every third of the TTL while a task
+    runs; if the leader dies the key expires and the next host to wake takes
+    over.
+``postgres``
+    A session-level ``pg_try_advisory_lock`` held on a dedicated connection.
+    PostgreSQL drops it when that connection closes, so a dead leader is
+    replaced as soon as the server notices.
+``none``
+    No election: every scheduler loop runs its tasks (a single host).
+
+``auto`` (the default) uses Redis when ``REDIS_URL`` is set and the redis
+library is installed, the advisory lock on PostgreSQL, and none otherwise.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from utils.redis_backend import redis_client
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv('SCHEDULER_LEADER_BACKEND', 'auto').strip().lower()
+LEASE_TTL_SEC = float(os.getenv('SCHEDULER_LEASE_TTL_SEC', '300'))
+_REDIS_KEY = 'ucm:scheduler:leader'
+_ADVISORY_KEY = 0x55434D5343484544  # b'UCMSCHED'
+
+# KEYS[1] lease; ARGV token, ttl ms. Renews our lease or takes a free one.
+_HOLD_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == ARGV[1] then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return 1
+end
+if not owner then
+  redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+  return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    name = 'base'
+
+    def hold(self) -> bool:
+        """Take or renew leadership; True while this process is the leader."""
+        raise NotImplementedError
+
+    def release(self) -> None:
+        """Give leadership up so another host can take over right away."""
+        raise NotImplementedError
+
+    @contextmanager
+    def renewing(self) -> Iterator[None]:
+        """Keep leadership while the block (a task) runs."""
+        yield
+
+
+class RedisLease(LeaderLease):
+    name = 'redis'
+
+    def __init__(self, client, ttl: float = LEASE_TTL_SEC):
+        self._ttl_ms = int(ttl * 1000)
+        self._token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._hold = client.register_script(_HOLD_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+        self._held_until = 0.0
+
+    def hold(self) -> bool:
+        now = time.monotonic()
+        try:
+            held = bool(int(self._hold(keys=[_REDIS_KEY], args=[self._token, self._ttl_ms])))
+        except Exception as e:
+            # Nobody else can take the key before our last renewal expires
+            logger.warning(f"Scheduler lease: Redis unavailable: {e}")
+            return now < self._held_until
+        self._held_until = now + self._ttl_ms / 1000 if held else 0.0
+        return held
+
+    def release(self) -> None:
+        self._held_until = 0.0
+        try:
+            self._release(keys=[_REDIS_KEY], args=[self._token])
+        except Exception as e:
+            logger.warning(f"Scheduler lease: release failed, it expires on its own: {e}")
+
+    @contextmanager
+    def renewing(self) -> Iterator[None]:
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self._ttl_ms / 3000):
+                if not self.hold():
+                    logger.warning("Scheduler lease lost while a task is running")
+
+        thread = threading.Thread(target=heartbeat, name='scheduler-lease-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+class PostgresAdvisoryLease(LeaderLease):
+    name = 'postgres'
+
+    def __init__(self, engine, key: int = _ADVISORY_KEY):
+        self._engine = engine
+        self._key = key
+        self._conn = None
+
+    def hold(self) -> bool:
+        from sqlalchemy import text
+
+        if self._conn is not None:
+            try:
+                self._conn.execute(text('SELECT 1'))
+                return True
+            except Exception as e:
+                logger.warning(f"Scheduler lease: advisory lock connection lost: {e}")
+                self._conn.invalidate()
+                self._conn = None
+        conn = None
+        try:
+            conn = self._engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+            if conn.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': self._key}).scalar():
+                self._conn, conn = conn, None
+                return True
+        except Exception as e:
+            logger.warning(f"Scheduler lease: advisory lock unavailable: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+        return False
+
+    def release(self) -> None:
+        from sqlalchemy import text
+
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self._key})
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Scheduler lease: advisory unlock failed: {e}")
+            conn.invalidate()
+
+
+def _postgres_engine(app):
+    if app is None:
+        return None
+    from models import db
+    with app.app_context():
+        engine = db.engine
+    return engine if engine.dialect.name == 'postgresql' else None
+
+
+def build_lease(app=None, backend: str = BACKEND) -> Optional[LeaderLease]:
+    """The lease for *backend*, or None when every scheduler loop may run."""
+    if backend not in ('auto', 'redis', 'postgres', 'none'):
+        logger.warning(f"Unknown SCHEDULER_LEADER_BACKEND {backend!r}, no leader election")
+        return None
+    if backend in ('auto', 'redis'):
+        client = redis_client()
+        if client is not None:
+            return RedisLease(client)
+        if backend == 'redis':
+            logger.warning("SCHEDULER_LEADER_BACKEND=redis but Redis is unavailable, "
+                           "no leader election")
+            return None
+    if backend in ('auto', 'postgres'):
+        engine = _postgres_engine(app)
+        if engine is not None:
+            return PostgresAdvisoryLease(engine)
+        if backend == 'postgres':
+            logger.warning("SCHEDULER_LEADER_BACKEND=postgres but the database is not "
+                           "PostgreSQL, no leader election")
+    return None
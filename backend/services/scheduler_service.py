@@ -2,6 +2,8 @@
 Scheduler Service - Background Task Scheduling
 Uses standard Python threading and time modules (no external dependencies like APScheduler)
 Safe for Docker, systemd, and development environments
+One loop per host (pidfile lock); with several hosts, one leader among them
+runs the tasks (services.scheduler_lease)
 """
 import threading
 import time
@@ -25,7 +27,8 @@ class ScheduledTask:
         func: Callable,
         interval: int,  # in seconds
         description: str = "",
-        enabled: bool = True
+        enabled: bool = True,
+        details: Optional[Callable[[], Any]] = None
     ):
         """
         Initialize a scheduled task
@@ -36,6 +39,8 @@ class ScheduledTask:
             interval: Interval in seconds between executions
             description: Human-readable description
             enabled: Whether task is enabled
+            details: Optional callable returning task-specific status
+                (JSON-serializable), reported as ``details``
             initial_delay: Seconds to wait before first execution (0 = run immediately)
         """
         self.name = name
@@ -48,6 +53,7 @@ class ScheduledTask:
         self.run_count = 0
         self.last_error: Optional[str] = None
         self.last_duration_ms = 0.0
+        self.details = details
         self._created_at = utc_now()
     
     def should_run(self) -> bool:
@@ -64,7 +70,7 @@ class ScheduledTask:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for API responses"""
-        return {
+        data = {
             "name": self.name,
             "description": self.description,
             "interval": self.interval,
@@ -75,6 +81,12 @@ class ScheduledTask:
             "last_error": self.last_error,
             "last_duration_ms": self.last_duration_ms,
         }
+        if self.details:
+            try:
+                data["details"] = self.details()
+            except Exception as e:
+                logger.warning(f"Task '{self.name}' details unavailable: {e}")
+        return data
 
 
 class SchedulerService:
@@ -106,6 +118,8 @@ class SchedulerService:
         self._owns_lock = False
         self._owner_pid = None
         self._lock_path = None
+        self._lease = None
+        self._leader = False
         logger.info(f"SchedulerService initialized (wake interval: {wake_interval}s)")
     
     def register_task(
@@ -114,7 +128,8 @@ class SchedulerService:
         func: Callable,
         interval: int,
         description: str = "",
-        enabled: bool = True
+        enabled: bool = True,
+        details: Optional[Callable[[], Any]] = None
     ) -> None:
         """
         Register a new scheduled task
@@ -125,6 +140,7 @@ class SchedulerService:
             interval: Interval in seconds
             description: Human-readable description
             enabled: Whether task starts enabled
+            details: Optional callable returning task-specific status
         """
         with self.tasks_lock:
             if name in self.tasks:
@@ -135,7 +151,8 @@ class SchedulerService:
                 func=func,
                 interval=interval,
                 description=description,
-                enabled=enabled
+                enabled=enabled,
+                details=details
             )
             self.tasks[name] = task
             logger.info(
@@ -242,6 +259,42 @@ class SchedulerService:
                 exc_info=True
             )
     
+    def _is_leader(self) -> bool:
+        """Whether this process may run tasks now (always, without a lease)."""
+        if self._lease is None:
+            return True
+        leader = self._lease.hold()
+        if leader != self._leader:
+            self._leader = leader
+            logger.info(f"Scheduler leadership {'acquired' if leader else 'lost'} "
+                        f"({self._lease.name} lease, pid {os.getpid()})")
+        return leader
+
+    def _run_due_tasks(self) -> None:
+        """Run every due task, renewing the leader lease before and during each one."""
+        # Make a snapshot of tasks to avoid holding lock during execution
+        with self.tasks_lock:
+            tasks_to_run = [
+                task for task in self.tasks.values()
+                if task.should_run()
+            ]
+        
+        # Execute tasks outside of lock
+        for i, task in enumerate(tasks_to_run):
+            if i and not self._is_leader():
+                return  # another host took over; it runs the rest
+            try:
+                if self._lease is None:
+                    self._run_task(task)
+                else:
+                    with self._lease.renewing():
+                        self._run_task(task)
+            except Exception as e:
+                logger.error(
+                    f"Unexpected error running task '{task.name}': {e}",
+                    exc_info=True
+                )
+    
     def _scheduler_loop(self) -> None:
         """Main scheduler loop - runs in background thread"""
         logger.info("Scheduler thread started")
@@ -258,29 +311,8 @@ class SchedulerService:
                     logger.info("Scheduler loop detected in a non-owner (forked) process; exiting")
                     self._running = False
                     break
-                # Make a snapshot of tasks to avoid holding lock during execution
-                with self.tasks_lock:
-                    tasks_to_run = [
-                        task for task in self.tasks.values()
-                        if task.should_run()
-                    ]
-                
-                # Execute tasks outside of lock
-                with self.tasks_lock:
-                    tasks_to_run = [
-                        task for task in self.tasks.values()
-                        if task.should_run()
-                    ]
-                
-                # Execute tasks outside of lock
-                for task in tasks_to_run:
-                    try:
-                        self._run_task(task)
-                    except Exception as e:
-                        logger.error(
-                            f"Unexpected error running task '{task.name}': {e}",
-                            exc_info=True
-                        )
+                if self._is_leader():
+                    self._run_due_tasks()
                 
                 # Sleep for wake_interval before checking again
                 time.sleep(self.wake_interval)
@@ -365,6 +397,14 @@ class SchedulerService:
                         "tasks registered here, but not running the loop in this process")
             return
 
+        # Across hosts sharing the database, a lease picks the one that runs tasks
+        try:
+            from services.scheduler_lease import build_lease
+            self._lease = build_lease(app)
+        except Exception as e:
+            logger.warning(f"Scheduler leader lease unavailable, running tasks here: {e}")
+            self._lease = None
+
         self._running = True
         self._thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self._thread.name = "SchedulerService"
@@ -395,6 +435,9 @@ class SchedulerService:
                 logger.warning(f"Scheduler thread did not stop within {timeout}s")
                 return False
 
+        if self._lease is not None:
+            self._lease.release()
+            self._leader = False
         self._release_lock()
         logger.info("Scheduler stopped")
         return True
@@ -0,0 +1,332 @@
+"""
+Search Index
+Substring search over certificates, CAs, users and templates without a
+leading-wildcard ILIKE scan of every table.
+
+One document per entity (names, DNs, serials and SAN values) is kept in a
+backend-specific index:
+
+- SQLite: FTS5 virtual table ``search_fts`` with the ``trigram`` tokenizer,
+  ranked by bm25. The rowid packs ``(entity_id, entity type)`` so updates are
+  rowid lookups.
+- PostgreSQL: table ``search_index`` with a ``pg_trgm`` GIN index, ranked by
+  trigram similarity. Without the extension the same table is scanned.
+
+Documents are rewritten from mapper ``after_insert``/``after_update``/
+``after_delete`` hooks on the flush connection, so the index commits or rolls
+back with the row. The index is derived data: ``ensure_search_index`` creates
+it at startup and rebuilds it when it is new. If neither backend feature is
+available, searches fall back to ILIKE on the entity tables.
+"""
+import json
+import logging
+import weakref
+
+from sqlalchemy import event, inspect as sa_inspect, or_, text
+
+from models import db, Certificate, CA, User, CertificateTemplate
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+# Entity type -> (model, rowid type code, fields feeding the document,
+# legacy ILIKE columns used when no index backend is available)
+_ENTITIES = {
+    'certificate': (Certificate, 1, (
+        'descr', 'subject', 'issuer', 'serial_number', 'serial_hex',
+        'san_dns', 'san_ip', 'san_email',
+    ), ('subject', 'issuer', 'descr', 'serial_number')),
+    'ca': (CA, 2, ('descr', 'subject', 'issuer'), ('descr', 'subject', 'issuer')),
+    'user': (User, 3, ('username', 'email', 'full_name'), ('username', 'email', 'full_name')),
+    'template': (CertificateTemplate, 4, ('name', 'description'), ('name', 'description')),
+}
+_TYPE_BITS = 3
+_JSON_LIST_FIELDS = frozenset({'san_dns', 'san_ip', 'san_email'})
+
+# Per-engine backend: 'fts5' | 'trgm' | 'table' | None (no index)
+_backends = weakref.WeakKeyDictionary()
+
+
+def _document(entity_type: str, obj) -> str:
+    parts = []
+    for field in _ENTITIES[entity_type][2]:
+        value = getattr(obj, field, None)
+        if not value:
+            continue
+        if field in _JSON_LIST_FIELDS:
+            parts.extend(str(v) for v in _json_values(value))
+        else:
+            parts.append(str(value))
+    return '\n'.join(parts)
+
+
+def _json_values(raw):
+    try:
+        values = json.loads(raw) if raw.startswith('[') else [raw]
+    except (TypeError, ValueError):
+        values = [raw]
+    return values if isinstance(values, list) else [values]
+
+
+def _rowid(entity_type: str, entity_id: int) -> int:
+    return (entity_id << _TYPE_BITS) | _ENTITIES[entity_type][1]
+
+
+def _detect_backend(connection):
+    """Which index exists on this database (cached per engine)."""
+    key = connection.engine
+    if key in _backends:
+        return _backends[key]
+    if connection.dialect.name == 'sqlite':
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_fts'"
+        )).first()
+        backend = 'fts5' if exists else None
+    elif connection.dialect.name == 'postgresql':
+        exists = connection.execute(text(
+            "SELECT to_regclass('search_index') IS NOT NULL"
+        )).scalar()
+        trgm = connection.execute(text(
+            "SELECT to_regclass('ix_search_index_trgm') IS NOT NULL"
+        )).scalar()
+        backend = ('trgm' if trgm else 'table') if exists else None
+    else:
+        backend = None
+    _backends[key] = backend
+    return backend
+
+
+def _write(connection, entity_type: str, entity_id: int, content):
+    """Replace (or, with ``content=None``, remove) one entity's document."""
+    backend = _detect_backend(connection)
+    if backend == 'fts5':
+        rowid = _rowid(entity_type, entity_id)
+        connection.execute(text("DELETE FROM search_fts WHERE rowid = :r"), {'r': rowid})
+        if content:
+            connection.execute(
+                text("INSERT INTO search_fts (rowid, content) VALUES (:r, :c)"),
+                {'r': rowid, 'c': content},
+            )
+    elif backend in ('trgm', 'table'):
+        connection.execute(
+            text("DELETE FROM search_index WHERE entity_type = :t AND entity_id = :i"),
+            {'t': entity_type, 'i': entity_id},
+        )
+        if content:
+            connection.execute(
+                text("INSERT INTO search_index (entity_type, entity_id, content) "
+                     "VALUES (:t, :i, :c)"),
+                {'t': entity_type, 'i': entity_id, 'c': content},
+            )
+
+
+# ---------------------------------------------------------------------------
+# Incremental maintenance
+# ---------------------------------------------------------------------------
+
+def _make_listeners(entity_type: str):
+    fields = _ENTITIES[entity_type][2]
+
+    def after_insert(mapper, connection, target):
+        _write(connection, entity_type, target.id, _document(entity_type, target))
+
+    def after_update(mapper, connection, target):
+        state = sa_inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            _write(connection, entity_type, target.id, _document(entity_type, target))
+
+    def after_delete(mapper, connection, target):
+        _write(connection, entity_type, target.id, None)
+
+    return after_insert, after_update, after_delete
+
+
+def _register_listeners():
+    if getattr(_register_listeners, '_done', False):
+        return
+    for entity_type, (model, _, _, _) in _ENTITIES.items():
+        after_insert, after_update, after_delete = _make_listeners(entity_type)
+        event.listen(model, 'after_insert', after_insert)
+        event.listen(model, 'after_update', after_update)
+        event.listen(model, 'after_delete', after_delete)
+    _register_listeners._done = True
+
+
+# ---------------------------------------------------------------------------
+# Schema / rebuild
+# ---------------------------------------------------------------------------
+
+def _create_sqlite(connection) -> bool:
+    try:
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE search_fts USING fts5(content, tokenize = 'trigram')"
+        ))
+        return True
+    except Exception as e:
+        logger.warning(f"SQLite FTS5 trigram unavailable, search uses table scans: {e}")
+        return False
+
+
+def _create_postgres(connection) -> bool:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS search_index ("
+        "entity_type VARCHAR(20) NOT NULL, entity_id INTEGER NOT NULL, "
+        "content TEXT NOT NULL, PRIMARY KEY (entity_type, entity_id))"
+    ))
+    savepoint = connection.begin_nested()
+    try:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_index_trgm "
+            "ON search_index USING gin (content gin_trgm_ops)"
+        ))
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        logger.warning(f"pg_trgm unavailable, search index is not trigram-accelerated: {e}")
+    return True
+
+
+def ensure_search_index(rebuild: bool = False) -> str:
+    """Create the index for this database if missing; rebuild it when new.
+
+    Returns the active backend name ('none' when searches fall back to ILIKE).
+    """
+    _register_listeners()
+    connection = db.session.connection()
+    _backends.pop(connection.engine, None)
+    backend = _detect_backend(connection)
+    if backend is None:
+        if connection.dialect.name == 'sqlite':
+            created = _create_sqlite(connection)
+        elif connection.dialect.name == 'postgresql':
+            created = _create_postgres(connection)
+        else:
+            created = False
+        _backends.pop(connection.engine, None)
+        backend = _detect_backend(connection)
+        rebuild = rebuild or created
+    db.session.commit()
+    if backend and rebuild:
+        rebuild_search_index()
+    return backend or 'none'
+
+
+def rebuild_search_index() -> int:
+    """Re-index every entity from scratch, in id-keyset batches."""
+    connection = db.session.connection()
+    backend = _detect_backend(connection)
+    if backend is None:
+        return 0
+    connection.execute(text(
+        "DELETE FROM search_fts" if backend == 'fts5' else "DELETE FROM search_index"
+    ))
+    indexed = 0
+    for entity_type, (model, _, _, _) in _ENTITIES.items():
+        last_id = 0
+        while True:
+            batch = (model.query.filter(model.id > last_id)
+                     .order_by(model.id).limit(REBUILD_BATCH_SIZE).all())
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for obj in batch:
+                _write(connection, entity_type, obj.id, _document(entity_type, obj))
+            indexed += len(batch)
+    db.session.commit()
+    logger.info(f"Search index rebuilt ({indexed} documents)")
+    return indexed
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _like_pattern(query: str) -> str:
+    safe = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{safe}%'
+
+
+def _ranked_ids_sql(backend: str, query: str):
+    """``(sql, params)`` selecting ``entity_id`` best match first, or None."""
+    if backend == 'fts5':
+        ids = "(rowid >> :bits) AS entity_id"
+        type_filter = "(rowid & :mask) = :code"
+        if len(query) >= 3:
+            # Trigram MATCH on a quoted phrase = case-insensitive substring
+            phrase = '"' + query.replace('"', '""') + '"'
+            return (
+                f"SELECT {ids} FROM search_fts WHERE search_fts MATCH :m "
+                f"AND {type_filter} ORDER BY rank",
+                {'m': phrase},
+            )
+        # Trigrams need 3 chars; shorter terms scan the (small) index table
+        return (
+            f"SELECT {ids} FROM search_fts WHERE content LIKE :p ESCAPE '\\' "
+            f"AND {type_filter} ORDER BY rowid DESC",
+            {'p': _like_pattern(query)},
+        )
+    if backend == 'trgm':
+        return (
+            "SELECT entity_id FROM search_index WHERE entity_type = :t "
+            "AND content ILIKE :p ESCAPE '\\' ORDER BY similarity(content, :q) DESC",
+            {'p': _like_pattern(query), 'q': query},
+        )
+    if backend == 'table':
+        return (
+            "SELECT entity_id FROM search_index WHERE entity_type = :t "
+            "AND content ILIKE :p ESCAPE '\\' ORDER BY entity_id DESC",
+            {'p': _like_pattern(query)},
+        )
+    return None
+
+
+def _bound(entity_type: str, sql: str, params: dict) -> dict:
+    """Bind values for the placeholders *sql* actually uses."""
+    values = dict(params, t=entity_type, bits=_TYPE_BITS,
+                  mask=(1 << _TYPE_BITS) - 1, code=_ENTITIES[entity_type][1])
+    return {name: value for name, value in values.items() if f':{name}' in sql}
+
+
+def search(entity_type: str, query: str, limit: int = 5) -> list:
+    """Up to *limit* entities of *entity_type* matching *query*, best first."""
+    model, _, _, like_columns = _ENTITIES[entity_type]
+    backend = _detect_backend(db.session.connection())
+    ranked = _ranked_ids_sql(backend, query) if backend else None
+    if ranked is None:
+        pattern = _like_pattern(query)
+        return model.query.filter(or_(*(
+            getattr(model, column).ilike(pattern, escape='\\') for column in like_columns
+        ))).limit(limit).all()
+
+    sql, params = ranked
+    ids = [row[0] for row in db.session.execute(
+        text(f"{sql} LIMIT :limit"),
+        dict(_bound(entity_type, sql, params), limit=limit),
+    )]
+    if not ids:
+        return []
+    by_id = {obj.id: obj for obj in model.query.filter(model.id.in_(ids)).all()}
+    # Documents of rows removed by bulk deletes are skipped here
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search_filter(entity_type: str, query: str):
+    """SQL filter restricting *entity_type*'s model to rows matching *query*."""
+    model, _, _, like_columns = _ENTITIES[entity_type]
+    backend = _detect_backend(db.session.connection())
+    ranked = _ranked_ids_sql(backend, query) if backend else None
+    if ranked is None:
+        pattern = _like_pattern(query)
+        return or_(*(
+            getattr(model, column).ilike(pattern, escape='\\') for column in like_columns
+        ))
+    sql, params = ranked
+    matching = text(sql).bindparams(
+        **_bound(entity_type, sql, params)
+    ).columns(entity_id=db.Integer)
+    return model.id.in_(matching.subquery().select())
+
+
+_register_listeners()
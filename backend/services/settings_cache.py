@@ -0,0 +1,184 @@
+"""Read-through cache of SystemConfig for request hot paths.
+
+Session checks, mTLS login, OCSP signing, public-URL resolution and the
+SCEP/EST/ACME routes each read a handful of settings per request, one
+``SELECT ... WHERE key = ?`` at a time. Here every row is loaded with ONE
+query into a snapshot that serves all keys until:
+
+  * a SystemConfig row is inserted, updated or deleted through the ORM
+    (including bulk ``Query.update``/``delete``), which publishes
+    ``settings.changed`` on the event bus at flush and again when the
+    transaction ends (services.events.orm); the cache subscribes and drops
+    the snapshot;
+  * with ``REDIS_URL`` set, another worker bumped the shared version key
+    (checked at most every ``_VERSION_CHECK_SEC``);
+  * SETTINGS_CACHE_TTL_SEC has passed, which bounds staleness for writes
+    made behind the ORM's back (raw SQL, another process without Redis).
+
+Values are returned exactly as stored, so encrypted settings still need
+decrypting by the caller. The admin settings API keeps reading rows
+directly so a write is visible to the same request.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+from utils.redis_backend import shared_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SEC = float(os.getenv('SETTINGS_CACHE_TTL_SEC', '30'))
+SETTINGS_CHANGED = 'settings.changed'
+
+_VERSION_CHECK_SEC = 1
+_REDIS_VERSION_KEY = 'ucm:settings:version'
+_TRUE_VALUES = ('true', '1', 'yes')
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    values: Dict[str, Optional[str]]
+    version: Optional[bytes]  # shared Redis version it was loaded at
+    loaded_at: float
+    checked_at: float
+
+
+_lock = threading.Lock()
+_snapshot: Optional[_Snapshot] = None
+_generation = 0  # bumped on every invalidation
+
+
+def _shared_version() -> Optional[bytes]:
+    client = shared_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(_REDIS_VERSION_KEY)
+    except Exception as e:
+        logger.debug(f"Settings cache: Redis version read failed: {e}")
+        return None
+
+
+def _load(generation: int) -> Dict[str, Optional[str]]:
+    global _snapshot
+    from models import SystemConfig, db
+
+    # Read the shared version first: a bump racing with the load is then
+    # seen as newer on the next check
+    version = _shared_version()
+    values = dict(db.session.query(SystemConfig.key, SystemConfig.value).all())
+    now = time.monotonic()
+    with _lock:
+        # An invalidation that landed while we were loading makes this stale
+        if generation == _generation:
+            _snapshot = _Snapshot(values, version, now, now)
+    return values
+
+
+def _values() -> Dict[str, Optional[str]]:
+    global _snapshot
+    _register_listeners()
+    now = time.monotonic()
+    with _lock:
+        snapshot, generation = _snapshot, _generation
+    if snapshot is not None and now - snapshot.loaded_at <= CACHE_TTL_SEC:
+        if now - snapshot.checked_at <= _VERSION_CHECK_SEC or shared_redis() is None:
+            return snapshot.values
+        if _shared_version() == snapshot.version:
+            with _lock:
+                if _snapshot is snapshot:
+                    _snapshot = replace(snapshot, checked_at=now)
+            return snapshot.values
+    return _load(generation)
+
+
+def get(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Stored value of setting *key*, or *default* when there is no such row."""
+    return _values().get(key, default)
+
+
+def get_bool(key: str, default: bool = False) -> bool:
+    """Setting *key* as a flag; *default* when unset or empty."""
+    value = get(key)
+    if value is None or not str(value).strip():
+        return default
+    return str(value).strip().lower() in _TRUE_VALUES
+
+
+def get_int(key: str, default: Optional[int] = None) -> Optional[int]:
+    """Setting *key* as an integer; *default* when unset or not a number."""
+    value = get(key)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def invalidate() -> None:
+    """Drop the snapshot here and, with Redis, in every other worker."""
+    global _snapshot, _generation
+    with _lock:
+        _generation += 1
+        _snapshot = None
+    client = shared_redis()
+    if client is None:
+        return
+    try:
+        client.incr(_REDIS_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Settings cache: Redis version bump failed: {e}")
+
+
+def reset() -> None:
+    """Forget the snapshot without touching the shared version (tests)."""
+    global _snapshot, _generation
+    with _lock:
+        _generation += 1
+        _snapshot = None
+
+
+def _on_settings_event(event_type, payload, ca_refid, meta):
+    invalidate()
+
+
+# ---------------------------------------------------------------------------
+# Change capture
+# ---------------------------------------------------------------------------
+
+def _on_row_change(mapper, connection, target):
+    from sqlalchemy.orm import object_session
+    from services.events.orm import emit_row_change
+    emit_row_change(object_session(target), SETTINGS_CHANGED, {'key': target.key})
+
+
+def _on_orm_execute(state):
+    # Query.update()/delete() skip the mapper events above
+    if not (state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    from models import SystemConfig
+    if mapper is not None and mapper.class_ is SystemConfig:
+        from services.events.orm import emit_row_change
+        emit_row_change(state.session, SETTINGS_CHANGED, {'key': None})
+
+
+def _register_listeners():
+    # Lazily, on first use: nothing is cached before then, so nothing can go stale
+    if getattr(_register_listeners, '_done', False):
+        return
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from models import SystemConfig
+    from services.events import event_bus
+
+    with _lock:
+        if getattr(_register_listeners, '_done', False):
+            return
+        for hook in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(SystemConfig, hook, _on_row_change)
+        event.listen(Session, 'do_orm_execute', _on_orm_execute)
+        event_bus.subscribe(SETTINGS_CHANGED, _on_settings_event)
+        _register_listeners._done = True
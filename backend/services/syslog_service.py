@@ -1,16 +1,26 @@
 """
 Remote Syslog Forwarder for Audit Logs
 Forwards audit events to a remote syslog server via UDP, TCP, or TCP+TLS.
+
+Sending is asynchronous: send() formats the message on the caller's thread
+and puts it on a bounded in-memory queue. A background sender drains the
+queue in batches over one long-lived connection. While the server is
+unreachable only the audit row ids are kept; once it is back, those rows are
+re-read from audit_logs and replayed in order.
 """
 
+import os
 import re
 import socket
 import ssl
+import threading
 import time
 import logging
 import logging.handlers
 import json
+from collections import deque
 from datetime import datetime
+from flask import current_app, has_app_context
 from utils.datetime_utils import utc_now
 from utils.request_helpers import safe_call
 
@@ -33,6 +43,17 @@ SEVERITY_MAP = {
 # How long the resolved HOSTNAME is cached before re-reading system_name
 _HOSTNAME_CACHE_TTL = 300
 
+# Send queue: bounded; on overflow either wait briefly for the sender
+# ('block', backpressure) or discard the oldest message ('drop_oldest')
+QUEUE_SIZE = int(os.getenv('SYSLOG_QUEUE_SIZE', '10000'))
+QUEUE_POLICY = os.getenv('SYSLOG_QUEUE_POLICY', 'drop_oldest')
+BLOCK_TIMEOUT = float(os.getenv('SYSLOG_BLOCK_TIMEOUT', '1.0'))
+BATCH_SIZE = 200
+# Audit ids remembered for replay while the server is unreachable
+REPLAY_MAX = int(os.getenv('SYSLOG_REPLAY_MAX', '100000'))
+_RECONNECT_MIN = 1.0
+_RECONNECT_MAX = 30.0
+
 
 def _sd_escape(value) -> str:
     """Escape a STRUCTURED-DATA PARAM-VALUE (RFC 5424 §6.3.3: \\, \" and ])."""
@@ -73,6 +94,22 @@ class SyslogForwarder:
         self._socket = None
         self._hostname = ''
         self._hostname_resolved_at = 0.0
+        # Async sender state, guarded by _cond; the socket by _io_lock.
+        # A sender exits once _generation moves past the one it started with.
+        old_cond = getattr(self, '_cond', None)
+        self._generation = getattr(self, '_generation', 0) + 1
+        if old_cond is not None:
+            with old_cond:
+                old_cond.notify_all()
+        self._cond = threading.Condition()
+        self._io_lock = threading.RLock()
+        self._queue = deque()          # (audit id or None, framed message)
+        self._replay_ids = deque()     # audit ids to re-read and resend
+        self._sender = None
+        self._sender_generation = None
+        self._app = None
+        self._in_flight = 0
+        self._counters = dict.fromkeys(('queued', 'sent', 'dropped', 'failed', 'replayed'), 0)
         self._initialized = True
 
     def _resolve_hostname(self) -> str:
@@ -104,6 +141,12 @@ class SyslogForwarder:
         if not self._initialized:
             self._initialize()
 
+        with self._cond:
+            # Messages were framed for the old target; start over
+            self._generation += 1
+            self._queue.clear()
+            self._replay_ids.clear()
+            self._cond.notify_all()
         self._close()
 
         self._enabled = enabled
@@ -129,12 +172,17 @@ class SyslogForwarder:
 
     def _close(self):
         """Close existing socket."""
-        if self._socket:
-            safe_call(self._socket.close)
-            self._socket = None
+        with self._io_lock:
+            if self._socket:
+                safe_call(self._socket.close)
+                self._socket = None
 
     def _get_socket(self):
         """Get or create socket connection."""
+        with self._io_lock:
+            return self._get_socket_locked()
+
+    def _get_socket_locked(self):
         if self._socket:
             return self._socket
 
@@ -204,7 +252,11 @@ class SyslogForwarder:
         return self._frame_message(message)
 
     def send(self, audit_log):
-        """Send an audit log entry to the remote syslog server. Non-blocking on failure."""
+        """Queue an audit log entry for the remote syslog server.
+
+        Never blocks on the network: the message is formatted here and
+        written by the background sender. Returns True when queued.
+        """
         if not self._enabled or not self._host:
             return False
 
@@ -214,35 +266,155 @@ class SyslogForwarder:
             return False
 
         try:
-            sock = self._get_socket()
-            if not sock:
-                return False
-
             message = self._build_message(audit_log)
+        except Exception as e:
+            logger.debug(f"Syslog message build failed: {e}", exc_info=True)
+            return False
 
-            if self._protocol == 'tcp':
-                sock.sendall(message)
+        entry_id = getattr(audit_log, 'id', None)
+        if not isinstance(entry_id, int):
+            entry_id = None
+        if self._app is None and has_app_context():
+            self._app = current_app._get_current_object()
+
+        with self._cond:
+            if self._replay_ids:
+                # Server down or replay in progress: keep order by going
+                # through audit_logs as well
+                self._remember_for_replay(entry_id)
+            else:
+                if len(self._queue) >= QUEUE_SIZE and QUEUE_POLICY == 'block':
+                    self._cond.wait_for(lambda: len(self._queue) < QUEUE_SIZE, BLOCK_TIMEOUT)
+                if len(self._queue) >= QUEUE_SIZE:
+                    self._queue.popleft()
+                    self._counters['dropped'] += 1
+                self._queue.append((entry_id, message))
+                self._counters['queued'] += 1
+            self._ensure_sender()
+            self._cond.notify_all()
+        return True
+
+    def _remember_for_replay(self, entry_id):
+        """Caller holds _cond."""
+        if entry_id is None or len(self._replay_ids) >= REPLAY_MAX:
+            self._counters['dropped'] += 1
+            return
+        self._replay_ids.append(entry_id)
+
+    def _ensure_sender(self):
+        """Start the sender thread in this process if needed. Caller holds _cond."""
+        if (self._sender is None or not self._sender.is_alive()
+                or self._sender_generation != self._generation):
+            self._sender = threading.Thread(
+                target=self._run_sender, args=(self._generation,),
+                name='SyslogSender', daemon=True,
+            )
+            self._sender_generation = self._generation
+            self._sender.start()
+
+    def _run_sender(self, generation):
+        backoff = _RECONNECT_MIN
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._queue or self._replay_ids or self._generation != generation,
+                    timeout=60,
+                )
+                if self._generation != generation or not self.is_enabled:
+                    return
+                replaying = bool(self._replay_ids)
+                if not replaying:
+                    batch = [self._queue.popleft()
+                             for _ in range(min(BATCH_SIZE, len(self._queue)))]
+                    self._in_flight = len(batch)
+            if replaying:
+                ok = self._replay_batch(generation)
+            elif batch:
+                ok = self._write([message for _, message in batch])
+                with self._cond:
+                    self._in_flight = 0
+                    if ok:
+                        self._counters['sent'] += len(batch)
+                    elif self._generation == generation:
+                        self._counters['failed'] += 1
+                        # Everything not yet written goes through audit_logs
+                        pending = list(self._queue)
+                        self._queue.clear()
+                        for entry_id, _ in batch + pending:
+                            self._remember_for_replay(entry_id)
+                    self._cond.notify_all()
             else:
-                sock.sendto(message, (self._host, self._port))
+                continue
+            if ok:
+                backoff = _RECONNECT_MIN
+            else:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _RECONNECT_MAX)
 
+    def _write(self, messages) -> bool:
+        """Write framed messages over the persistent connection."""
+        try:
+            with self._io_lock:
+                sock = self._get_socket_locked()
+                if not sock:
+                    return False
+                if self._protocol == 'tcp':
+                    # Framed messages concatenate into one stream write
+                    sock.sendall(b''.join(messages))
+                else:
+                    for message in messages:
+                        sock.sendto(message, (self._host, self._port))
             return True
-        except (BrokenPipeError, ConnectionResetError, OSError):
+        except Exception as e:
+            logger.warning(f"Syslog send failed, will replay from audit log: {e}")
             self._close()
+            return False
+
+    def _replay_batch(self, generation) -> bool:
+        """Resend the oldest remembered audit rows. Returns False on failure."""
+        with self._cond:
+            ids = [self._replay_ids[i] for i in range(min(BATCH_SIZE, len(self._replay_ids)))]
+        if self._app is None:
+            return False
+        from models import db, AuditLog
+        with self._app.app_context():
             try:
-                sock = self._get_socket()
-                if sock:
-                    message = self._build_message(audit_log)
-                    if self._protocol == 'tcp':
-                        sock.sendall(message)
-                    else:
-                        sock.sendto(message, (self._host, self._port))
-                    return True
+                rows = (AuditLog.query.filter(AuditLog.id.in_(ids))
+                        .order_by(AuditLog.id).all())
+                messages = [self._build_message(row) for row in rows]
             except Exception as e:
-                logger.debug(f"Syslog retry send failed (after socket reset): {e}", exc_info=True)
-            return False
-        except Exception as e:
-            logger.debug(f"Syslog send failed: {e}", exc_info=True)
+                logger.error(f"Syslog replay read failed: {e}")
+                return False
+            finally:
+                db.session.remove()
+        if messages and not self._write(messages):
             return False
+        with self._cond:
+            if self._generation == generation:
+                for _ in ids:
+                    self._replay_ids.popleft()
+                self._counters['replayed'] += len(messages)
+                if not self._replay_ids:
+                    logger.info("Syslog forwarding caught up after outage")
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued messages were written (or *timeout* elapsed)."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._queue or self._replay_ids or self._in_flight),
+                timeout,
+            )
+
+    @property
+    def stats(self) -> dict:
+        """Queue depth and delivery counters of this process."""
+        if not self._initialized:
+            return {}
+        with self._cond:
+            return dict(self._counters, queue_depth=len(self._queue),
+                        replay_backlog=len(self._replay_ids))
 
     def test_connection(self) -> dict:
         """Test syslog connection by sending a test message."""
@@ -252,23 +424,24 @@ class SyslogForwarder:
         self._close()
 
         try:
-            sock = self._get_socket()
-            if not sock:
-                return {'success': False, 'error': 'Failed to connect'}
-
-            facility_code = FACILITY_MAP['local0']
-            pri = (facility_code * 8) + SEVERITY_MAP['info']
-            timestamp = utc_now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-            hostname = self._resolve_hostname()
-            message = f'<{pri}>1 {timestamp} {hostname} UCM - - [ucm@0 action="test"] UCM syslog test message'
-
-            framed_message = self._frame_message(message)
-            if self._protocol == 'tcp':
-                sock.sendall(framed_message)
-            else:
-                sock.sendto(framed_message, (self._host, self._port))
-
-            return {'success': True, 'message': f'Test message sent via {self._protocol.upper()} to {self._host}:{self._port}'}
+            with self._io_lock:
+                sock = self._get_socket()
+                if not sock:
+                    return {'success': False, 'error': 'Failed to connect'}
+
+                facility_code = FACILITY_MAP['local0']
+                pri = (facility_code * 8) + SEVERITY_MAP['info']
+                timestamp = utc_now().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                hostname = self._resolve_hostname()
+                message = f'<{pri}>1 {timestamp} {hostname} UCM - - [ucm@0 action="test"] UCM syslog test message'
+
+                framed_message = self._frame_message(message)
+                if self._protocol == 'tcp':
+                    sock.sendall(framed_message)
+                else:
+                    sock.sendto(framed_message, (self._host, self._port))
+
+                return {'success': True, 'message': f'Test message sent via {self._protocol.upper()} to {self._host}:{self._port}'}
         except Exception as e:
             self._close()
             return {'success': False, 'error': str(e)}
@@ -0,0 +1,80 @@
+"""Webhook delivery worker.
+
+A daemon thread that drains the durable webhook queue as soon as
+``WebhookService.enqueue_deliveries`` commits new rows, instead of leaving
+them for the scheduler's next 30-second wake. It keeps claiming batches until
+the queue is empty, then sleeps until woken again or until IDLE_POLL_SEC
+elapses (which is when backed-off retries come due).
+
+Every process runs its own worker: the thread is (re)started lazily on the
+first wake in a process, so a forked server worker gets one too. Claims are
+atomic, so workers and the scheduler's ``webhook_delivery`` task can drain
+the same queue without double delivery.
+"""
+import logging
+import os
+import threading
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+IDLE_POLL_SEC = float(os.getenv('WEBHOOK_DISPATCH_POLL_SEC', '15'))
+BATCH_SIZE = 50
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_app = None
+_thread = None
+
+
+def _drain(app) -> None:
+    from services.webhook_service import WebhookService
+    with app.app_context():
+        try:
+            while WebhookService.process_pending_deliveries(BATCH_SIZE)['attempted'] >= BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.error(f"Webhook dispatch failed: {e}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+def _run(app) -> None:
+    while True:
+        _wake.wait(IDLE_POLL_SEC)
+        _wake.clear()
+        with _lock:
+            if _app is None:
+                return
+        _drain(app)
+
+
+def start(app) -> None:
+    """Enable the worker for *app*; the thread itself starts on first wake."""
+    global _app
+    with _lock:
+        _app = app
+    wake()
+
+
+def stop() -> None:
+    """Let the worker thread exit after its current batch."""
+    global _app, _thread
+    with _lock:
+        _app = None
+        _thread = None
+    _wake.set()
+
+
+def wake() -> None:
+    """Ask the worker to drain the queue now (no-op until :func:`start`)."""
+    global _thread
+    with _lock:
+        if _app is None:
+            return
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, args=(_app,), daemon=True,
+                                       name='WebhookDispatcher')
+            _thread.start()
+    _wake.set()
@@ -3,6 +3,10 @@ Webhook Service - UCM
 Sends HTTP notifications for certificate lifecycle events.
 """
 import base64
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from models import db, SystemConfig
 from utils.encryption import decrypt_if_needed
@@ -234,6 +238,67 @@ def _build_auth_header(webhook) -> dict:
     return {}
 
 
+class _PreparedEndpoint:
+    """Send-time view of a WebhookEndpoint: URL, static headers (custom +
+    auth) and the decrypted HMAC secret. Built once per batch on the
+    claiming thread and free of ORM state, so sender threads can use it."""
+
+    __slots__ = ('id', 'url', 'headers', 'secret')
+
+    def __init__(self, endpoint):
+        self.id = endpoint.id
+        self.url = endpoint.url
+        self.headers = {}
+        self.headers.update(_safe_custom_headers(endpoint.get_headers()))
+        self.headers.update(_build_auth_header(endpoint))
+        self.secret = decrypt_if_needed(endpoint.secret) if endpoint.secret else None
+
+
+class _EndpointSession:
+    __slots__ = ('url', 'http', 'lock', 'last_used')
+
+    def __init__(self, url):
+        self.url = url
+        self.http = requests.Session()
+        self.lock = threading.RLock()  # one sender per endpoint at a time
+        self.last_used = time.monotonic()
+
+
+# Keep-alive HTTP sessions, one per endpoint, shared by every delivery batch
+# in this process so back-to-back events reuse the TLS connection.
+_SESSION_IDLE_SECONDS = 300
+_sessions_lock = threading.Lock()
+_endpoint_sessions = {}  # endpoint id -> _EndpointSession
+
+
+def _endpoint_session(endpoint: _PreparedEndpoint) -> _EndpointSession:
+    """Return the endpoint's keep-alive session; replaced if its URL changed."""
+    now = time.monotonic()
+    stale = []
+    with _sessions_lock:
+        entry = _endpoint_sessions.get(endpoint.id)
+        if entry is None or entry.url != endpoint.url:
+            if entry is not None:
+                stale.append(entry)
+            entry = _endpoint_sessions[endpoint.id] = _EndpointSession(endpoint.url)
+        entry.last_used = now
+        for endpoint_id, other in list(_endpoint_sessions.items()):
+            if now - other.last_used > _SESSION_IDLE_SECONDS:
+                stale.append(_endpoint_sessions.pop(endpoint_id))
+    for old in stale:
+        old.http.close()
+    return entry
+
+
+def close_endpoint_sessions():
+    """Drop every pooled webhook connection (tests, endpoint reconfiguration)."""
+    with _sessions_lock:
+        entries = list(_endpoint_sessions.values())
+        _endpoint_sessions.clear()
+    for entry in entries:
+        entry.http.close()
+
+
 class WebhookService:
     """Service for sending webhook notifications"""
     
@@ -274,6 +339,8 @@ class WebhookService:
     _BACKOFF_CAP_SECONDS = 3600     # capped at 1 h
     _CLAIM_LEASE_SECONDS = 120      # delivery lease; longer than the POST timeout
                                     # so a crashed claim is reclaimed, not lost (#139)
+    _PER_ENDPOINT_BATCH = 10        # claim cap per endpoint: one backlog can't fill a batch
+    MAX_SENDERS = int(os.getenv('WEBHOOK_DELIVERY_WORKERS', '8'))
 
     @staticmethod
     def send_event(event_type: str, payload: dict, ca_refid: str = None, meta: dict = None):
@@ -289,6 +356,8 @@ class WebhookService:
     def enqueue_deliveries(event_type: str, payload: dict, ca_refid: str = None, meta: dict = None):
         """Bus subscriber: queue one delivery per matching, enabled endpoint."""
         from models import WebhookDelivery
+        if event_type not in WebhookService.ALL_EVENTS:
+            return  # internal bus traffic (e.g. auth cache invalidation)
         try:
             endpoints = WebhookEndpoint.query.filter_by(enabled=True).all()
         except Exception as e:
@@ -332,32 +401,43 @@ class WebhookService:
         except Exception as e:
             db.session.rollback()
             logger.error(f"Failed to queue webhook deliveries for {event_type}: {e}")
+            return
         finally:
             session.expire_on_commit = prev_expire
+        from services import webhook_dispatcher
+        webhook_dispatcher.wake()
 
     @staticmethod
     def _build_body_json(event_type: str, payload: dict, timestamp: str) -> str:
         return json.dumps({'event': event_type, 'timestamp': timestamp, 'data': payload}, default=str)
 
     @staticmethod
-    def _perform_delivery(endpoint: WebhookEndpoint, event_type: str, body_json: str):
-        """Build headers, sign, and POST. Returns (ok, status_code, error)."""
-        headers = {}
-        headers.update(_safe_custom_headers(endpoint.get_headers()))
-        headers.update(_build_auth_header(endpoint))
+    def _perform_delivery(endpoint, event_type: str, body_json: str):
+        """Build headers, sign, and POST. Returns (ok, status_code, error).
+
+        ``endpoint`` is a WebhookEndpoint (one-off sends) or a
+        _PreparedEndpoint from a delivery batch, which goes out over the
+        endpoint's keep-alive session.
+        """
+        http = None
+        if isinstance(endpoint, _PreparedEndpoint):
+            http = _endpoint_session(endpoint).http
+        else:
+            endpoint = _PreparedEndpoint(endpoint)
+        headers = dict(endpoint.headers)
         headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'UCM-Webhook/2.0',
             'X-UCM-Event': event_type,
         })
-        secret_plain = decrypt_if_needed(endpoint.secret) if endpoint.secret else None
-        if secret_plain:
-            signature = hmac.new(secret_plain.encode(), body_json.encode(), hashlib.sha256).hexdigest()
+        if endpoint.secret:
+            signature = hmac.new(endpoint.secret.encode(), body_json.encode(), hashlib.sha256).hexdigest()
             headers['X-UCM-Signature'] = f'sha256={signature}'
 
         from utils.ssrf_protection import safe_request_post
         try:
-            response = safe_request_post(endpoint.url, data=body_json, headers=headers, timeout=10)
+            response = safe_request_post(endpoint.url, data=body_json, headers=headers,
+                                         timeout=10, session=http)
             return bool(response.ok), response.status_code, (None if response.ok else f"HTTP {response.status_code}")
         except requests.RequestException as e:
             return False, None, str(e)
@@ -372,53 +452,65 @@ class WebhookService:
                    WebhookService._BACKOFF_CAP_SECONDS)
 
     @staticmethod
-    def process_pending_deliveries(limit: int = 50) -> dict:
-        """Scheduler task: deliver due pending webhook deliveries with backoff."""
+    def _claim_due(now, limit: int) -> list:
+        """Claim up to ``limit`` due deliveries in one UPDATE; return their ids.
+
+        Atomic claim (#139): bumping attempts and pushing next_attempt_at
+        forward (a lease) happens in a single conditional UPDATE, so a row
+        another scheduler/worker already claimed no longer matches and is
+        skipped — exactly-once delivery even with several processes. A
+        crashed claim is reclaimed once its lease elapses. At most
+        _PER_ENDPOINT_BATCH rows per endpoint are taken, oldest first, so
+        one endpoint's backlog cannot starve the others.
+        """
+        from sqlalchemy import func, select, update as _sa_update
         from models import WebhookDelivery
-        now = utc_now()
-        result = {'attempted': 0, 'delivered': 0, 'retry': 0, 'failed': 0}
-        try:
-            due = (WebhookDelivery.query
-                   .filter(WebhookDelivery.status == WebhookDelivery.STATUS_PENDING,
-                           WebhookDelivery.next_attempt_at <= now)
-                   .order_by(WebhookDelivery.next_attempt_at.asc())
-                   .limit(limit).all())
-        except Exception as e:
-            logger.error(f"Webhook delivery query failed: {e}")
-            return result
+        due = (WebhookDelivery.status == WebhookDelivery.STATUS_PENDING,
+               WebhookDelivery.next_attempt_at <= now)
+        ranked = (select(
+                      WebhookDelivery.id,
+                      WebhookDelivery.next_attempt_at,
+                      func.row_number().over(
+                          partition_by=WebhookDelivery.endpoint_id,
+                          order_by=(WebhookDelivery.next_attempt_at, WebhookDelivery.id),
+                      ).label('rank'))
+                  .where(*due)
+                  .subquery())
+        batch = (select(ranked.c.id)
+                 .where(ranked.c.rank <= WebhookService._PER_ENDPOINT_BATCH)
+                 .order_by(ranked.c.next_attempt_at, ranked.c.id)
+                 .limit(limit))
+        claimed = db.session.execute(
+            _sa_update(WebhookDelivery)
+            .where(WebhookDelivery.id.in_(batch), *due)
+            .values(attempts=(WebhookDelivery.attempts + 1),
+                    next_attempt_at=now + timedelta(seconds=WebhookService._CLAIM_LEASE_SECONDS))
+            .returning(WebhookDelivery.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        return claimed
 
-        for d in due:
-            # Atomic claim (#139): only one scheduler/worker may send a row.
-            # Bump attempts + push next_attempt_at forward (a lease) in a single
-            # conditional UPDATE; if another process already claimed it the
-            # rowcount is 0 and we skip — guarantees exactly-once delivery even
-            # when the scheduler runs in multiple workers. A crashed claim is
-            # reclaimed once the lease (next_attempt_at) elapses.
-            from sqlalchemy import update as _sa_update
-            claimed = db.session.execute(
-                _sa_update(WebhookDelivery)
-                .where(WebhookDelivery.id == d.id,
-                       WebhookDelivery.status == WebhookDelivery.STATUS_PENDING,
-                       WebhookDelivery.next_attempt_at <= now)
-                .values(attempts=(WebhookDelivery.attempts + 1),
-                        next_attempt_at=now + timedelta(seconds=WebhookService._CLAIM_LEASE_SECONDS))
-            ).rowcount
-            db.session.commit()
-            if not claimed:
-                continue  # already claimed by a concurrent scheduler
-            db.session.refresh(d)
+    @staticmethod
+    def _send_group(endpoint: _PreparedEndpoint, items: list) -> list:
+        """Send one endpoint's deliveries in order over its keep-alive session.
 
-            result['attempted'] += 1
-            endpoint = db.session.get(WebhookEndpoint, d.endpoint_id)
-            if not endpoint or not endpoint.enabled:
-                d.status = WebhookDelivery.STATUS_FAILED
-                d.last_error = 'Endpoint missing or disabled'
-                result['failed'] += 1
-                _safe_commit()
-                continue
+        Runs on a sender thread and touches no database state. Returns
+        [(delivery id, ok, status code, error)].
+        """
+        outcomes = []
+        with _endpoint_session(endpoint).lock:
+            for delivery_id, event_type, body_json in items:
+                ok, code, err = WebhookService._perform_delivery(endpoint, event_type, body_json)
+                outcomes.append((delivery_id, ok, code, err))
+        return outcomes
 
-            body_json = WebhookService._build_body_json(d.event_type, json.loads(d.payload), d.event_timestamp)
-            ok, code, err = WebhookService._perform_delivery(endpoint, d.event_type, body_json)
+    @staticmethod
+    def _record_outcomes(deliveries: dict, endpoint: WebhookEndpoint, outcomes: list, result: dict):
+        from models import WebhookDelivery
+        now = utc_now()
+        for delivery_id, ok, code, err in outcomes:
+            d = deliveries[delivery_id]
             d.last_response_code = code
             d.last_error = err
             if ok:
@@ -437,7 +529,68 @@ class WebhookService:
                 endpoint.last_failure = now
                 endpoint.failure_count = (endpoint.failure_count or 0) + 1
                 result['retry'] += 1
-            _safe_commit()
+        _safe_commit()
+
+    @staticmethod
+    def process_pending_deliveries(limit: int = 50) -> dict:
+        """Deliver due pending webhook deliveries with backoff.
+
+        Claims a batch, then sends each endpoint's share sequentially on its
+        own keep-alive connection while different endpoints go out in
+        parallel (up to MAX_SENDERS), so a slow receiver only holds up its
+        own queue. Outcomes are written back here, one commit per endpoint.
+        """
+        from models import WebhookDelivery
+        now = utc_now()
+        result = {'attempted': 0, 'delivered': 0, 'retry': 0, 'failed': 0}
+        try:
+            claimed = WebhookService._claim_due(now, limit)
+            if not claimed:
+                return result
+            rows = (WebhookDelivery.query
+                    .filter(WebhookDelivery.id.in_(claimed))
+                    .order_by(WebhookDelivery.id).all())
+            endpoint_ids = {d.endpoint_id for d in rows}
+            endpoints = {ep.id: ep for ep in
+                         WebhookEndpoint.query.filter(WebhookEndpoint.id.in_(endpoint_ids))}
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Webhook delivery claim failed: {e}")
+            return result
+
+        result['attempted'] = len(rows)
+        deliveries = {d.id: d for d in rows}
+        groups = {}  # endpoint id -> [(delivery id, event type, body)]
+        for d in rows:
+            endpoint = endpoints.get(d.endpoint_id)
+            if not endpoint or not endpoint.enabled:
+                d.status = WebhookDelivery.STATUS_FAILED
+                d.last_error = 'Endpoint missing or disabled'
+                result['failed'] += 1
+                continue
+            body_json = WebhookService._build_body_json(d.event_type, json.loads(d.payload), d.event_timestamp)
+            groups.setdefault(d.endpoint_id, []).append((d.id, d.event_type, body_json))
+        _safe_commit()
+
+        prepared = {endpoint_id: _PreparedEndpoint(endpoints[endpoint_id]) for endpoint_id in groups}
+        if len(groups) == 1:
+            # Nothing to overlap with: send on the calling thread
+            (endpoint_id, items), = groups.items()
+            outcomes = WebhookService._send_group(prepared[endpoint_id], items)
+            WebhookService._record_outcomes(deliveries, endpoints[endpoint_id], outcomes, result)
+        elif groups:
+            workers = min(WebhookService.MAX_SENDERS, len(groups))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='WebhookSend') as pool:
+                futures = {pool.submit(WebhookService._send_group, prepared[endpoint_id], items): endpoint_id
+                           for endpoint_id, items in groups.items()}
+                for future in as_completed(futures):
+                    endpoint_id = futures[future]
+                    try:
+                        outcomes = future.result()
+                    except Exception as e:
+                        outcomes = [(item[0], False, None, str(e)) for item in groups[endpoint_id]]
+                    WebhookService._record_outcomes(deliveries, endpoints[endpoint_id], outcomes, result)
+
         if result['attempted']:
             logger.info(f"Webhook deliveries processed: {result}")
         return result
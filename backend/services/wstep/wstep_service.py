@@ -22,7 +22,6 @@ from services.ca_service import CAService
 from utils.datetime_utils import utc_now
 from utils.key_type import validate_enrollment_public_key
 from utils.san_parse import is_valid_san_email
-from utils.serial_format import serial_variants
 from utils.upn_san import build_upn_other_name
 
 from . import ws_security
@@ -794,7 +793,7 @@ def renew(ca, csr_der, security_header, csr_element, validity_days, source='wste
     db_cert = None
     candidates = Certificate.query.filter(
         Certificate.caref == ca.refid,
-        Certificate.serial_number.in_(serial_variants(signing_cert.serial_number)),
+        Certificate.serial_hex == format(signing_cert.serial_number, 'x'),
         Certificate.crt.isnot(None),
     ).all()
     signing_der = signing_cert.public_bytes(Encoding.DER)
@@ -110,6 +110,48 @@ def _reset_acme_proxy_caches():
     reset_proxy_caches()
 
 
+@pytest.fixture(autouse=True)
+def _reset_inventory_stats():
+    """Drop the shared dashboard/metrics counters around every test.
+
+    They are cached for a few seconds per process, so a test that writes
+    rows directly (bypassing the lifecycle events that invalidate them)
+    would otherwise read counts left over from an earlier test.
+    """
+    from services.inventory_stats import invalidate
+
+    invalidate()
+    yield
+    invalidate()
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_cache():
+    """Drop cached API keys, permissions and mTLS lookups around every test.
+
+    Tests that patch the permission helpers, or write auth rows directly,
+    bypass what invalidates these caches.
+    """
+    from auth import resolver_cache
+    from services.mtls_auth_service import invalidate_cache
+
+    resolver_cache.reset()
+    invalidate_cache()
+    yield
+    resolver_cache.reset()
+    invalidate_cache()
+
+
+@pytest.fixture(autouse=True)
+def _reset_settings_cache():
+    """Drop the cached SystemConfig snapshot around every test."""
+    from services import settings_cache
+
+    settings_cache.reset()
+    yield
+    settings_cache.reset()
+
+
 @pytest.fixture(scope='session')
 def app():
     """Create Flask app with test configuration (shared across all tests)."""
@@ -348,3 +390,25 @@ def assert_error(response, status):
     """Assert response is an error with given status code."""
     assert response.status_code == status, \
         f'Expected {status}, got {response.status_code}: {response.data[:500]}'
+
+
+@pytest.fixture(autouse=True)
+def _reset_delta_crl_publisher():
+    """Cancel debounced delta CRLs a test's revocations left pending.
+
+    Their timers would otherwise fire after the test, against whatever
+    database the next test is using.
+    """
+    from services.crl import delta_publisher
+
+    yield
+    delta_publisher.reset()
+
+
+@pytest.fixture(autouse=True)
+def _reset_hsm_session_pools():
+    """Disconnect pooled HSM sessions a test opened against its providers."""
+    from services.hsm import session_pool
+
+    yield
+    session_pool.reset()
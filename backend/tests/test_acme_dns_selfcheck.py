@@ -137,8 +137,8 @@ def test_auto_poll_spawns_thread_when_not_testing(app, monkeypatch):
             started.append(True)
 
     monkeypatch.setattr(orders_mod.threading, 'Thread', _SpyThread)
+    monkeypatch.setitem(app.config, 'TESTING', False)
     with app.test_request_context():
-        app.config['TESTING'] = False
         orders_mod._run_auto_poll_background(999999, 'staging')
     assert started == [True], 'a background thread must be spawned outside TESTING'
 
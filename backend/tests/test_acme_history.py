@@ -0,0 +1,73 @@
+"""ACME history pruning (services.acme.history)."""
+import json
+import secrets
+from datetime import timedelta
+
+import pytest
+
+from models import db
+from models.acme_models import AcmeAccount, AcmeAuthorization, AcmeChallenge, AcmeOrder
+from services.acme import history
+from utils.datetime_utils import utc_now
+
+
+@pytest.fixture
+def acme_history(app):
+    """One account with an old and a recent order per certificate outcome."""
+    with app.app_context():
+        account = AcmeAccount(jwk='{}', jwk_thumbprint=secrets.token_hex(32))
+        db.session.add(account)
+        db.session.flush()
+        ids = {}
+        for label, age_days, certificate_id in (
+            ('old_failed', 200, None), ('old_issued', 200, 1), ('recent', 10, None),
+        ):
+            expires = utc_now() - timedelta(days=age_days)
+            order_id, authz_id, challenge_id = (secrets.token_urlsafe(32) for _ in range(3))
+            order = AcmeOrder(order_id=order_id, account_id=account.account_id, identifiers='[]',
+                              certificate_id=certificate_id, expires=expires)
+            authz = AcmeAuthorization(authorization_id=authz_id, order_id=order_id,
+                                      account_id=account.account_id,
+                                      identifier=json.dumps({'type': 'dns', 'value': 'a.example'}),
+                                      expires=expires)
+            challenge = AcmeChallenge(challenge_id=challenge_id, authorization_id=authz_id,
+                                      type='http-01')
+            db.session.add_all([order, authz, challenge])
+            ids[label] = (order_id, authz_id, challenge_id)
+        db.session.commit()
+        yield ids
+        for order_id, authz_id, challenge_id in ids.values():
+            AcmeChallenge.query.filter_by(challenge_id=challenge_id).delete()
+            AcmeAuthorization.query.filter_by(authorization_id=authz_id).delete()
+            AcmeOrder.query.filter_by(order_id=order_id).delete()
+        AcmeAccount.query.filter_by(account_id=account.account_id).delete()
+        db.session.commit()
+
+
+def _exists(order_id, authz_id, challenge_id):
+    return (
+        AcmeOrder.query.filter_by(order_id=order_id).first() is not None,
+        AcmeAuthorization.query.filter_by(authorization_id=authz_id).first() is not None,
+        AcmeChallenge.query.filter_by(challenge_id=challenge_id).first() is not None,
+    )
+
+
+def test_prune_removes_expired_history_but_keeps_issued_orders(app, acme_history):
+    with app.app_context():
+        result = history.prune_history(retention_days=90)
+
+        assert result['challenges'] >= 2
+        assert result['authorizations'] >= 2
+        assert result['orders'] >= 1
+        assert _exists(*acme_history['old_failed']) == (False, False, False)
+        # Revocation and ARI find the owning order by certificate
+        assert _exists(*acme_history['old_issued']) == (True, False, False)
+        assert _exists(*acme_history['recent']) == (True, True, True)
+
+
+def test_zero_retention_disables_pruning(app, acme_history):
+    with app.app_context():
+        assert history.prune_history(retention_days=0) == {
+            'challenges': 0, 'authorizations': 0, 'orders': 0,
+        }
+        assert _exists(*acme_history['old_failed']) == (True, True, True)
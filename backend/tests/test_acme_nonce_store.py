@@ -0,0 +1,138 @@
+"""ACME Replay-Nonce backends (services.acme.nonce_store)."""
+import time
+from datetime import timedelta
+
+import pytest
+
+from services.acme import nonce_store
+from utils.datetime_utils import utc_now
+
+
+@pytest.fixture
+def restore_nonce_store():
+    yield
+    nonce_store.reset()
+
+
+class TestMemoryStore:
+    def test_nonce_is_accepted_once(self):
+        store = nonce_store.MemoryNonceStore()
+        token = store.issue()
+
+        assert store.consume(token) is True
+        assert store.consume(token) is False
+        assert store.consume('never-issued') is False
+
+    def test_full_ring_evicts_oldest(self):
+        store = nonce_store.MemoryNonceStore(capacity=2)
+        first, second, third = store.issue(), store.issue(), store.issue()
+
+        assert store.consume(first) is False
+        assert store.consume(second) is True
+        assert store.consume(third) is True
+
+    def test_expired_nonces_are_rejected_and_cleaned(self):
+        store = nonce_store.MemoryNonceStore(ttl=0)
+        token = store.issue()
+        store.issue()
+
+        assert store.consume(token) is False
+        assert store.cleanup() == 1
+
+
+class TestHmacStore:
+    def test_signed_nonce_is_accepted_once(self):
+        store = nonce_store.HmacNonceStore(b'secret', bloom_capacity=1000)
+        token = store.issue()
+
+        assert store.consume(token) is True
+        assert store.consume(token) is False
+
+    def test_other_key_and_tampering_are_rejected(self):
+        store = nonce_store.HmacNonceStore(b'secret', bloom_capacity=1000)
+        other = nonce_store.HmacNonceStore(b'other', bloom_capacity=1000)
+        token = store.issue()
+        tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+
+        assert other.consume(token) is False
+        assert store.consume(tampered) is False
+        assert store.consume('!!not base64!!') is False
+
+    def test_nonce_outside_window_is_rejected(self, monkeypatch):
+        store = nonce_store.HmacNonceStore(b'secret', window=60, bloom_capacity=1000)
+        token = store.issue()
+        now = time.time()
+        monkeypatch.setattr(nonce_store.time, 'time', lambda: now + 61)
+
+        assert store.consume(token) is False
+
+    def test_replay_detected_across_filter_rotation(self, monkeypatch):
+        store = nonce_store.HmacNonceStore(b'secret', window=60, bloom_capacity=1000)
+        now = time.time()
+        clock = {'t': now}
+        monkeypatch.setattr(nonce_store.time, 'time', lambda: clock['t'])
+        clock['t'] = now + 30
+        token = store.issue()
+        assert store.consume(token) is True
+
+        clock['t'] = now + 61
+        assert store.consume(store.issue()) is True  # rotates the filters
+        assert store.consume(token) is False
+
+
+class TestBloomFilter:
+    def test_membership(self):
+        bloom = nonce_store.BloomFilter(1000)
+        items = [f'nonce-{i}'.encode() for i in range(500)]
+        for item in items:
+            bloom.add(item)
+
+        assert all(item in bloom for item in items)
+        assert sum(f'other-{i}'.encode() in bloom for i in range(1000)) <= 1
+
+
+class TestDatabaseStore:
+    def test_consume_and_bulk_cleanup(self, app):
+        from models import db
+        from models.acme_models import AcmeNonce
+
+        with app.app_context():
+            store = nonce_store.DatabaseNonceStore()
+            token = store.issue()
+            assert store.consume(token) is True
+            assert store.consume(token) is False
+
+            stale = AcmeNonce.query.filter_by(token=token).first()
+            stale.expires_at = utc_now() - timedelta(minutes=1)
+            db.session.add(AcmeNonce(token='expired-unused', expires_at=utc_now() - timedelta(minutes=1)))
+            db.session.commit()
+
+            assert store.cleanup() == 2
+            assert AcmeNonce.query.filter(AcmeNonce.token.in_([token, 'expired-unused'])).count() == 0
+
+
+class TestBackendSelection:
+    def test_auto_without_redis_uses_memory(self, app, monkeypatch, restore_nonce_store):
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        with app.app_context():
+            assert nonce_store.configure('auto').name == 'memory'
+            assert nonce_store.configure('hmac').name == 'hmac'
+            assert nonce_store.configure('db').name == 'db'
+
+    def test_several_workers_without_redis_use_the_database(self, app, monkeypatch, restore_nonce_store):
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        monkeypatch.setenv('UCM_WORKERS', '4')
+        with app.app_context():
+            for backend in ('auto', 'redis', 'memory', 'hmac'):
+                assert nonce_store.configure(backend).name == 'db', backend
+
+    def test_acme_endpoint_round_trip_uses_configured_backend(self, app, client, restore_nonce_store):
+        from services.acme import AcmeService
+
+        with app.app_context():
+            store = nonce_store.configure('hmac')
+            response = client.head('/acme/new-nonce')
+            token = response.headers['Replay-Nonce']
+
+            assert AcmeService().validate_nonce(token) is True
+            assert store.consume(token) is False
@@ -0,0 +1,251 @@
+"""Asynchronous ACME challenge validation (services.acme.validation_worker)."""
+import json
+import threading
+
+import pytest
+import requests
+
+from models import db
+from models.acme_models import AcmeAccount, AcmeAuthorization, AcmeChallenge, AcmeOrder
+from services.acme import validation_worker
+from services.acme.validation_worker import ValidationJob, ValidationPool
+
+from tests.test_acme_security_paths import (
+    _build_jws, _gen_key_and_jwk, _nonce, _post_jws, _thumbprint,
+)
+
+
+@pytest.fixture
+def acme_account(app):
+    key, jwk = _gen_key_and_jwk()
+    with app.app_context():
+        acct = AcmeAccount(
+            jwk=json.dumps(jwk),
+            jwk_thumbprint=_thumbprint(jwk),
+            status='valid',
+        )
+        db.session.add(acct)
+        db.session.commit()
+        acct_id = acct.account_id
+    return {'key': key, 'jwk': jwk, 'account_id': acct_id}
+
+
+def _job(challenge_id, identifier='a.example.com', account_id='acct-1'):
+    return ValidationJob(challenge_id=challenge_id, account_id=account_id,
+                         identifier=identifier, base_url='http://localhost')
+
+
+class _BlockingRunner:
+    """Records concurrent attempts and holds them until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.seen = []
+
+    def __call__(self, job, final):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.seen.append(job.challenge_id)
+        self.release.wait(5)
+        with self.lock:
+            self.active -= 1
+        return True
+
+
+class TestValidationPool:
+    def test_one_validation_per_identifier_at_a_time(self):
+        runner = _BlockingRunner()
+        pool = ValidationPool(runner, max_workers=4, per_identifier=1, per_account=4)
+        try:
+            for i in range(3):
+                pool.submit(_job(f'c{i}', identifier='same.example.com'))
+            pool.submit(_job('other', identifier='other.example.com'))
+            runner.release.set()
+            assert pool.wait_idle(5)
+        finally:
+            pool.shutdown()
+
+        assert runner.peak <= 2
+        assert sorted(runner.seen) == ['c0', 'c1', 'c2', 'other']
+
+    def test_per_account_limit(self):
+        runner = _BlockingRunner()
+        pool = ValidationPool(runner, max_workers=8, per_identifier=8, per_account=2)
+        try:
+            for i in range(5):
+                pool.submit(_job(f'c{i}', identifier=f'n{i}.example.com'))
+            assert pool.stats()['running'] == 2
+            assert pool.stats()['waiting'] == 3
+            runner.release.set()
+            assert pool.wait_idle(5)
+        finally:
+            pool.shutdown()
+
+        assert runner.peak == 2
+        assert len(runner.seen) == 5
+
+    def test_duplicate_submission_is_ignored(self):
+        runner = _BlockingRunner()
+        pool = ValidationPool(runner)
+        try:
+            assert pool.submit(_job('dup')) is True
+            assert pool.submit(_job('dup')) is False
+            runner.release.set()
+            assert pool.wait_idle(5)
+        finally:
+            pool.shutdown()
+
+        assert runner.seen == ['dup']
+
+    def test_transient_failures_are_retried_until_final_attempt(self):
+        attempts = []
+
+        def runner(job, final):
+            attempts.append((job.attempt, final))
+            return final
+
+        pool = ValidationPool(runner, max_attempts=3, retry_delays=(0.01,))
+        try:
+            pool.submit(_job('flaky'))
+            assert pool.wait_idle(5)
+        finally:
+            pool.shutdown()
+
+        assert attempts == [(1, False), (2, False), (3, True)]
+        assert pool.stats()['retried'] == 2
+
+
+def _make_challenge(app, account_id, chall_type='dns-01', identifier='async.example.com'):
+    with app.app_context():
+        order = AcmeOrder(
+            account_id=account_id,
+            status='pending',
+            identifiers=json.dumps([{'type': 'dns', 'value': identifier}]),
+        )
+        db.session.add(order)
+        db.session.commit()
+        authz = AcmeAuthorization(
+            order_id=order.order_id,
+            account_id=account_id,
+            identifier=json.dumps({'type': 'dns', 'value': identifier}),
+            status='pending',
+        )
+        db.session.add(authz)
+        db.session.commit()
+        chall = AcmeChallenge(
+            authorization_id=authz.authorization_id,
+            type=chall_type,
+            status='pending',
+            url='http://localhost/acme/challenge/placeholder',
+        )
+        db.session.add(chall)
+        db.session.commit()
+        chall.url = f'http://localhost/acme/challenge/{chall.challenge_id}'
+        db.session.commit()
+        return chall.challenge_id
+
+
+class TestChallengeEndpoint:
+    def test_post_returns_processing_and_queues_validation(self, app, client, acme_account, monkeypatch):
+        submitted = []
+
+        class _RecordingPool:
+            def submit(self, job):
+                submitted.append(job)
+                return True
+
+        monkeypatch.setattr(validation_worker, '_inline', lambda: False)
+        monkeypatch.setattr(validation_worker, 'get_pool', lambda: _RecordingPool())
+        from services.acme.acme_service import AcmeService
+
+        def _boom(*a, **k):
+            raise AssertionError("validation must not run in the request")
+        monkeypatch.setattr(AcmeService, 'validate_dns01_challenge', _boom)
+
+        chall_id = _make_challenge(app, acme_account['account_id'])
+        url = f'http://localhost/acme/challenge/{chall_id}'
+        jws = _build_jws(url, {}, acme_account['key'],
+                         kid=f'http://localhost/acme/acct/{acme_account["account_id"]}',
+                         nonce=_nonce(client))
+        r = _post_jws(client, f'/acme/challenge/{chall_id}', jws)
+
+        assert r.status_code == 200
+        assert r.get_json()['status'] == 'processing'
+        assert r.headers['Retry-After'] == '3'
+        assert [(j.challenge_id, j.identifier) for j in submitted] == [(chall_id, 'async.example.com')]
+        with app.app_context():
+            assert AcmeChallenge.query.filter_by(challenge_id=chall_id).first().status == 'processing'
+
+
+class TestTransientFailures:
+    def _run(self, app, account_id, chall_id, retry_transient):
+        from services.acme.acme_service import AcmeService
+        challenge = AcmeChallenge.query.filter_by(challenge_id=chall_id).first()
+        account = AcmeAccount.query.filter_by(account_id=account_id).first()
+        challenge.status = 'processing'
+        db.session.commit()
+        return AcmeService(base_url='http://localhost').run_challenge_validation(
+            challenge, account, retry_transient=retry_transient)
+
+    def test_timeout_defers_while_attempts_remain(self, app, acme_account, monkeypatch):
+        from services.acme.mixins.challenge import ChallengeRetry
+        import dns.exception
+
+        def _timeout(*a, **k):
+            raise dns.exception.Timeout()
+        monkeypatch.setattr('dns.resolver.resolve', _timeout)
+
+        chall_id = _make_challenge(app, acme_account['account_id'])
+        with app.app_context():
+            with pytest.raises(ChallengeRetry):
+                self._run(app, acme_account['account_id'], chall_id, retry_transient=True)
+            challenge = AcmeChallenge.query.filter_by(challenge_id=chall_id).first()
+            assert challenge.status == 'processing'
+            assert challenge.authorization.status == 'pending'
+
+            assert self._run(app, acme_account['account_id'], chall_id, retry_transient=False) is False
+            assert challenge.status == 'invalid'
+            assert json.loads(challenge.error)['type'].endswith(':dns')
+
+    def test_client_error_is_not_retried(self, app, acme_account, monkeypatch):
+        from services.acme.acme_service import AcmeService
+
+        def _not_found(self, url, pin, allow_private):
+            response = requests.Response()
+            response.status_code = 404
+            response.url = url
+            return response
+        monkeypatch.setattr(AcmeService, '_http01_fetch_following_redirects', _not_found)
+        monkeypatch.setattr(AcmeService, '_acme_allow_private_ips', lambda self: True)
+
+        chall_id = _make_challenge(app, acme_account['account_id'], chall_type='http-01')
+        with app.app_context():
+            assert self._run(app, acme_account['account_id'], chall_id, retry_transient=True) is False
+            challenge = AcmeChallenge.query.filter_by(challenge_id=chall_id).first()
+            assert challenge.status == 'invalid'
+
+
+class TestOrphanResubmit:
+    def test_requeues_processing_challenges_not_tracked_here(self, app, acme_account, monkeypatch):
+        account_id = acme_account['account_id']
+        orphan = _make_challenge(app, account_id, identifier='orphan.example.com')
+        tracked = _make_challenge(app, account_id, identifier='tracked.example.com')
+        settled = _make_challenge(app, account_id, identifier='settled.example.com')
+        with app.app_context():
+            for chall_id, status in ((orphan, 'processing'), (tracked, 'processing'), (settled, 'valid')):
+                AcmeChallenge.query.filter_by(challenge_id=chall_id).first().status = status
+            db.session.commit()
+
+            submitted = []
+            monkeypatch.setattr(validation_worker, 'is_pending', lambda chall_id: chall_id == tracked)
+            monkeypatch.setattr(validation_worker, 'submit',
+                                lambda challenge, account, base_url, client_ip=None:
+                                submitted.append((challenge.challenge_id, account.account_id, base_url)))
+
+            assert validation_worker.resubmit_orphans() == len(submitted)
+        assert (orphan, account_id, 'http://localhost') in submitted
+        assert not {tracked, settled} & {chall_id for chall_id, _, _ in submitted}
@@ -98,6 +98,30 @@ class TestListLogs:
         data = assert_success(r)
         assert len(data) >= 1, 'Expected at least one audit entry from login'
 
+    def test_list_cursor_mode_walks_newest_first(self, auth_client):
+        """?cursor= walks every log once, newest first, without a count."""
+        for _ in range(3):
+            auth_client.get(f'{BASE}/stats')
+            auth_client.post('/api/v2/auth/login',
+                             data=json.dumps({'username': 'admin', 'password': 'changeme123'}),
+                             content_type=CONTENT_JSON)
+        expected = [e['id'] for e in assert_success(auth_client.get(f'{BASE}/logs?per_page=100'))]
+
+        seen, cursor = [], ''
+        while len(seen) < len(expected):
+            body = get_json(auth_client.get(f'{BASE}/logs?per_page=2&cursor={cursor}'))
+            assert 'total' not in body['meta']
+            seen.extend(e['id'] for e in body['data'])
+            if not body['meta']['has_next']:
+                break
+            cursor = body['meta']['next_cursor']
+
+        assert seen[:len(expected)] == expected[:len(seen)]
+        assert len(seen) == len(set(seen))
+
+    def test_list_cursor_invalid(self, auth_client):
+        assert_error(auth_client.get(f'{BASE}/logs?cursor=garbage'), 400)
+
 
 # ============================================================
 # Get Single Log
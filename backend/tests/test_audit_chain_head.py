@@ -0,0 +1,101 @@
+"""Audit hash-chain appends through the audit_chain_head tracker."""
+from models import db, AuditLog, AuditChainHead
+from services.audit import AuditService
+from services.audit import core as audit_core
+from utils.datetime_utils import utc_now
+
+
+def _head():
+    return db.session.get(AuditChainHead, 1)
+
+
+class TestChainHead:
+    def test_append_links_to_head_and_advances_it(self, app):
+        with app.app_context():
+            first = AuditService.log_action('chain_head_first', details='first')
+            second = AuditService.log_action('chain_head_second', details='second')
+
+            assert second.prev_hash == first.entry_hash
+            assert second.entry_hash == second.compute_hash(first.entry_hash)
+            head = _head()
+            assert head.last_id == second.id
+            assert head.last_hash == second.entry_hash
+
+    def test_unchained_row_does_not_break_chain(self, app):
+        with app.app_context():
+            before = AuditService.log_action('chain_head_before_gap')
+            db.session.add(AuditLog(timestamp=utc_now(), username='system',
+                                    action='chain_head_unchained'))
+            db.session.commit()
+            after = AuditService.log_action('chain_head_after_gap')
+
+            assert after.prev_hash == before.entry_hash
+            assert AuditService.verify_integrity(start_id=before.id)['valid']
+
+    def test_batch_commits_entries_in_order(self, app):
+        with app.app_context():
+            with AuditService.batch():
+                entries = [AuditService.log_action(f'chain_head_batch_{i}') for i in range(3)]
+                assert all(e.id is None for e in entries)
+
+            assert [e.id for e in entries] == sorted(e.id for e in entries)
+            assert entries[1].prev_hash == entries[0].entry_hash
+            assert entries[2].prev_hash == entries[1].entry_hash
+            assert _head().last_hash == entries[2].entry_hash
+
+
+    def test_create_all_seeds_the_head(self):
+        from sqlalchemy import create_engine, text
+
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+        db.metadata.create_all(engine)
+
+        with engine.connect() as conn:
+            rows = conn.execute(text('SELECT id, last_id, last_hash FROM audit_chain_head')).all()
+        assert rows == [(1, None, None)]
+
+    def test_missing_head_is_reseeded_from_the_chain(self, app):
+        with app.app_context():
+            last = AuditService.log_action('chain_head_before_reseed')
+            db.session.query(AuditChainHead).delete()
+            db.session.commit()
+
+            entry = AuditService.log_action('chain_head_after_reseed')
+
+            assert entry.prev_hash == last.entry_hash
+            assert _head().last_hash == entry.entry_hash
+
+    def test_racing_seed_does_not_conflict(self, app):
+        with app.app_context():
+            AuditService.log_action('chain_head_seeded')
+            head = (_head().last_id, _head().last_hash)
+            # The INSERT of a worker that lost the race to the existing row
+            unguarded = audit_core.SEED_CHAIN_HEAD_SQL.replace(
+                'WHERE NOT EXISTS (SELECT 1 FROM audit_chain_head WHERE id = 1)', 'WHERE 1 = 1')
+            db.session.execute(db.text(unguarded))
+            db.session.commit()
+
+            db.session.expire_all()
+            assert (_head().last_id, _head().last_hash) == head
+
+
+class TestVerifyIntegrity:
+    def test_streams_across_chunks(self, app, monkeypatch):
+        with app.app_context():
+            monkeypatch.setattr(audit_core, '_VERIFY_CHUNK', 2)
+            with AuditService.batch():
+                entries = [AuditService.log_action(f'chain_head_chunk_{i}') for i in range(5)]
+
+            result = AuditService.verify_integrity(start_id=entries[0].id, end_id=entries[-1].id)
+            assert result == {'valid': True, 'checked': 5, 'errors': []}
+
+    def test_detects_tampering(self, app):
+        with app.app_context():
+            entry = AuditService.log_action('chain_head_tamper', details='original')
+            entry.details = 'rewritten'
+            db.session.commit()
+
+            result = AuditService.verify_integrity(start_id=entry.id, end_id=entry.id)
+            assert not result['valid']
+            assert result['errors'][0]['error'] == 'entry_hash mismatch (tampered)'
@@ -0,0 +1,99 @@
+"""Cached API-key and effective-permission resolution (auth.resolver_cache)."""
+import pytest
+
+from auth import resolver_cache
+from auth.permissions import get_effective_permissions
+from auth.unified import AuthManager
+from models import User, db
+from models.api_key import APIKey
+from models.group import Group, GroupMember
+
+
+@pytest.fixture
+def key_owner(app):
+    """A viewer with one API key, and a group they are not yet in."""
+    with app.app_context():
+        user = User(username='cache-owner', email='cache-owner@example.test', role='viewer')
+        user.set_password('Str0ng-Passw0rd!')
+        group = Group(name='Cache Group', description='', permissions=[])
+        db.session.add_all([user, group])
+        db.session.commit()
+        key = AuthManager().create_api_key(user.id, 'cache-key', ['read:cas'])
+        yield {'user_id': user.id, 'group_id': group.id, 'key': key['key'], 'key_id': key['id']}
+
+        GroupMember.query.filter_by(user_id=user.id).delete()
+        APIKey.query.filter_by(user_id=user.id).delete()
+        db.session.delete(db.session.get(Group, group.id))
+        db.session.delete(db.session.get(User, user.id))
+        db.session.commit()
+
+
+def test_api_key_is_served_from_cache(app, key_owner):
+    with app.test_request_context():
+        manager = AuthManager()
+        first = manager.verify_api_key(key_owner['key'])
+        # Raw SQL fires no change event, so only the TTL would pick this up
+        db.session.execute(APIKey.__table__.update().where(
+            APIKey.__table__.c.id == key_owner['key_id']).values(is_active=False))
+        db.session.commit()
+        second = manager.verify_api_key(key_owner['key'])
+
+        assert first['permissions'] == second['permissions'] == ['read:cas']
+        # Written through under TESTING
+        assert db.session.get(APIKey, key_owner['key_id']).last_used_at is not None
+
+        resolver_cache.invalidate_api_key()
+        assert manager.verify_api_key(key_owner['key']) is None
+
+
+def test_revoking_a_key_invalidates_it(app, key_owner):
+    with app.test_request_context():
+        manager = AuthManager()
+        assert manager.verify_api_key(key_owner['key']) is not None
+
+        db.session.get(APIKey, key_owner['key_id']).is_active = False
+        db.session.commit()
+
+        assert manager.verify_api_key(key_owner['key']) is None
+
+
+def test_membership_and_group_changes_invalidate_permissions(app, key_owner):
+    with app.app_context():
+        user = db.session.get(User, key_owner['user_id'])
+        group = db.session.get(Group, key_owner['group_id'])
+        db.session.add(GroupMember(group_id=group.id, user_id=user.id))
+        db.session.commit()
+        assert 'read:audit' not in get_effective_permissions(user)
+
+        group.permissions = ['read:audit']
+        db.session.commit()
+        assert 'read:audit' in get_effective_permissions(user)
+
+        db.session.delete(GroupMember.query.filter_by(user_id=user.id).first())
+        db.session.commit()
+        assert 'read:audit' not in get_effective_permissions(user)
+
+
+def test_role_change_takes_effect_immediately(app, key_owner):
+    with app.app_context():
+        user = db.session.get(User, key_owner['user_id'])
+        assert 'write:cas' not in get_effective_permissions(user)
+
+        # Bypasses the ORM, so no change event: the (user, role) key still misses
+        db.session.execute(
+            User.__table__.update().where(User.__table__.c.id == user.id).values(role='operator'))
+        db.session.commit()
+        db.session.refresh(user)
+
+        assert 'write:cas' in get_effective_permissions(user)
+
+
+def test_last_used_is_flushed_in_one_update(app, key_owner):
+    with app.app_context():
+        resolver_cache._last_used[(APIKey.__table__, key_owner['key_id'])] = resolver_cache.utc_now()
+        resolver_cache._last_used[(APIKey.__table__, 10 ** 9)] = resolver_cache.utc_now()
+
+        assert resolver_cache.flush_last_used() == 2
+        assert resolver_cache.flush_last_used() == 0
+        db.session.expire_all()
+        assert db.session.get(APIKey, key_owner['key_id']).last_used_at is not None
@@ -0,0 +1,64 @@
+"""Cached CDP CRL downloads with conditional GET (ETag / Last-Modified)."""
+from tests.conftest import get_json
+
+
+def _regenerate(auth_client, ca_id):
+    r = auth_client.post(f'/api/v2/crl/{ca_id}/regenerate')
+    assert r.status_code == 200, r.data
+
+
+def _refid(auth_client, ca_id):
+    return get_json(auth_client.get(f'/api/v2/cas/{ca_id}'))['data']['refid']
+
+
+class TestCdpConditionalGet:
+
+    def test_etag_and_if_none_match(self, auth_client, client, create_ca):
+        ca = create_ca(cn='CDP Cache ETag CA')
+        _regenerate(auth_client, ca['id'])
+        url = f"/cdp/{_refid(auth_client, ca['id'])}.crl"
+
+        r = client.get(url)
+        assert r.status_code == 200
+        etag = r.headers['ETag']
+        assert etag
+        assert r.headers['Last-Modified']
+
+        r2 = client.get(url, headers={'If-None-Match': etag})
+        assert r2.status_code == 304
+        assert not r2.data
+
+    def test_if_modified_since(self, auth_client, client, create_ca):
+        ca = create_ca(cn='CDP Cache IMS CA')
+        _regenerate(auth_client, ca['id'])
+        url = f"/cdp/{_refid(auth_client, ca['id'])}.crl"
+
+        last_modified = client.get(url).headers['Last-Modified']
+        r = client.get(url, headers={'If-Modified-Since': last_modified})
+        assert r.status_code == 304
+
+    def test_max_age_bounded(self, auth_client, client, create_ca):
+        ca = create_ca(cn='CDP Cache Max-Age CA')
+        _regenerate(auth_client, ca['id'])
+
+        r = client.get(f"/cdp/{_refid(auth_client, ca['id'])}.crl")
+        directives = dict(
+            part.strip().partition('=')[::2] for part in r.headers['Cache-Control'].split(',')
+        )
+        assert 0 < int(directives['max-age']) <= 3600
+
+    def test_regeneration_replaces_cached_crl(self, auth_client, client, create_ca):
+        ca = create_ca(cn='CDP Cache Refresh CA')
+        _regenerate(auth_client, ca['id'])
+        url = f"/cdp/{_refid(auth_client, ca['id'])}.crl"
+        first = client.get(url)
+
+        _regenerate(auth_client, ca['id'])
+        second = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+
+        assert second.status_code == 200
+        assert second.headers['ETag'] != first.headers['ETag']
+        assert second.data != first.data
+
+    def test_unknown_ca_is_404(self, client):
+        assert client.get('/cdp/no-such-ca.crl').status_code == 404
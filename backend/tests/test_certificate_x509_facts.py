@@ -0,0 +1,61 @@
+"""Persisted X.509 display facts on Certificate rows."""
+import base64
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+
+import models.certificate as certificate_module
+from models import db, Certificate
+
+
+def _fingerprint(cert, algorithm):
+    return ':'.join(f'{b:02X}' for b in cert.fingerprint(algorithm))
+
+
+class TestCertificateX509Facts:
+    def test_facts_are_persisted_at_issuance(self, app, create_ca, create_cert):
+        with app.app_context():
+            ca = create_ca(cn='Facts CA')
+            cert = db.session.get(Certificate, create_cert(
+                cn='facts.example.com', ca_id=ca['id'])['id'])
+            parsed = x509.load_pem_x509_certificate(base64.b64decode(cert.crt))
+
+            assert cert.x509_key_type == cert.key_type
+            assert cert.x509_key_type.split()[0] in ('RSA', 'EC')
+            assert cert.x509_signature_algorithm
+            assert cert.x509_thumbprint_sha1 == _fingerprint(parsed, hashes.SHA1())
+            assert cert.x509_thumbprint_sha256 == _fingerprint(parsed, hashes.SHA256())
+
+    def test_to_dict_does_not_parse_pem(
+        self, app, create_ca, create_cert, monkeypatch
+    ):
+        with app.app_context():
+            ca = create_ca(cn='Facts No Parse CA')
+            cert_id = create_cert(cn='noparse.example.com', ca_id=ca['id'])['id']
+            db.session.expire_all()
+            cert = db.session.get(Certificate, cert_id)
+
+            def _fail(*args, **kwargs):
+                raise AssertionError('PEM parsed during to_dict')
+            monkeypatch.setattr(certificate_module, 'derive_certificate_facts', _fail)
+
+            data = cert.to_dict()
+
+            assert data['thumbprint_sha256'] == cert.x509_thumbprint_sha256
+            assert data['key_size'] > 0
+
+    def test_replacing_crt_rederives_facts(self, app, create_ca, create_cert):
+        with app.app_context():
+            ca = create_ca(cn='Facts Replace CA')
+            first = db.session.get(Certificate, create_cert(
+                cn='first.example.com', ca_id=ca['id'])['id'])
+            second = db.session.get(Certificate, create_cert(
+                cn='second.example.com', ca_id=ca['id'])['id'])
+
+            first.crt = second.crt
+            assert first.x509_thumbprint_sha256 is None
+            assert first.thumbprint_sha256 == second.thumbprint_sha256
+            db.session.commit()
+
+            assert first.x509_thumbprint_sha256 == second.x509_thumbprint_sha256
+            assert first.serial_hex == second.serial_hex
@@ -271,6 +271,48 @@ class TestListCertificates:
         r = auth_client.get(f'{BASE}?sort_by=valid_to&sort_order=desc')
         assert r.status_code == 200
 
+    @pytest.mark.parametrize('sort', [
+        'sort_by=subject&sort_order=asc',
+        'sort_by=valid_to&sort_order=desc',
+        'sort_by=status&sort_order=asc',
+    ])
+    def test_list_cursor_walks_same_rows_as_pages(self, auth_client, create_cert, sort):
+        for i in range(3):
+            create_cert(cn=f'cursor-walk-{i}.example.com')
+        expected = [c['id'] for c in assert_success(
+            auth_client.get(f'{BASE}?{sort}&per_page=100'))]
+        expected.sort()
+
+        seen, cursor = [], ''
+        while True:
+            body = get_json(auth_client.get(f'{BASE}?{sort}&per_page=2&cursor={cursor}'))
+            seen.extend(c['id'] for c in body['data'])
+            assert 'total' not in body['meta']
+            if not body['meta']['has_next']:
+                break
+            cursor = body['meta']['next_cursor']
+
+        assert len(seen) == len(set(seen))
+        assert sorted(seen) == expected
+
+    def test_list_cursor_optional_total(self, auth_client, create_cert):
+        create_cert(cn='cursor-total.example.com')
+        total = get_json(auth_client.get(f'{BASE}?per_page=1'))['meta']['total']
+
+        body = get_json(auth_client.get(f'{BASE}?per_page=1&cursor=&total=exact'))
+
+        assert body['meta']['total'] == total
+        assert body['meta']['total_is_estimate'] is False
+
+    def test_list_cursor_rejects_cursor_from_other_sort(self, auth_client, create_cert):
+        create_cert(cn='cursor-other-a.example.com')
+        create_cert(cn='cursor-other-b.example.com')
+        cursor = get_json(auth_client.get(
+            f'{BASE}?sort_by=subject&per_page=1&cursor='))['meta']['next_cursor']
+
+        assert_error(auth_client.get(f'{BASE}?sort_by=valid_to&cursor={cursor}'), 400)
+        assert_error(auth_client.get(f'{BASE}?cursor=not-a-cursor'), 400)
+
 
 # ============================================================================
 # Certificate stats
@@ -0,0 +1,95 @@
+"""Persisted certificate compliance score, grade and scheduled refresh."""
+import json
+from datetime import timedelta
+
+from models import db, Certificate
+from services.cert_service import CertificateService
+from services.compliance_service import (
+    calculate_compliance_score,
+    next_compliance_recheck,
+    refresh_compliance_scores,
+)
+from utils.datetime_utils import utc_now
+
+
+def _cert(cert_dict):
+    return db.session.get(Certificate, cert_dict['id'])
+
+
+class TestNextComplianceRecheck:
+    def test_returns_next_band_boundary(self):
+        now = utc_now()
+        valid_to = now + timedelta(days=100)
+
+        assert next_compliance_recheck(valid_to, now=now) == valid_to - timedelta(days=31)
+        assert next_compliance_recheck(
+            valid_to, now=valid_to - timedelta(days=20)
+        ) == valid_to - timedelta(days=8)
+        assert next_compliance_recheck(
+            valid_to, now=valid_to - timedelta(days=3)
+        ) == valid_to - timedelta(days=1)
+
+    def test_stable_scores_have_no_recheck(self):
+        now = utc_now()
+        assert next_compliance_recheck(None, now=now) is None
+        assert next_compliance_recheck(now + timedelta(days=100), revoked=True, now=now) is None
+        assert next_compliance_recheck(now - timedelta(days=1), now=now) is None
+
+
+class TestPersistedCompliance:
+    def test_score_matches_calculated_score_at_issuance(self, app, create_cert):
+        with app.app_context():
+            cert = _cert(create_cert(cn='compliance-issue.example.com'))
+            expected = calculate_compliance_score(cert.to_dict())
+
+            assert cert.compliance_score == expected['score']
+            assert cert.compliance_grade == expected['grade']
+            assert cert.compliance_recheck_at == cert.valid_to - timedelta(days=31)
+
+    def test_revocation_rescores(self, app, create_cert):
+        with app.app_context():
+            cert_dict = create_cert(cn='compliance-revoke.example.com')
+            before = _cert(cert_dict).compliance_score
+
+            CertificateService.revoke_certificate(cert_dict['id'], username='test')
+            cert = _cert(cert_dict)
+
+            assert cert.compliance_score == before - 25
+            assert cert.compliance_recheck_at is None
+
+    def test_refresh_rescores_only_due_rows(self, app, create_cert):
+        with app.app_context():
+            due = _cert(create_cert(cn='compliance-due.example.com'))
+            not_due = _cert(create_cert(cn='compliance-notdue.example.com'))
+            expected = due.compliance_score
+            due.compliance_score = 1
+            due.compliance_recheck_at = utc_now() - timedelta(minutes=1)
+            not_due.compliance_score = 2
+            db.session.commit()
+
+            refresh_compliance_scores()
+
+            assert due.compliance_score == expected
+            assert due.compliance_recheck_at > utc_now()
+            assert not_due.compliance_score == 2
+
+
+class TestComplianceListing:
+    def test_sort_and_filter_use_persisted_grade(self, app, auth_client, create_cert):
+        with app.app_context():
+            low = _cert(create_cert(cn='compliance-low.example.com'))
+            low.compliance_score = 0
+            low.compliance_grade = 'F'
+            db.session.commit()
+            low_id = low.id
+
+        r = auth_client.get(
+            '/api/v2/certificates?sort_by=compliance_grade&sort_order=asc&per_page=100')
+        data = json.loads(r.data)['data']
+        assert data[0]['id'] == low_id
+        assert data[0]['compliance_grade'] == 'F'
+
+        r = auth_client.get('/api/v2/certificates?compliance_grade=F&per_page=100')
+        ids = {c['id'] for c in json.loads(r.data)['data']}
+        assert low_id in ids
+        assert all(c['compliance_grade'] == 'F' for c in json.loads(r.data)['data'])
@@ -0,0 +1,56 @@
+"""Event-driven delta CRL publication."""
+
+
+def _revoke(cert_ids, reason='keyCompromise'):
+    from services.cert_service import CertificateService
+    for cert_id in cert_ids:
+        CertificateService.revoke_certificate(cert_id, reason=reason, username='test')
+
+
+def _set_ca(ca_id, **fields):
+    from models import db, CA
+    ca = db.session.get(CA, ca_id)
+    for name, value in fields.items():
+        setattr(ca, name, value)
+    db.session.commit()
+    return ca
+
+
+class TestDeltaPublisher:
+    def test_burst_of_revocations_publishes_one_delta(self, app, create_ca, create_cert):
+        from models.crl import CRLMetadata
+        from services.crl import CRLService, delta_publisher
+
+        ca = create_ca(cn='Debounced Delta CA')
+        certs = [create_cert(cn=f'debounced-{i}.example.com', ca_id=ca['id']) for i in range(3)]
+        with app.app_context():
+            _set_ca(ca['id'], cdp_enabled=True, delta_crl_enabled=True)
+            base = CRLService.generate_crl(ca['id'])
+            _revoke([c['id'] for c in certs])
+
+            # Revocations under a delta-publishing CA no longer re-sign the full CRL
+            assert CRLService.get_latest_base_crl(ca['id']).crl_number == base.crl_number
+            assert len(delta_publisher._pending) == 1
+
+            delta_publisher.flush()
+
+            deltas = CRLMetadata.query.filter_by(ca_id=ca['id'], is_delta=True).all()
+            assert len(deltas) == 1
+            assert deltas[0].base_crl_number == base.crl_number
+            assert deltas[0].revoked_count == 3
+            assert not delta_publisher._pending
+
+    def test_ca_without_delta_keeps_full_crl_on_revocation(self, app, create_ca, create_cert):
+        from models.crl import CRLMetadata
+        from services.crl import CRLService, delta_publisher
+
+        ca = create_ca(cn='Full Only CA')
+        cert = create_cert(cn='full-only.example.com', ca_id=ca['id'])
+        with app.app_context():
+            _set_ca(ca['id'], cdp_enabled=True, delta_crl_enabled=False)
+            _revoke([cert['id']])
+            delta_publisher.flush()
+
+            latest = CRLService.get_latest_base_crl(ca['id'])
+            assert latest is not None and latest.revoked_count == 1
+            assert CRLMetadata.query.filter_by(ca_id=ca['id'], is_delta=True).count() == 0
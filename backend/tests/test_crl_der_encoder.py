@@ -0,0 +1,120 @@
+"""Streaming DER CRL encoder — byte-for-byte parity with cryptography's builder."""
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.x509.oid import CRLEntryExtensionOID, NameOID
+
+from services.crl import der_encoder
+from services.crl import query as crl_query
+
+ISSUER = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'Encoder Test CA')])
+NOW = datetime(2026, 10, 16, 12, 0, 0)
+NEXT = NOW + timedelta(days=7)
+ENTRIES = [
+    (5, NOW - timedelta(days=1), x509.ReasonFlags.key_compromise, NOW - timedelta(days=2)),
+    (2 ** 158 + 3, NOW, None, None),
+    (128, datetime(2051, 1, 1), x509.ReasonFlags.superseded, None),
+]
+
+
+def _reference(key, hash_algorithm, entries, extensions):
+    builder = (x509.CertificateRevocationListBuilder()
+               .issuer_name(ISSUER).last_update(NOW).next_update(NEXT))
+    for serial, revoked_at, reason, invalidity_at in entries:
+        revoked = x509.RevokedCertificateBuilder().serial_number(serial).revocation_date(revoked_at)
+        if reason is not None:
+            revoked = revoked.add_extension(x509.CRLReason(reason), critical=False)
+        if invalidity_at is not None:
+            revoked = revoked.add_extension(x509.InvalidityDate(invalidity_at), critical=False)
+        builder = builder.add_revoked_certificate(revoked.build())
+    for ext, critical in extensions:
+        builder = builder.add_extension(ext, critical=critical)
+    return builder.sign(key, hash_algorithm)
+
+
+def _encode(key, hash_algorithm, entries, extensions):
+    return der_encoder.encode_crl(
+        ISSUER, NOW, NEXT,
+        (der_encoder.encode_revoked_entry(*entry) for entry in entries),
+        extensions, key, hash_algorithm,
+    )
+
+
+@pytest.mark.parametrize('key, hash_algorithm', [
+    (rsa.generate_private_key(65537, 2048), hashes.SHA256()),
+    (ec.generate_private_key(ec.SECP384R1()), hashes.SHA384()),
+    (ed25519.Ed25519PrivateKey.generate(), None),
+])
+def test_tbs_matches_builder(key, hash_algorithm):
+    extensions = [
+        (x509.CRLNumber(42), False),
+        (x509.AuthorityKeyIdentifier.from_issuer_public_key(key.public_key()), False),
+        (x509.DeltaCRLIndicator(41), True),
+    ]
+    reference = _reference(key, hash_algorithm, ENTRIES, extensions)
+    der = _encode(key, hash_algorithm or hashes.SHA256(), ENTRIES, extensions)
+    crl = x509.load_der_x509_crl(der)
+
+    assert crl.tbs_certlist_bytes == reference.tbs_certlist_bytes
+    assert crl.is_signature_valid(key.public_key())
+    entry = crl.get_revoked_certificate_by_serial_number(5)
+    assert entry.extensions.get_extension_for_oid(CRLEntryExtensionOID.CRL_REASON).value.reason \
+        == x509.ReasonFlags.key_compromise
+
+
+def test_rsa_output_is_identical():
+    key = rsa.generate_private_key(65537, 2048)
+    extensions = [(x509.CRLNumber(1), False)]
+    reference = _reference(key, hashes.SHA256(), ENTRIES, extensions)
+
+    assert _encode(key, hashes.SHA256(), ENTRIES, extensions) \
+        == reference.public_bytes(serialization.Encoding.DER)
+
+
+def test_empty_crl_omits_revoked_list():
+    key = ec.generate_private_key(ec.SECP256R1())
+    extensions = [(x509.CRLNumber(1), False)]
+    der = _encode(key, hashes.SHA256(), [], extensions)
+
+    assert x509.load_der_x509_crl(der).tbs_certlist_bytes \
+        == _reference(key, hashes.SHA256(), [], extensions).tbs_certlist_bytes
+
+
+def test_pem_round_trip():
+    key = ec.generate_private_key(ec.SECP256R1())
+    der = _encode(key, hashes.SHA256(), ENTRIES, [(x509.CRLNumber(1), False)])
+    pem = der_encoder.der_to_pem(der)
+
+    assert x509.load_pem_x509_crl(pem.encode()).public_bytes(serialization.Encoding.DER) == der
+
+
+class TestGeneratedCrl:
+    def test_streams_all_revoked_entries_across_chunks(self, app, create_ca, create_cert, monkeypatch):
+        from models import db, CA
+        from services.cert_service import CertificateService
+        from services.crl import CRLService
+
+        ca = create_ca(cn='Streaming CRL CA')
+        revoked_ids = []
+        for i in range(5):
+            cert = create_cert(cn=f'streaming-crl-{i}.example.com', ca_id=ca['id'])
+            revoked_ids.append(cert['id'])
+        with app.app_context():
+            for cert_id in revoked_ids:
+                CertificateService.revoke_certificate(cert_id, reason='keyCompromise', username='test')
+
+            monkeypatch.setattr(crl_query, 'REVOKED_CHUNK_SIZE', 2)
+            meta = CRLService.generate_crl(ca['id'])
+            crl = x509.load_der_x509_crl(meta.crl_der)
+            ca_cert = x509.load_pem_x509_certificate(
+                base64.b64decode(db.session.get(CA, ca['id']).crt))
+
+            assert meta.revoked_count == 5
+            assert len(crl) == 5
+            assert crl.is_signature_valid(ca_cert.public_key())
+            assert x509.load_pem_x509_crl(meta.crl_pem.encode()).public_bytes(
+                serialization.Encoding.DER) == meta.crl_der
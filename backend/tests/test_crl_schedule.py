@@ -175,3 +175,117 @@ class TestSchedulerPublishInterval:
             should, reason = CRLSchedulerTask.should_regenerate_crl(ca['id'])
             assert should is True
             assert 'publish interval' in reason.lower()
+
+
+class TestSchedulerWorkerPool:
+
+    def test_due_crls_is_one_statement(self, app, auth_client, create_ca):
+        from sqlalchemy import event
+
+        ca = create_ca(cn='Sched Bulk Due CA')
+        auth_client.post(f"/api/v2/crl/{ca['id']}/regenerate")
+        with app.app_context():
+            row = CRLMetadata.query.filter_by(ca_id=ca['id'], is_delta=False).first()
+            row.next_update = utc_now() - timedelta(minutes=5)
+            db.session.commit()
+
+            statements = []
+
+            def _count(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', _count)
+            try:
+                due = CRLSchedulerTask.due_crls()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', _count)
+
+            assert len(statements) == 1
+            job = next(j for j in due if j['ca_id'] == ca['id'])
+            assert 'stale' in job['full_reason'].lower()
+
+    def test_due_cas_are_signed_concurrently(self, app, create_ca):
+        import threading
+        from unittest.mock import patch
+
+        barrier = threading.Barrier(2, timeout=10)
+        jobs = [
+            {'ca_id': create_ca(cn=f'Sched Pool CA {i}')['id'], 'ca': f'Pool {i}',
+             'full_reason': 'test', 'delta_hours': None}
+            for i in range(2)
+        ]
+
+        def _regenerate(ca_id, username='scheduler'):
+            # Both calls must be in flight at once for the barrier to release
+            barrier.wait()
+            return True
+
+        with app.app_context():
+            with patch.object(CRLSchedulerTask, 'due_crls', return_value=jobs), \
+                 patch.object(CRLSchedulerTask, 'regenerate_crl', side_effect=_regenerate):
+                CRLSchedulerTask.execute()
+
+        runs = {run['ca_id']: run for run in CRLSchedulerTask.last_runs()}
+        for job in jobs:
+            assert runs[job['ca_id']]['full']['ok'] is True
+
+    def test_per_ca_timing_in_metrics(self, app, create_ca):
+        from unittest.mock import patch
+        from services.metrics_service import render_metrics
+
+        ca = create_ca(cn='Sched Metrics CA')
+        job = {'ca_id': ca['id'], 'ca': 'Sched Metrics CA', 'full_reason': 'test', 'delta_hours': None}
+        with app.app_context():
+            with patch.object(CRLSchedulerTask, 'due_crls', return_value=[job]):
+                CRLSchedulerTask.execute()
+            assert CRLMetadata.query.filter_by(ca_id=ca['id'], is_delta=False).count() == 1
+
+            body = render_metrics()
+
+        run = next(r for r in CRLSchedulerTask.last_runs() if r['ca_id'] == ca['id'])
+        assert run['full']['ok'] is True and run['full']['duration_ms'] >= 0
+        assert (f'ucm_crl_generation_duration_milliseconds{{ca="Sched Metrics CA",'
+                f'ca_id="{ca["id"]}",type="full"}}') in body
+
+    def test_scheduler_run_racing_a_delta_publish_numbers_distinctly(self, app, create_ca):
+        import threading
+        from models import CA
+        from services.crl.generation import CRLGenerationMixin
+
+        ca_id = create_ca(cn='Sched Race CA')['id']
+        with app.app_context():
+            db.session.get(CA, ca_id).delta_crl_enabled = True
+            db.session.commit()
+            CRLGenerationMixin.generate_crl(ca_id, username='test')
+
+        job = {'ca_id': ca_id, 'ca': 'Sched Race CA', 'full_reason': 'test', 'delta_hours': 4}
+        errors = []
+
+        def _scheduler():
+            result = CRLSchedulerTask._run_ca(app, job)
+            if not (result['full']['ok'] and result['delta']['ok']):
+                errors.append(result)
+
+        def _delta_publish():
+            # What services.crl.delta_publisher runs on its timer thread
+            with app.app_context():
+                try:
+                    CRLGenerationMixin.generate_delta_crl(ca_id, validity_hours=8, username='system')
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+
+        for _ in range(3):
+            threads = [threading.Thread(target=target)
+                       for target in (_scheduler, _delta_publish, _delta_publish)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=60)
+
+        assert errors == []
+        with app.app_context():
+            numbers = [n for (n,) in db.session.query(CRLMetadata.crl_number)
+                       .filter_by(ca_id=ca_id).order_by(CRLMetadata.id)]
+        assert len(numbers) == 1 + 3 * 4
+        assert numbers == sorted(set(numbers))
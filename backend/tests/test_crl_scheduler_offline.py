@@ -49,10 +49,9 @@ class TestCrlSchedulerSkipsOfflineCas:
             row.cdp_enabled = True
             db.session.commit()
             from services.crl_scheduler_task import CRLSchedulerTask
-            with patch.object(CRLSchedulerTask, 'should_regenerate_crl',
-                              return_value=(True, 'test')) as should, \
-                 patch.object(CRLSchedulerTask, 'regenerate_crl',
+            # No CRL yet, so the bulk due query selects it
+            with patch.object(CRLSchedulerTask, 'regenerate_crl',
                               return_value=True) as regen:
                 CRLSchedulerTask.execute()
-            checked_ids = [c.args[0] for c in should.call_args_list]
-            assert ca['id'] in checked_ids
+            regenerated_ids = [c.args[0] for c in regen.call_args_list]
+            assert ca['id'] in regenerated_ids
@@ -83,8 +83,9 @@ def test_callsites_use_commit_or_rollback():
 
     base = os.path.join(os.path.dirname(__file__), "..")
     targets = [
-        ("auth/unified.py", 2),
-        ("services/mtls_auth_service.py", 4),
+        ("auth/unified.py", 1),
+        ("auth/resolver_cache.py", 1),
+        ("services/mtls_auth_service.py", 3),
         ("services/webauthn_service.py", 4),
     ]
     for rel, expected_helper_calls in targets:
@@ -0,0 +1,268 @@
+"""HSM session pooling: HsmService leases connected provider instances."""
+import threading
+import time
+
+import pytest
+
+from services.hsm import HsmService, session_pool
+from services.hsm.base_provider import BaseHsmProvider, HsmConnectionError
+from services.hsm.session_pool import HsmSessionPool
+
+
+class FakeProvider(BaseHsmProvider):
+    """Counts connects; signs by echoing the key identifier."""
+
+    connects = 0
+    fail_next_sign = False
+
+    def connect(self):
+        type(self).connects += 1
+        self._connected = True
+        return True
+
+    def disconnect(self):
+        self._connected = False
+
+    def test_connection(self):
+        return {'success': True}
+
+    def list_keys(self):
+        return []
+
+    def generate_key(self, label, algorithm, purpose='signing', extractable=False):
+        raise NotImplementedError
+
+    def delete_key(self, key_identifier):
+        return True
+
+    def get_public_key(self, key_identifier):
+        raise NotImplementedError
+
+    def sign(self, key_identifier, data, algorithm=None):
+        if type(self).fail_next_sign:
+            type(self).fail_next_sign = False
+            self._connected = False
+            raise HsmConnectionError('session handle invalid')
+        return key_identifier.encode() + b':' + data
+
+
+@pytest.fixture
+def hsm_key(app, monkeypatch):
+    from models import db
+    from models.hsm import HsmKey, HsmProvider
+
+    FakeProvider.connects = 0
+    FakeProvider.fail_next_sign = False
+    monkeypatch.setitem(HsmService._provider_registry, 'pkcs11', FakeProvider)
+    with app.app_context():
+        provider = HsmProvider(name=f'Pooled HSM {time.monotonic_ns()}', type='pkcs11', config='{}')
+        provider.set_config({'pool_size': 2})
+        db.session.add(provider)
+        db.session.flush()
+        key = HsmKey(provider_id=provider.id, key_identifier='abcd', label='pooled',
+                     algorithm='EC-P256', key_type='asymmetric', purpose='signing')
+        db.session.add(key)
+        db.session.commit()
+        yield key
+        HsmService.delete_provider(provider.id)
+
+
+class TestHsmServiceSessions:
+    def test_signatures_reuse_one_connection(self, hsm_key):
+        for i in range(5):
+            assert HsmService.sign(hsm_key.id, b'tbs%d' % i) == b'abcd:tbs%d' % i
+
+        assert FakeProvider.connects == 1
+        assert session_pool.stats()[hsm_key.provider_id] == {'size': 2, 'open': 1, 'idle': 1}
+
+    def test_lost_session_is_replaced_and_call_retried(self, hsm_key):
+        HsmService.sign(hsm_key.id, b'warm')
+        FakeProvider.fail_next_sign = True
+
+        assert HsmService.sign(hsm_key.id, b'again') == b'abcd:again'
+        assert FakeProvider.connects == 2
+        assert session_pool.stats()[hsm_key.provider_id]['open'] == 1
+
+    def test_config_change_reconnects(self, hsm_key):
+        HsmService.sign(hsm_key.id, b'before')
+        HsmService.update_provider(hsm_key.provider_id, config={'pool_size': 1})
+
+        HsmService.sign(hsm_key.id, b'after')
+
+        assert FakeProvider.connects == 2
+        assert session_pool.stats()[hsm_key.provider_id]['size'] == 1
+
+
+class TestHsmSessionPool:
+    def _pool(self, size=2):
+        FakeProvider.connects = 0
+        return HsmSessionPool(lambda: FakeProvider({}), size)
+
+    def test_size_bounds_concurrent_leases(self):
+        pool = self._pool(size=2)
+        inside = threading.Barrier(2)
+        peak = []
+
+        def worker():
+            with pool.lease():
+                inside.wait(timeout=5)
+                peak.append(pool.stats()['open'])
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert max(peak) == 2
+        assert FakeProvider.connects == 2
+        assert pool.stats() == {'size': 2, 'open': 2, 'idle': 2}
+
+    def test_idle_instance_failing_health_check_is_replaced(self, monkeypatch):
+        pool = self._pool()
+        with pool.lease() as first:
+            pass
+        monkeypatch.setattr(session_pool, 'HEALTH_CHECK_SEC', 0)
+        monkeypatch.setattr(FakeProvider, 'ping', lambda self: False)
+
+        with pool.lease() as second:
+            assert second is not first
+
+        assert not first.is_connected
+        assert pool.stats()['open'] == 1
+
+    def test_exhausted_pool_times_out(self, monkeypatch):
+        pool = self._pool(size=1)
+        monkeypatch.setattr(session_pool, 'ACQUIRE_TIMEOUT_SEC', 0.05)
+        with pool.lease():
+            with pytest.raises(HsmConnectionError):
+                with pool.lease():
+                    pass
+
+    def test_close_disconnects_returned_instances(self):
+        pool = self._pool()
+        with pool.lease() as leased:
+            pool.close()
+            assert leased.is_connected
+        assert not leased.is_connected
+        assert pool.stats()['open'] == 0
+
+
+class TestPkcs11KeyHandleCache:
+    def test_private_key_is_looked_up_once_per_session(self):
+        pkcs11 = pytest.importorskip('pkcs11')
+        from services.hsm.pkcs11_provider import Pkcs11Provider
+
+        class Key:
+            def __getitem__(self, attribute):
+                return pkcs11.KeyType.EC
+
+            def sign(self, data, mechanism=None):
+                return b'sig:' + data
+
+        class Session:
+            searches = 0
+
+            def get_objects(self, template):
+                Session.searches += 1
+                yield Key()
+
+        provider = Pkcs11Provider.__new__(Pkcs11Provider)
+        BaseHsmProvider.__init__(provider, {})
+        provider._session = Session()
+        provider._token = provider._lib = None
+        provider.token_label = 'test'
+
+        assert provider.sign('01', b'a', 'EC-P256') == b'sig:a'
+        assert provider.sign('01', b'b', 'EC-P256') == b'sig:b'
+        assert Session.searches == 1
+
+        provider._session.close = lambda: None
+        provider.disconnect()
+        assert provider._key_handles == {}
+
+
+class TestPkcs11SharedLogin:
+    """A token whose login is shared by its sessions, like a real PKCS#11 token."""
+
+    @pytest.fixture
+    def token(self, monkeypatch, tmp_path):
+        pkcs11 = pytest.importorskip('pkcs11')
+        from services.hsm import pkcs11_provider
+
+        class Token:
+            logged_in = False
+            logins = 0
+
+            def open(self, rw=False, user_pin=None):
+                if user_pin is not None:
+                    if self.logged_in:
+                        raise pkcs11.exceptions.UserAlreadyLoggedIn()
+                    self.logged_in = True
+                    self.logins += 1
+                return Session(self, owns_login=user_pin is not None)
+
+        class Session:
+            def __init__(self, token, owns_login):
+                self.token, self.owns_login = token, owns_login
+
+            def get_objects(self, template):
+                yield Key(self.token)
+
+            def close(self):
+                # C_Logout is per token: every other session loses the login
+                if self.owns_login:
+                    self.token.logged_in = False
+
+        class Key:
+            def __init__(self, token):
+                self.token = token
+
+            def __getitem__(self, attribute):
+                return pkcs11.KeyType.EC
+
+            def sign(self, data, mechanism=None):
+                if not self.token.logged_in:
+                    raise pkcs11.exceptions.UserNotLoggedIn()
+                return b'sig:' + data
+
+        token = Token()
+        lib = type('Lib', (), {'get_token': lambda self, token_label=None: token})()
+        monkeypatch.setattr(pkcs11_provider.pkcs11, 'lib', lambda path: lib)
+        module = tmp_path / 'libfake.so'
+        module.write_bytes(b'')
+        config = {'module_path': str(module), 'token_label': 'fake', 'user_pin': '1234'}
+        token.pool = HsmSessionPool(lambda: pkcs11_provider.Pkcs11Provider(config), size=2)
+        return token
+
+    def test_retiring_a_session_keeps_the_others_logged_in(self, token):
+        pool = token.pool
+        entered = threading.Barrier(2)
+
+        def sign_concurrently():
+            with pool.lease() as instance:
+                entered.wait(timeout=5)
+                instance.sign('01', b'tbs', 'EC-P256')
+
+        threads = [threading.Thread(target=sign_concurrently) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert pool.stats()['idle'] == 2
+
+        with pytest.raises(HsmConnectionError):
+            with pool.lease():
+                raise HsmConnectionError('session handle invalid')
+
+        assert token.logged_in is True
+        with pool.lease() as survivor:
+            assert survivor.sign('01', b'after', 'EC-P256') == b'sig:after'
+        assert token.logins == 1
+
+    def test_close_logs_the_token_out(self, token):
+        with token.pool.lease() as instance:
+            instance.sign('01', b'tbs', 'EC-P256')
+        token.pool.close()
+
+        assert token.logged_in is False
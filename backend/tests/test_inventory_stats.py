@@ -0,0 +1,58 @@
+"""Aggregated, briefly cached inventory counters (dashboard + /metrics)."""
+from datetime import timedelta
+
+from models import db, Certificate
+from services import inventory_stats
+from services.cert_service import CertificateService
+from utils.datetime_utils import utc_now
+
+
+def _count(*criteria):
+    return Certificate.query.filter(*criteria).count()
+
+
+class TestCertificateCounts:
+    def test_buckets_match_individual_counts(self, app, create_cert):
+        with app.app_context():
+            create_cert(cn='inventory-valid.example.com')
+            revoked = create_cert(cn='inventory-revoked.example.com')
+            CertificateService.revoke_certificate(revoked['id'], username='test')
+
+            inventory_stats.invalidate()
+            counts = inventory_stats.get_counts('certificates')
+            now = utc_now()
+
+            assert counts['total'] == _count()
+            assert counts['revoked'] == _count(Certificate.revoked == True)  # noqa: E712
+            assert counts['expired'] == _count(
+                Certificate.revoked == False, Certificate.valid_to < now)  # noqa: E712
+            assert counts['active']['total'] == _count(Certificate.archived == False)  # noqa: E712
+            assert counts['active']['expiring_7d'] <= counts['active']['expiring_30d']
+
+    def test_cached_until_invalidated(self, app):
+        with app.app_context():
+            before = inventory_stats.get_counts('certificates')['total']
+            db.session.add(Certificate(refid='inventory-direct-insert', descr='direct',
+                                       valid_to=utc_now() + timedelta(days=90)))
+            db.session.commit()
+            try:
+                assert inventory_stats.get_counts('certificates')['total'] == before
+                inventory_stats.invalidate('certificates')
+                assert inventory_stats.get_counts('certificates')['total'] == before + 1
+            finally:
+                Certificate.query.filter_by(refid='inventory-direct-insert').delete()
+                db.session.commit()
+
+    def test_lifecycle_event_invalidates(self, app, create_cert):
+        with app.app_context():
+            before = inventory_stats.get_counts('certificates')['total']
+            create_cert(cn='inventory-event.example.com')
+            assert inventory_stats.get_counts('certificates')['total'] == before + 1
+
+
+class TestCaCounts:
+    def test_ca_event_invalidates(self, app, create_ca):
+        with app.app_context():
+            before = inventory_stats.get_counts('cas')['total']
+            create_ca(cn='Inventory Stats CA')
+            assert inventory_stats.get_counts('cas')['total'] == before + 1
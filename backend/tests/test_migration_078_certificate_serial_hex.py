@@ -0,0 +1,83 @@
+"""Migration 078 coverage for the canonical certificate serial column."""
+import base64
+import importlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from sqlalchemy import create_engine, text
+
+_CREATE = (
+    'CREATE TABLE certificates (id INTEGER PRIMARY KEY, caref VARCHAR(36), '
+    'crt TEXT, serial_number VARCHAR(100))'
+)
+
+
+def _migration():
+    return importlib.import_module('migrations.078_certificate_serial_hex')
+
+
+def _crt_b64(serial):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'm078')])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(serial)
+        .not_valid_before(now).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.PEM)).decode()
+
+
+def test_migration_078_backfills_serial_hex_on_sqlite_idempotently():
+    conn = sqlite3.connect(':memory:')
+    conn.execute(_CREATE)
+    # All-digit hex serial: only the stored crt disambiguates it.
+    conn.execute(
+        'INSERT INTO certificates (id, caref, crt, serial_number) VALUES (?, ?, ?, ?)',
+        (1, 'ca', _crt_b64(0x123456), '123456'),
+    )
+    conn.execute(
+        'INSERT INTO certificates (id, caref, crt, serial_number) VALUES (?, ?, ?, ?)',
+        (2, 'ca', None, '255'),
+    )
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    rows = dict(conn.execute('SELECT id, serial_hex FROM certificates'))
+    assert rows == {1: '123456', 2: 'ff'}
+    indexes = {
+        row[1] for row in conn.execute("PRAGMA index_list('certificates')")
+    }
+    assert 'idx_certificates_serial_hex_caref' in indexes
+
+
+def test_migration_078_sqlalchemy_path_uses_supplied_connection():
+    engine = create_engine('sqlite:///:memory:')
+    migration = _migration()
+
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE))
+        conn.execute(text(
+            "INSERT INTO certificates (id, caref, serial_number) VALUES (1, 'ca', 'ABCDEF')"
+        ))
+        migration.upgrade(conn)
+        migration.upgrade(conn)
+        serial_hex = conn.execute(
+            text('SELECT serial_hex FROM certificates WHERE id = 1')
+        ).scalar()
+        indexes = {
+            row[1]
+            for row in conn.execute(text("PRAGMA index_list('certificates')"))
+        }
+
+    assert serial_hex == 'abcdef'
+    assert 'idx_certificates_serial_hex_caref' in indexes
@@ -0,0 +1,80 @@
+"""Migration 079 coverage for persisted certificate X.509 facts."""
+import base64
+import importlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from sqlalchemy import create_engine, text
+
+_CREATE = (
+    'CREATE TABLE certificates (id INTEGER PRIMARY KEY, crt TEXT, csr TEXT)'
+)
+_FACTS = (
+    'SELECT x509_key_type, x509_signature_algorithm, x509_thumbprint_sha1, '
+    'x509_thumbprint_sha256 FROM certificates WHERE id = 1'
+)
+
+
+def _migration():
+    return importlib.import_module('migrations.079_certificate_x509_facts')
+
+
+def _cert():
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'm079')])
+    now = datetime.now(timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+
+def _b64(cert):
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.PEM)).decode()
+
+
+def test_migration_079_backfills_facts_on_sqlite_idempotently():
+    cert = _cert()
+    conn = sqlite3.connect(':memory:')
+    conn.execute(_CREATE)
+    conn.execute('INSERT INTO certificates (id, crt) VALUES (1, ?)', (_b64(cert),))
+    conn.execute('INSERT INTO certificates (id) VALUES (2)')
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    key_type, sig, sha1, sha256 = conn.execute(_FACTS).fetchone()
+    assert key_type == 'EC secp256r1'
+    assert sig == 'ECDSA-SHA256'
+    assert sha1 == ':'.join(f'{b:02X}' for b in cert.fingerprint(hashes.SHA1()))
+    assert sha256 == ':'.join(f'{b:02X}' for b in cert.fingerprint(hashes.SHA256()))
+    assert conn.execute(
+        'SELECT x509_key_type, x509_thumbprint_sha1 FROM certificates WHERE id = 2'
+    ).fetchone() == ('N/A', '')
+
+
+def test_migration_079_sqlalchemy_path_uses_supplied_connection():
+    engine = create_engine('sqlite:///:memory:')
+    migration = _migration()
+
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE))
+        conn.execute(
+            text('INSERT INTO certificates (id, crt) VALUES (1, :crt)'),
+            {'crt': _b64(_cert())},
+        )
+        migration.upgrade(conn)
+        migration.upgrade(conn)
+        key_type, sig, _, _ = conn.execute(text(_FACTS)).fetchone()
+
+    assert key_type == 'EC secp256r1'
+    assert sig == 'ECDSA-SHA256'
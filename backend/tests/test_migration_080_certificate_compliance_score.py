@@ -0,0 +1,44 @@
+"""Migration 080 coverage for persisted certificate compliance scores."""
+import importlib
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+
+def _migration():
+    return importlib.import_module('migrations.080_certificate_compliance_score')
+
+
+def test_migration_080_adds_columns_on_sqlite_idempotently():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE certificates (id INTEGER PRIMARY KEY)')
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    columns = {
+        row[1] for row in conn.execute('PRAGMA table_info(certificates)')
+    }
+    assert {'compliance_score', 'compliance_grade', 'compliance_recheck_at'} <= columns
+    indexes = {
+        row[1] for row in conn.execute("PRAGMA index_list('certificates')")
+    }
+    assert 'ix_certificates_compliance_score' in indexes
+    assert 'ix_certificates_compliance_recheck_at' in indexes
+
+
+def test_migration_080_sqlalchemy_path_uses_supplied_connection():
+    engine = create_engine('sqlite:///:memory:')
+    migration = _migration()
+
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE certificates (id INTEGER PRIMARY KEY)'))
+        migration.upgrade(conn)
+        migration.upgrade(conn)
+        columns = {
+            row[1]
+            for row in conn.execute(text("PRAGMA table_info('certificates')"))
+        }
+
+    assert {'compliance_score', 'compliance_grade', 'compliance_recheck_at'} <= columns
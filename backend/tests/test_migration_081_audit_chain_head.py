@@ -0,0 +1,39 @@
+"""Migration 081 coverage for the audit chain-head table."""
+import importlib
+import sqlite3
+
+
+def _migration():
+    return importlib.import_module('migrations.081_audit_chain_head')
+
+
+def test_migration_081_seeds_head_from_last_chained_entry():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, entry_hash VARCHAR(64))')
+    conn.executemany('INSERT INTO audit_logs VALUES (?, ?)',
+                     [(1, 'a' * 64), (2, 'b' * 64), (3, None)])
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    rows = conn.execute('SELECT id, last_id, last_hash FROM audit_chain_head').fetchall()
+    assert rows == [(1, 2, 'b' * 64)]
+
+
+def test_migration_081_seeds_empty_head_without_chained_entries():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, entry_hash VARCHAR(64))')
+    _migration().upgrade(conn)
+
+    rows = conn.execute('SELECT id, last_id, last_hash FROM audit_chain_head').fetchall()
+    assert rows == [(1, None, None)]
+
+
+def test_migration_081_without_audit_logs():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+    _migration().upgrade(conn)
+
+    rows = conn.execute('SELECT id, last_id, last_hash FROM audit_chain_head').fetchall()
+    assert rows == [(1, None, None)]
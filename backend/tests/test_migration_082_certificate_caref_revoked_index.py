@@ -0,0 +1,35 @@
+"""Migration 082 coverage for the CRL walk index on certificates."""
+import importlib
+import sqlite3
+
+
+def _migration():
+    return importlib.import_module('migrations.082_certificate_caref_revoked_index')
+
+
+def _indexes(conn):
+    return {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index'"
+        ).fetchall()
+    }
+
+
+def test_migration_082_creates_index_idempotently():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE certificates (id INTEGER PRIMARY KEY, caref VARCHAR(36), revoked BOOLEAN)')
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+    assert 'idx_certificates_caref_revoked' in _indexes(conn)
+
+    migration.downgrade(conn)
+    assert 'idx_certificates_caref_revoked' not in _indexes(conn)
+
+
+def test_migration_082_without_certificates():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    assert 'idx_certificates_caref_revoked' not in _indexes(conn)
@@ -0,0 +1,27 @@
+"""Migration 083 coverage for the CRL entries fingerprint columns."""
+import importlib
+import sqlite3
+
+
+def _migration():
+    return importlib.import_module('migrations.083_crl_entries_fingerprint')
+
+
+def test_migration_083_adds_columns_idempotently():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE crl_metadata (id INTEGER PRIMARY KEY)')
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(crl_metadata)')}
+    assert {'entries_fingerprint', 'entries_reuse_depth'} <= columns
+
+
+def test_migration_083_without_crl_metadata():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'crl_metadata' not in tables
@@ -0,0 +1,60 @@
+"""Migration 084 coverage for ACME lookup indexes and challenge id backfill."""
+import importlib
+import sqlite3
+
+_INDEXES = {
+    'idx_acme_challenges_authorization', 'idx_acme_authz_order',
+    'idx_acme_authz_account_status', 'idx_acme_orders_account_created',
+    'idx_acme_orders_certificate',
+}
+_SCHEMA = [
+    'CREATE TABLE acme_orders (id INTEGER PRIMARY KEY, order_id VARCHAR(64), '
+    'account_id VARCHAR(64), certificate_id INTEGER, created_at DATETIME)',
+    'CREATE TABLE acme_authorizations (id INTEGER PRIMARY KEY, authorization_id VARCHAR(64), '
+    'order_id VARCHAR(64), account_id VARCHAR(64), status VARCHAR(20), expires DATETIME)',
+    'CREATE TABLE acme_challenges (id INTEGER PRIMARY KEY, challenge_id VARCHAR(64), '
+    'authorization_id VARCHAR(64), url VARCHAR(512))',
+    "INSERT INTO acme_authorizations (authorization_id, status, expires) "
+    "VALUES ('live', 'pending', '2999-01-01 00:00:00'), ('old', 'valid', '2000-01-01 00:00:00')",
+    "INSERT INTO acme_challenges (challenge_id, authorization_id, url) VALUES "
+    "('c1', 'live', 'https://ucm.example/acme/challenge/seg1'), "
+    "('c2', 'old', 'https://ucm.example/acme/challenge/seg2'), "
+    "('c3', 'live', 'https://ucm.example/acme/challenge/c3')",
+]
+
+
+def _migration():
+    return importlib.import_module('migrations.084_acme_lookup_indexes')
+
+
+def _indexes(conn):
+    return {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index'"
+        ).fetchall()
+    }
+
+
+def test_migration_084_indexes_and_backfills_idempotently():
+    conn = sqlite3.connect(':memory:')
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    assert _INDEXES <= _indexes(conn)
+    ids = dict(conn.execute('SELECT id, challenge_id FROM acme_challenges').fetchall())
+    # Live challenges resolve by their URL segment; expired history is left alone
+    assert ids == {1: 'seg1', 2: 'c2', 3: 'c3'}
+
+    migration.downgrade(conn)
+    assert not _INDEXES & _indexes(conn)
+
+
+def test_migration_084_without_acme_tables():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    assert not _INDEXES & _indexes(conn)
@@ -0,0 +1,71 @@
+"""Migration 085 coverage for the mTLS auth certificate lookup keys."""
+import hashlib
+import importlib
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+_CREATE = (
+    'CREATE TABLE auth_certificates (id INTEGER PRIMARY KEY, cert_pem BLOB, '
+    'cert_serial VARCHAR(128), cert_fingerprint VARCHAR(128))'
+)
+
+
+def _migration():
+    return importlib.import_module('migrations.085_auth_certificate_lookup_keys')
+
+
+def _cert(serial):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'm085')])
+    now = datetime.now(timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(serial)
+        .not_valid_before(now).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+
+def test_migration_085_backfills_lookup_keys_idempotently():
+    cert = _cert(0x123456)
+    fingerprint = hashlib.sha256(cert.public_bytes(serialization.Encoding.DER)).hexdigest()
+    conn = sqlite3.connect(':memory:')
+    conn.execute(_CREATE)
+    conn.execute(
+        'INSERT INTO auth_certificates VALUES (?, ?, ?, ?)',
+        (1, cert.public_bytes(serialization.Encoding.PEM), '123456', ''),
+    )
+    conn.execute(
+        'INSERT INTO auth_certificates VALUES (?, ?, ?, ?)',
+        (2, None, '255', 'AB' * 32),
+    )
+    migration = _migration()
+
+    migration.upgrade(conn)
+    migration.upgrade(conn)
+
+    rows = {
+        row[0]: row[1:] for row in conn.execute(
+            'SELECT id, serial_hex, fingerprint_hex FROM auth_certificates')
+    }
+    assert rows == {1: ('123456', fingerprint), 2: ('ff', 'ab' * 32)}
+    indexes = {
+        row[1] for row in conn.execute("PRAGMA index_list('auth_certificates')")
+    }
+    assert {'ix_auth_certificates_serial_hex', 'ix_auth_certificates_fingerprint_hex'} <= indexes
+
+
+def test_migration_085_without_auth_certificates():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    assert conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name = 'auth_certificates'"
+    ).fetchone()[0] == 0
@@ -0,0 +1,46 @@
+"""Migration 086 coverage for the unique CRL number index."""
+import importlib
+import sqlite3
+
+import pytest
+
+
+def _migration():
+    return importlib.import_module('migrations.086_crl_number_unique')
+
+
+def _crl_table(rows=()):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE crl_metadata (id INTEGER PRIMARY KEY, ca_id INTEGER, crl_number INTEGER)')
+    conn.executemany('INSERT INTO crl_metadata (ca_id, crl_number) VALUES (?, ?)', rows)
+    return conn
+
+
+def _indexes(conn):
+    return {row[1] for row in conn.execute('PRAGMA index_list(crl_metadata)')}
+
+
+def test_migration_086_rejects_duplicate_numbers_idempotently():
+    conn = _crl_table([(1, 1), (1, 2), (2, 1)])
+    _migration().upgrade(conn)
+    _migration().upgrade(conn)
+
+    assert 'uq_crl_metadata_ca_number' in _indexes(conn)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute('INSERT INTO crl_metadata (ca_id, crl_number) VALUES (1, 2)')
+
+
+def test_migration_086_leaves_existing_duplicates_alone():
+    conn = _crl_table([(1, 1), (1, 1)])
+    _migration().upgrade(conn)
+
+    assert 'uq_crl_metadata_ca_number' not in _indexes(conn)
+    assert conn.execute('SELECT COUNT(*) FROM crl_metadata').fetchone()[0] == 2
+
+
+def test_migration_086_without_crl_metadata():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'crl_metadata' not in tables
@@ -0,0 +1,30 @@
+"""Migration 087 coverage: the CRL entries fingerprint columns are dropped."""
+import importlib
+import sqlite3
+
+
+def _migration():
+    return importlib.import_module('migrations.087_crl_drop_entries_fingerprint')
+
+
+def test_migration_087_drops_columns_idempotently():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE crl_metadata (id INTEGER PRIMARY KEY, crl_number INTEGER, '
+                 'entries_fingerprint VARCHAR(64), entries_reuse_depth INTEGER DEFAULT 0)')
+    conn.execute('INSERT INTO crl_metadata (crl_number, entries_fingerprint) VALUES (1, :fp)',
+                 {'fp': '0' * 64})
+
+    _migration().upgrade(conn)
+    _migration().upgrade(conn)
+
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(crl_metadata)')}
+    assert columns == {'id', 'crl_number'}
+    assert conn.execute('SELECT crl_number FROM crl_metadata').fetchall() == [(1,)]
+
+
+def test_migration_087_without_crl_metadata():
+    conn = sqlite3.connect(':memory:')
+    _migration().upgrade(conn)
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'crl_metadata' not in tables
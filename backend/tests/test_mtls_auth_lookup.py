@@ -0,0 +1,119 @@
+"""mTLS login lookups: canonical keys and the verified-certificate cache."""
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from models import SystemConfig, User, db
+from models.auth_certificate import AuthCertificate
+from services.mtls_auth_service import MTLSAuthService
+
+
+def _client_cert(serial):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'mtls-lookup')])
+    now = datetime.now(timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(serial)
+        .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+
+@pytest.fixture
+def enrolled(app):
+    """A user with one PEM-backed enrolment (all-digit hex serial, stored as
+    decimal) and one legacy enrolment holding only a decimal serial."""
+    cert = _client_cert(0x123456)
+    der = cert.public_bytes(serialization.Encoding.DER)
+    with app.app_context():
+        user = User(username='mtls-lookup', email='mtls-lookup@example.test', role='viewer')
+        user.set_password('Str0ng-Passw0rd!')
+        db.session.add(user)
+        db.session.flush()
+        pem_row = AuthCertificate(
+            user_id=user.id, cert_serial=str(0x123456), cert_subject='CN=mtls-lookup',
+            cert_pem=cert.public_bytes(serialization.Encoding.PEM), enabled=True)
+        legacy_row = AuthCertificate(
+            user_id=user.id, cert_serial='255', cert_subject='CN=legacy', enabled=True)
+        db.session.add_all([pem_row, legacy_row])
+        db.session.commit()
+        yield {'user_id': user.id, 'pem_id': pem_row.id, 'legacy_id': legacy_row.id,
+               'fingerprint': hashlib.sha256(der).hexdigest().upper()}
+
+        AuthCertificate.query.filter_by(user_id=user.id).delete()
+        db.session.delete(db.session.get(User, user.id))
+        db.session.commit()
+
+
+def test_lookup_keys_are_derived_from_the_certificate(app, enrolled):
+    with app.app_context():
+        pem_row = db.session.get(AuthCertificate, enrolled['pem_id'])
+        legacy_row = db.session.get(AuthCertificate, enrolled['legacy_id'])
+
+        assert pem_row.serial_hex == '123456'
+        assert pem_row.fingerprint_hex == enrolled['fingerprint'].lower()
+        assert (legacy_row.serial_hex, legacy_row.fingerprint_hex) == ('ff', None)
+
+
+@pytest.mark.parametrize('cert_info, expected', [
+    ({'serial': '123456'}, 'pem_id'),
+    ({'serial': 'FF'}, 'legacy_id'),
+    ({'serial': '255'}, 'legacy_id'),
+])
+def test_presented_serial_spellings_resolve(app, enrolled, cert_info, expected):
+    with app.app_context():
+        user, auth_cert, error = MTLSAuthService.authenticate_certificate(cert_info)
+
+        assert error == ''
+        assert auth_cert.id == enrolled[expected]
+        assert user.id == enrolled['user_id']
+
+
+def test_fingerprint_resolves_unknown_serial(app, enrolled):
+    with app.app_context():
+        fingerprint = ':'.join(enrolled['fingerprint'][i:i + 2] for i in range(0, 64, 2))
+        _, auth_cert, _ = MTLSAuthService.authenticate_certificate(
+            {'serial': 'DEADBEEF', 'fingerprint': fingerprint})
+
+        assert auth_cert.id == enrolled['pem_id']
+        assert auth_cert.last_used_at is not None
+
+
+def test_cached_certificate_is_rejected_once_disabled(app, enrolled):
+    with app.app_context():
+        cert_info = {'serial': '123456'}
+        assert MTLSAuthService.authenticate_certificate(cert_info)[0] is not None
+
+        db.session.get(AuthCertificate, enrolled['pem_id']).enabled = False
+        db.session.commit()
+
+        assert MTLSAuthService.authenticate_certificate(cert_info) == (
+            None, None, 'Certificate is disabled')
+
+
+def test_enabled_flag_follows_setting_writes(app):
+    with app.app_context():
+        row = SystemConfig.query.filter_by(key='mtls_enabled').first()
+        original = row.value if row else None
+        if row is None:
+            row = SystemConfig(key='mtls_enabled')
+            db.session.add(row)
+        try:
+            row.value = 'false'
+            db.session.commit()
+            assert MTLSAuthService.is_mtls_enabled() is False
+
+            row.value = 'true'
+            db.session.commit()
+            assert MTLSAuthService.is_mtls_enabled() is True
+        finally:
+            row.value = original
+            db.session.commit()
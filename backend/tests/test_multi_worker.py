@@ -0,0 +1,198 @@
+"""Multi-worker support: scheduler leader lease and the cache event relay."""
+import json
+
+import pytest
+
+from services import scheduler_lease
+from services.events import relay
+from services.events.bus import EventBus
+from services.scheduler_service import SchedulerService
+
+
+class _FakeRedis:
+    """Runs the lease scripts' logic in Python; the lease key never expires."""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+        self.down = False
+        self.holds = 0
+
+    def register_script(self, script):
+        def call(keys, args):
+            if self.down:
+                raise ConnectionError('redis down')
+            key, token = keys[0], args[0]
+            owner = self.data.get(key)
+            if script == scheduler_lease._HOLD_SCRIPT:
+                self.holds += 1
+                if owner in (None, token):
+                    self.data[key] = token
+                    return 1
+                return 0
+            if owner == token:
+                del self.data[key]
+                return 1
+            return 0
+        return call
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class _FakeLease(scheduler_lease.LeaderLease):
+    name = 'fake'
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.released = False
+
+    def hold(self):
+        return self.answers.pop(0) if self.answers else False
+
+    def release(self):
+        self.released = True
+
+
+class TestRedisLease:
+    def test_one_holder_until_released(self):
+        shared = _FakeRedis()
+        first, second = scheduler_lease.RedisLease(shared), scheduler_lease.RedisLease(shared)
+
+        assert first.hold() is True
+        assert second.hold() is False
+        assert first.hold() is True  # renewal
+
+        first.release()
+        assert second.hold() is True
+        assert first.hold() is False
+
+    def test_expired_lease_is_taken_over(self):
+        shared = _FakeRedis()
+        first, second = scheduler_lease.RedisLease(shared), scheduler_lease.RedisLease(shared)
+        first.hold()
+        shared.data.clear()  # the leader died and its key expired
+
+        assert second.hold() is True
+        assert first.hold() is False
+
+    def test_keeps_leading_through_an_outage_only_within_the_ttl(self, monkeypatch):
+        shared = _FakeRedis()
+        leader = scheduler_lease.RedisLease(shared, ttl=60)
+        follower = scheduler_lease.RedisLease(shared, ttl=60)
+        leader.hold()
+        shared.down = True
+
+        assert leader.hold() is True
+        assert follower.hold() is False
+        now = scheduler_lease.time.monotonic()
+        monkeypatch.setattr(scheduler_lease.time, 'monotonic', lambda: now + 61)
+        assert leader.hold() is False
+
+    def test_renews_from_a_heartbeat_while_a_task_runs(self):
+        shared = _FakeRedis()
+        leader = scheduler_lease.RedisLease(shared, ttl=0.03)
+        leader.hold()
+        with leader.renewing():
+            deadline = scheduler_lease.time.monotonic() + 5
+            while shared.holds < 3 and scheduler_lease.time.monotonic() < deadline:
+                scheduler_lease.time.sleep(0.01)
+        assert shared.holds >= 3
+        holds = shared.holds
+        scheduler_lease.time.sleep(0.05)
+        assert shared.holds == holds  # the heartbeat stopped with the block
+
+
+class TestBuildLease:
+    def test_no_election_on_sqlite_without_redis(self, app, monkeypatch):
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        for backend in ('auto', 'redis', 'postgres', 'none', 'bogus'):
+            assert scheduler_lease.build_lease(app, backend) is None, backend
+
+
+class TestSchedulerLeadership:
+    @pytest.fixture
+    def sched(self):
+        sched = SchedulerService(wake_interval=60)
+        self.runs = []
+        for name in ('a', 'b', 'c'):
+            sched.register_task(name, lambda name=name: self.runs.append(name), interval=60)
+            sched.tasks[name].last_run = sched.tasks[name]._created_at.replace(year=2000)
+        return sched
+
+    def test_runs_everything_without_a_lease(self, sched):
+        assert sched._is_leader() is True
+        sched._run_due_tasks()
+        assert self.runs == ['a', 'b', 'c']
+
+    def test_follower_runs_nothing(self, sched):
+        sched._lease = _FakeLease([False])
+        if sched._is_leader():
+            sched._run_due_tasks()
+        assert self.runs == []
+
+    def test_stops_when_leadership_is_lost_mid_batch(self, sched):
+        sched._lease = _FakeLease([True, False])
+        if sched._is_leader():
+            sched._run_due_tasks()
+        assert self.runs == ['a']
+        assert sched._leader is False
+
+    def test_stop_releases_the_lease(self, sched):
+        sched._lease = lease = _FakeLease([])
+        sched._running = True
+        assert sched.stop() is True
+        assert lease.released is True
+
+
+class TestEventRelay:
+    @pytest.fixture
+    def bus(self, monkeypatch):
+        bus = EventBus()
+        monkeypatch.setattr(relay, 'event_bus', bus)
+        return bus
+
+    def test_only_events_with_remote_handlers_are_relayed(self, bus):
+        relayed, seen = [], []
+        bus.subscribe('ca.updated', lambda *event: seen.append(('cache', event[0])), remote=True)
+        bus.subscribe('ca.updated', lambda *event: seen.append(('webhook', event[0])))
+        bus.subscribe('certificate.issued', lambda *event: seen.append(('webhook', event[0])))
+        bus.set_relay(lambda event_type, payload, ca_refid: relayed.append(event_type))
+
+        bus.emit('ca.updated', {'ca': {'id': 1}})
+        bus.emit('certificate.issued', {'id': 2})
+
+        assert relayed == ['ca.updated']
+        assert seen == [('cache', 'ca.updated'), ('webhook', 'ca.updated'),
+                        ('webhook', 'certificate.issued')]
+
+    def test_replayed_events_reach_remote_handlers_only(self, bus):
+        relayed, seen = [], []
+        bus.subscribe('ca.deleted', lambda *event: seen.append(('cache', event[1])), remote=True)
+        bus.subscribe('ca.deleted', lambda *event: seen.append(('webhook', event[1])))
+        bus.set_relay(lambda *event: relayed.append(event))
+
+        message = json.dumps({'origin': 'other', 'type': 'ca.deleted',
+                              'payload': {'ca': {'id': 3}}, 'ca_refid': 'r'})
+        relay._dispatch(message, origin='me')
+        relay._dispatch(message.replace('"other"', '"me"'), origin='me')
+        relay._dispatch('not json', origin='me')
+
+        assert seen == [('cache', {'ca': {'id': 3}})]
+        assert relayed == []  # never sent back out
+
+    def test_publish_tags_the_origin(self, monkeypatch):
+        shared = _FakeRedis()
+        monkeypatch.setattr(relay, '_client', shared)
+        relay.publish('user.changed', {'user_id': 7})
+
+        channel, message = shared.published[0]
+        event = json.loads(message)
+        assert channel == relay.CHANNEL
+        assert event['origin'] == relay._process_origin()
+        assert (event['type'], event['payload']) == ('user.changed', {'user_id': 7})
+
+    def test_start_is_a_no_op_without_redis(self, monkeypatch):
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        assert relay.start() is False
+        assert relay._client is None
@@ -0,0 +1,167 @@
+"""Tests for the OCSP response pre-signing engine."""
+import base64
+import threading
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509 import ocsp
+
+from api.ocsp_routes import OCSP_REQUEST_TYPE
+from models import db, CA, Certificate, OCSPResponse, SystemConfig
+from services.cert_service import CertificateService
+from services import ocsp_presign
+from services.ocsp_presign import presign_ca, run_ocsp_presign
+from services.ocsp_service import OCSPService
+
+
+def _set_config(key, value):
+    row = SystemConfig.query.filter_by(key=key).first()
+    if not row:
+        row = SystemConfig(key=key)
+        db.session.add(row)
+    row.value = value
+    db.session.commit()
+
+
+@pytest.fixture
+def presign_on(app):
+    with app.app_context():
+        _set_config('ocsp_presign_enabled', 'true')
+    yield
+    with app.app_context():
+        SystemConfig.query.filter(SystemConfig.key.in_((
+            'ocsp_presign_enabled', 'ocsp_presign_refresh_fraction',
+        ))).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _ocsp_ca(create_ca, cn):
+    ca = db.session.get(CA, create_ca(cn=cn)['id'])
+    ca.ocsp_enabled = True
+    db.session.commit()
+    return ca
+
+
+def _serial(cert_dict):
+    cert = db.session.get(Certificate, cert_dict['id'])
+    return x509.load_pem_x509_certificate(base64.b64decode(cert.crt)).serial_number
+
+
+def _entries(ca_id, serial):
+    return {
+        row.cert_serial: row for row in OCSPResponse.query.filter(
+            OCSPResponse.ca_id == ca_id,
+            OCSPResponse.cert_serial.startswith(f'{format(serial, "x")}:'),
+        )
+    }
+
+
+class TestPresign:
+    def test_disabled_by_default(self, app, create_ca, create_cert):
+        with app.app_context():
+            ca = _ocsp_ca(create_ca, 'Presign Disabled CA')
+            cert = create_cert(cn='presign-off.example.com', ca_id=ca.id)
+
+            run_ocsp_presign()
+
+            assert _entries(ca.id, _serial(cert)) == {}
+
+    def test_presigns_sha1_and_sha256_for_issued_certs(
+        self, app, create_ca, create_cert, presign_on
+    ):
+        with app.app_context():
+            ca = _ocsp_ca(create_ca, 'Presign CA')
+            cert = create_cert(cn='presign.example.com', ca_id=ca.id)
+            serial = _serial(cert)
+
+            totals = run_ocsp_presign()
+
+            entries = _entries(ca.id, serial)
+            assert set(entries) == {
+                f'{format(serial, "x")}:sha1', f'{format(serial, "x")}:sha256',
+            }
+            assert totals['good'] >= 1
+            parsed = ocsp.load_der_ocsp_response(
+                entries[f'{format(serial, "x")}:sha1'].response_der)
+            assert parsed.certificate_status == ocsp.OCSPCertStatus.GOOD
+            assert parsed.serial_number == serial
+
+    def test_fresh_responses_are_not_resigned(
+        self, app, create_ca, create_cert, presign_on
+    ):
+        with app.app_context():
+            ca = _ocsp_ca(create_ca, 'Presign Fresh CA')
+            create_cert(cn='presign-fresh.example.com', ca_id=ca.id)
+            first = presign_ca(ca)
+
+            second = presign_ca(ca)
+
+            assert first['good'] == 1
+            assert second['good'] == 0
+
+    def test_revocation_resigns_immediately(
+        self, app, create_ca, create_cert, presign_on
+    ):
+        with app.app_context():
+            ca = _ocsp_ca(create_ca, 'Presign Revoke CA')
+            cert = create_cert(cn='presign-revoke.example.com', ca_id=ca.id)
+            serial = _serial(cert)
+            presign_ca(ca)
+
+            CertificateService.revoke_certificate(cert['id'], username='test')
+
+            entries = _entries(ca.id, serial)
+            assert len(entries) == 2
+            assert {row.status for row in entries.values()} == {'revoked'}
+
+    def test_revocation_resigns_off_the_dispatching_thread(self, app, presign_on, monkeypatch):
+        done = threading.Event()
+        resigned = []
+
+        def _record(cert_id):
+            resigned.append((cert_id, threading.current_thread().name))
+            done.set()
+        monkeypatch.setattr(ocsp_presign, '_inline', lambda: False)
+        monkeypatch.setattr(ocsp_presign, '_resign_revoked', _record)
+
+        with app.app_context():
+            ocsp_presign.on_certificate_revoked(
+                'certificate.revoked', {'certificate': {'id': 42}}, None, None)
+
+        assert done.wait(5)
+        assert resigned == [(42, 'OCSPRevokedPresign')]
+
+    def test_responder_serves_presigned_bytes(
+        self, app, client, create_ca, create_cert, presign_on
+    ):
+        with app.app_context():
+            ca = _ocsp_ca(create_ca, 'Presign Serve CA')
+            cert = create_cert(cn='presign-serve.example.com', ca_id=ca.id)
+            presign_ca(ca)
+            leaf = db.session.get(Certificate, cert['id'])
+            issuer = x509.load_pem_x509_certificate(base64.b64decode(ca.crt))
+            request = ocsp.OCSPRequestBuilder().add_certificate(
+                x509.load_pem_x509_certificate(base64.b64decode(leaf.crt)),
+                issuer, hashes.SHA1(),
+            ).build()
+            cached = _entries(ca.id, _serial(cert))[
+                f'{format(_serial(cert), "x")}:sha1'].response_der
+
+            response = client.post(
+                '/ocsp',
+                data=request.public_bytes(serialization.Encoding.DER),
+                content_type=OCSP_REQUEST_TYPE,
+            )
+
+            assert response.data == cached
+
+    def test_invalid_refresh_fraction_falls_back_to_default(
+        self, app, create_ca, create_cert, presign_on
+    ):
+        with app.app_context():
+            _set_config('ocsp_presign_refresh_fraction', '7')
+            ca = _ocsp_ca(create_ca, 'Presign Fraction CA')
+            create_cert(cn='presign-fraction.example.com', ca_id=ca.id)
+
+            assert presign_ca(ca, OCSPService())['good'] == 1
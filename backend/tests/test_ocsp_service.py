@@ -13,6 +13,8 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from api.ocsp_routes import OCSP_REQUEST_TYPE, _find_ca_by_issuer_hash
 from models import db, CA, Certificate, OCSPResponse, SystemConfig
 from services.cert_service import CertificateService
+from services.events import event_bus
+from services.ocsp_issuer_index import issuer_hashes, issuer_index
 from services.ocsp_service import OCSPService
 
 
@@ -264,6 +266,24 @@ class TestGenerateResponse:
             assert response.response_status == ocsp.OCSPResponseStatus.SUCCESSFUL
             assert response.certificate_status == ocsp.OCSPCertStatus.UNKNOWN
 
+    def test_serial_hex_is_canonical_for_any_stored_spelling(
+        self, app, create_ca, create_cert
+    ):
+        with app.app_context():
+            ca = create_ca(cn='OCSP Serial Spelling CA')
+            cert = create_cert(cn='spelling.example.com', ca_id=ca['id'])
+            cert_obj = _cert_model(cert)
+            serial = _load_x509(cert_obj).serial_number
+            assert cert_obj.serial_hex == format(serial, 'x')
+
+            cert_obj.serial_number = format(serial, 'X')
+            db.session.commit()
+
+            assert cert_obj.serial_hex == format(serial, 'x')
+            assert Certificate.find_by_serial(serial, caref=cert_obj.caref) == cert_obj
+            _, status = OCSPService().generate_response(_ca_model(ca), serial)
+            assert status == 'good'
+
     def test_configurable_response_validity(self, app, create_ca, create_cert):
         with app.app_context():
             ca = create_ca(cn='OCSP Validity CA')
@@ -455,6 +475,100 @@ class TestDelegatedResponderValidation:
             )
 
 
+class TestSigningMaterialCache:
+    def test_material_is_reused_across_responses(
+        self, app, create_ca, create_cert, monkeypatch
+    ):
+        with app.app_context():
+            ca = create_ca(cn='OCSP Signing Cache CA')
+            cert = create_cert(cn='signing-cache.example.com', ca_id=ca['id'])
+            ca_obj = _ca_model(ca)
+            serial = _load_x509(_cert_model(cert)).serial_number
+            service = OCSPService()
+            service.generate_response(ca_obj, serial, request_nonce=b'first')
+
+            def _fail(_ca):
+                raise AssertionError('CA key reloaded despite cached material')
+
+            monkeypatch.setattr(service, '_load_ca_key', _fail)
+            _, status = service.generate_response(
+                ca_obj, serial, request_nonce=b'second')
+
+            assert status == 'good'
+
+    def test_responder_assignment_refreshes_material(
+        self, app, create_ca, create_cert, monkeypatch
+    ):
+        with app.app_context():
+            ca = create_ca(cn='OCSP Signing Cache Responder CA')
+            record = create_cert(
+                cn='signing-cache-responder.example.com', ca_id=ca['id'])
+            ca_obj = _ca_model(ca)
+            service = OCSPService()
+            assert service._signing_material(ca_obj).use_delegated is False
+
+            ca_cert = _load_x509(ca_obj)
+            responder_key = rsa.generate_private_key(
+                public_exponent=65537, key_size=2048
+            )
+            responder_cert = _delegated_certificate(
+                ca_cert, service._load_ca_key(ca_obj), responder_key
+            )
+            _configure_delegated_responder(
+                ca_obj, _cert_model(record), responder_cert, responder_key
+            )
+            monkeypatch.setattr(
+                'security.encryption.decrypt_private_key', lambda value: value
+            )
+
+            material = service._signing_material(ca_obj)
+
+            assert material.use_delegated is True
+            assert material.signing_cert.fingerprint(hashes.SHA256()) == (
+                responder_cert.fingerprint(hashes.SHA256())
+            )
+
+    def test_responder_rekey_refreshes_material(
+        self, app, create_ca, create_cert, monkeypatch
+    ):
+        with app.app_context():
+            ca = create_ca(cn='OCSP Signing Cache Rekey CA')
+            record = create_cert(
+                cn='signing-cache-rekey.example.com', ca_id=ca['id'])
+            ca_obj = _ca_model(ca)
+            service = OCSPService()
+            ca_cert = _load_x509(ca_obj)
+            monkeypatch.setattr(
+                'security.encryption.decrypt_private_key', lambda value: value
+            )
+            first_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            _configure_delegated_responder(
+                ca_obj, _cert_model(record),
+                _delegated_certificate(ca_cert, service._load_ca_key(ca_obj), first_key),
+                first_key,
+            )
+            assert service._signing_material(ca_obj).use_delegated is True
+
+            # Same record id, new certificate and key
+            second_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            second_cert = _delegated_certificate(
+                ca_cert, service._load_ca_key(ca_obj), second_key)
+            cert_obj = _cert_model(record)
+            cert_obj.crt = base64.b64encode(
+                second_cert.public_bytes(serialization.Encoding.PEM)).decode()
+            cert_obj.prv = base64.b64encode(second_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )).decode()
+            db.session.commit()
+
+            material = service._signing_material(ca_obj)
+
+            assert material.signing_cert.fingerprint(hashes.SHA256()) == (
+                second_cert.fingerprint(hashes.SHA256())
+            )
+
+
 class TestCacheInvalidation:
     def test_revoke_invalidates_every_cached_algorithm(
         self, app, create_ca, create_cert
@@ -529,6 +643,73 @@ class TestIssuerHashLookup:
             assert parsed.response_status == ocsp.OCSPResponseStatus.SUCCESSFUL
             assert isinstance(parsed.hash_algorithm, hashes.SHA224)
 
+    @pytest.mark.parametrize('algorithm', [
+        hashes.SHA1(), hashes.SHA256(), hashes.SHA384(), hashes.SHA512(),
+    ])
+    def test_index_resolves_every_supported_algorithm(
+        self, app, create_ca, algorithm
+    ):
+        with app.app_context():
+            ca = create_ca(cn=f'OCSP Index {algorithm.name} CA')
+            ca_obj = _ca_model(ca)
+            name_hash, key_hash = issuer_hashes(_load_x509(ca_obj), algorithm)
+
+            found = _find_ca_by_issuer_hash(name_hash, key_hash, algorithm)
+
+            assert found is not None
+            assert found.id == ca_obj.id
+
+    def test_index_follows_replaced_ca_certificate(self, app, create_ca):
+        with app.app_context():
+            ca = create_ca(cn='OCSP Index Replaced CA')
+            other = create_ca(cn='OCSP Index Donor CA')
+            ca_obj = _ca_model(ca)
+            old_hashes = issuer_hashes(_load_x509(ca_obj), hashes.SHA256())
+            assert _find_ca_by_issuer_hash(
+                *old_hashes, hashes.SHA256()).id == ca_obj.id
+
+            # Swap the stored certificate without an event, as a restore or
+            # another worker process would.
+            ca_obj.crt = _ca_model(other).crt
+            db.session.commit()
+
+            assert _find_ca_by_issuer_hash(*old_hashes, hashes.SHA256()) is None
+            new_hashes = issuer_hashes(_load_x509(ca_obj), hashes.SHA256())
+            assert _find_ca_by_issuer_hash(
+                *new_hashes, hashes.SHA256()) is not None
+
+    def test_ca_event_marks_index_dirty(self, app, create_ca):
+        with app.app_context():
+            create_ca(cn='OCSP Index Event CA')
+            issuer_index.refresh()
+            assert issuer_index._dirty is False
+
+            event_bus.emit('ca.updated', {'ca': {}})
+
+            assert issuer_index._dirty is True
+
+    def test_unknown_issuers_refresh_once_per_interval(self, app, create_ca, monkeypatch):
+        import services.ocsp_issuer_index as index_module
+
+        with app.app_context():
+            create_ca(cn='OCSP Index Miss CA')
+            issuer_index.clear()
+            issuer_index.refresh()
+            refreshes = []
+            original = issuer_index.refresh
+            monkeypatch.setattr(issuer_index, 'refresh', lambda: refreshes.append(1) or original())
+            clock = [1000.0]
+            monkeypatch.setattr(index_module.time, 'monotonic', lambda: clock[0])
+
+            for i in range(5):
+                unknown = bytes([i]) * 32
+                assert issuer_index.lookup(unknown, unknown, hashes.SHA256()) is None
+            assert len(refreshes) == 1
+
+            clock[0] += index_module.MISS_REFRESH_INTERVAL_SEC
+            assert issuer_index.lookup(b'\x09' * 32, b'\x09' * 32, hashes.SHA256()) is None
+            assert len(refreshes) == 2
+
 
 class TestCleanup:
     def test_cleanup_runs(self, app):
@@ -0,0 +1,109 @@
+"""Keyset pagination (utils.pagination): index-friendly ranges and count estimates."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import case, event
+from sqlalchemy.dialects import postgresql
+
+from models import AuditLog, Certificate, db
+from utils.pagination import _nullable, estimate_count, keyset_paginate
+
+ACTION = 'keyset_test'
+
+
+@pytest.fixture
+def logs(app):
+    """Five logs with timestamps (two tied) and two without, removed afterwards."""
+    base = datetime(2030, 1, 1)
+    with app.app_context():
+        rows = [AuditLog(action=ACTION, timestamp=base + timedelta(minutes=m))
+                for m in (3, 1, 1, 4, 2)]
+        rows += [AuditLog(action=ACTION) for _ in range(2)]
+        db.session.add_all(rows)
+        db.session.flush()
+        # The column default fills in a None timestamp on insert
+        for row in rows[5:]:
+            row.timestamp = None
+        db.session.commit()
+        yield [row.id for row in rows]
+        AuditLog.query.filter_by(action=ACTION).delete()
+        db.session.commit()
+
+
+def _walk(per_page, **kwargs):
+    query = AuditLog.query.filter_by(action=ACTION)
+    seen, cursor = [], None
+    while True:
+        page = keyset_paginate(query, AuditLog.timestamp, AuditLog.id, sort_key='timestamp',
+                               cursor=cursor, per_page=per_page, **kwargs)
+        seen.extend(log.id for log in page['items'])
+        if not page['meta']['has_next']:
+            return seen
+        cursor = page['meta']['next_cursor']
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_walk_orders_by_sort_then_id_with_nulls_last(app, logs, descending):
+    with app.app_context():
+        stamped = [(db.session.get(AuditLog, i).timestamp, i) for i in logs[:5]]
+        expected = [i for _, i in sorted(stamped, reverse=descending)]
+        expected += sorted(logs[5:], reverse=descending)
+        for per_page in (1, 2, 3, 10):
+            assert _walk(per_page, descending=descending) == expected, per_page
+
+
+def test_nullability_comes_from_the_column():
+    assert _nullable(AuditLog.timestamp) is True
+    assert _nullable(AuditLog.action) is False
+    assert _nullable(case((AuditLog.success.is_(True), 1), else_=0)) is True
+
+
+def test_pages_are_index_range_scans(app, logs):
+    """Both the first page and a cursor page use the timestamp index, no sort."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'audit_logs' in statement and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            _walk(2, descending=True)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        ranged = [s for s in statements if 'IS NOT NULL' in s[0]]
+        assert len(ranged) >= 2
+        for statement, parameters in ranged:
+            plan = ' '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters).all())
+            assert 'ix_audit_logs_timestamp' in plan, plan
+            assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_estimate_expands_in_lists(app):
+    """IN filters reach the driver as plain placeholders, one per value."""
+    executed = []
+
+    class _Connection:
+        def exec_driver_sql(self, sql, params):
+            executed.append((sql, params))
+            return type('R', (), {'scalar': lambda self: [{'Plan': {'Plan Rows': 42}}]})()
+
+    class _Session:
+        def get_bind(self):
+            return type('B', (), {'dialect': postgresql.dialect()})()
+
+        def connection(self):
+            return _Connection()
+
+    with app.app_context():
+        query = Certificate.query.filter(Certificate.caref.in_(['a', 'b', 'c']))
+        query.session = _Session()
+        assert estimate_count(query) == (42, True)
+
+    sql, params = executed[0]
+    assert 'POSTCOMPILE' not in sql
+    assert sorted(v for v in params.values() if v in ('a', 'b', 'c')) == ['a', 'b', 'c']
@@ -0,0 +1,178 @@
+"""Rate limiter buckets (security.rate_limit_store) and compiled rule matching."""
+import pytest
+
+from security import rate_limit_store, rate_limiter
+
+PUBLIC_IP = '8.8.8.8'
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(rate_limit_store.time, 'monotonic', fake)
+    return fake
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """A limiter on its own memory store, with limiting switched on."""
+    monkeypatch.setattr(rate_limiter.RateLimitConfig, '_enabled', True)
+    monkeypatch.setattr(rate_limiter.RateLimitConfig, '_custom_limits', {})
+    return rate_limiter.RateLimiter(rate_limit_store.MemoryBucketStore())
+
+
+class TestMemoryStore:
+    def test_burst_then_refill(self, clock):
+        store = rate_limit_store.MemoryBucketStore()
+        assert [store.take('k', 60, 2)[0] for _ in range(3)] == [True, True, False]
+
+        clock.now += 1  # 60 rpm: one token per second
+        assert store.take('k', 60, 2) == (True, 0.0)
+        assert store.take('k', 60, 2)[0] is False
+
+    def test_least_recently_used_bucket_is_evicted(self, clock):
+        store = rate_limit_store.MemoryBucketStore(capacity=2)
+        store.take('a', 60, 1)
+        store.take('b', 60, 1)
+        store.take('a', 60, 1)  # a is now the most recently used
+        store.take('c', 60, 1)
+
+        assert len(store) == 2
+        # a is still drained, b starts over with a full bucket
+        assert store.take('a', 60, 1)[0] is False
+        assert store.take('b', 60, 1)[0] is True
+
+    def test_clear_by_prefix(self):
+        store = rate_limit_store.MemoryBucketStore()
+        for key in ('10.0.0.1:/acme/', '10.0.0.1:_default', '10.0.0.2:_default'):
+            store.take(key, 60, 5)
+
+        assert store.clear('10.0.0.1:') == 2
+        assert store.clear() == 1
+
+
+class TestRedisStore:
+    class _DownRedis:
+        def register_script(self, script):
+            def call(keys, args):
+                raise ConnectionError('redis down')
+            return call
+
+        def scan_iter(self, match, count):
+            raise ConnectionError('redis down')
+
+    def test_falls_back_to_process_buckets(self):
+        store = rate_limit_store.RedisBucketStore(self._DownRedis())
+
+        assert [store.take('k', 60, 2)[0] for _ in range(3)] == [True, True, False]
+        assert store.clear() == 1
+
+    def test_retries_redis_only_after_the_cooldown(self, clock):
+        calls = []
+
+        class _FlakyRedis:
+            down = True
+
+            def register_script(self, script):
+                def call(keys, args):
+                    calls.append(keys[0])
+                    if self.down:
+                        raise ConnectionError('redis down')
+                    return 1, '5'
+                return call
+
+        redis = _FlakyRedis()
+        store = rate_limit_store.RedisBucketStore(redis, retry_after=10)
+        store.take('k', 60, 2)
+        store.take('k', 60, 2)
+        assert len(calls) == 1
+
+        redis.down = False
+        clock.now += 10
+        assert store.take('k', 60, 2) == (True, 5.0)
+        assert len(calls) == 2
+
+    def test_auto_without_redis_uses_memory(self, monkeypatch):
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        assert rate_limit_store._build('auto').name == 'memory'
+        assert rate_limit_store._build('redis').name == 'memory'
+
+
+class TestRuleMatching:
+    def test_matches_first_rule_in_declaration_order(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter.RateLimitConfig, '_custom_limits',
+                            {'/api/v2/certificates/export': {'rpm': 5, 'burst': 1}})
+        config = rate_limiter.RateLimitConfig
+
+        assert config.get_rule('/api/v2/certificates/export/pem')[0] == '/api/v2/certificates/export'
+        assert config.get_rule('/api/v2/certificates/issue')[0] == '/api/v2/certificates/issue'
+        assert config.get_rule('/api/v2/certificates/42')[0] == '/api/v2/certificates'
+        assert config.get_rule('/ocsp/abc')[0] == '/ocsp'
+        assert config.get_rule('/api/v2/dashboard') == ('_default', config.get_default_limits()['_default'])
+
+    def test_agrees_with_a_linear_scan(self):
+        config = rate_limiter.RateLimitConfig
+        rules = [(p, limit) for p, limit in config.get_default_limits().items() if p != '_default']
+        paths = ['/', '/acme', '/acme/new-order', '/api/v2/cas/1', '/api/v2/casx',
+                 '/api/v2/auth/login/totp', '/cdp/ca.crl', '/scep/pkiclient.exe',
+                 '/api/v2/ssh/cas/import', '/api/v2/ssh/cas', '/.well-known/est/simpleenroll']
+        for path in paths:
+            expected = next((p for p, _ in rules if path.startswith(p)), '_default')
+            assert config.get_rule(path)[0] == expected, path
+
+    def test_custom_limit_changes_recompile(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter.RateLimitConfig, '_custom_limits', {})
+        config = rate_limiter.RateLimitConfig
+        config.set_custom_limit('/api/v2/reports', 10, 2)
+        matcher = config._get_matcher()
+        config.set_custom_limit('/api/v2/reports', 10, 2)
+
+        assert config._get_matcher() is matcher
+        assert config.get_limit('/api/v2/reports/run') == {'rpm': 10, 'burst': 2}
+        config.remove_custom_limit('/api/v2/reports')
+        assert config.get_rule('/api/v2/reports/run')[0] == '_default'
+
+
+class TestLimiter:
+    def test_blocks_after_burst_and_counts_decisions(self, limiter):
+        limit = rate_limiter.RateLimitConfig.get_limit('/api/v2/import')
+        results = [limiter.check_rate_limit(PUBLIC_IP, '/api/v2/import/pem')
+                   for _ in range(limit['burst'] + 1)]
+
+        assert all(allowed for allowed, _ in results[:-1])
+        allowed, info = results[-1]
+        assert allowed is False
+        assert info['retry_after'] >= 1
+        stats = limiter.get_stats()
+        assert stats['by_endpoint'] == {
+            '/api/v2/import': {'allowed': limit['burst'], 'blocked': 1}}
+        assert stats['rate_limited'] == 1
+
+    def test_buckets_are_per_client(self, limiter):
+        for _ in range(3):
+            limiter.check_rate_limit(PUBLIC_IP, '/api/v2/import')
+        assert limiter.check_rate_limit(PUBLIC_IP, '/api/v2/import')[0] is False
+        assert limiter.check_rate_limit('1.1.1.1', '/api/v2/import')[0] is True
+
+        limiter.clear_bucket(PUBLIC_IP)
+        assert limiter.check_rate_limit(PUBLIC_IP, '/api/v2/import')[0] is True
+
+    def test_decisions_are_exported(self, app, limiter, monkeypatch):
+        monkeypatch.setattr(rate_limiter, '_rate_limiter', limiter)
+        limiter.check_rate_limit(PUBLIC_IP, '/acme/new-nonce')
+        limiter.check_rate_limit('192.168.1.5', '/acme/new-nonce')
+        with app.app_context():
+            from services.metrics_service import render_metrics
+            out = render_metrics()
+
+        assert '# TYPE ucm_rate_limit_decisions_total counter' in out
+        assert 'ucm_rate_limit_decisions_total{rule="/acme/",decision="allowed"} 1' in out
+        assert 'ucm_rate_limit_bypassed_total 1' in out
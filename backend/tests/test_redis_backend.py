@@ -0,0 +1,50 @@
+"""Shared Redis client and backend selection (utils.redis_backend)."""
+import sys
+
+from utils import redis_backend
+from utils.redis_backend import BackendSlot
+
+
+class _Backend:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_no_client_without_redis_url(monkeypatch):
+    monkeypatch.delenv('REDIS_URL', raising=False)
+    assert redis_backend.redis_client() is None
+    assert redis_backend.shared_redis() is None
+
+
+def test_no_client_without_redis_library(monkeypatch):
+    monkeypatch.setenv('REDIS_URL', 'redis://localhost:6379/0')
+    monkeypatch.setitem(sys.modules, 'redis', None)
+    assert redis_backend.redis_client() is None
+
+
+def test_shared_client_is_created_once_per_url(monkeypatch):
+    created = []
+    monkeypatch.setattr(redis_backend, '_shared', {})
+    monkeypatch.setattr(redis_backend, 'redis_client', lambda: created.append(1) or object())
+    monkeypatch.setenv('REDIS_URL', 'redis://a/0')
+    first = redis_backend.shared_redis()
+    assert redis_backend.shared_redis() is first
+    monkeypatch.setenv('REDIS_URL', 'redis://b/0')
+    assert redis_backend.shared_redis() is not first
+    assert len(created) == 2
+
+
+def test_slot_builds_lazily_from_the_configured_name():
+    configured = {'name': 'memory'}
+    slot = BackendSlot('Test', _Backend, lambda: configured['name'])
+    assert slot.get().name == 'memory'
+    configured['name'] = 'redis'
+    assert slot.get().name == 'memory'
+    slot.reset()
+    assert slot.get().name == 'redis'
+
+
+def test_slot_configure_replaces_the_backend():
+    slot = BackendSlot('Test', _Backend, lambda: 'memory')
+    assert slot.configure(' DB ').name == 'db'
+    assert slot.get().name == 'db'
@@ -0,0 +1,109 @@
+"""Search index: SAN matching, ranking and incremental maintenance."""
+import json
+
+from models import db, CertificateTemplate
+from services import search_index
+
+
+def _template(name, description=None):
+    return CertificateTemplate(name=name, description=description,
+                               template_type='custom', extensions_template='{}')
+
+
+def _ids(results):
+    return [obj.id for obj in results]
+
+
+class TestSearchIndex:
+    def test_sqlite_uses_fts5(self, app):
+        with app.app_context():
+            assert search_index.ensure_search_index() == 'fts5'
+
+    def test_san_values_are_searchable(self, app, create_cert):
+        with app.app_context():
+            cert_id = create_cert(
+                cn='san-index.example.com',
+                san_dns=['alt-frontdoor.example.net'],
+                san_ip=['10.91.82.73'],
+                san_email=['pki-owner@example.org'],
+            )['id']
+
+            for term in ('alt-frontdoor', '10.91.82.73', 'pki-owner@', 'FRONTDOOR'):
+                assert cert_id in _ids(search_index.search('certificate', term, 20)), term
+
+    def test_exact_match_ranks_first(self, app):
+        with app.app_context():
+            noisy = _template(
+                'rank-noise template',
+                'rank-target rank-target mentioned in passing by a long text '
+                + 'filler ' * 50,
+            )
+            exact = _template('rank-target')
+            db.session.add_all([noisy, exact])
+            db.session.commit()
+
+            results = search_index.search('template', 'rank-target', 5)
+
+            assert _ids(results)[0] == exact.id
+            assert noisy.id in _ids(results)
+
+    def test_updates_and_deletes_are_indexed(self, app):
+        with app.app_context():
+            template = _template('index-before-rename')
+            db.session.add(template)
+            db.session.commit()
+
+            template.name = 'index-after-rename'
+            db.session.commit()
+            assert search_index.search('template', 'index-before', 5) == []
+            assert _ids(search_index.search('template', 'index-after', 5)) == [template.id]
+
+            db.session.delete(template)
+            db.session.commit()
+            assert search_index.search('template', 'index-after', 5) == []
+
+    def test_rolled_back_rows_are_not_indexed(self, app):
+        with app.app_context():
+            db.session.add(_template('index-rolled-back'))
+            db.session.flush()
+            db.session.rollback()
+
+            assert search_index.search('template', 'index-rolled-back', 5) == []
+
+    def test_rebuild_matches_incremental_index(self, app, create_cert):
+        with app.app_context():
+            cert_id = create_cert(cn='rebuild-index.example.com')['id']
+
+            search_index.rebuild_search_index()
+
+            assert _ids(search_index.search('certificate', 'rebuild-index', 5)) == [cert_id]
+
+
+class TestSearchEndpoints:
+    def test_global_search_matches_san(self, auth_client, create_cert):
+        cert_id = create_cert(cn='global-san.example.com',
+                              san_dns=['only-in-san.example.net'])['id']
+
+        r = auth_client.get('/api/v2/search?q=only-in-san')
+        data = json.loads(r.data)['data']
+
+        assert [c['id'] for c in data['certificates']] == [cert_id]
+
+    def test_certificate_list_search_uses_index(self, auth_client, create_cert):
+        cert_id = create_cert(cn='list-search.example.com',
+                              san_dns=['list-only-san.example.net'])['id']
+
+        r = auth_client.get('/api/v2/certificates?search=list-only-san')
+        data = json.loads(r.data)['data']
+
+        assert [c['id'] for c in data] == [cert_id]
+
+    def test_two_character_search(self, app, auth_client):
+        with app.app_context():
+            db.session.add(_template('Qz short-term template'))
+            db.session.commit()
+
+        r = auth_client.get('/api/v2/search?q=qz')
+        names = [t['name'] for t in json.loads(r.data)['data']['templates']]
+
+        assert 'Qz short-term template' in names
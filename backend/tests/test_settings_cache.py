@@ -0,0 +1,117 @@
+"""SystemConfig read-through cache (services.settings_cache)."""
+import pytest
+from sqlalchemy import event
+
+from models import SystemConfig, db
+from services import settings_cache
+
+
+@pytest.fixture
+def settings(app):
+    """Three throwaway settings, removed again afterwards."""
+    with app.app_context():
+        db.session.add_all([
+            SystemConfig(key='cache_test_flag', value='true'),
+            SystemConfig(key='cache_test_days', value='12'),
+            SystemConfig(key='cache_test_text', value='hello'),
+        ])
+        db.session.commit()
+        yield
+        SystemConfig.query.filter(SystemConfig.key.like('cache_test_%')).delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def selects(app):
+    """Count SELECT statements issued while the test runs."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', count)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.version = 0
+
+    def get(self, key):
+        return str(self.version).encode()
+
+    def incr(self, key):
+        self.version += 1
+
+
+def test_one_query_serves_every_key(app, settings, selects):
+    with app.app_context():
+        assert settings_cache.get_bool('cache_test_flag') is True
+        assert settings_cache.get_int('cache_test_days') == 12
+        assert settings_cache.get('cache_test_text') == 'hello'
+        assert settings_cache.get('cache_test_missing', 'fallback') == 'fallback'
+        assert settings_cache.get_int('cache_test_text', 7) == 7
+        assert settings_cache.get_bool('cache_test_missing', True) is True
+
+    assert len(selects) == 1
+
+
+def test_orm_writes_invalidate(app, settings):
+    with app.app_context():
+        assert settings_cache.get('cache_test_text') == 'hello'
+
+        SystemConfig.query.filter_by(key='cache_test_text').first().value = 'changed'
+        db.session.commit()
+        assert settings_cache.get('cache_test_text') == 'changed'
+
+        SystemConfig.query.filter_by(key='cache_test_text').delete()
+        db.session.commit()
+        assert settings_cache.get('cache_test_text') is None
+
+
+def test_rolled_back_write_is_not_served(app, settings):
+    with app.app_context():
+        SystemConfig.query.filter_by(key='cache_test_text').first().value = 'pending'
+        db.session.flush()
+        assert settings_cache.get('cache_test_text') == 'pending'
+
+        db.session.rollback()
+        assert settings_cache.get('cache_test_text') == 'hello'
+
+
+def test_raw_sql_write_waits_for_invalidation(app, settings):
+    with app.app_context():
+        assert settings_cache.get('cache_test_text') == 'hello'
+        # Raw SQL fires no change event, so only the TTL would pick this up
+        table = SystemConfig.__table__
+        db.session.execute(table.update().where(
+            table.c.key == 'cache_test_text').values(value='raw'))
+        db.session.commit()
+        assert settings_cache.get('cache_test_text') == 'hello'
+
+        settings_cache.invalidate()
+        assert settings_cache.get('cache_test_text') == 'raw'
+
+
+def test_shared_version_bump_reloads(app, settings, monkeypatch):
+    shared = _FakeRedis()
+    monkeypatch.setattr(settings_cache, 'shared_redis', lambda: shared)
+    monkeypatch.setattr(settings_cache, '_VERSION_CHECK_SEC', 0)
+    with app.app_context():
+        assert settings_cache.get('cache_test_text') == 'hello'
+        table = SystemConfig.__table__
+        db.session.execute(table.update().where(
+            table.c.key == 'cache_test_text').values(value='other worker'))
+        db.session.commit()
+        assert settings_cache.get('cache_test_text') == 'hello'
+
+        # What another worker's invalidate() does
+        shared.incr(settings_cache._REDIS_VERSION_KEY)
+        assert settings_cache.get('cache_test_text') == 'other worker'
+
+        settings_cache.invalidate()
+        assert shared.version == 2
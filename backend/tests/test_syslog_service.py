@@ -4,6 +4,7 @@ Covers #135: HOSTNAME field populated from system_name (fallback machine
 hostname), plus RFC 5424 structured-data escaping and TCP framing safety.
 """
 import re
+import time
 import pytest
 from unittest.mock import Mock
 
@@ -161,3 +162,120 @@ class TestBuildMessage:
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+class _TcpSink:
+    """Local line-framed syslog receiver."""
+
+    def __init__(self, port=0):
+        import socket
+        import threading
+        self.lines = []
+        self.connections = 0
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(('127.0.0.1', port))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        import threading
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        buf = b''
+        with conn:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                buf += chunk
+                *complete, buf = buf.split(b'\n')
+                self.lines.extend(line.decode() for line in complete)
+
+    def close(self):
+        self._server.close()
+
+    def wait_for(self, count, timeout=5):
+        import time
+        deadline = time.monotonic() + timeout
+        while len(self.lines) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.lines
+
+
+@pytest.fixture
+def tcp_forwarder(forwarder):
+    yield forwarder
+    forwarder.configure(enabled=False)
+
+
+class TestAsyncSending:
+    def test_queued_messages_arrive_in_order_over_one_connection(self, app, tcp_forwarder):
+        sink = _TcpSink()
+        try:
+            tcp_forwarder.configure(enabled=True, host='127.0.0.1', port=sink.port,
+                                    protocol='tcp', framing='line')
+            with app.app_context():
+                for i in range(50):
+                    assert tcp_forwarder.send(make_audit_log(details=f'event {i}'))
+            assert tcp_forwarder.flush()
+
+            lines = sink.wait_for(50)
+            assert [line.rsplit(' ', 1)[1] for line in lines] == [str(i) for i in range(50)]
+            assert sink.connections == 1
+            assert tcp_forwarder.stats['sent'] == 50
+        finally:
+            sink.close()
+
+    def test_drop_oldest_when_queue_full(self, app, tcp_forwarder, monkeypatch):
+        import services.syslog_service as svc
+        monkeypatch.setattr(svc, 'QUEUE_SIZE', 3)
+        tcp_forwarder.configure(enabled=True, host='127.0.0.1', port=9, protocol='tcp')
+        # Hold the sender off the queue so it fills up
+        monkeypatch.setattr(tcp_forwarder, '_ensure_sender', lambda: None)
+        with app.app_context():
+            for i in range(5):
+                tcp_forwarder.send(make_audit_log(details=f'event {i}'))
+
+        assert [m.decode().split()[-1] for _, m in tcp_forwarder._queue] == ['2', '3', '4']
+        assert tcp_forwarder.stats['dropped'] == 2
+
+    def test_outage_is_replayed_from_audit_log(self, app, tcp_forwarder, monkeypatch):
+        import services.syslog_service as svc
+        from services.audit_service import AuditService
+        monkeypatch.setattr(svc, '_RECONNECT_MIN', 0.05)
+        monkeypatch.setattr(svc, '_RECONNECT_MAX', 0.05)
+
+        sink = _TcpSink()
+        port = sink.port
+        sink.close()  # nothing listening: the first write fails
+        tcp_forwarder.configure(enabled=True, host='127.0.0.1', port=port,
+                                protocol='tcp', framing='line')
+        monkeypatch.setattr(svc, 'syslog_forwarder', tcp_forwarder)
+        with app.app_context():
+            for i in range(3):
+                AuditService.log_action('syslog_replay_test', details=f'replayed {i}',
+                                        resource_type='system')
+        deadline = time.monotonic() + 5
+        while tcp_forwarder.stats['replay_backlog'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert tcp_forwarder.stats['replay_backlog'] == 3
+
+        sink = _TcpSink(port)
+        try:
+            assert tcp_forwarder.flush()
+            lines = sink.wait_for(3)
+            assert [line.rsplit(' ', 2)[1:] for line in lines] == [
+                ['replayed', str(i)] for i in range(3)
+            ]
+            assert tcp_forwarder.stats['replayed'] == 3
+        finally:
+            sink.close()
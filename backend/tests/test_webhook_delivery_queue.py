@@ -156,5 +156,110 @@ class TestProcessDeliveries:
             assert db.session.get(WebhookDelivery, did).status == 'failed'
 
 
+class TestBatchedDelivery:
+    def _endpoint(self, app, name):
+        with app.app_context():
+            ep = WebhookEndpoint(name=name, url=f'https://{name}.invalid/h',
+                                 events=json.dumps(['*']), enabled=True)
+            db.session.add(ep)
+            db.session.commit()
+            return ep.id
+
+    def _queue(self, app, endpoint_id, count):
+        with app.app_context():
+            for i in range(count):
+                db.session.add(WebhookDelivery(
+                    endpoint_id=endpoint_id, event_type='certificate.issued',
+                    payload=json.dumps({'id': i}), event_timestamp=utc_now().isoformat(),
+                    status='pending', next_attempt_at=utc_now() - timedelta(seconds=1)))
+            db.session.commit()
+
+    def test_single_update_claims_fair_share_per_endpoint(self, app, endpoint, monkeypatch):
+        from sqlalchemy import event
+        busy = self._endpoint(app, 'busy')
+        self._queue(app, busy, WebhookService._PER_ENDPOINT_BATCH + 5)
+        self._queue(app, endpoint, 1)
+        sent = []
+        monkeypatch.setattr(WebhookService, '_perform_delivery',
+                            staticmethod(lambda ep, et, body: sent.append(ep.id) or (True, 200, None)))
+        updates = []
+
+        def _count(conn, cursor, statement, params, context, executemany):
+            sql = statement.lstrip().upper()
+            if sql.startswith('UPDATE WEBHOOK_DELIVERIES') and 'RETURNING' in sql:
+                updates.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+            event.listen(engine, 'before_cursor_execute', _count)
+            try:
+                res = WebhookService.process_pending_deliveries()
+            finally:
+                event.remove(engine, 'before_cursor_execute', _count)
+
+            assert res['delivered'] == WebhookService._PER_ENDPOINT_BATCH + 1
+            assert sent.count(busy) == WebhookService._PER_ENDPOINT_BATCH
+            assert sent.count(endpoint) == 1
+            assert len(updates) == 1  # the whole batch is claimed at once
+            assert WebhookDelivery.query.filter_by(endpoint_id=busy, status='pending').count() == 5
+
+    def test_slow_endpoint_does_not_block_others(self, app, endpoint, monkeypatch):
+        import threading
+        slow = self._endpoint(app, 'slow')
+        self._queue(app, slow, 1)
+        self._queue(app, endpoint, 1)
+        fast_done = threading.Event()
+
+        def perform(ep, et, body):
+            if ep.id == slow:
+                # Only returns once the other endpoint was served concurrently
+                return (fast_done.wait(timeout=5), 200, None)
+            fast_done.set()
+            return (True, 200, None)
+
+        monkeypatch.setattr(WebhookService, '_perform_delivery', staticmethod(perform))
+        with app.app_context():
+            res = WebhookService.process_pending_deliveries()
+            assert res['delivered'] == 2
+
+    def test_endpoint_connection_reused_across_batches(self, app, endpoint, monkeypatch):
+        import utils.ssrf_protection as ssrf
+        from services.webhook_service import close_endpoint_sessions
+
+        class _Response:
+            ok = True
+            status_code = 204
+
+        sessions = []
+        monkeypatch.setattr(ssrf, 'safe_request_post',
+                            lambda url, session=None, **kw: sessions.append(session) or _Response())
+        try:
+            with app.app_context():
+                for _ in range(2):
+                    self._queue(app, endpoint, 1)
+                    assert WebhookService.process_pending_deliveries()['delivered'] == 1
+            assert len(sessions) == 2
+            assert sessions[0] is not None and sessions[0] is sessions[1]
+        finally:
+            close_endpoint_sessions()
+
+    def test_enqueue_wakes_dispatcher(self, app, endpoint, monkeypatch):
+        import threading
+        from services import webhook_dispatcher
+        drained = threading.Event()
+        monkeypatch.setattr(WebhookService, 'process_pending_deliveries',
+                            staticmethod(lambda limit=50: drained.set() or {'attempted': 0}))
+        monkeypatch.setattr(webhook_dispatcher, 'IDLE_POLL_SEC', 60)
+        with app.app_context():
+            webhook_dispatcher.start(app)
+            try:
+                drained.wait(timeout=5)
+                drained.clear()
+                WebhookService.enqueue_deliveries('certificate.issued', {'id': 1})
+                assert drained.wait(timeout=5)
+            finally:
+                webhook_dispatcher.stop()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,86 @@
+"""Display facts derived from a stored certificate/CSR PEM.
+
+``Certificate`` rows keep ``crt``/``csr`` as base64-wrapped PEM. Everything
+``Certificate.to_dict`` shows about the key, signature and fingerprints comes
+from one parse here; the model persists the result so list pages never
+re-parse PEM.
+"""
+from __future__ import annotations
+
+import base64
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import dsa, ec, rsa
+
+# Friendly names for the common signature OIDs; others use the OID name.
+SIGNATURE_NAMES = {
+    '1.2.840.113549.1.1.11': 'SHA256-RSA',
+    '1.2.840.113549.1.1.12': 'SHA384-RSA',
+    '1.2.840.113549.1.1.13': 'SHA512-RSA',
+    '1.2.840.113549.1.1.5': 'SHA1-RSA',
+    '1.2.840.10045.4.3.2': 'ECDSA-SHA256',
+    '1.2.840.10045.4.3.3': 'ECDSA-SHA384',
+    '1.2.840.10045.4.3.4': 'ECDSA-SHA512',
+}
+
+EMPTY_FACTS = {
+    'serial_hex': None,
+    'key_type': 'N/A',
+    'signature_algorithm': 'N/A',
+    'thumbprint_sha1': '',
+    'thumbprint_sha256': '',
+}
+
+
+def _load(encoded: str | None, loader):
+    if not encoded:
+        return None
+    try:
+        return loader(base64.b64decode(encoded))
+    except Exception:
+        return None
+
+
+def describe_public_key(public_key) -> str:
+    """``"RSA 2048"`` / ``"EC secp256r1"`` / ``"DSA 2048"``, else ``"Unknown"``."""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return f"RSA {public_key.key_size}"
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return f"EC {public_key.curve.name}"
+    if isinstance(public_key, dsa.DSAPublicKey):
+        return f"DSA {public_key.key_size}"
+    return "Unknown"
+
+
+def _colon_hex(digest: bytes) -> str:
+    return ':'.join(f'{b:02X}' for b in digest)
+
+
+def derive_certificate_facts(crt: str | None, csr: str | None = None) -> dict:
+    """Parse *crt* (or, without one, *csr*) once and return its display facts.
+
+    Keys match ``EMPTY_FACTS``. The key type falls back to the CSR only when
+    there is no certificate at all; an unparseable certificate yields the
+    ``EMPTY_FACTS`` placeholders, never an exception.
+    """
+    facts = dict(EMPTY_FACTS)
+    if crt:
+        cert = _load(crt, x509.load_pem_x509_certificate)
+        if cert is None:
+            return facts
+        facts['serial_hex'] = format(cert.serial_number, 'x')
+        oid = cert.signature_algorithm_oid
+        facts['signature_algorithm'] = SIGNATURE_NAMES.get(
+            oid.dotted_string, oid._name or str(oid))
+        facts['thumbprint_sha1'] = _colon_hex(cert.fingerprint(hashes.SHA1()))
+        facts['thumbprint_sha256'] = _colon_hex(cert.fingerprint(hashes.SHA256()))
+        source = cert
+    else:
+        source = _load(csr, x509.load_pem_x509_csr)
+    if source is not None:
+        try:
+            facts['key_type'] = describe_public_key(source.public_key())
+        except Exception:
+            pass
+    return facts
@@ -1,11 +1,15 @@
 """
 Pagination Helper
-Simple pagination for SQLAlchemy queries
+Simple pagination for SQLAlchemy queries, plus an opt-in keyset (cursor)
+mode for walking large result sets without COUNT(*) or OFFSET scans.
 """
 
+import base64
+import json
 import math
 from datetime import datetime
 from flask import request
+from sqlalchemy import tuple_
 
 
 def paginate(query, page=1, per_page=20):
@@ -83,3 +87,140 @@ def parse_date_filter(from_arg='date_from', to_arg='date_to'):
         except (ValueError, AttributeError):
             pass
     return date_from, date_to
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or was issued for a different sort."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        try:
+            return datetime.fromisoformat(value['dt'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor('Invalid cursor value') from e
+    return value
+
+
+def encode_cursor(sort_key: str, sort_value, row_id: int) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    payload = json.dumps(
+        {'s': sort_key, 'v': _encode_value(sort_value), 'i': row_id},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_key: str):
+    """Return ``(sort_value, row_id)``; raises InvalidCursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, row_id = payload['v'], int(payload['i'])
+        issued_for = payload['s']
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if issued_for != sort_key:
+        raise InvalidCursor('Cursor was issued for a different sort order')
+    return _decode_value(value), row_id
+
+
+def estimate_count(query):
+    """``(count, is_estimate)``: planner row estimate on PostgreSQL, else COUNT(*)."""
+    session = query.session
+    dialect = session.get_bind().dialect
+    if dialect.name != 'postgresql':
+        return query.count(), False
+    # Expand IN lists into one placeholder per value: the driver never sees
+    # SQLAlchemy's __[POSTCOMPILE_...] markers
+    compiled = query.statement.compile(
+        dialect=dialect, compile_kwargs={'render_postcompile': True}
+    )
+    plan = session.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows']), True
+
+
+def _nullable(expr) -> bool:
+    """Whether *expr* may be NULL; only a NOT NULL mapped column is known not to be."""
+    return getattr(getattr(expr, 'expression', expr), 'nullable', True)
+
+
+def keyset_paginate(query, sort_expr, id_column, *, sort_key, descending=False,
+                    cursor=None, per_page=20, total=None, nullable=None):
+    """
+    Keyset-paginate *query* ordered by ``(sort_expr, id_column)``.
+
+    Each page is a row-value range ``(sort, id) > (:sort, :id)`` (``<`` when
+    descending) ordered by ``sort, id``, which an index on the sort column
+    (plus the id) answers without scanning or sorting the rows before the
+    cursor. NULL sort values always come last, in both directions: they are
+    walked afterwards as a second range ``sort IS NULL`` ordered by id.
+    ``nullable`` defaults to the column's own definition.
+
+    ``cursor`` is the ``next_cursor`` of the previous page (None/empty for
+    the first page) and must have been issued for the same ``sort_key``.
+    ``total`` may be ``'exact'`` or ``'estimate'``; by default no count is run.
+
+    Returns:
+        dict: {items, meta}
+    """
+    per_page = min(max(1, per_page), 100)
+    if nullable is None:
+        nullable = _nullable(sort_expr)
+    counted = None
+    if total == 'exact':
+        counted = (query.count(), False)
+    elif total == 'estimate':
+        counted = estimate_count(query)
+
+    after = (lambda col, value: col < value) if descending else (lambda col, value: col > value)
+    order = (lambda col: col.desc()) if descending else (lambda col: col.asc())
+    query = query.order_by(None)
+
+    value, last_id = decode_cursor(cursor, sort_key) if cursor else (None, None)
+    rows = []
+    if not cursor or value is not None:
+        # Non-NULL sort values: one index range
+        ranged = query.filter(sort_expr.isnot(None)) if nullable else query
+        if cursor:
+            ranged = ranged.filter(after(tuple_(sort_expr, id_column), tuple_(value, last_id)))
+        rows = (
+            ranged.order_by(order(sort_expr), order(id_column))
+            .add_columns(sort_expr)
+            .limit(per_page + 1)
+            .all()
+        )
+        last_id = None
+    if nullable and len(rows) <= per_page:
+        # Then the NULLs, by id
+        nulls = query.filter(sort_expr.is_(None))
+        if last_id is not None:
+            nulls = nulls.filter(after(id_column, last_id))
+        rows += (
+            nulls.order_by(order(id_column))
+            .add_columns(sort_expr)
+            .limit(per_page + 1 - len(rows))
+            .all()
+        )
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    items = [row[0] for row in rows]
+
+    meta = {'per_page': per_page, 'has_next': has_next, 'next_cursor': None}
+    if has_next:
+        last_item, last_value = rows[-1][0], rows[-1][1]
+        meta['next_cursor'] = encode_cursor(sort_key, last_value, last_item.id)
+    if counted is not None:
+        meta['total'], meta['total_is_estimate'] = counted
+    return {'items': items, 'meta': meta}
@@ -18,7 +18,6 @@ from urllib.parse import urlsplit, urlunsplit
 
 from flask import current_app, request as flask_request
 
-from models import SystemConfig
 from utils.acme_public_url import is_valid_public_vhost
 
 logger = logging.getLogger(__name__)
@@ -62,9 +61,10 @@ class ParsedPublicUrl:
 
 
 def _config_value(key: str, default: str = '') -> str:
+    from services import settings_cache
     try:
-        row = SystemConfig.query.filter_by(key=key).first()
-        return (row.value or '').strip() if row else default
+        value = settings_cache.get(key)
+        return value.strip() if value is not None else default
     except Exception:
         return default
 
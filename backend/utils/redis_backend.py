@@ -0,0 +1,89 @@
+"""
+redis_backend — the Redis connection and backend selection shared by the
+multi-worker stores and caches.
+
+The ACME nonce store, rate-limit buckets, settings and CRL caches, the cache
+event relay and the scheduler lease all coordinate workers through the Redis
+server at ``REDIS_URL``, and all fall back to per-process state when it is
+unset or the redis library is missing. The nonce and rate-limit stores
+additionally pick a backend by name from the environment, built lazily and
+replaceable at runtime (:class:`BackendSlot`).
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Short, so an unreachable server delays a request by at most this much
+SOCKET_TIMEOUT_SEC = 1
+
+_lock = threading.Lock()
+_shared: Dict[str, Any] = {}  # REDIS_URL -> client (None: redis not installed)
+
+T = TypeVar('T')
+
+
+def redis_client(socket_timeout: Optional[float] = SOCKET_TIMEOUT_SEC):
+    """A new client for ``REDIS_URL``, or None when Redis cannot be used.
+
+    Pass ``socket_timeout=None`` for a connection that blocks on reads
+    (pub/sub listeners).
+    """
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.debug("redis library not installed, REDIS_URL ignored: state stays per process")
+        return None
+    return redis.from_url(redis_url, socket_timeout=socket_timeout)
+
+
+def shared_redis():
+    """The process-wide client for ``REDIS_URL`` (or None), created on first use."""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    with _lock:
+        if redis_url not in _shared:
+            _shared[redis_url] = redis_client()
+        return _shared[redis_url]
+
+
+class BackendSlot(Generic[T]):
+    """The active backend of a store, built lazily from its configured name.
+
+    *build* turns a backend name (``auto``, ``redis``, ``memory``, ...) into
+    an instance with a ``name`` attribute; *configured* returns the name set
+    in the environment.
+    """
+
+    def __init__(self, label: str, build: Callable[[str], T], configured: Callable[[], str]):
+        self._label = label
+        self._build = build
+        self._configured = configured
+        self._lock = threading.Lock()
+        self._backend: Optional[T] = None
+
+    def get(self) -> T:
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._build(self._configured())
+                logger.info(f"{self._label} backend: {self._backend.name}")
+            return self._backend
+
+    def configure(self, backend: str) -> T:
+        """Replace the active backend (tests, runtime reconfiguration)."""
+        instance = self._build(backend.strip().lower())
+        with self._lock:
+            self._backend = instance
+        return instance
+
+    def reset(self) -> None:
+        """Forget the active backend; the next call rebuilds it from the environment."""
+        with self._lock:
+            self._backend = None
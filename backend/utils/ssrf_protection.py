@@ -328,7 +328,7 @@ def _resolve_and_validate(url: str, allow_loopback: bool = False) -> tuple:
     return host, chosen
 
 
-def safe_request_post(url, allow_loopback: bool = False, **kwargs):
+def safe_request_post(url, allow_loopback: bool = False, session=None, **kwargs):
     """requests.post() with DNS-rebinding protection.
 
     Resolves the URL hostname once, validates it against the cloud-metadata
@@ -340,12 +340,16 @@ def safe_request_post(url, allow_loopback: bool = False, **kwargs):
 
     allow_loopback=True permits a colocated upstream on 127.0.0.1 (ACME
     Pebble/step-ca); cloud metadata stays blocked. Default keeps loopback denied.
+
+    session: optional requests.Session whose keep-alive connections may be
+    reused. A pooled connection was itself opened under a pin, so it only
+    ever leads to an address that passed validation; new ones are pinned here.
     """
     import requests
     kwargs.setdefault('timeout', 30)  # never hang forever on a stuck/slow upstream
     host, ips = _resolve_and_validate(url, allow_loopback)
     with pin_host(host, ips):
-        return requests.post(url, **kwargs)
+        return (session or requests).post(url, **kwargs)
 
 
 def safe_request_get(url, allow_loopback: bool = False, **kwargs):
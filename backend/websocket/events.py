@@ -222,6 +222,7 @@ def init_websocket(app) -> SocketIO:
         engineio_logger=app.config.get("ENGINEIO_LOGGER", False),
         ping_timeout=int(app.config.get("SOCKETIO_PING_TIMEOUT", 60)),
         ping_interval=int(app.config.get("SOCKETIO_PING_INTERVAL", 25)),
+        transports=app.config.get("SOCKETIO_TRANSPORTS"),
     )
 
     presence_url = app.config.get(